@@ -16,3 +16,21 @@ accesslog = "-"
 # Using '-' for the error log file makes gunicorn log errors to stderr
 errorlog = "-"
 loglevel = "info"
+
+
+def post_worker_init(worker):
+    """Load the CloudFront key pairs once the application is loaded by a worker.
+
+    The worker fails to boot, which stops gunicorn, if urls should be signed and the key of
+    an active key pair is missing or invalid.
+
+    Parameters
+    ----------
+    worker : gunicorn.workers.base.Worker
+        The worker that loaded the application
+
+    """
+    # Django is only set up once the worker loaded the application
+    from marsha.core.utils.cloudfront_utils import check_private_keys
+
+    check_private_keys()
@@ -7,6 +7,12 @@ import * as React from 'react';
 const makeFormData = jest.fn().mockReturnValue('form data body');
 jest.doMock('../../utils/makeFormData/makeFormData', () => ({ makeFormData }));
 
+const uploadInParts = jest.fn();
+jest.doMock('../../utils/uploadInParts/uploadInParts', () => ({
+  MULTIPART_UPLOAD_THRESHOLD: 100,
+  uploadInParts,
+}));
+
 jest.doMock('react-router-dom', () => ({
   Redirect: () => {},
 }));
@@ -22,7 +28,10 @@ describe('VideoForm', () => {
     title: '',
   } as Video;
 
-  afterEach(fetchMock.restore);
+  afterEach(() => {
+    fetchMock.restore();
+    jest.clearAllMocks();
+  });
 
   it('renders the form by default', () => {
     fetchMock.mock('/api/videos/ab42/upload-policy/', {});
@@ -84,6 +93,41 @@ describe('VideoForm', () => {
     ]);
   });
 
+  it('uploads large files in parts', async () => {
+    fetchMock.mock('/api/videos/ab42/upload-policy/', JSON.stringify({}));
+    uploadInParts.mockResolvedValue(undefined);
+
+    const wrapper = shallow(<VideoForm jwt={'some_token'} video={video} />);
+    const componentInstance = wrapper.instance() as VideoForm;
+    await flushAllPromises();
+
+    const file = { size: 101, stub: 'file', type: 'video/mp4' } as any;
+    componentInstance.setState({ file });
+    await componentInstance.upload();
+
+    expect(uploadInParts).toHaveBeenCalledWith('some_token', 'ab42', file);
+    expect(makeFormData).not.toHaveBeenCalled();
+    expect(wrapper.name()).toEqual('Redirect');
+    expect(wrapper.prop('to')).toEqual('/player');
+  });
+
+  it('redirects to /errors/upload when it fails to upload the parts', async () => {
+    fetchMock.mock('/api/videos/ab42/upload-policy/', JSON.stringify({}));
+    uploadInParts.mockRejectedValue(new Error('failed to upload a part'));
+
+    const wrapper = shallow(<VideoForm jwt={'some_token'} video={video} />);
+    const componentInstance = wrapper.instance() as VideoForm;
+    await flushAllPromises();
+
+    componentInstance.setState({
+      file: { size: 101, stub: 'file', type: 'video/mp4' } as any,
+    });
+    await componentInstance.upload();
+
+    expect(wrapper.name()).toEqual('Redirect');
+    expect(wrapper.prop('to')).toEqual('/errors/upload');
+  });
+
   it('redirects to /errors/policy when it fails to get the policy', async () => {
     fetchMock.mock('/api/videos/ab42/upload-policy/', {
       throws: 'invalid policy',
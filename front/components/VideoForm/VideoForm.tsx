@@ -7,6 +7,10 @@ import { API_ENDPOINT } from '../../settings';
 import { AWSPolicy } from '../../types/AWSPolicy';
 import { Video } from '../../types/Video';
 import { makeFormData } from '../../utils/makeFormData/makeFormData';
+import {
+  MULTIPART_UPLOAD_THRESHOLD,
+  uploadInParts,
+} from '../../utils/uploadInParts/uploadInParts';
 import { Maybe } from '../../utils/types';
 import { ROUTE as ERROR_ROUTE } from '../ErrorComponent/ErrorComponent';
 import { IframeHeading } from '../Headings/Headings';
@@ -85,11 +89,22 @@ export class VideoForm extends React.Component<VideoFormProps, VideoFormState> {
   }
 
   async upload() {
-    const { jwt } = this.props;
+    const { jwt, video } = this.props;
     const { file, policy } = this.state;
 
     this.setState({ status: 'uploading' });
 
+    // Large files are sent in parts, concurrently, and can be resumed
+    if (file!.size > MULTIPART_UPLOAD_THRESHOLD) {
+      try {
+        await uploadInParts(jwt, video.id, file!);
+        this.setState({ status: 'success' });
+      } catch (error) {
+        this.setState({ status: 'upload_error' });
+      }
+      return;
+    }
+
     // Use FormData to meet the requirement of a multi-part POST request for s3
     // NB: order of keys is important here, which is why we do not iterate over an object
     const formData = makeFormData(
@@ -5,7 +5,7 @@ import * as React from 'react';
 import videojs from 'video.js';
 
 import { Video } from '../../types/Video';
-import { VideoJsPlayer } from './VideoJsPlayer';
+import { forwardQueryString, VideoJsPlayer } from './VideoJsPlayer';
 
 describe('VideoJsPlayer', () => {
   const video = {
@@ -32,6 +32,47 @@ describe('VideoJsPlayer', () => {
     );
   });
 
+  it('renders the HLS manifest before the MP4 sources', () => {
+    const wrapper = shallow(
+      <VideoJsPlayer
+        video={{
+          ...video,
+          urls: {
+            ...video.urls,
+            manifests: { hls: 'https://example.com/hls/1533686400.m3u8' },
+          },
+        }}
+      />,
+    );
+
+    const html = wrapper.html();
+    expect(html).toContain(
+      '<source src="https://example.com/hls/1533686400.m3u8" type="application/x-mpegURL"/>',
+    );
+    expect(html.indexOf('application/x-mpegURL')).toBeLessThan(
+      html.indexOf('video/mp4'),
+    );
+  });
+
+  it('forwards the query string of the manifest to its playlists and segments', () => {
+    (videojs as any).Hls = { xhr: {} };
+    forwardQueryString('https://example.com/v/hls/1533686400.m3u8?Policy=a');
+    const { beforeRequest } = (videojs as any).Hls.xhr;
+
+    expect(
+      beforeRequest({
+        uri: 'https://example.com/v/hls/1533686400_144_00001.ts',
+      }),
+    ).toEqual({
+      uri: 'https://example.com/v/hls/1533686400_144_00001.ts?Policy=a',
+    });
+    // Other files are left untouched
+    expect(beforeRequest({ uri: 'https://other.com/file.ts' })).toEqual({
+      uri: 'https://other.com/file.ts',
+    });
+    delete (videojs as any).Hls;
+  });
+
   it('starts up the player when it mounts', () => {
     mount(<VideoJsPlayer video={video} />); // Mount so videojs is called with an element
     expect(videojs).toHaveBeenCalledWith(expect.any(Element), { video });
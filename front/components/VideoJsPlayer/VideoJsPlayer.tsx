@@ -24,6 +24,28 @@ const VideoJsPlayerContainer = styled.div`
 
 export const ROUTE = () => '/player';
 
+/**
+ * Players don't forward the query string of a manifest to the playlists and segments it lists.
+ * When it carries a CloudFront signed policy, append it to the requests for these files.
+ * @param manifest The url of the HLS master manifest.
+ */
+export const forwardQueryString = (manifest: string) => {
+  const [url, queryString] = manifest.split('?');
+  // Hls is the http-streaming tech bundled with video.js, missing from its types
+  const hls = (videojs as any).Hls;
+  if (!queryString || !hls) {
+    return;
+  }
+
+  const directory = url.substring(0, url.lastIndexOf('/') + 1);
+  hls.xhr.beforeRequest = (options: { uri: string }) => {
+    if (options.uri.startsWith(directory) && !options.uri.includes('?')) {
+      options.uri = `${options.uri}?${queryString}`;
+    }
+    return options;
+  };
+};
+
 export class VideoJsPlayer extends React.Component<
   VideoJsPlayerProps,
   VideoJsPlayerState
@@ -31,6 +53,11 @@ export class VideoJsPlayer extends React.Component<
   videoNodeRef: Nullable<HTMLVideoElement> = null;
 
   componentDidMount() {
+    const { manifests } = this.props.video.urls;
+    if (manifests && manifests.hls) {
+      forwardQueryString(manifests.hls);
+    }
+
     // Instantiate Video.js and keep the instance in state
     this.setState({
       player: videojs(this.videoNodeRef, this.props),
@@ -57,6 +84,13 @@ export class VideoJsPlayer extends React.Component<
             className="video-js"
             controls={true}
           >
+            {video.urls.manifests && video.urls.manifests.hls && (
+              <source
+                src={video.urls.manifests.hls}
+                type="application/x-mpegURL"
+              />
+            )}
+            {/* Progressive MP4 files are a fallback for browsers without adaptive streaming */}
             {(Object.keys(video.urls.mp4) as videoSize[]).map(size => (
               <source
                 src={video.urls.mp4[size]}
@@ -0,0 +1,16 @@
+export interface MultipartUpload {
+  bucket: string;
+  key: string;
+  max_file_size: number;
+  part_count: number;
+  part_size: number;
+  s3_endpoint: string;
+  stamp: string;
+  upload_id: string;
+}
+
+export interface UploadedPart {
+  etag: string;
+  part_number: number;
+  size: number;
+}
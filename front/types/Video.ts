@@ -5,8 +5,11 @@ export interface Video {
   id: string;
   status: string;
   title: string;
+  // Only the resolutions produced for the video, or requested from the API, are present
   urls: {
-    mp4: { [key in videoSize]: string };
-    thumbnails: { [key in videoSize]: string };
+    mp4: { [key in videoSize]?: string };
+    thumbnails: { [key in videoSize]?: string };
+    // Master manifests for adaptive streaming, when the video was transcoded for it
+    manifests?: { hls?: string };
   };
 }
@@ -0,0 +1,129 @@
+import fetchMock from 'fetch-mock';
+
+import { uploadInParts } from './uploadInParts';
+
+describe('uploadInParts', () => {
+  // A 10 bytes file is uploaded in 3 parts of 4, 4 and 2 bytes
+  const file = new File(['0123456789'], 'video.mp4', { type: 'video/mp4' });
+  const storageKey = `multipartUpload:ab42:video.mp4:10:${file.lastModified}`;
+  const upload = {
+    bucket: 'good-ol-bucket',
+    key: 'playlist/ab42/videos/1533686400',
+    max_file_size: 1000,
+    part_count: 3,
+    part_size: 4,
+    s3_endpoint: 's3.aws.example.com',
+    stamp: '1533686400',
+    upload_id: 'upload-1',
+  };
+  const urls = {
+    1: 'https://s3.aws.example.com/part1',
+    2: 'https://s3.aws.example.com/part2',
+    3: 'https://s3.aws.example.com/part3',
+  };
+
+  const lastBody = (url: string) =>
+    JSON.parse(fetchMock.lastOptions(url).body as string);
+
+  afterEach(() => {
+    fetchMock.restore();
+    localStorage.clear();
+  });
+
+  it('uploads all the parts of a file and completes the upload', async () => {
+    fetchMock.post(
+      '/api/videos/ab42/multipart-upload/',
+      JSON.stringify(upload),
+    );
+    fetchMock.post(
+      '/api/videos/ab42/multipart-upload/parts/',
+      JSON.stringify({ urls }),
+    );
+    fetchMock.put('begin:https://s3.aws.example.com/', 200);
+    fetchMock.post('/api/videos/ab42/multipart-upload/complete/', {});
+
+    await uploadInParts('some_token', 'ab42', file, 2);
+
+    expect(lastBody('/api/videos/ab42/multipart-upload/')).toEqual({
+      content_type: 'video/mp4',
+      size: 10,
+    });
+    expect(lastBody('/api/videos/ab42/multipart-upload/parts/')).toEqual({
+      part_numbers: [1, 2, 3],
+      stamp: '1533686400',
+      upload_id: 'upload-1',
+    });
+    expect(
+      fetchMock
+        .calls('begin:https://s3.aws.example.com/')
+        .map((call: any) => [call[0], call[1].body.size])
+        .sort(),
+    ).toEqual([
+      ['https://s3.aws.example.com/part1', 4],
+      ['https://s3.aws.example.com/part2', 4],
+      ['https://s3.aws.example.com/part3', 2],
+    ]);
+    expect(lastBody('/api/videos/ab42/multipart-upload/complete/')).toEqual({
+      stamp: '1533686400',
+      upload_id: 'upload-1',
+    });
+    expect(localStorage.getItem(storageKey)).toBeNull();
+  });
+
+  it('resumes an interrupted upload without sending complete parts', async () => {
+    localStorage.setItem(storageKey, JSON.stringify(upload));
+    fetchMock.get(
+      '/api/videos/ab42/multipart-upload/parts/' +
+        '?stamp=1533686400&upload_id=upload-1',
+      JSON.stringify({
+        parts: [
+          { etag: '"etag1"', part_number: 1, size: 4 },
+          { etag: '"etag2"', part_number: 2, size: 1 },
+        ],
+      }),
+    );
+    fetchMock.post(
+      '/api/videos/ab42/multipart-upload/parts/',
+      JSON.stringify({ urls: { 2: urls[2], 3: urls[3] } }),
+    );
+    fetchMock.put('begin:https://s3.aws.example.com/', 200);
+    fetchMock.post('/api/videos/ab42/multipart-upload/complete/', {});
+
+    await uploadInParts('some_token', 'ab42', file);
+
+    expect(
+      lastBody('/api/videos/ab42/multipart-upload/parts/').part_numbers,
+    ).toEqual([2, 3]);
+    expect(fetchMock.calls('begin:https://s3.aws.example.com/').length).toEqual(
+      2,
+    );
+    expect(fetchMock.called('/api/videos/ab42/multipart-upload/')).toBeFalsy();
+  });
+
+  it('keeps the upload to resume it when a part fails', async () => {
+    fetchMock.post(
+      '/api/videos/ab42/multipart-upload/',
+      JSON.stringify(upload),
+    );
+    fetchMock.post(
+      '/api/videos/ab42/multipart-upload/parts/',
+      JSON.stringify({ urls }),
+    );
+    fetchMock.put('begin:https://s3.aws.example.com/', 500);
+
+    // Send one part at a time so that the upload stops at the first one
+    await expect(
+      uploadInParts('some_token', 'ab42', file, 1),
+    ).rejects.toThrow();
+
+    // The part was tried 3 times before giving up
+    expect(fetchMock.calls('https://s3.aws.example.com/part1').length).toEqual(
+      3,
+    );
+    expect(fetchMock.called('https://s3.aws.example.com/part2')).toBeFalsy();
+    expect(
+      fetchMock.called('/api/videos/ab42/multipart-upload/complete/'),
+    ).toBeFalsy();
+    expect(JSON.parse(localStorage.getItem(storageKey)!)).toEqual(upload);
+  });
+});
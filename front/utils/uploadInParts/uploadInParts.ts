@@ -0,0 +1,163 @@
+import { API_ENDPOINT } from '../../settings';
+import { MultipartUpload, UploadedPart } from '../../types/MultipartUpload';
+
+// Files larger than this are uploaded in parts rather than in one POST request
+export const MULTIPART_UPLOAD_THRESHOLD = 100 * 1024 * 1024; // 100MB
+// Number of parts sent to S3 at the same time
+export const UPLOAD_CONCURRENCY = 4;
+// Number of part urls presigned by each request to the API
+const PART_URLS_BATCH_SIZE = 100;
+// Number of attempts to send a part before giving up
+const PART_ATTEMPTS = 3;
+
+// Uploads are remembered until they are completed so that they can be resumed
+const getStorageKey = (videoId: string, file: File) =>
+  `multipartUpload:${videoId}:${file.name}:${file.size}:${file.lastModified}`;
+
+const apiRequest = async (
+  jwt: string,
+  videoId: string,
+  path: string,
+  method: 'GET' | 'POST',
+  body?: object,
+) => {
+  const response = await fetch(
+    `${API_ENDPOINT}/videos/${videoId}/multipart-upload/${path}`,
+    {
+      body: body && JSON.stringify(body),
+      headers: {
+        Authorization: `Bearer ${jwt}`,
+        'Content-Type': 'application/json',
+      },
+      method,
+    },
+  );
+  if (!response.ok) {
+    throw new Error(`Multipart upload request failed: ${path}`);
+  }
+  return response;
+};
+
+// Get the upload started for this file earlier or initiate a new one
+const getUpload = async (
+  jwt: string,
+  videoId: string,
+  file: File,
+): Promise<[MultipartUpload, UploadedPart[]]> => {
+  const storageKey = getStorageKey(videoId, file);
+  const stored = localStorage.getItem(storageKey);
+
+  if (stored) {
+    const storedUpload: MultipartUpload = JSON.parse(stored);
+    try {
+      const uploadId = encodeURIComponent(storedUpload.upload_id);
+      const query = `stamp=${storedUpload.stamp}&upload_id=${uploadId}`;
+      const partsResponse = await apiRequest(
+        jwt,
+        videoId,
+        `parts/?${query}`,
+        'GET',
+      );
+      const { parts } = await partsResponse.json();
+      return [storedUpload, parts];
+    } catch (error) {
+      // The upload expired or was aborted: start over
+      localStorage.removeItem(storageKey);
+    }
+  }
+
+  const response = await apiRequest(jwt, videoId, '', 'POST', {
+    content_type: file.type,
+    size: file.size,
+  });
+  const upload: MultipartUpload = await response.json();
+  localStorage.setItem(storageKey, JSON.stringify(upload));
+  return [upload, []];
+};
+
+const sendPart = async (url: string, body: Blob) => {
+  for (let attempt = 1; ; attempt++) {
+    try {
+      const response = await fetch(url, { body, method: 'PUT' });
+      if (response.ok) {
+        return;
+      }
+      throw new Error(`Failed to upload a part: ${response.status}`);
+    } catch (error) {
+      if (attempt >= PART_ATTEMPTS) {
+        throw error;
+      }
+    }
+  }
+};
+
+/**
+ * Upload a file to S3 in parts sent concurrently, resuming the upload of the
+ * same file if it was interrupted. Parts already uploaded with the expected
+ * size are not sent again.
+ * @param jwt The token of the video.
+ * @param videoId The id of the video for which the file is uploaded.
+ * @param file The video file.
+ * @param concurrency The number of parts sent at the same time.
+ */
+export const uploadInParts = async (
+  jwt: string,
+  videoId: string,
+  file: File,
+  concurrency = UPLOAD_CONCURRENCY,
+) => {
+  const [upload, uploadedParts] = await getUpload(jwt, videoId, file);
+  const partCount = upload.part_count;
+  const stamp = upload.stamp;
+  const uploadId = upload.upload_id;
+
+  const partSize = (partNumber: number) =>
+    Math.min(
+      upload.part_size,
+      file.size - (partNumber - 1) * upload.part_size,
+    );
+  const uploaded = new Set(
+    uploadedParts
+      .filter(part => part.size === partSize(part.part_number))
+      .map(part => part.part_number),
+  );
+  const pendingParts: number[] = [];
+  for (let partNumber = 1; partNumber <= partCount; partNumber++) {
+    if (!uploaded.has(partNumber)) {
+      pendingParts.push(partNumber);
+    }
+  }
+
+  // Presign the urls of all the pending parts with a few requests
+  const urls: { [partNumber: string]: string } = {};
+  for (let i = 0; i < pendingParts.length; i += PART_URLS_BATCH_SIZE) {
+    const response = await apiRequest(jwt, videoId, 'parts/', 'POST', {
+      part_numbers: pendingParts.slice(i, i + PART_URLS_BATCH_SIZE),
+      stamp,
+      upload_id: uploadId,
+    });
+    Object.assign(urls, (await response.json()).urls);
+  }
+
+  // Each worker sends the next pending part until there is none left
+  const worker = async () => {
+    let partNumber = pendingParts.shift();
+    while (partNumber !== undefined) {
+      const start = (partNumber - 1) * upload.part_size;
+      await sendPart(
+        urls[partNumber],
+        file.slice(start, start + partSize(partNumber)),
+      );
+      partNumber = pendingParts.shift();
+    }
+  };
+  await Promise.all(
+    Array.from({ length: Math.min(concurrency, pendingParts.length) }, worker),
+  );
+
+  await apiRequest(jwt, videoId, 'complete/', 'POST', {
+    stamp,
+    upload_id: uploadId,
+  });
+  localStorage.removeItem(getStorageKey(videoId, file));
+};
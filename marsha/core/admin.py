@@ -1,25 +1,43 @@
 """Admin of the ``core`` app of the Marsha project."""
+import io
 
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.contrib.admin.utils import unquote
 from django.contrib.auth.admin import UserAdmin as DefaultUserAdmin
+from django.core.exceptions import NON_FIELD_ERRORS, PermissionDenied
+from django.forms.models import BaseInlineFormSet
+from django.http import HttpResponseRedirect
+from django.template.response import TemplateResponse
+from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
 from safedelete.admin import SafeDeleteAdmin
 
+from marsha.core.defaults import PROVISIONING_ADMIN_MAX_ROWS
 from marsha.core.models import (
     AudioTrack,
     ConsumerSite,
     ConsumerSiteAccess,
     ConsumerSiteOrganization,
+    DeletionJob,
     Organization,
     OrganizationAccess,
     Playlist,
     PlaylistAccess,
+    ProvisioningJob,
     SignTrack,
     SubtitleTrack,
     User,
     Video,
 )
+from marsha.core.utils.deletion_job_utils import schedule_deletion
+from marsha.core.utils.provisioning_utils import (
+    MANIFEST_FORMATS,
+    provision_lti_resources,
+    read_manifest,
+)
 
 
 class MarshaAdminSite(admin.AdminSite):
@@ -38,7 +56,230 @@ class BaseModelAdmin(SafeDeleteAdmin):
     pass
 
 
-class UserOrganizationsInline(admin.TabularInline):
+class NonDeletedUniqueInlineFormSet(BaseInlineFormSet):
+    """Validate the ``NonDeletedUniqueIndex`` of all the objects of an inline at once.
+
+    Each form validates its object against the database, but not against the other objects
+    of the inline: two new rows with the same values would only fail on save.
+
+    """
+
+    def validate_unique(self):
+        """Add an error to the forms whose object conflicts with another object."""
+        super().validate_unique()
+
+        forms_to_delete = self.deleted_forms
+        valid_forms = [
+            form
+            for form in self.forms
+            if form.is_valid() and form not in forms_to_delete
+        ]
+        if not valid_forms:
+            return
+
+        # pylint: disable=protected-access
+        errors = self.model.get_non_deleted_unique_errors(
+            [form.instance for form in valid_forms],
+            exclude=valid_forms[0]._get_validation_exclusions(),
+        )
+        for form, form_errors in zip(valid_forms, errors):
+            for field, field_errors in form_errors.items():
+                form.add_error(
+                    None if field == NON_FIELD_ERRORS else field, field_errors
+                )
+
+
+class BaseTabularInline(admin.TabularInline):
+    """Base for all our tabular inlines."""
+
+    formset = NonDeletedUniqueInlineFormSet
+
+
+class JobAdminMixin:
+    """Show the progress of the jobs run in the background and resume the failed ones.
+
+    Jobs are only created by the admin actions that schedule them and updated by the worker.
+
+    """
+
+    list_filter = ("state",)
+    actions = ["resume"]
+
+    # pylint: disable=unused-argument
+    def has_add_permission(self, request):
+        """Jobs are created by the actions that schedule them, not from their admin."""
+        return False
+
+    def progress_display(self, obj):
+        """Display the progress of a job as a percentage."""
+        return "{:d}%".format(obj.progress)
+
+    progress_display.short_description = _("progress")
+
+    def resume(self, request, queryset):
+        """Set the failed jobs back to pending so that a worker resumes them.
+
+        Parameters
+        ----------
+        request : Type[django.http.request.HttpRequest]
+            The request on the admin changelist
+        queryset : Type[django.db.models.query.QuerySet]
+            The selected jobs
+
+        """
+        count = queryset.filter(state=self.model.FAILED).update(
+            state=self.model.PENDING, error=""
+        )
+        self.message_user(
+            request,
+            _("{count:d} {name!s}(s) resumed.").format(
+                count=count, name=self.model._meta.verbose_name
+            ),
+            messages.SUCCESS,
+        )
+
+    resume.short_description = _("Resume selected failed jobs")
+
+
+class DeletionJobMixin:
+    """Delete objects in the background with deletion jobs instead of during the request.
+
+    The deletion page and the action replacing the deletion of the selected objects only
+    list the objects to delete: collecting their whole cascade would already take too long.
+
+    """
+
+    def get_actions(self, request):
+        """Replace the deletion of the selected objects by the scheduling of deletion jobs."""
+        actions = super().get_actions(request)
+        actions.pop("delete_selected", None)
+        return actions
+
+    def render_deletion_confirmation(
+        self, request, objects, action=None, extra_context=None
+    ):
+        """Render the page asking to confirm the deletion of objects in the background."""
+        context = dict(
+            self.admin_site.each_context(request),
+            title=_("Are you sure?"),
+            opts=self.model._meta,
+            objects=objects,
+            action=action,
+            action_checkbox_name=helpers.ACTION_CHECKBOX_NAME,
+        )
+        context.update(extra_context or {})
+        return TemplateResponse(
+            request, "admin/core/deletion_job_confirmation.html", context
+        )
+
+    def schedule_deletions(self, request, objects):
+        """Schedule the deletion of objects and report it to the user.
+
+        Returns
+        -------
+        List[DeletionJob]
+            The jobs deleting the objects, created or already scheduled
+
+        """
+        jobs = []
+        for obj in objects:
+            job, created = schedule_deletion(obj)
+            jobs.append(job)
+            if not created:
+                self.message_user(
+                    request,
+                    _('The deletion of "{!s}" was already scheduled.').format(obj),
+                    messages.WARNING,
+                )
+        self.message_user(
+            request,
+            _("{:d} deletion job(s) scheduled.").format(len(jobs)),
+            messages.SUCCESS,
+        )
+        return jobs
+
+    def delete_view(self, request, object_id, extra_context=None):
+        """Schedule the deletion of an object after confirmation.
+
+        Parameters
+        ----------
+        request : Type[django.http.request.HttpRequest]
+            The request on the admin deletion page
+        object_id : string
+            The primary key of the object to delete, quoted
+        extra_context : dictionary
+            Added to the context of the confirmation page
+
+        Returns
+        -------
+        Type[django.http.response.HttpResponse]
+            The confirmation page or a redirection to the deletion job scheduled
+
+        Raises
+        ------
+        PermissionDenied
+            If the user is not allowed to delete the object
+
+        """
+        opts = self.model._meta
+        obj = self.get_object(request, unquote(object_id))
+        if obj is None:
+            return self._get_obj_does_not_exist_redirect(request, opts, object_id)
+        if not self.has_delete_permission(request, obj):
+            raise PermissionDenied
+
+        if request.method != "POST":
+            return self.render_deletion_confirmation(
+                request, [obj], extra_context=extra_context
+            )
+
+        [job] = self.schedule_deletions(request, [obj])
+        return HttpResponseRedirect(
+            reverse(
+                "admin:core_deletionjob_change",
+                args=[job.pk],
+                current_app=self.admin_site.name,
+            )
+        )
+
+    def schedule_deletion(self, request, queryset):
+        """Schedule the deletion of the selected objects after confirmation.
+
+        Parameters
+        ----------
+        request : Type[django.http.request.HttpRequest]
+            The request on the admin changelist
+        queryset : Type[django.db.models.query.QuerySet]
+            The selected objects
+
+        Returns
+        -------
+        Type[django.template.response.TemplateResponse] or `None`
+            The confirmation page or `None` to go back to the changelist
+
+        Raises
+        ------
+        PermissionDenied
+            If the user is not allowed to delete objects
+
+        """
+        if not self.has_delete_permission(request):
+            raise PermissionDenied
+
+        objects = list(queryset)
+        if request.POST.get("post"):
+            self.schedule_deletions(request, objects)
+            return None
+        return self.render_deletion_confirmation(
+            request, objects, action="schedule_deletion"
+        )
+
+    schedule_deletion.short_description = _(
+        "Delete selected %(verbose_name_plural)s in the background"
+    )
+
+
+class UserOrganizationsInline(BaseTabularInline):
     """Inline to display organizations to which a user has been granted access."""
 
     model = OrganizationAccess
@@ -53,7 +294,7 @@ class UserAdmin(DefaultUserAdmin):
     inlines = DefaultUserAdmin.inlines + [UserOrganizationsInline]
 
 
-class ConsumerSiteUsersInline(admin.TabularInline):
+class ConsumerSiteUsersInline(BaseTabularInline):
     """Inline to display users who have been granted access to a consumer site."""
 
     model = ConsumerSiteAccess
@@ -61,7 +302,7 @@ class ConsumerSiteUsersInline(admin.TabularInline):
     verbose_name_plural = _("users")
 
 
-class ConsumerSiteOrganizationsInline(admin.TabularInline):
+class ConsumerSiteOrganizationsInline(BaseTabularInline):
     """Inline to display organizations for a consumer site."""
 
     model = ConsumerSiteOrganization
@@ -69,15 +310,133 @@ class ConsumerSiteOrganizationsInline(admin.TabularInline):
     verbose_name_plural = _("organizations")
 
 
+class ProvisionLTIResourcesForm(forms.Form):
+    """Form to upload a manifest of the LTI resources to provision for a consumer site."""
+
+    manifest = forms.FileField(
+        label=_("manifest"),
+        help_text=_(
+            "CSV file with a header line, or JSONL file, with the fields context_id, "
+            "context_title, resource_link_id and resource_link_title."
+        ),
+    )
+    manifest_format = forms.ChoiceField(
+        label=_("format"),
+        choices=[(value, value.upper()) for value in MANIFEST_FORMATS],
+    )
+
+
 @admin.register(ConsumerSite, site=admin_site)
-class ConsumerSiteAdmin(BaseModelAdmin):
+class ConsumerSiteAdmin(DeletionJobMixin, BaseModelAdmin):
     """Admin class for the ConsumerSite model."""
 
     list_display = ("name",)
     inlines = [ConsumerSiteUsersInline, ConsumerSiteOrganizationsInline]
-
-
-class OrganizationUsersInline(admin.TabularInline):
+    actions = ["provision_lti_resources", "schedule_deletion"]
+
+    def provision_lti_resources(self, request, queryset):
+        """Create the playlists and videos listed in a manifest uploaded for a consumer site.
+
+        The action first displays a form to upload the manifest. The consumer site of all the
+        rows of the manifest is the selected one.
+
+        Manifests with more than ``PROVISIONING_ADMIN_MAX_ROWS`` rows would take longer than a
+        request is allowed to: they are stored in a job provisioned in the background by the
+        ``run_provisioning_jobs`` worker.
+
+        Parameters
+        ----------
+        request : Type[django.http.request.HttpRequest]
+            The request on the admin changelist
+        queryset : Type[django.db.models.query.QuerySet]
+            The selected consumer sites
+
+        Returns
+        -------
+        Type[django.http.response.HttpResponse] or `None`
+            The form to upload the manifest, a redirection to the provisioning job scheduled or
+            `None` to go back to the changelist
+
+        """
+        consumer_sites = list(queryset[:2])
+        if len(consumer_sites) != 1:
+            self.message_user(
+                request,
+                _("Please select exactly one consumer site to provision."),
+                messages.ERROR,
+            )
+            return None
+        [consumer_site] = consumer_sites
+
+        if "provision" in request.POST:
+            form = ProvisionLTIResourcesForm(request.POST, request.FILES)
+        else:
+            form = ProvisionLTIResourcesForm()
+
+        if form.is_valid():
+            manifest_format = form.cleaned_data["manifest_format"]
+            try:
+                # The BOM added by some spreadsheet softwares is ignored
+                manifest = form.cleaned_data["manifest"].read().decode("utf-8-sig")
+                # Reading the whole manifest first reports its errors before provisioning
+                rows = sum(
+                    1
+                    for _row in read_manifest(
+                        io.StringIO(manifest, newline=""), manifest_format
+                    )
+                )
+            except ValueError as error:
+                self.message_user(request, str(error), messages.ERROR)
+                return None
+
+            if rows > PROVISIONING_ADMIN_MAX_ROWS:
+                job = ProvisioningJob.objects.create(
+                    consumer_site=consumer_site,
+                    manifest=manifest,
+                    manifest_format=manifest_format,
+                    rows=rows,
+                )
+                self.message_user(
+                    request,
+                    _(
+                        "The {:d} rows of the manifest will be provisioned in the background."
+                    ).format(rows),
+                    messages.SUCCESS,
+                )
+                return HttpResponseRedirect(
+                    reverse(
+                        "admin:core_provisioningjob_change",
+                        args=[job.pk],
+                        current_app=self.admin_site.name,
+                    )
+                )
+
+            report = provision_lti_resources(
+                read_manifest(io.StringIO(manifest, newline=""), manifest_format),
+                consumer_site_name=consumer_site.name,
+            )
+            self.message_user(request, str(report), messages.SUCCESS)
+            return None
+
+        context = dict(
+            self.admin_site.each_context(request),
+            title=_("Provision LTI resources"),
+            opts=self.model._meta,
+            consumer_site=consumer_site,
+            form=form,
+            max_rows=PROVISIONING_ADMIN_MAX_ROWS,
+            action_checkbox_name=helpers.ACTION_CHECKBOX_NAME,
+        )
+        return TemplateResponse(
+            request, "admin/core/consumersite/provision_lti_resources.html", context
+        )
+
+    provision_lti_resources.short_description = _(
+        "Provision LTI resources from a manifest"
+    )
+
+
+class OrganizationUsersInline(BaseTabularInline):
     """Inline to display users who have been granted access to an organization."""
 
     model = OrganizationAccess
@@ -85,7 +444,7 @@ class OrganizationUsersInline(admin.TabularInline):
     verbose_name_plural = _("users")
 
 
-class OrganizationConsumerSitesInline(admin.TabularInline):
+class OrganizationConsumerSitesInline(BaseTabularInline):
     """Inline to display consumer sites for an organization."""
 
     model = ConsumerSiteOrganization
@@ -94,26 +453,27 @@ class OrganizationConsumerSitesInline(admin.TabularInline):
 
 
 @admin.register(Organization, site=admin_site)
-class OrganizationAdmin(BaseModelAdmin):
+class OrganizationAdmin(DeletionJobMixin, BaseModelAdmin):
     """Admin class for the Organization model."""
 
     list_display = ("name",)
     inlines = [OrganizationUsersInline, OrganizationConsumerSitesInline]
+    actions = ["schedule_deletion"]
 
 
-class AudioTrackInline(admin.TabularInline):
+class AudioTrackInline(BaseTabularInline):
     """Inline for audio tracks of a video."""
 
     model = AudioTrack
 
 
-class SubtitleTrackInline(admin.TabularInline):
+class SubtitleTrackInline(BaseTabularInline):
     """Inline for subtitle tracks of a video."""
 
     model = SubtitleTrack
 
 
-class SignTrackInline(admin.TabularInline):
+class SignTrackInline(BaseTabularInline):
     """Inline for sign tracks of a video."""
 
     model = SignTrack
@@ -128,7 +488,7 @@ class VideoAdmin(BaseModelAdmin):
     inlines = [AudioTrackInline, SubtitleTrackInline, SignTrackInline]
 
 
-class VideosInline(admin.TabularInline):
+class VideosInline(BaseTabularInline):
     """Inline for videos in a playlist."""
 
     model = Video
@@ -136,7 +496,7 @@ class VideosInline(admin.TabularInline):
     verbose_name_plural = _("videos")
 
 
-class PlaylistAccessesInline(admin.TabularInline):
+class PlaylistAccessesInline(BaseTabularInline):
     """Inline for with right to write access to a playlist."""
 
     model = PlaylistAccess
@@ -151,3 +511,58 @@ class PlaylistAdmin(BaseModelAdmin):
     list_display = ("title", "organization", "created_by", "is_public")
     exclude = ("duplicated_from",)
     inlines = [VideosInline, PlaylistAccessesInline]
+
+
+@admin.register(DeletionJob, site=admin_site)
+class DeletionJobAdmin(JobAdminMixin, BaseModelAdmin):
+    """Admin class for the DeletionJob model, showing the progress of the deletions."""
+
+    list_display = (
+        "object_repr",
+        "content_type",
+        "state",
+        "progress_display",
+        "counts",
+        "created_on",
+        "finished_on",
+    )
+    list_filter = ("state", "content_type")
+    readonly_fields = (
+        "content_type",
+        "object_id",
+        "object_repr",
+        "state",
+        "progress_display",
+        "step",
+        "steps",
+        "counts",
+        "deleted_on",
+        "finished_on",
+        "error",
+    )
+    exclude = ("deleted",)
+
+
+@admin.register(ProvisioningJob, site=admin_site)
+class ProvisioningJobAdmin(JobAdminMixin, BaseModelAdmin):
+    """Admin class for the ProvisioningJob model, showing the progress of the provisionings."""
+
+    list_display = (
+        "consumer_site",
+        "state",
+        "progress_display",
+        "counts",
+        "created_on",
+        "finished_on",
+    )
+    readonly_fields = (
+        "consumer_site",
+        "manifest_format",
+        "state",
+        "progress_display",
+        "rows",
+        "counts",
+        "finished_on",
+        "error",
+    )
+    exclude = ("deleted", "manifest")
@@ -1,14 +1,135 @@
 """Declare API endpoints with Django RestFramework viewsets."""
+from contextlib import contextmanager
+import hashlib
+import json
+from types import SimpleNamespace
+
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.http import Http404
+from django.utils import timezone
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date
 
-from rest_framework import mixins, viewsets
+from botocore.exceptions import ClientError
+from rest_framework import exceptions, mixins, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from .models import Video
-from .permissions import IsVideoTokenOrAdminUser
-from .serializers import VideoSerializer
-from .utils.s3_utils import get_s3_policy
+from .defaults import VIDEO_BULK_UPDATE_MAX, VIDEO_SOURCE_MULTIPART_MAX_SIZE
+from .models import Playlist, Video
+from .pagination import PositionCursorPagination
+from .permissions import IsPlaylistTokenOrAdminUser, IsVideoTokenOrAdminUser
+from .serializers import (
+    BulkVideoItemSerializer,
+    BulkVideoSerializer,
+    InitiateMultipartUploadSerializer,
+    MultipartUploadSerializer,
+    PlaylistVideoSerializer,
+    UploadPartUrlsSerializer,
+    UploadPoliciesSerializer,
+    VideoReadSerializer,
+    VideoSerializer,
+)
+from .utils import cloudfront_utils, s3_utils
+from .utils.time_utils import to_timestamp
+from .utils.timing_utils import timer
+
+
+# Fields of a video from which the validators of its representation are computed
+VIDEO_VALIDATOR_FIELDS = (
+    "id",
+    "playlist_id",
+    "updated_on",
+    "state",
+    "uploaded_on",
+    "resolutions",
+    "streaming_formats",
+)
+
+
+def get_video_validators(video, request):
+    """Compute the validators of the representation of a video for conditional requests.
+
+    The representation depends on the video, on the version of the API and on the filters of
+    the urls requested and, when urls are signed, on their expiration. It changes when signed
+    urls start expiring later, at the beginning of each time bucket.
+
+    Parameters
+    ----------
+    video : Type[models.Model] or types.SimpleNamespace
+        The video or an object with the values of its fields listed in `VIDEO_VALIDATOR_FIELDS`
+    request : Type[rest_framework.request.Request]
+        The request for the representation of the video
+
+    Returns
+    -------
+    Tuple[string, integer, integer or `None`]
+        The strong ETag of the representation, the timestamp at which it last changed and the
+        number of seconds during which it does not change or `None` if urls are not signed
+
+    """
+    last_modified = to_timestamp(video.updated_on)
+    max_age = None
+    parts = [
+        str(video.id),
+        str(video.playlist_id),
+        last_modified,
+        video.updated_on.microsecond,
+        video.state,
+        to_timestamp(video.uploaded_on),
+        video.resolutions,
+        video.streaming_formats,
+        settings.CLOUDFRONT_URL,
+        getattr(request, "version", None),
+        request.query_params.get("resolutions"),
+        request.query_params.get("kinds"),
+    ]
+
+    if settings.CLOUDFRONT_SIGNED_URLS_ACTIVE:
+        now = to_timestamp(timezone.now())
+        expires_at = to_timestamp(cloudfront_utils.get_expiration())
+        # Urls signed from the beginning of the current time bucket to the next one all expire
+        # at the same date
+        bucket_start = expires_at - settings.CLOUDFRONT_SIGNED_URLS_VALIDITY
+        bucket_end = bucket_start + max(settings.CLOUDFRONT_SIGNED_URLS_BUCKET, 1)
+        max_age = max(bucket_end - now, 0)
+        last_modified = max(last_modified, bucket_start)
+        parts.append(expires_at)
+
+    etag = '"{:s}"'.format(hashlib.sha1(json.dumps(parts).encode("utf-8")).hexdigest())
+    return etag, last_modified, max_age
+
+
+@contextmanager
+def s3_errors():
+    """Turn the errors of S3 on a multipart upload into API errors.
+
+    Raises
+    ------
+    NotFound
+        If the multipart upload does not exist, e.g. because it was completed or aborted
+    ValidationError
+        If S3 refuses to assemble the parts of the upload
+
+    """
+    try:
+        yield
+    except ClientError as error:
+        code = error.response["Error"]["Code"]
+        if code == "NoSuchUpload":
+            raise exceptions.NotFound("The upload does not exist.")
+        if code in ("EntityTooSmall", "InvalidPart", "InvalidPartOrder"):
+            raise exceptions.ValidationError(
+                {"parts": error.response["Error"]["Message"]}
+            )
+        raise
 
 
 class VideoViewSet(
@@ -20,6 +141,97 @@ class VideoViewSet(
     serializer_class = VideoSerializer
     permission_classes = [IsVideoTokenOrAdminUser]
 
+    def get_not_modified_response(self, request):
+        """Answer a conditional request for a video with a 304 if the video did not change.
+
+        The validators are computed from a narrow query on the fields they depend on, without
+        loading the whole video nor signing its urls.
+
+        Parameters
+        ----------
+        request : Type[rest_framework.request.Request]
+            The request with an `If-None-Match` or an `If-Modified-Since` header
+
+        Returns
+        -------
+        Tuple[Type[django.http.HttpResponseNotModified] or `None`, Tuple]
+            The response to return, or `None` if the video changed, and the validators
+
+        Raises
+        ------
+        Http404
+            If the video does not exist
+
+        """
+        try:
+            values = (
+                self.get_queryset()
+                .filter(pk=self.kwargs[self.lookup_field])
+                .values(*VIDEO_VALIDATOR_FIELDS)
+                .first()
+            )
+        except (TypeError, ValueError, ValidationError):
+            values = None
+        if values is None:
+            raise Http404
+
+        video = SimpleNamespace(**values)
+        self.check_object_permissions(request, video)
+        validators = get_video_validators(video, request)
+        return (
+            get_conditional_response(
+                request, etag=validators[0], last_modified=validators[1]
+            ),
+            validators,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve a video with validators for conditional requests.
+
+        Parameters
+        ----------
+        request : Type[rest_framework.request.Request]
+            The request on the API endpoint, optionally conditional
+        args : list
+            The positional arguments of the route
+        kwargs : dictionary
+            The keyword arguments of the route, with the primary key of the video
+
+        Returns
+        -------
+        Type[rest_framework.response.Response]
+            HttpResponse carrying the video as a JSON object or a 304 if the representation
+            known by the client is still valid.
+
+        """
+        response = None
+        if (
+            "HTTP_IF_NONE_MATCH" in request.META
+            or "HTTP_IF_MODIFIED_SINCE" in request.META
+        ):
+            response, validators = self.get_not_modified_response(request)
+
+        if response is None:
+            with timer("video"):
+                video = self.get_object()
+            with timer("serialize"):
+                response = Response(
+                    VideoReadSerializer(
+                        video, context=self.get_serializer_context()
+                    ).data
+                )
+            validators = get_video_validators(video, request)
+
+        etag, last_modified, max_age = validators
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        if max_age is None:
+            patch_cache_control(response, private=True, no_cache=True)
+        else:
+            patch_cache_control(response, private=True, max_age=max_age)
+        patch_vary_headers(response, ("Accept", "Authorization"))
+        return response
+
     @action(methods=["get"], detail=True, url_path="upload-policy")
     # pylint: disable=unused-argument
     def upload_policy(self, request, pk=None):
@@ -38,5 +250,382 @@ class VideoViewSet(
             HttpResponse carrying the policy as a JSON object.
 
         """
-        policy = get_s3_policy(settings.AWS_SOURCE_BUCKET_NAME, self.get_object())
+        policy = s3_utils.get_s3_policy(
+            settings.AWS_SOURCE_BUCKET_NAME, self.get_object()
+        )
         return Response(policy)
+
+    def get_permission_error(self, request, obj):
+        """Check the object permissions of a request, returning their error instead of raising.
+
+        Parameters
+        ----------
+        request : Type[django.http.request.HttpRequest]
+            The request that holds the authenticated user
+        obj : Type[models.Model]
+            The object for which the permissions are checked
+
+        Returns
+        -------
+        string or `None`
+            The detail of the error if the permissions are not granted, `None` otherwise
+
+        """
+        try:
+            self.check_object_permissions(request, obj)
+        except exceptions.APIException as error:
+            return error.detail
+        return None
+
+    @action(methods=["patch"], detail=False, url_path="bulk")
+    def bulk_partial_update(self, request):
+        """Update some fields of several videos at once.
+
+        Each item of the list sent is validated as a partial update of the video of its `id`,
+        after checking the permissions of this video as for the update of a single video (see
+        `IsVideoTokenOrAdminUser`). The valid items are applied together with a single UPDATE
+        statement, in one transaction. Invalid items are reported in the errors without
+        preventing the valid ones from being applied.
+
+        The statement bypasses `Video.save` and the `post_save` signal, which no receiver
+        listens to for videos. The contexts of student launches cached for a video need no
+        invalidation either: they are keyed by its `updated_on`, which the statement bumps.
+
+        Parameters
+        ----------
+        request : Type[django.http.request.HttpRequest]
+            The request on the API endpoint, with a list of partial updates
+
+        Returns
+        -------
+        Type[rest_framework.response.Response]
+            HttpResponse carrying the ids of the videos updated and the errors of each video
+            that was not updated, by video id, as a JSON object.
+
+        """
+        items = BulkVideoItemSerializer(data=request.data, many=True)
+        items.is_valid(raise_exception=True)
+        if not 1 <= len(items.validated_data) <= VIDEO_BULK_UPDATE_MAX:
+            raise exceptions.ValidationError(
+                {
+                    "non_field_errors": (
+                        "Between 1 and {:d} videos can be updated at once.".format(
+                            VIDEO_BULK_UPDATE_MAX
+                        )
+                    )
+                }
+            )
+        video_ids = [str(item["id"]) for item in items.validated_data]
+        if len(set(video_ids)) < len(video_ids):
+            raise exceptions.ValidationError(
+                {"non_field_errors": "Each video can only be updated once."}
+            )
+
+        updated = []
+        errors = {}
+        # New value of each field by video id, for each field updated
+        changes = {}
+        with transaction.atomic():
+            videos = {
+                str(video.id): video
+                for video in self.get_queryset()
+                .filter(id__in=video_ids)
+                .select_for_update()
+            }
+            for video_id, data in zip(video_ids, request.data):
+                video = videos.get(video_id)
+                if video is None:
+                    errors[video_id] = exceptions.NotFound.default_detail
+                    continue
+                error = self.get_permission_error(request, video)
+                if error is not None:
+                    errors[video_id] = error
+                    continue
+
+                serializer = BulkVideoSerializer(
+                    video,
+                    data=data,
+                    partial=True,
+                    context=self.get_serializer_context(),
+                )
+                if not serializer.is_valid():
+                    errors[video_id] = serializer.errors
+                    continue
+                for field, value in serializer.validated_data.items():
+                    changes.setdefault(field, {})[video_id] = value
+                updated.append(video_id)
+
+            if updated:
+                Video.objects.filter(id__in=updated).update(
+                    updated_on=timezone.now(),
+                    **{
+                        field: Case(
+                            *[
+                                When(id=video_id, then=Value(value))
+                                for video_id, value in values.items()
+                            ],
+                            default=F(field),
+                            output_field=Video._meta.get_field(field)
+                        )
+                        for field, values in changes.items()
+                    }
+                )
+
+        return Response({"updated": updated, "errors": errors})
+
+    @action(methods=["post"], detail=False, url_path="upload-policies")
+    def upload_policies(self, request):
+        """Get the policies for direct upload of several videos of a playlist at once.
+
+        Permissions are checked for each video: the videos that can't be uploaded by the user
+        or that are not in the playlist are reported in the errors, without failing the whole
+        request.
+
+        Parameters
+        ----------
+        request : Type[django.http.request.HttpRequest]
+            The request on the API endpoint, with the id of the playlist and of its videos
+
+        Returns
+        -------
+        Type[rest_framework.response.Response]
+            HttpResponse carrying the policy of each video and the error of each video for
+            which no policy was built, by video id, as a JSON object.
+
+        """
+        serializer = UploadPoliciesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        video_ids = {str(video_id) for video_id in serializer.validated_data["videos"]}
+
+        videos = []
+        errors = {}
+        for video in self.get_queryset().filter(
+            playlist_id=serializer.validated_data["playlist"], id__in=video_ids
+        ):
+            try:
+                self.check_object_permissions(request, video)
+            except exceptions.APIException as error:
+                errors[str(video.id)] = error.detail
+            else:
+                videos.append(video)
+
+        for video_id in video_ids - {str(video.id) for video in videos} - set(errors):
+            errors[video_id] = exceptions.NotFound.default_detail
+
+        return Response(
+            {
+                "policies": s3_utils.get_s3_policies(
+                    settings.AWS_SOURCE_BUCKET_NAME, videos
+                ),
+                "errors": errors,
+            }
+        )
+
+    def get_multipart_upload(self, serializer_class, data):
+        """Get the S3 key of the multipart upload of a video targeted by a request.
+
+        The key is computed from the video and the stamp so that the upload of another video
+        can't be targeted.
+
+        Parameters
+        ----------
+        serializer_class : Type[MultipartUploadSerializer]
+            The serializer validating the data of the request
+        data : dictionary
+            The data of the request
+
+        Returns
+        -------
+        Tuple[string, dictionary]
+            The S3 key of the upload and the validated data
+
+        Raises
+        ------
+        ValidationError
+            If the data is not valid
+
+        """
+        video = self.get_object()
+        serializer = serializer_class(data=data)
+        serializer.is_valid(raise_exception=True)
+        return (
+            video.get_source_s3_key(stamp=serializer.validated_data["stamp"]),
+            serializer.validated_data,
+        )
+
+    @action(methods=["post"], detail=True, url_path="multipart-upload")
+    # pylint: disable=unused-argument
+    def multipart_upload(self, request, pk=None):
+        """Initiate a multipart upload of a video to our AWS S3 source bucket.
+
+        Large files are sent in parts, concurrently, to presigned urls obtained from the
+        `multipart-upload/parts` endpoint.
+
+        Parameters
+        ----------
+        request : Type[django.http.request.HttpRequest]
+            The request on the API endpoint, with the size and the content type of the file
+        pk: string
+            The primary key of the video
+
+        Returns
+        -------
+        Type[rest_framework.response.Response]
+            HttpResponse carrying the id of the upload and the size of its parts as a JSON
+            object.
+
+        """
+        video = self.get_object()
+        serializer = InitiateMultipartUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = s3_utils.create_multipart_upload(
+            settings.AWS_SOURCE_BUCKET_NAME, video, **serializer.validated_data
+        )
+        return Response(upload, status=status.HTTP_201_CREATED)
+
+    @action(methods=["get", "post"], detail=True, url_path="multipart-upload/parts")
+    # pylint: disable=unused-argument
+    def multipart_upload_parts(self, request, pk=None):
+        """List the parts of a multipart upload or presign urls to upload them.
+
+        A GET request lists the parts already uploaded so that an interrupted upload can be
+        resumed. A POST request presigns the urls of the parts listed in `part_numbers`.
+
+        Parameters
+        ----------
+        request : Type[django.http.request.HttpRequest]
+            The request on the API endpoint, with the stamp and the id of the upload
+        pk: string
+            The primary key of the video
+
+        Returns
+        -------
+        Type[rest_framework.response.Response]
+            HttpResponse carrying the parts uploaded or the url of each part as a JSON object.
+
+        """
+        bucket = settings.AWS_SOURCE_BUCKET_NAME
+        if request.method == "GET":
+            key, data = self.get_multipart_upload(
+                MultipartUploadSerializer, request.query_params
+            )
+            with s3_errors():
+                parts = s3_utils.list_parts(bucket, key, data["upload_id"])
+            return Response({"parts": parts})
+
+        key, data = self.get_multipart_upload(UploadPartUrlsSerializer, request.data)
+        urls = s3_utils.get_upload_part_urls(
+            bucket, key, data["upload_id"], sorted(set(data["part_numbers"]))
+        )
+        return Response({"urls": urls})
+
+    @action(methods=["post"], detail=True, url_path="multipart-upload/complete")
+    # pylint: disable=unused-argument
+    def multipart_upload_complete(self, request, pk=None):
+        """Assemble all the parts uploaded for a multipart upload into the video file.
+
+        The parts are listed from S3 so that the size of the file can be checked. An upload
+        exceeding the maximum size is aborted.
+
+        Parameters
+        ----------
+        request : Type[django.http.request.HttpRequest]
+            The request on the API endpoint, with the stamp and the id of the upload
+        pk: string
+            The primary key of the video
+
+        Returns
+        -------
+        Type[rest_framework.response.Response]
+            HttpResponse carrying the key and the size of the file as a JSON object.
+
+        """
+        bucket = settings.AWS_SOURCE_BUCKET_NAME
+        key, data = self.get_multipart_upload(MultipartUploadSerializer, request.data)
+
+        with s3_errors():
+            parts = s3_utils.list_parts(bucket, key, data["upload_id"])
+            if not parts:
+                raise exceptions.ValidationError({"parts": "No part was uploaded."})
+
+            size = sum(part["size"] for part in parts)
+            if size > VIDEO_SOURCE_MULTIPART_MAX_SIZE:
+                s3_utils.abort_multipart_upload(bucket, key, data["upload_id"])
+                raise exceptions.ValidationError(
+                    {
+                        "size": "The file should not exceed {:d} bytes.".format(
+                            VIDEO_SOURCE_MULTIPART_MAX_SIZE
+                        )
+                    }
+                )
+
+            s3_utils.complete_multipart_upload(bucket, key, data["upload_id"], parts)
+
+        return Response({"stamp": data["stamp"], "key": key, "size": size})
+
+    @action(methods=["post"], detail=True, url_path="multipart-upload/abort")
+    # pylint: disable=unused-argument
+    def multipart_upload_abort(self, request, pk=None):
+        """Abort a multipart upload and delete the parts already uploaded.
+
+        Parameters
+        ----------
+        request : Type[django.http.request.HttpRequest]
+            The request on the API endpoint, with the stamp and the id of the upload
+        pk: string
+            The primary key of the video
+
+        Returns
+        -------
+        Type[rest_framework.response.Response]
+            An empty HttpResponse.
+
+        """
+        key, data = self.get_multipart_upload(MultipartUploadSerializer, request.data)
+        with s3_errors():
+            s3_utils.abort_multipart_upload(
+                settings.AWS_SOURCE_BUCKET_NAME, key, data["upload_id"]
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class PlaylistViewSet(viewsets.GenericViewSet):
+    """Viewset for the API of the playlist object."""
+
+    queryset = Playlist.objects.all()
+    permission_classes = [IsPlaylistTokenOrAdminUser]
+    pagination_class = PositionCursorPagination
+
+    @action(methods=["get"], detail=True)
+    # pylint: disable=unused-argument
+    def videos(self, request, pk=None):
+        """List the videos of a playlist in the order of their position, page by page.
+
+        The number of SQL queries does not depend on the size of the page: the playlist is
+        joined to the videos and each kind of track is prefetched with one query.
+
+        Parameters
+        ----------
+        request : Type[django.http.request.HttpRequest]
+            The request on the API endpoint, with an optional cursor and page size
+        pk: string
+            The primary key of the playlist
+
+        Returns
+        -------
+        Type[rest_framework.response.Response]
+            HttpResponse carrying the videos of the page and the url of the next page as a
+            JSON object.
+
+        """
+        playlist = self.get_object()
+        videos = (
+            Video.objects.filter(playlist=playlist)
+            .select_related("playlist")
+            .prefetch_related("audiotracks", "subtitletracks", "signtracks")
+        )
+        page = self.paginate_queryset(videos)
+        serializer = PlaylistVideoSerializer(
+            page, many=True, context=self.get_serializer_context()
+        )
+        return self.get_paginated_response(serializer.data)
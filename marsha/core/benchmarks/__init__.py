@@ -0,0 +1,11 @@
+"""Benchmarks of the hot paths of the ``core`` app, run with the ``benchmark`` command."""
+
+# Names of the available benchmarks mapped to the module that runs them
+BENCHMARKS = {
+    "lti_launch": "marsha.core.benchmarks.lti_launch",
+    "lti_verification": "marsha.core.benchmarks.lti_verification",
+    "server_timing": "marsha.core.benchmarks.server_timing",
+    "upload_policies": "marsha.core.benchmarks.upload_policies",
+    "uuid_inserts": "marsha.core.benchmarks.uuid_inserts",
+    "video_serializer": "marsha.core.benchmarks.video_serializer",
+}
@@ -0,0 +1,177 @@
+"""Helpers to time functions and report the results of benchmarks."""
+from collections import namedtuple
+import time
+
+import oauth2
+
+
+class BenchmarkResult(
+    namedtuple(
+        "BenchmarkResult", ["name", "iterations", "total", "p50", "p99", "counts"]
+    )
+):
+    """Timings, in seconds, of the calls to a function during a benchmark.
+
+    The counts map the name of a counter (e.g. SQL queries) to its maximum value for one call.
+
+    """
+
+    __slots__ = ()
+
+    @property
+    def per_second(self):
+        """Return the number of calls per second."""
+        return self.iterations / self.total if self.total else float("inf")
+
+
+def percentile(timings, rank):
+    """Get a percentile of sorted timings with the nearest-rank method.
+
+    Parameters
+    ----------
+    timings : List[float]
+        The timings sorted in ascending order
+    rank : integer
+        The rank of the percentile, between 0 and 100
+
+    Returns
+    -------
+    float
+        The timing below which `rank` percent of the timings fall
+
+    """
+    index = max(0, -(-len(timings) * rank // 100) - 1)
+    return timings[index]
+
+
+def summarize(name, timings, counts=None):
+    """Summarize the timings of the calls to a function.
+
+    Parameters
+    ----------
+    name : string
+        The name under which the results are reported
+    timings : List[float]
+        The duration of each call in seconds
+    counts : Dict[string, integer]
+        The maximum value of each counter for one call
+
+    Returns
+    -------
+    BenchmarkResult
+        The summary of the timings
+
+    """
+    timings = sorted(timings)
+    return BenchmarkResult(
+        name=name,
+        iterations=len(timings),
+        total=sum(timings),
+        p50=percentile(timings, 50),
+        p99=percentile(timings, 99),
+        counts=counts or {},
+    )
+
+
+def measure(name, function, arguments):
+    """Time the calls to a function for each item of a list of arguments.
+
+    Parameters
+    ----------
+    name : string
+        The name under which the results are reported
+    function : callable
+        The function to time, called with each item of `arguments` as only argument
+    arguments : Iterable[any]
+        The arguments of the successive calls, prepared beforehand so that preparing them is
+        not timed
+
+    Returns
+    -------
+    BenchmarkResult
+        The timings of the calls
+
+    """
+    timings = []
+    for argument in arguments:
+        start = time.perf_counter()
+        function(argument)
+        timings.append(time.perf_counter() - start)
+
+    return summarize(name, timings)
+
+
+def format_results(results):
+    """Format the results of a benchmark as a table.
+
+    Parameters
+    ----------
+    results : Iterable[BenchmarkResult]
+        The results to format
+
+    Returns
+    -------
+    string
+        A line of headers followed by a line for each result
+
+    """
+    counters = sorted({counter for result in results for counter in result.counts})
+    lines = [
+        "{:<28s} {:>10s} {:>12s} {:>10s} {:>10s}".format(
+            "name", "iterations", "per second", "p50 (ms)", "p99 (ms)"
+        )
+        + "".join(" {:>10s}".format(counter) for counter in counters)
+    ]
+    for result in results:
+        lines.append(
+            "{:<28s} {:>10d} {:>12.1f} {:>10.3f} {:>10.3f}".format(
+                result.name,
+                result.iterations,
+                result.per_second,
+                result.p50 * 1000,
+                result.p99 * 1000,
+            )
+            + "".join(
+                " {:>10s}".format(str(result.counts.get(counter, "")))
+                for counter in counters
+            )
+        )
+    return "\n".join(lines)
+
+
+def sign_lti_parameters(parameters, consumer_key, secret, url="http://testserver/"):
+    """Sign the parameters of an LTI launch request with the reference oauth2 library.
+
+    Parameters
+    ----------
+    parameters : dictionary
+        The LTI parameters of the launch request
+    consumer_key : string
+        The oauth consumer key of the passport
+    secret : string
+        The shared secret of the passport
+    url : string
+        The absolute url to which the launch request is sent
+
+    Returns
+    -------
+    dictionary
+        The parameters along with a fresh timestamp, a fresh nonce and their signature
+
+    """
+    parameters = dict(
+        parameters,
+        oauth_callback="about:blank",
+        oauth_consumer_key=consumer_key,
+        oauth_nonce=oauth2.generate_nonce(16),
+        oauth_signature_method="HMAC-SHA1",
+        oauth_timestamp=str(int(time.time())),
+        oauth_version="1.0",
+    )
+    oauth_request = oauth2.Request("POST", url, parameters)
+    parameters["oauth_signature"] = (
+        oauth2.SignatureMethod_HMAC_SHA1()
+        .sign(oauth_request, oauth2.Consumer(consumer_key, secret), None)
+        .decode("ascii")
+    )
+    return parameters
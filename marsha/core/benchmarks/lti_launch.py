@@ -0,0 +1,253 @@
+"""Benchmark LTI launch requests replayed through the Django test client.
+
+Each scenario creates its objects with the factories, then replays correctly signed launch
+requests on the LTI video view. For each scenario, it reports the latency of the launches,
+the number of SQL queries and the number of CloudFront RSA signatures per launch.
+
+CloudFront signed urls are activated with a temporary RSA key so that signing is measured.
+Everything is done in a transaction that is rolled back in the end.
+
+"""
+from collections import OrderedDict
+from contextlib import contextmanager
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from ..factories import (
+    ConsumerSiteLTIPassportFactory,
+    PlaylistFactory,
+    PlaylistLTIPassportFactory,
+    VideoFactory,
+)
+from ..models import Video
+from ..utils import cloudfront_utils
+from .base import sign_lti_parameters, summarize
+
+
+CONSUMER_SITE_NAME = "example.com"
+
+# Maximum number of SQL queries for one launch in each scenario
+QUERY_BUDGETS = {
+    "instructor_new_video": 3,
+    "instructor_existing_video": 4,
+    "student_existing_video": 3,
+    "playlist_passport": 4,
+    "consumer_site_passport": 3,
+}
+
+
+def _create_ready_video(playlist):
+    """Create a video uploaded and transcoded in a playlist."""
+    return VideoFactory(
+        playlist=playlist, state=Video.READY, uploaded_on=timezone.now()
+    )
+
+
+def instructor_new_video():
+    """Instructors launch a new video in an existing playlist."""
+    passport = ConsumerSiteLTIPassportFactory(consumer_site__name=CONSUMER_SITE_NAME)
+    playlist = PlaylistFactory(consumer_site=passport.consumer_site)
+
+    def get_parameters(iteration):
+        """Build the parameters launching a new video at each iteration."""
+        return {
+            "context_id": playlist.lti_id,
+            "resource_link_id": "new-video-{:d}".format(iteration),
+            "roles": "Instructor",
+        }
+
+    return passport, get_parameters
+
+
+def instructor_existing_video():
+    """Instructors launch a video that was already uploaded."""
+    passport = ConsumerSiteLTIPassportFactory(consumer_site__name=CONSUMER_SITE_NAME)
+    video = _create_ready_video(PlaylistFactory(consumer_site=passport.consumer_site))
+
+    def get_parameters(_iteration):
+        """Build the parameters launching the uploaded video as an instructor."""
+        return {
+            "context_id": video.playlist.lti_id,
+            "resource_link_id": video.lti_id,
+            "roles": "Instructor",
+        }
+
+    return passport, get_parameters
+
+
+def student_existing_video():
+    """Students launch a video that was already uploaded."""
+    passport = ConsumerSiteLTIPassportFactory(consumer_site__name=CONSUMER_SITE_NAME)
+    video = _create_ready_video(PlaylistFactory(consumer_site=passport.consumer_site))
+
+    def get_parameters(_iteration):
+        """Build the parameters launching the uploaded video as a student."""
+        return {
+            "context_id": video.playlist.lti_id,
+            "resource_link_id": video.lti_id,
+            "roles": "Student",
+        }
+
+    return passport, get_parameters
+
+
+def playlist_passport():
+    """Instructors launch an uploaded video with a passport scoped to its playlist."""
+    passport = PlaylistLTIPassportFactory(
+        playlist__consumer_site__name=CONSUMER_SITE_NAME
+    )
+    video = _create_ready_video(passport.playlist)
+
+    def get_parameters(_iteration):
+        """Build the parameters launching the uploaded video of the playlist."""
+        return {
+            "context_id": video.playlist.lti_id,
+            "resource_link_id": video.lti_id,
+            "roles": "Instructor",
+        }
+
+    return passport, get_parameters
+
+
+def consumer_site_passport():
+    """Instructors launch a new video in a new playlist with a passport scoped to the site."""
+    passport = ConsumerSiteLTIPassportFactory(consumer_site__name=CONSUMER_SITE_NAME)
+
+    def get_parameters(iteration):
+        """Build the parameters launching a new video in a new playlist at each iteration."""
+        return {
+            "context_id": "new-playlist-{:d}".format(iteration),
+            "resource_link_id": "new-video-{:d}".format(iteration),
+            "roles": "Instructor",
+        }
+
+    return passport, get_parameters
+
+
+SCENARIOS = OrderedDict(
+    (scenario.__name__, scenario)
+    for scenario in [
+        instructor_new_video,
+        instructor_existing_video,
+        student_existing_video,
+        playlist_passport,
+        consumer_site_passport,
+    ]
+)
+
+
+def replay_scenario(name, iterations):
+    """Replay the launch requests of a scenario.
+
+    The objects created by the scenario must be rolled back by the caller.
+
+    Parameters
+    ----------
+    name : string
+        The name of the scenario in `SCENARIOS`
+    iterations : integer
+        The number of launch requests to replay
+
+    Returns
+    -------
+    BenchmarkResult
+        The timings of the launch requests with their maximum number of SQL queries and RSA
+        signatures
+
+    Raises
+    ------
+    RuntimeError
+        If a launch request is not successful
+
+    """
+    passport, get_parameters = SCENARIOS[name]()
+    client = Client()
+    timings = []
+    counts = {"queries": 0, "rsa": 0}
+
+    for iteration in range(iterations):
+        data = sign_lti_parameters(
+            dict(
+                get_parameters(iteration),
+                tool_consumer_instance_guid=CONSUMER_SITE_NAME,
+            ),
+            passport.oauth_consumer_key,
+            passport.shared_secret,
+            url="http://testserver/lti-video/",
+        )
+
+        with CaptureQueriesContext(connection) as queries, mock.patch.object(
+            cloudfront_utils, "rsa_signer", wraps=cloudfront_utils.rsa_signer
+        ) as rsa_signer:
+            start = time.perf_counter()
+            response = client.post("/lti-video/", data)
+            timings.append(time.perf_counter() - start)
+
+        if response.status_code != 200 or b'data-state="error"' in response.content:
+            raise RuntimeError("The launch request of {:s} failed.".format(name))
+
+        counts["queries"] = max(counts["queries"], len(queries))
+        counts["rsa"] = max(counts["rsa"], rsa_signer.call_count)
+
+    return summarize(name, timings, counts)
+
+
+@contextmanager
+def signed_urls():
+    """Activate CloudFront signed urls with a temporary RSA key and no signature cached."""
+    cloudfront_utils._signatures.clear()
+    private_key = rsa.generate_private_key(
+        public_exponent=65537, key_size=2048, backend=default_backend()
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        key_path = os.path.join(directory, "cloudfront_private_key")
+        with open(key_path, "wb") as key_file:
+            key_file.write(
+                private_key.private_bytes(
+                    encoding=serialization.Encoding.PEM,
+                    format=serialization.PrivateFormat.TraditionalOpenSSL,
+                    encryption_algorithm=serialization.NoEncryption(),
+                )
+            )
+
+        with override_settings(
+            CLOUDFRONT_ACCESS_KEY_ID="BENCHMARK",
+            CLOUDFRONT_PRIVATE_KEY_PATH=key_path,
+            CLOUDFRONT_SIGNED_URLS_ACTIVE=True,
+        ):
+            yield
+
+
+def run(iterations):
+    """Replay the launch requests of all the scenarios with CloudFront signed urls.
+
+    Parameters
+    ----------
+    iterations : integer
+        The number of launch requests replayed in each scenario
+
+    Returns
+    -------
+    List[BenchmarkResult]
+        The timings and counts of each scenario
+
+    """
+    results = []
+    with signed_urls():
+        for name in SCENARIOS:
+            with transaction.atomic():
+                results.append(replay_scenario(name, iterations))
+                transaction.set_rollback(True)
+
+    return results
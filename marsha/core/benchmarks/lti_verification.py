@@ -0,0 +1,73 @@
+"""Benchmark the verification of the OAuth signature of LTI launch requests.
+
+It compares the launches verified per second by the in-tree verifier and by pylti.
+
+"""
+from django.test import RequestFactory
+
+from pylti.common import verify_request_common
+
+from ..utils import oauth_utils
+from .base import measure, sign_lti_parameters
+
+
+CONSUMER_KEY = "ABC123"
+SHARED_SECRET = "#Y5$"
+
+LAUNCH_PARAMETERS = {
+    "context_id": "course-v1:ufr+mathematics+0001",
+    "launch_presentation_locale": "en",
+    "launch_presentation_return_url": "",
+    "lis_person_contact_email_primary": "johnny@example.com",
+    "lis_person_sourcedid": "johnny",
+    "lis_result_sourcedid": "course-v1%3Aufr%2Bmathematics%2B0001:example.com-df7:562",
+    "lti_message_type": "basic-lti-launch-request",
+    "lti_version": "LTI-1p0",
+    "resource_link_id": "example.com-df7",
+    "roles": "Student",
+    "user_id": "562",
+}
+
+
+def verify_with_pylti(request):
+    """Verify a request as it was done before the in-tree verifier."""
+    verify_request_common(
+        {CONSUMER_KEY: {"secret": SHARED_SECRET}},
+        request.build_absolute_uri(),
+        request.method,
+        request.META,
+        dict(request.POST.items()),
+    )
+
+
+def verify_natively(request):
+    """Verify a request with the in-tree verifier, including the nonce check."""
+    oauth_utils.verify_request(request, CONSUMER_KEY, SHARED_SECRET)
+
+
+def run(iterations):
+    """Verify the same signed launch requests with both implementations.
+
+    Parameters
+    ----------
+    iterations : integer
+        The number of launch requests verified by each implementation
+
+    Returns
+    -------
+    List[BenchmarkResult]
+        The timings of each implementation
+
+    """
+    factory = RequestFactory()
+    requests = [
+        factory.post(
+            "/", sign_lti_parameters(LAUNCH_PARAMETERS, CONSUMER_KEY, SHARED_SECRET)
+        )
+        for _ in range(iterations)
+    ]
+
+    return [
+        measure("pylti", verify_with_pylti, requests),
+        measure("native", verify_natively, requests),
+    ]
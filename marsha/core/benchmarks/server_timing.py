@@ -0,0 +1,147 @@
+"""Benchmark the overhead of the server timing instrumentation.
+
+The timers stay on the hot paths whether the `ServerTimingMiddleware` is activated or not. It
+times batches of phases without timer, with a timer while no request is measured, which is
+what happens when the middleware is not activated, and with a timer while a request is
+measured. Timings are reported per phase.
+
+It also replays requests on the video API with the middleware deactivated and activated,
+in a transaction that is rolled back in the end.
+
+"""
+import time
+
+from django.db import transaction
+from django.test import Client, override_settings
+
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..factories import VideoFactory
+from ..utils import timing_utils
+from .base import summarize
+
+
+# Number of phases timed in each iteration
+BATCH_SIZE = 1000
+
+
+def without_timer():
+    """Run empty phases without timer."""
+    for _ in range(BATCH_SIZE):
+        pass
+
+
+def with_timer():
+    """Run empty phases each wrapped in a timer."""
+    for _ in range(BATCH_SIZE):
+        with timing_utils.timer("phase"):
+            pass
+
+
+def measure_phases(name, function, iterations, measured):
+    """Time batches of phases, optionally while a request is being measured.
+
+    Parameters
+    ----------
+    name : string
+        The name under which the results are reported
+    function : callable
+        The function running a batch of phases
+    iterations : integer
+        The number of batches
+    measured : boolean
+        Whether a request is being measured while the phases run
+
+    Returns
+    -------
+    BenchmarkResult
+        The timings of the batches divided by the size of a batch so that the results are
+        reported per phase
+
+    """
+    timings = []
+    for _ in range(iterations):
+        if measured:
+            timing_utils.start_request()
+        try:
+            start = time.perf_counter()
+            function()
+            timings.append((time.perf_counter() - start) / BATCH_SIZE)
+        finally:
+            timing_utils.stop_request()
+    return summarize(name, timings)
+
+
+def measure_requests(name, iterations, active):
+    """Time requests retrieving a video on the API.
+
+    Parameters
+    ----------
+    name : string
+        The name under which the results are reported
+    iterations : integer
+        The number of requests
+    active : boolean
+        Whether the `ServerTimingMiddleware` is activated
+
+    Returns
+    -------
+    BenchmarkResult
+        The timings of the requests
+
+    Raises
+    ------
+    RuntimeError
+        If a request is not successful
+
+    """
+    video = VideoFactory()
+    jwt_token = AccessToken()
+    jwt_token.payload["video_id"] = str(video.id)
+
+    timings = []
+    with override_settings(SERVER_TIMING_ACTIVE=active):
+        # The middleware chain is built by each client with the settings of its first request
+        client = Client()
+        for _ in range(iterations):
+            start = time.perf_counter()
+            response = client.get(
+                "/api/videos/{!s}/".format(video.id),
+                HTTP_AUTHORIZATION="Bearer {!s}".format(jwt_token),
+            )
+            timings.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise RuntimeError("The request of {:s} failed.".format(name))
+
+    return summarize(name, timings)
+
+
+def run(iterations):
+    """Time phases and requests with and without server timing.
+
+    Parameters
+    ----------
+    iterations : integer
+        The number of batches of phases and of requests of each kind
+
+    Returns
+    -------
+    List[BenchmarkResult]
+        The timings per phase and per request of each kind
+
+    """
+    results = [
+        measure_phases("phase_without_timer", without_timer, iterations, False),
+        measure_phases("phase_timer_inactive", with_timer, iterations, False),
+        measure_phases("phase_timer_active", with_timer, iterations, True),
+    ]
+    with transaction.atomic():
+        results.extend(
+            [
+                measure_requests("request_inactive", iterations, False),
+                measure_requests("request_active", iterations, True),
+            ]
+        )
+        transaction.set_rollback(True)
+
+    return results
@@ -0,0 +1,105 @@
+"""Benchmark the upload policies built for batches of videos of a playlist.
+
+For each batch size, it compares building the policies one video at a time, deriving the
+signing key for each of them as it was done before signing keys were cached, with building
+them all at once with the cached signing key. Timings are reported per policy.
+
+The videos are created in a transaction that is rolled back in the end.
+
+"""
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from ..factories import PlaylistFactory
+from ..models import Video
+from ..utils import s3_utils
+from .base import summarize
+
+
+BATCH_SIZES = (1, 10, 100, 500)
+
+
+def sign_separately(videos):
+    """Build the policy of each video separately, deriving the signing key each time."""
+    for video in videos:
+        s3_utils.get_signature_key.cache_clear()
+        s3_utils.get_s3_policy(settings.AWS_SOURCE_BUCKET_NAME, video)
+
+
+def sign_in_batch(videos):
+    """Build the policies of all the videos at once."""
+    s3_utils.get_s3_policies(settings.AWS_SOURCE_BUCKET_NAME, videos)
+
+
+def measure_batches(name, function, videos, iterations):
+    """Time the calls to a function building the policies of a batch of videos.
+
+    Parameters
+    ----------
+    name : string
+        The name under which the results are reported
+    function : callable
+        The function to time, called with the list of videos as only argument
+    videos : List[Type[models.Model]]
+        The videos of the batch
+    iterations : integer
+        The number of calls to the function
+
+    Returns
+    -------
+    BenchmarkResult
+        The timings of the calls divided by the size of the batch so that the results are
+        reported per policy
+
+    """
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        function(videos)
+        timings.append((time.perf_counter() - start) / len(videos))
+    return summarize(name, timings, {"videos": len(videos)})
+
+
+def run(iterations):
+    """Build the upload policies of batches of videos of increasing sizes.
+
+    Parameters
+    ----------
+    iterations : integer
+        The number of batches of each size for which policies are built
+
+    Returns
+    -------
+    List[BenchmarkResult]
+        The timings per policy of each way of building them for each batch size
+
+    """
+    results = []
+    with transaction.atomic():
+        playlist = PlaylistFactory()
+        all_videos = Video.objects.bulk_create(
+            [
+                Video(playlist=playlist, lti_id="video-{:d}".format(index))
+                for index in range(max(BATCH_SIZES))
+            ]
+        )
+        for size in BATCH_SIZES:
+            videos = all_videos[:size]
+            results.extend(
+                [
+                    measure_batches(
+                        "separately_{:d}".format(size),
+                        sign_separately,
+                        videos,
+                        iterations,
+                    ),
+                    measure_batches(
+                        "batch_{:d}".format(size), sign_in_batch, videos, iterations
+                    ),
+                ]
+            )
+        transaction.set_rollback(True)
+
+    return results
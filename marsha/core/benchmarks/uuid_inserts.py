@@ -0,0 +1,125 @@
+"""Benchmark the inserts of rows with random or time-ordered UUIDs as primary keys.
+
+For each generator of UUIDs, it times the generation of the UUIDs, then the insertion of
+batches of rows in a table with a UUID primary key, as the tables of the models. Timings are
+reported per UUID and per row, with the size of the primary key index once all the batches
+are inserted: random UUIDs split the pages of the whole B-tree, leaving them half empty,
+while time-ordered UUIDs fill its last page.
+
+The tables are temporary and created in a transaction that is rolled back in the end.
+
+"""
+import time
+import uuid
+
+from django.db import connection, transaction
+
+from ..utils.uuid_utils import uuid7
+from .base import summarize
+
+
+# Number of rows inserted with one statement in each iteration
+BATCH_SIZE = 1000
+
+# Generators of UUIDs compared, by name
+GENERATORS = (("uuid4", uuid.uuid4), ("uuid7", uuid7))
+
+
+def measure_generation(name, generator, iterations):
+    """Time the generation of batches of UUIDs.
+
+    Parameters
+    ----------
+    name : string
+        The name under which the results are reported
+    generator : callable
+        The function generating a UUID
+    iterations : integer
+        The number of batches of UUIDs
+
+    Returns
+    -------
+    BenchmarkResult
+        The timings of the batches divided by their size so that they are reported per UUID
+
+    """
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        for _ in range(BATCH_SIZE):
+            generator()
+        timings.append((time.perf_counter() - start) / BATCH_SIZE)
+    return summarize(name, timings)
+
+
+def measure_inserts(name, generator, iterations):
+    """Time the insertion of batches of rows in a new table with a UUID primary key.
+
+    Parameters
+    ----------
+    name : string
+        The name under which the results are reported, also used to name the table
+    generator : callable
+        The function generating the primary key of each row
+    iterations : integer
+        The number of batches of rows
+
+    Returns
+    -------
+    BenchmarkResult
+        The timings of the batches divided by their size so that they are reported per row,
+        with the size of the primary key index in kilobytes
+
+    """
+    table = "benchmark_{:s}".format(name)
+    timings = []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE TEMPORARY TABLE {:s} "
+            "(id uuid PRIMARY KEY, created_on timestamp with time zone NOT NULL)".format(
+                table
+            )
+        )
+        for _ in range(iterations):
+            # UUIDs are generated beforehand so that only the insertion is timed
+            ids = [str(generator()) for _ in range(BATCH_SIZE)]
+            start = time.perf_counter()
+            cursor.execute(
+                "INSERT INTO {:s} (id, created_on) "
+                "SELECT unnest(%s::uuid[]), now()".format(table),
+                [ids],
+            )
+            timings.append((time.perf_counter() - start) / BATCH_SIZE)
+
+        cursor.execute("SELECT pg_relation_size(%s)", ["{:s}_pkey".format(table)])
+        [index_size] = cursor.fetchone()
+
+    return summarize(name, timings, {"index_kb": index_size // 1024})
+
+
+def run(iterations):
+    """Generate UUIDs and insert rows with each generator.
+
+    Parameters
+    ----------
+    iterations : integer
+        The number of batches of UUIDs generated and of rows inserted with each generator
+
+    Returns
+    -------
+    List[BenchmarkResult]
+        The timings per UUID and per row for each generator
+
+    """
+    results = [
+        measure_generation("generate_{:s}".format(name), generator, iterations)
+        for name, generator in GENERATORS
+    ]
+    with transaction.atomic():
+        results.extend(
+            measure_inserts("insert_{:s}".format(name), generator, iterations)
+            for name, generator in GENERATORS
+        )
+        transaction.set_rollback(True)
+
+    return results
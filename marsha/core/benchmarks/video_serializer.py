@@ -0,0 +1,111 @@
+"""Benchmark the serialization of videos on the hot paths of LTI launches and of the API.
+
+It compares serializing ready videos with the model serializer, with the read-only
+serializer from model instances and with the read-only serializer from `values` rows.
+Timings are reported per video, so "per second" reads as videos serialized per second.
+
+The videos are created in a transaction that is rolled back in the end.
+
+"""
+import time
+
+from django.db import transaction
+from django.test import override_settings
+from django.utils import timezone
+
+from ..factories import PlaylistFactory
+from ..models import Video
+from ..serializers import VideoReadSerializer, VideoSerializer
+from .base import summarize
+
+
+# Number of videos serialized in each iteration
+BATCH_SIZE = 100
+
+
+def with_model_serializer(videos):
+    """Serialize each video with a model serializer, as done before."""
+    return [VideoSerializer(video).data for video in videos]
+
+
+def with_read_serializer(videos):
+    """Serialize each video with the read-only serializer."""
+    return [VideoReadSerializer(video).data for video in videos]
+
+
+def measure_videos(name, function, videos, iterations):
+    """Time the serialization of a batch of videos.
+
+    Parameters
+    ----------
+    name : string
+        The name under which the results are reported
+    function : callable
+        The function to time, called with the list of videos as only argument
+    videos : List[Type[models.Video] or dictionary]
+        The videos as instances or as rows
+    iterations : integer
+        The number of calls to the function
+
+    Returns
+    -------
+    BenchmarkResult
+        The timings of the calls divided by the number of videos so that the results are
+        reported per video
+
+    """
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        function(videos)
+        timings.append((time.perf_counter() - start) / len(videos))
+    return summarize(name, timings, {"videos": len(videos)})
+
+
+def run(iterations):
+    """Serialize batches of ready videos in each way, with unsigned urls.
+
+    Parameters
+    ----------
+    iterations : integer
+        The number of batches serialized in each way
+
+    Returns
+    -------
+    List[BenchmarkResult]
+        The timings per video of each way of serializing them
+
+    """
+    with transaction.atomic(), override_settings(CLOUDFRONT_SIGNED_URLS_ACTIVE=False):
+        playlist = PlaylistFactory()
+        Video.objects.bulk_create(
+            [
+                Video(
+                    playlist=playlist,
+                    lti_id="video-{:d}".format(index),
+                    title="video {:d}".format(index),
+                    state=Video.READY,
+                    uploaded_on=timezone.now(),
+                    streaming_formats=[Video.HLS],
+                )
+                for index in range(BATCH_SIZE)
+            ]
+        )
+        videos = Video.objects.filter(playlist=playlist)
+        instances = list(videos)
+        rows = list(videos.values(*VideoReadSerializer.SOURCE_FIELDS))
+
+        results = [
+            measure_videos(
+                "model_serializer", with_model_serializer, instances, iterations
+            ),
+            measure_videos(
+                "read_serializer", with_read_serializer, instances, iterations
+            ),
+            measure_videos(
+                "read_serializer_rows", with_read_serializer, rows, iterations
+            ),
+        ]
+        transaction.set_rollback(True)
+
+    return results
@@ -7,3 +7,80 @@ AWS_UPLOAD_EXPIRATION_DELAY = getattr(
 )  # 24h
 
 VIDEO_SOURCE_MAX_SIZE = getattr(settings, "VIDEO_SOURCE_MAX_SIZE", 2 ** 30)  # 1GB
+
+# Multipart upload of video sources, in parts sent concurrently
+VIDEO_SOURCE_MULTIPART_MAX_SIZE = getattr(
+    settings, "VIDEO_SOURCE_MULTIPART_MAX_SIZE", 50 * 2 ** 30
+)  # 50GB
+VIDEO_SOURCE_PART_SIZE = getattr(
+    settings, "VIDEO_SOURCE_PART_SIZE", 64 * 2 ** 20
+)  # 64MB
+# Maximum number of part urls presigned in one request
+VIDEO_SOURCE_PART_URLS_MAX = getattr(settings, "VIDEO_SOURCE_PART_URLS_MAX", 100)
+
+# Maximum number of videos for which upload policies are built in one request
+VIDEO_UPLOAD_POLICIES_MAX = getattr(settings, "VIDEO_UPLOAD_POLICIES_MAX", 500)
+
+# Maximum number of videos updated in one bulk request
+VIDEO_BULK_UPDATE_MAX = getattr(settings, "VIDEO_BULK_UPDATE_MAX", 500)
+
+# Deletion jobs marking the objects of a cascade as deleted in the background: number of
+# objects marked in each transaction and delay after which a job that stopped recording its
+# progress is considered interrupted and resumed by another worker
+DELETION_JOB_BATCH_SIZE = getattr(settings, "DELETION_JOB_BATCH_SIZE", 1000)
+DELETION_JOB_STALE_TIMEOUT = getattr(
+    settings, "DELETION_JOB_STALE_TIMEOUT", 5 * 60
+)  # 5 minutes
+
+# Provisioning of LTI resources from a manifest uploaded in the admin: number of rows above
+# which the manifest is provisioned in the background by a job, number of rows provisioned in
+# each transaction of a job and delay after which a job that stopped recording its progress
+# is considered interrupted and resumed by another worker
+PROVISIONING_ADMIN_MAX_ROWS = getattr(settings, "PROVISIONING_ADMIN_MAX_ROWS", 5000)
+PROVISIONING_JOB_BATCH_SIZE = getattr(settings, "PROVISIONING_JOB_BATCH_SIZE", 1000)
+PROVISIONING_JOB_STALE_TIMEOUT = getattr(
+    settings, "PROVISIONING_JOB_STALE_TIMEOUT", 5 * 60
+)  # 5 minutes
+
+# Number of videos in each page of the videos of a playlist
+PLAYLIST_VIDEOS_PAGE_SIZE = getattr(settings, "PLAYLIST_VIDEOS_PAGE_SIZE", 20)
+PLAYLIST_VIDEOS_MAX_PAGE_SIZE = getattr(settings, "PLAYLIST_VIDEOS_MAX_PAGE_SIZE", 100)
+
+# Cache of the LTI passports used to verify LTI launch requests
+LTI_PASSPORT_CACHE_SIZE = getattr(settings, "LTI_PASSPORT_CACHE_SIZE", 1024)
+LTI_PASSPORT_CACHE_TIMEOUT = getattr(
+    settings, "LTI_PASSPORT_CACHE_TIMEOUT", 5 * 60
+)  # 5 minutes
+LTI_PASSPORT_CACHE_NEGATIVE_TIMEOUT = getattr(
+    settings, "LTI_PASSPORT_CACHE_NEGATIVE_TIMEOUT", 10
+)  # 10 seconds
+
+# Verification of the OAuth signature of LTI launch requests
+LTI_OAUTH_TIMESTAMP_WINDOW = getattr(
+    settings, "LTI_OAUTH_TIMESTAMP_WINDOW", 5 * 60
+)  # 5 minutes
+LTI_OAUTH_NONCE_CACHE_SIZE = getattr(settings, "LTI_OAUTH_NONCE_CACHE_SIZE", 10000)
+
+# Cache of the context rendered for students by LTI launch requests. The timeout is further
+# bounded by the validity of CloudFront signed urls.
+LTI_STUDENT_CONTEXT_CACHE_TIMEOUT = getattr(
+    settings, "LTI_STUDENT_CONTEXT_CACHE_TIMEOUT", 15 * 60
+)  # 15 minutes
+LTI_STUDENT_CONTEXT_CACHE_STALE_TIMEOUT = getattr(
+    settings, "LTI_STUDENT_CONTEXT_CACHE_STALE_TIMEOUT", 60
+)  # 1 minute
+LTI_STUDENT_CONTEXT_CACHE_LOCK_TIMEOUT = getattr(
+    settings, "LTI_STUDENT_CONTEXT_CACHE_LOCK_TIMEOUT", 10
+)  # 10 seconds
+
+# Number of CloudFront signed urls kept in memory by each process until they expire
+CLOUDFRONT_SIGNED_URLS_CACHE_SIZE = getattr(
+    settings, "CLOUDFRONT_SIGNED_URLS_CACHE_SIZE", 10000
+)
+
+# Archive of the objects soft deleted long ago: delay after which they are moved out of their
+# table, no longer undeletable from the admin, and number of objects moved in each transaction
+DELETED_OBJECTS_RETENTION = getattr(
+    settings, "DELETED_OBJECTS_RETENTION", 90 * 24 * 60 * 60
+)  # 90 days
+ARCHIVE_BATCH_SIZE = getattr(settings, "ARCHIVE_BATCH_SIZE", 1000)
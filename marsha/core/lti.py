@@ -1,13 +1,15 @@
 """LTI module that supports LTI 1.0."""
 import re
 
-from django.db.models import Q
 from django.utils.datastructures import MultiValueDictKeyError
 
-from pylti.common import LTIException, verify_request_common
+from pylti.common import LTIException
 
 from .models import ConsumerSite, Playlist, Video
-from .models.account import INSTRUCTOR, LTI_ROLES, STUDENT, LTIPassport
+from .models.account import INSTRUCTOR, LTI_ROLES, STUDENT
+from .utils import oauth_utils
+from .utils.lti_utils import get_lti_passport
+from .utils.timing_utils import timer
 
 
 class LTI:
@@ -27,6 +29,7 @@ class LTI:
         """
         self.request = request
         self._is_verified = False
+        self._lti_passport = None
 
     def verify(self):
         """Verify the LTI request.
@@ -61,45 +64,21 @@ class LTI:
             raise LTIException("A consumer site name is required.")
 
         # find a passport related to either the consumer site or the playlist
-        try:
-            lti_passport = LTIPassport.objects.get(
-                Q(
-                    oauth_consumer_key=consumer_key,
-                    is_enabled=True,
-                    consumer_site__name=consumer_site_name,
-                )
-                | Q(
-                    oauth_consumer_key=consumer_key,
-                    is_enabled=True,
-                    playlist__consumer_site__name=consumer_site_name,
-                )
-            )
-        except LTIPassport.DoesNotExist:
+        with timer("passport"):
+            lti_passport = get_lti_passport(consumer_key, consumer_site_name)
+        if lti_passport is None:
             raise LTIException(
                 "Could not find a valid passport for this consumer site and this "
                 "oauth consumer key: {:s}/{:s}.".format(
                     consumer_site_name, consumer_key
                 )
             )
+        self._lti_passport = lti_passport
 
-        consumers = {
-            str(lti_passport.oauth_consumer_key): {
-                "secret": str(lti_passport.shared_secret)
-            }
-        }
-        # A call to the verification function should raise an LTIException but
-        # we can further check that it returns True.
-        if (
-            verify_request_common(
-                consumers,
-                self.request.build_absolute_uri(),
-                self.request.method,
-                self.request.META,
-                dict(self.request.POST.items()),
-            )
-            is not True
-        ):
-            raise LTIException()
+        # Raises an LTIException if the signature is not valid
+        oauth_utils.verify_request(
+            self.request, consumer_key, str(lti_passport.shared_secret)
+        )
 
         self._is_verified = True
         return True
@@ -198,6 +177,49 @@ class LTI:
         """
         return bool(LTI_ROLES[STUDENT] & self.roles)
 
+    def get_consumer_site(self):
+        """Get the consumer site that sent the LTI launch request.
+
+        The consumer site is taken from the passport that verified the request when available,
+        which saves a query.
+
+        Returns
+        -------
+        core.models.account.ConsumerSite
+            The consumer site named after the `consumer_site_name` of the request.
+
+        """
+        lti_passport = self._lti_passport
+        if lti_passport is not None:
+            if lti_passport.consumer_site_id:
+                return lti_passport.consumer_site
+            return lti_passport.playlist.consumer_site
+
+        return ConsumerSite.objects.get(name=self.consumer_site_name)
+
+    def get_video_queryset(self):
+        """Get a queryset filtering the video targetted by the LTI launch request.
+
+        Returns
+        -------
+        django.db.models.query.QuerySet
+            A queryset on the video matching the `resource_link_id`, the `context_id` and the
+            consumer site of the request, if it exists.
+
+        """
+        # Make sure LTI verification have run successfully
+        assert getattr(self, "_is_verified", False) or self.verify()
+
+        # Filtering out the deleted playlists and consumer sites, as the manager of videos does
+        # for videos, lets the planner use the indexes of the hot lookups on each table
+        return Video.objects.filter(
+            lti_id=self.resource_link_id,
+            playlist__lti_id=self.context_id,
+            playlist__deleted__isnull=True,
+            playlist__consumer_site__name=self.consumer_site_name,
+            playlist__consumer_site__deleted__isnull=True,
+        )
+
     def get_or_create_video(self):
         """Get or create the video targetted by the LTI launch request.
 
@@ -213,32 +235,23 @@ class LTI:
         # Make sure LTI verification have run successfully
         assert getattr(self, "_is_verified", False) or self.verify()
 
-        # If the video already exist, retrieve it from database
-        try:
-            return Video.objects.get(
-                lti_id=self.resource_link_id,
-                playlist__lti_id=self.context_id,
-                playlist__consumer_site__name=self.consumer_site_name,
-            )
-        except Video.DoesNotExist:
-            # Only create the video if the request comes from an instructor
-            if not self.is_instructor:
+        # Only retrieve the video if the request does not come from an instructor
+        if not self.is_instructor:
+            try:
+                return self.get_video_queryset().get()
+            except Video.DoesNotExist:
                 return None
 
-        # Creating the video...
-        # - Get the consumer site (we know it exists because the passport verified)
-        consumer_site = ConsumerSite.objects.get(name=self.consumer_site_name)
-
-        # - Get the playlist if it exists or create it
-        playlist, _ = Playlist.objects.get_or_create(
+        # Get the playlist and the video or create them if they don't exist, with one
+        # statement for each of them. This is race-free thanks to their unique indexes.
+        playlist, _ = Playlist.objects.get_or_create_non_deleted(
+            consumer_site=self.get_consumer_site(),
             lti_id=self.context_id,
-            consumer_site=consumer_site,
             defaults={"title": self.context_title},
         )
-
-        # Create the video
-        return Video.objects.create(
-            lti_id=self.resource_link_id,
-            title=self.resource_link_title,
+        video, _ = Video.objects.get_or_create_non_deleted(
             playlist=playlist,
+            lti_id=self.resource_link_id,
+            defaults={"title": self.resource_link_title},
         )
+        return video
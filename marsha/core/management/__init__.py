@@ -0,0 +1 @@
+"""Management of the ``core`` app of the Marsha project."""
@@ -0,0 +1,103 @@
+"""Base classes of the management commands of the ``core`` app of the Marsha project."""
+import abc
+import time
+
+from django.core.management.base import BaseCommand
+
+from ..utils.job_utils import claim_job
+
+
+class JobCommand(abc.ABC, BaseCommand):
+    """Base command of the workers claiming and running the jobs of a model, one at a time.
+
+    Subclasses set the model of their jobs with the defaults of their options and run each
+    job claimed in batches of the size requested.
+
+    """
+
+    # The model of the jobs, based on ``BackgroundJob``
+    model = None
+    # The default number of objects processed in each transaction and its description
+    batch_size = None
+    batch_size_help = None
+    # The default number of seconds after which a running job without progress is resumed
+    stale_timeout = None
+
+    def add_arguments(self, parser):
+        """Add the size of the batches, the stale timeout and the polling options."""
+        parser.add_argument(
+            "--batch-size", type=int, default=self.batch_size, help=self.batch_size_help
+        )
+        parser.add_argument(
+            "--stale-timeout",
+            type=int,
+            default=self.stale_timeout,
+            help="Number of seconds after which a running job without progress is resumed.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when there is no job left to run instead of waiting for new ones.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Number of seconds to wait before looking for new jobs.",
+        )
+
+    @abc.abstractmethod
+    def run_job(self, job, batch_size):
+        """Run a job claimed by the worker until it is done.
+
+        Parameters
+        ----------
+        job : BackgroundJob
+            The job to run
+        batch_size : integer
+            The maximum number of objects processed in each transaction
+
+        """
+
+    @abc.abstractmethod
+    def get_report(self, job):
+        """Describe the work done by a job once it is done.
+
+        Parameters
+        ----------
+        job : BackgroundJob
+            The job done
+
+        Returns
+        -------
+        string
+            The amount of work done by the job, e.g. "3 objects deleted"
+
+        """
+
+    def handle(self, *args, **options):
+        """Run the jobs until there is none left or forever."""
+        while True:
+            job = claim_job(self.model, options["stale_timeout"])
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+                continue
+
+            start = time.perf_counter()
+            try:
+                self.run_job(job, options["batch_size"])
+            except Exception as error:  # pylint: disable=broad-except
+                # The progress of the job is the one of its last batch committed
+                job.state, job.error = self.model.FAILED, repr(error)
+                self.model.objects.filter(pk=job.pk).update(
+                    state=job.state, error=job.error
+                )
+                self.stderr.write("{!s}: {:s}".format(job, job.error))
+            else:
+                self.stdout.write(
+                    "{!s}: {:s} in {:.1f}s.".format(
+                        job, self.get_report(job), time.perf_counter() - start
+                    )
+                )
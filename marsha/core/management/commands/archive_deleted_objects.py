@@ -0,0 +1,47 @@
+"""Move the objects soft deleted for longer than the retention period to archive tables."""
+from datetime import timedelta
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...defaults import ARCHIVE_BATCH_SIZE, DELETED_OBJECTS_RETENTION
+from ...utils.archive_utils import archive_deleted_objects
+
+
+class Command(BaseCommand):
+    """Archive the objects deleted long ago, to be run periodically."""
+
+    help = (
+        "Move the objects soft deleted for longer than the retention period from their "
+        "table to its archive table, in batches. They can be restored with the "
+        "restore_archived_objects command."
+    )
+
+    def add_arguments(self, parser):
+        """Add the retention period and the size of the batches."""
+        parser.add_argument(
+            "--retention-days",
+            type=float,
+            default=DELETED_OBJECTS_RETENTION / (24 * 60 * 60),
+            help="Number of days during which deleted objects are kept in their table.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=ARCHIVE_BATCH_SIZE,
+            help="Number of objects moved in each transaction.",
+        )
+
+    def handle(self, *args, **options):
+        """Archive the objects and print their number by model."""
+        start = time.perf_counter()
+        counts = archive_deleted_objects(
+            timedelta(days=options["retention_days"]), options["batch_size"]
+        )
+        for label, count in counts.items():
+            self.stdout.write("{:s}: {:d} objects archived.".format(label, count))
+        self.stdout.write(
+            "{:d} objects archived in {:.1f}s.".format(
+                sum(counts.values()), time.perf_counter() - start
+            )
+        )
@@ -0,0 +1,49 @@
+"""Run benchmarks of the hot paths of the ``core`` app."""
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from ...benchmarks import BENCHMARKS
+from ...benchmarks.base import format_results
+
+
+class Command(BaseCommand):
+    """Run benchmarks and print their results as tables."""
+
+    help = "Run benchmarks of the hot paths of the core app and print their results."
+
+    def add_arguments(self, parser):
+        """Add the names of the benchmarks to run and the number of iterations."""
+        parser.add_argument(
+            "names",
+            nargs="*",
+            metavar="name",
+            help="Benchmarks to run among: {:s}. Run all of them by default.".format(
+                ", ".join(sorted(BENCHMARKS))
+            ),
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=1000,
+            help="Number of iterations of each benchmark.",
+        )
+
+    def handle(self, *args, **options):
+        """Run the benchmarks and print their results."""
+        names = options["names"] or sorted(BENCHMARKS)
+        unknown_names = set(names) - set(BENCHMARKS)
+        if unknown_names:
+            raise CommandError(
+                "Unknown benchmarks: {:s}.".format(", ".join(sorted(unknown_names)))
+            )
+
+        # Requests are built with the test request factory
+        with override_settings(ALLOWED_HOSTS=settings.ALLOWED_HOSTS + ["testserver"]):
+            for name in names:
+                results = import_module(BENCHMARKS[name]).run(options["iterations"])
+                self.stdout.write(name)
+                self.stdout.write(format_results(results))
+                self.stdout.write("")
@@ -0,0 +1,64 @@
+"""Provision the playlists and videos listed in a manifest before LTI launch requests."""
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...utils.provisioning_utils import (
+    MANIFEST_FIELDS,
+    MANIFEST_FORMATS,
+    provision_lti_resources,
+    read_manifest,
+)
+
+
+class Command(BaseCommand):
+    """Create the playlists and videos of a manifest that don't exist yet."""
+
+    help = (
+        "Create the playlists and videos listed in a CSV or JSONL manifest that don't exist "
+        "yet. Each row should have the following fields: {:s}.".format(
+            ", ".join(MANIFEST_FIELDS)
+        )
+    )
+
+    def add_arguments(self, parser):
+        """Add the path of the manifest, its format and the size of the batches."""
+        parser.add_argument("manifest", help="Path of the manifest file.")
+        parser.add_argument(
+            "--format",
+            choices=MANIFEST_FORMATS,
+            help="Format of the manifest. Guessed from its extension by default.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows processed in each transaction.",
+        )
+        parser.add_argument(
+            "--consumer-site",
+            help="Name of the consumer site for all the rows, ignoring their own.",
+        )
+
+    def handle(self, *args, **options):
+        """Provision the manifest and print a report with the throughput."""
+        manifest_format = options["format"]
+        if manifest_format is None:
+            manifest_format = os.path.splitext(options["manifest"])[1][1:].lower()
+            if manifest_format not in MANIFEST_FORMATS:
+                raise CommandError(
+                    "Can't guess the format of the manifest, please use --format."
+                )
+
+        try:
+            # The BOM added by some spreadsheet softwares is ignored
+            with open(options["manifest"], encoding="utf-8-sig", newline="") as lines:
+                report = provision_lti_resources(
+                    read_manifest(lines, manifest_format),
+                    batch_size=options["batch_size"],
+                    consumer_site_name=options["consumer_site"],
+                )
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+
+        self.stdout.write(str(report))
@@ -0,0 +1,45 @@
+"""Restore archived objects in the table of their model, to be undeleted from the admin."""
+from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from ...utils.archive_utils import get_archived_models, restore_archived_objects
+
+
+class Command(BaseCommand):
+    """Move archived objects back to their table, still soft deleted."""
+
+    help = (
+        "Move archived objects back to the table of their model, along with the archived "
+        "objects they reference and those deleted in cascade with them. They stay soft "
+        "deleted and can then be undeleted from the admin."
+    )
+
+    def add_arguments(self, parser):
+        """Add the model and the primary keys of the objects to restore."""
+        parser.add_argument("model", help="Label of the model, e.g. core.Video.")
+        parser.add_argument(
+            "pks", nargs="+", metavar="pk", help="Primary keys of the objects."
+        )
+
+    def handle(self, *args, **options):
+        """Restore the objects and print their number by model."""
+        try:
+            model = apps.get_model(options["model"])
+        except (LookupError, ValueError) as error:
+            raise CommandError(str(error))
+        if model not in get_archived_models():
+            raise CommandError(
+                "The objects of {:s} are not archived.".format(options["model"])
+            )
+
+        try:
+            pks = [model._meta.pk.to_python(pk) for pk in options["pks"]]
+        except ValidationError as error:
+            raise CommandError(" ".join(error.messages))
+
+        counts = restore_archived_objects(model, pks)
+        if not counts:
+            raise CommandError("No archived object matches these primary keys.")
+        for label, count in counts.items():
+            self.stdout.write("{:s}: {:d} objects restored.".format(label, count))
@@ -0,0 +1,26 @@
+"""Run the deletion jobs scheduled from the admin as a background worker."""
+from ...defaults import DELETION_JOB_BATCH_SIZE, DELETION_JOB_STALE_TIMEOUT
+from ...models import DeletionJob
+from ...utils.deletion_job_utils import run_deletion_job
+from ..base import JobCommand
+
+
+class Command(JobCommand):
+    """Claim and run the pending or interrupted deletion jobs, one at a time."""
+
+    help = (
+        "Soft delete the objects of the pending deletion jobs and resume the interrupted "
+        "ones, marking their relations as deleted in batches."
+    )
+    model = DeletionJob
+    batch_size = DELETION_JOB_BATCH_SIZE
+    batch_size_help = "Number of objects marked as deleted in each transaction."
+    stale_timeout = DELETION_JOB_STALE_TIMEOUT
+
+    def run_job(self, job, batch_size):
+        """Mark the objects of the cascade of the job as deleted, see `run_deletion_job`."""
+        run_deletion_job(job, batch_size=batch_size)
+
+    def get_report(self, job):
+        """Report the number of objects marked as deleted by the job."""
+        return "{:d} objects deleted".format(sum(job.counts.values()))
@@ -0,0 +1,26 @@
+"""Run the provisioning jobs scheduled from the admin as a background worker."""
+from ...defaults import PROVISIONING_JOB_BATCH_SIZE, PROVISIONING_JOB_STALE_TIMEOUT
+from ...models import ProvisioningJob
+from ...utils.provisioning_job_utils import run_provisioning_job
+from ..base import JobCommand
+
+
+class Command(JobCommand):
+    """Claim and run the pending or interrupted provisioning jobs, one at a time."""
+
+    help = (
+        "Provision the manifests of the pending provisioning jobs and resume the "
+        "interrupted ones, provisioning their rows in batches."
+    )
+    model = ProvisioningJob
+    batch_size = PROVISIONING_JOB_BATCH_SIZE
+    batch_size_help = "Number of rows provisioned in each transaction."
+    stale_timeout = PROVISIONING_JOB_STALE_TIMEOUT
+
+    def run_job(self, job, batch_size):
+        """Provision the rows of the manifest of the job, see `run_provisioning_job`."""
+        run_provisioning_job(job, batch_size=batch_size)
+
+    def get_report(self, job):
+        """Report the number of rows provisioned by the job."""
+        return "{:d} rows provisioned".format(job.counts.get("rows", 0))
@@ -1,10 +1,162 @@
 """This module holds the managers for the marsha models."""
 
 from django.contrib.auth.models import UserManager as DefaultUserManager
+from django.db import connections, router
+from django.db.models import signals, sql
 
+from psqlextra.indexes import ConditionalUniqueIndex
 from safedelete.managers import SafeDeleteManager
 
 
+class BaseManager(SafeDeleteManager):
+    """Extends the manager for soft-deletion with race-free creation of unique objects."""
+
+    def _get_conditional_unique_index(self, field_names):
+        """Find the conditional unique index defined on exactly the fields passed in argument.
+
+        Parameters
+        ----------
+        field_names : Iterable[string]
+            Names of the fields that should compose the unique index
+
+        Returns
+        -------
+        psqlextra.indexes.ConditionalUniqueIndex
+            The conditional unique index defined on these fields
+
+        Raises
+        ------
+        ValueError
+            If no conditional unique index is defined on these fields
+
+        """
+        for index in self.model._meta.indexes:
+            if isinstance(index, ConditionalUniqueIndex) and set(index.fields) == set(
+                field_names
+            ):
+                return index
+
+        raise ValueError(
+            "The model '{:s}' has no conditional unique index on the fields: {:s}.".format(
+                self.model._meta.object_name, ", ".join(sorted(field_names))
+            )
+        )
+
+    def _get_or_create_sql(self, obj, fields, index, using):
+        """Build the statement getting the non deleted object matching a new one or creating it.
+
+        Parameters
+        ----------
+        obj : models.Model
+            The object to create, holding the values of the fields of the index
+        fields : List[models.Field]
+            The fields to insert and to return
+        index : psqlextra.indexes.ConditionalUniqueIndex
+            The conditional unique index used as arbiter of the insert
+        using : string
+            The alias of the database
+
+        Returns
+        -------
+        Tuple[string, Tuple]
+            The SQL statement, returning the values of the fields followed by a boolean set to
+            True if the object was created, and its parameters
+
+        """
+        model = self.model
+        connection = connections[using]
+        quote_name = connection.ops.quote_name
+        index_fields = [model._meta.get_field(name) for name in index.fields]
+
+        query = sql.InsertQuery(model)
+        query.insert_values(fields, [obj])
+        [(insert_sql, insert_params)] = query.get_compiler(using=using).as_sql()
+
+        returning = ", ".join(quote_name(field.column) for field in fields)
+        upsert_sql = (
+            "WITH inserted AS ("
+            "{insert:s} ON CONFLICT ({conflict_target:s}) WHERE {predicate:s} "
+            "DO NOTHING RETURNING {returning:s}"
+            ") "
+            "SELECT {returning:s}, true FROM inserted "
+            "UNION ALL "
+            "SELECT {returning:s}, false FROM {table:s} WHERE {lookup:s} AND {predicate:s}"
+        ).format(
+            insert=insert_sql,
+            conflict_target=", ".join(
+                quote_name(field.column) for field in index_fields
+            ),
+            predicate=index.condition,
+            returning=returning,
+            table=quote_name(model._meta.db_table),
+            lookup=" AND ".join(
+                "{:s} = %s".format(quote_name(field.column)) for field in index_fields
+            ),
+        )
+        params = tuple(insert_params) + tuple(
+            field.get_db_prep_save(getattr(obj, field.attname), connection)
+            for field in index_fields
+        )
+        return upsert_sql, params
+
+    def get_or_create_non_deleted(self, defaults=None, **kwargs):
+        """Get the non deleted object matching the arguments or create it, in one statement.
+
+        The lookup arguments must be the exact fields of a conditional unique index of the model
+        (e.g. a ``NonDeletedUniqueIndex``). An ``INSERT ... ON CONFLICT DO NOTHING`` using this
+        partial index as arbiter creates the object if it does not exist. Otherwise, the
+        statement selects the existing row, in a common table expression, without writing it.
+
+        The select can't see a row committed by a concurrent transaction after the statement
+        started: nothing is returned in this rare case and the statement is run again.
+
+        Contrary to ``get_or_create``, concurrent calls can't create duplicates and never fail
+        with an ``IntegrityError`` for this index.
+
+        Parameters
+        ----------
+        defaults : dictionary
+            Values of the fields to set only if the object is created
+        kwargs : dictionary
+            Values of the fields composing the unique index, used to find the object
+
+        Returns
+        -------
+        Tuple[models.Model, boolean]
+            The object found or created and a boolean set to True if the object was created
+
+        """
+        model = self.model
+        index = self._get_conditional_unique_index(kwargs)
+        using = self._db or router.db_for_write(model)
+        connection = connections[using]
+
+        obj = model(**dict(defaults or {}, **kwargs))
+        fields = model._meta.local_concrete_fields
+        upsert_sql, params = self._get_or_create_sql(obj, fields, index, using)
+
+        row = None
+        with connection.cursor() as cursor:
+            while row is None:
+                cursor.execute(upsert_sql, params)
+                row = cursor.fetchone()
+
+        obj = model.from_db(using, [field.attname for field in fields], row[:-1])
+        created = row[-1]
+
+        if created:
+            signals.post_save.send(
+                sender=model,
+                instance=obj,
+                created=True,
+                update_fields=None,
+                raw=False,
+                using=using,
+            )
+
+        return obj, created
+
+
 class UserManager(DefaultUserManager, SafeDeleteManager):
     """Extends the default manager for users with the one for soft-deletion."""
 
@@ -0,0 +1,61 @@
+"""Middlewares of the ``core`` app of the Marsha project."""
+import json
+import logging
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from .utils import timing_utils
+
+
+logger = logging.getLogger(__name__)
+
+
+class ServerTimingMiddleware:
+    """Measure the SQL queries and the phases of each request.
+
+    The timings are sent in a `Server-Timing` header, that browsers show in their developer
+    tools, and logged as a JSON object under the "marsha.core.middleware" logger.
+
+    The timings reveal details of the backend, so the middleware is only used when the
+    `SERVER_TIMING_ACTIVE` setting is set. Otherwise, Django removes it from the middleware
+    chain and the timers on the hot paths do nothing.
+
+    """
+
+    def __init__(self, get_response):
+        """Remove the middleware from the chain if it is not activated.
+
+        Raises
+        ------
+        MiddlewareNotUsed
+            If the `SERVER_TIMING_ACTIVE` setting is not set
+
+        """
+        if not settings.SERVER_TIMING_ACTIVE:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Measure the request and add its timings to the response."""
+        timings = timing_utils.start_request()
+        try:
+            with connection.execute_wrapper(timings):
+                response = self.get_response(request)
+        finally:
+            timing_utils.stop_request()
+
+        response["Server-Timing"] = timings.get_server_timing()
+        logger.info(
+            json.dumps(
+                dict(
+                    timings.as_dict(),
+                    method=request.method,
+                    path=request.path,
+                    status=response.status_code,
+                ),
+                sort_keys=True,
+            )
+        )
+        return response
@@ -0,0 +1,25 @@
+# Generated by Django 2.0 on 2026-10-18 19:00
+
+from django.db import migrations
+
+import marsha.core.models.base
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("core", "0003_auto_20180915_1117")]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="playlist",
+            index=marsha.core.models.base.NonDeletedUniqueIndex(
+                fields=["consumer_site", "lti_id"], name="playlist_consume_c7ec0f_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="video",
+            index=marsha.core.models.base.NonDeletedUniqueIndex(
+                fields=["playlist", "lti_id"], name="video_playlis_816ef5_idx"
+            ),
+        ),
+    ]
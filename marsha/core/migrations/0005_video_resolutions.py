@@ -0,0 +1,28 @@
+# Generated by Django 2.0 on 2026-10-18 19:21
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("core", "0004_non_deleted_unique_lti_ids")]
+
+    operations = [
+        migrations.AddField(
+            model_name="video",
+            name="resolutions",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.PositiveSmallIntegerField(),
+                blank=True,
+                help_text=(
+                    "resolutions in which the active version of the video and its "
+                    "thumbnails were produced by the transcoding pipeline, unknown for the "
+                    "videos transcoded before they were recorded."
+                ),
+                null=True,
+                size=None,
+                verbose_name="resolutions",
+            ),
+        )
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 2.0 on 2026-10-18 19:24
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("core", "0005_video_resolutions")]
+
+    operations = [
+        migrations.AddField(
+            model_name="video",
+            name="streaming_formats",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.CharField(choices=[("hls", "HLS")], max_length=10),
+                blank=True,
+                default=list,
+                help_text=(
+                    "adaptive streaming formats in which the active version of the video "
+                    "was produced by the transcoding pipeline."
+                ),
+                size=None,
+                verbose_name="streaming formats",
+            ),
+        )
+    ]
@@ -0,0 +1,148 @@
+# Generated by Django 2.0 on 2026-10-18 19:48
+
+import uuid
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("core", "0006_video_streaming_formats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeletionJob",
+            fields=[
+                ("deleted", models.DateTimeField(editable=False, null=True)),
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        help_text="primary key for the record as UUID",
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="id",
+                    ),
+                ),
+                (
+                    "created_on",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="date and time at which a record was created",
+                        verbose_name="created on",
+                    ),
+                ),
+                (
+                    "updated_on",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="date and time at which a record was last updated",
+                        verbose_name="updated on",
+                    ),
+                ),
+                (
+                    "object_id",
+                    models.UUIDField(
+                        help_text="primary key of the object to delete",
+                        verbose_name="object id",
+                    ),
+                ),
+                (
+                    "object_repr",
+                    models.CharField(
+                        help_text="representation of the object to delete",
+                        max_length=255,
+                        verbose_name="object",
+                    ),
+                ),
+                (
+                    "state",
+                    models.CharField(
+                        choices=[
+                            ("pending", "pending"),
+                            ("running", "running"),
+                            ("done", "done"),
+                            ("failed", "failed"),
+                        ],
+                        default="pending",
+                        help_text="state of the deletion job",
+                        max_length=20,
+                        verbose_name="state",
+                    ),
+                ),
+                (
+                    "step",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="index of the relation of the cascade being deleted",
+                        verbose_name="step",
+                    ),
+                ),
+                (
+                    "steps",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="number of relations in the cascade",
+                        verbose_name="steps",
+                    ),
+                ),
+                (
+                    "counts",
+                    django.contrib.postgres.fields.jsonb.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text="number of objects marked as deleted by model",
+                        verbose_name="counts",
+                    ),
+                ),
+                (
+                    "deleted_on",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="date and time set as deletion date on all the objects",
+                        null=True,
+                        verbose_name="deleted on",
+                    ),
+                ),
+                (
+                    "finished_on",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="date and time at which the job finished",
+                        null=True,
+                        verbose_name="finished on",
+                    ),
+                ),
+                (
+                    "error",
+                    models.TextField(
+                        blank=True,
+                        help_text="error that stopped the job, if any",
+                        verbose_name="error",
+                    ),
+                ),
+                (
+                    "content_type",
+                    models.ForeignKey(
+                        help_text="model of the object to delete",
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="contenttypes.ContentType",
+                        verbose_name="content type",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "deletion job",
+                "verbose_name_plural": "deletion jobs",
+                "db_table": "deletion_job",
+                "ordering": ["-created_on"],
+            },
+        )
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.0 on 2026-10-18 19:54
+
+from django.db import migrations
+
+import marsha.core.models.base
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("core", "0007_deletion_job")]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="consumersite",
+            index=marsha.core.models.base.NonDeletedIndex(
+                fields=["name"], name="consumer_si_name_e88584_idx"
+            ),
+        )
+    ]
@@ -0,0 +1,181 @@
+# Generated by Django 2.0 on 2026-10-18 20:00
+
+from django.db import migrations, models
+
+import marsha.core.utils.uuid_utils
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("core", "0008_consumer_site_name_index")]
+
+    operations = [
+        migrations.AlterField(
+            model_name="audiotrack",
+            name="id",
+            field=models.UUIDField(
+                default=marsha.core.utils.uuid_utils.uuid7,
+                editable=False,
+                help_text="primary key for the record as UUID",
+                primary_key=True,
+                serialize=False,
+                verbose_name="id",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="consumersite",
+            name="id",
+            field=models.UUIDField(
+                default=marsha.core.utils.uuid_utils.uuid7,
+                editable=False,
+                help_text="primary key for the record as UUID",
+                primary_key=True,
+                serialize=False,
+                verbose_name="id",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="consumersiteaccess",
+            name="id",
+            field=models.UUIDField(
+                default=marsha.core.utils.uuid_utils.uuid7,
+                editable=False,
+                help_text="primary key for the record as UUID",
+                primary_key=True,
+                serialize=False,
+                verbose_name="id",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="consumersiteorganization",
+            name="id",
+            field=models.UUIDField(
+                default=marsha.core.utils.uuid_utils.uuid7,
+                editable=False,
+                help_text="primary key for the record as UUID",
+                primary_key=True,
+                serialize=False,
+                verbose_name="id",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="deletionjob",
+            name="id",
+            field=models.UUIDField(
+                default=marsha.core.utils.uuid_utils.uuid7,
+                editable=False,
+                help_text="primary key for the record as UUID",
+                primary_key=True,
+                serialize=False,
+                verbose_name="id",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="ltipassport",
+            name="id",
+            field=models.UUIDField(
+                default=marsha.core.utils.uuid_utils.uuid7,
+                editable=False,
+                help_text="primary key for the record as UUID",
+                primary_key=True,
+                serialize=False,
+                verbose_name="id",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="organization",
+            name="id",
+            field=models.UUIDField(
+                default=marsha.core.utils.uuid_utils.uuid7,
+                editable=False,
+                help_text="primary key for the record as UUID",
+                primary_key=True,
+                serialize=False,
+                verbose_name="id",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="organizationaccess",
+            name="id",
+            field=models.UUIDField(
+                default=marsha.core.utils.uuid_utils.uuid7,
+                editable=False,
+                help_text="primary key for the record as UUID",
+                primary_key=True,
+                serialize=False,
+                verbose_name="id",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="playlist",
+            name="id",
+            field=models.UUIDField(
+                default=marsha.core.utils.uuid_utils.uuid7,
+                editable=False,
+                help_text="primary key for the record as UUID",
+                primary_key=True,
+                serialize=False,
+                verbose_name="id",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="playlistaccess",
+            name="id",
+            field=models.UUIDField(
+                default=marsha.core.utils.uuid_utils.uuid7,
+                editable=False,
+                help_text="primary key for the record as UUID",
+                primary_key=True,
+                serialize=False,
+                verbose_name="id",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="signtrack",
+            name="id",
+            field=models.UUIDField(
+                default=marsha.core.utils.uuid_utils.uuid7,
+                editable=False,
+                help_text="primary key for the record as UUID",
+                primary_key=True,
+                serialize=False,
+                verbose_name="id",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="subtitletrack",
+            name="id",
+            field=models.UUIDField(
+                default=marsha.core.utils.uuid_utils.uuid7,
+                editable=False,
+                help_text="primary key for the record as UUID",
+                primary_key=True,
+                serialize=False,
+                verbose_name="id",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="user",
+            name="id",
+            field=models.UUIDField(
+                default=marsha.core.utils.uuid_utils.uuid7,
+                editable=False,
+                help_text="primary key for the record as UUID",
+                primary_key=True,
+                serialize=False,
+                verbose_name="id",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="video",
+            name="id",
+            field=models.UUIDField(
+                default=marsha.core.utils.uuid_utils.uuid7,
+                editable=False,
+                help_text="primary key for the record as UUID",
+                primary_key=True,
+                serialize=False,
+                verbose_name="id",
+            ),
+        ),
+    ]
@@ -0,0 +1,127 @@
+# Generated by Django 2.0 on 2026-10-18 20:41
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+
+import marsha.core.utils.uuid_utils
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("core", "0009_time_ordered_uuids")]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProvisioningJob",
+            fields=[
+                ("deleted", models.DateTimeField(editable=False, null=True)),
+                (
+                    "id",
+                    models.UUIDField(
+                        default=marsha.core.utils.uuid_utils.uuid7,
+                        editable=False,
+                        help_text="primary key for the record as UUID",
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="id",
+                    ),
+                ),
+                (
+                    "created_on",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="date and time at which a record was created",
+                        verbose_name="created on",
+                    ),
+                ),
+                (
+                    "updated_on",
+                    models.DateTimeField(
+                        auto_now=True,
+                        help_text="date and time at which a record was last updated",
+                        verbose_name="updated on",
+                    ),
+                ),
+                (
+                    "manifest",
+                    models.TextField(
+                        help_text="content of the manifest uploaded",
+                        verbose_name="manifest",
+                    ),
+                ),
+                (
+                    "manifest_format",
+                    models.CharField(
+                        choices=[("csv", "CSV"), ("jsonl", "JSONL")],
+                        help_text="format of the manifest",
+                        max_length=10,
+                        verbose_name="format",
+                    ),
+                ),
+                (
+                    "state",
+                    models.CharField(
+                        choices=[
+                            ("pending", "pending"),
+                            ("running", "running"),
+                            ("done", "done"),
+                            ("failed", "failed"),
+                        ],
+                        default="pending",
+                        help_text="state of the provisioning job",
+                        max_length=20,
+                        verbose_name="state",
+                    ),
+                ),
+                (
+                    "rows",
+                    models.PositiveIntegerField(
+                        help_text="number of rows in the manifest", verbose_name="rows"
+                    ),
+                ),
+                (
+                    "counts",
+                    django.contrib.postgres.fields.jsonb.JSONField(
+                        blank=True,
+                        default=dict,
+                        help_text="number of rows processed and of objects created",
+                        verbose_name="counts",
+                    ),
+                ),
+                (
+                    "finished_on",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="date and time at which the job finished",
+                        null=True,
+                        verbose_name="finished on",
+                    ),
+                ),
+                (
+                    "error",
+                    models.TextField(
+                        blank=True,
+                        help_text="error that stopped the job, if any",
+                        verbose_name="error",
+                    ),
+                ),
+                (
+                    "consumer_site",
+                    models.ForeignKey(
+                        help_text="consumer site of all the rows of the manifest",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="provisioning_jobs",
+                        to="core.ConsumerSite",
+                        verbose_name="consumer site",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "provisioning job",
+                "verbose_name_plural": "provisioning jobs",
+                "db_table": "provisioning_job",
+                "ordering": ["-created_on"],
+            },
+        )
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.0 on 2026-10-18 20:56
+
+from django.db import migrations
+
+import marsha.core.models.base
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("core", "0010_provisioning_job")]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="video",
+            index=marsha.core.models.base.NonDeletedIndex(
+                fields=["playlist", "position", "id"], name="video_playlis_6a7fcb_idx"
+            ),
+        )
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 2.0 on 2026-10-18 21:20
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("core", "0012_deletion_job_background_job")]
+
+    operations = [
+        migrations.AlterField(
+            model_name="provisioningjob",
+            name="counts",
+            field=django.contrib.postgres.fields.jsonb.JSONField(
+                blank=True,
+                default=dict,
+                help_text="number of objects processed by the job, by kind",
+                verbose_name="counts",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="provisioningjob",
+            name="state",
+            field=models.CharField(
+                choices=[
+                    ("pending", "pending"),
+                    ("running", "running"),
+                    ("done", "done"),
+                    ("failed", "failed"),
+                ],
+                default="pending",
+                help_text="state of the job",
+                max_length=20,
+                verbose_name="state",
+            ),
+        ),
+    ]
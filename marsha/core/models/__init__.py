@@ -2,3 +2,6 @@
 # pylint: disable=wildcard-import,unused-wildcard-import
 from .account import *  # noqa isort:skip
 from .video import *  # noqa isort:skip
+from .job import *  # noqa isort:skip
+from .deletion import *  # noqa isort:skip
+from .provisioning import *  # noqa isort:skip
@@ -10,7 +10,7 @@ from safedelete import HARD_DELETE
 
 from marsha.core.managers import UserManager
 
-from .base import BaseModel, NonDeletedUniqueIndex
+from .base import BaseModel, NonDeletedIndex, NonDeletedUniqueIndex
 
 
 OAUTH_CONSUMER_KEY_CHARS = string.ascii_uppercase + string.digits
@@ -114,6 +114,9 @@ class LTIPassport(BaseModel):
         default=True,
     )
 
+    # LTI launch requests are verified with the passport of their consumer key
+    hot_lookups = (("oauth_consumer_key",),)
+
     class Meta:
         """Options for the ``LTIPassport`` model."""
 
@@ -158,12 +161,16 @@ class ConsumerSite(BaseModel):
         help_text=_("users who have been granted access to this consumer site"),
     )
 
+    # LTI launch requests look up their consumer site by name
+    hot_lookups = (("name",),)
+
     class Meta:
         """Options for the ``ConsumerSite`` model."""
 
         db_table = "consumer_site"
         verbose_name = _("consumer site")
         verbose_name_plural = _("consumer sites")
+        indexes = [NonDeletedIndex(["name"])]
 
     def __str__(self):
         """Get the string representation of an instance."""
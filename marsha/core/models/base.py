@@ -4,16 +4,18 @@ Base model for the core app of the Marsha project.
 In this base model, we activate generic behaviours that apply to all our models and enforce
 checks and validation that go further than what Django is doing.
 """
-import uuid
-
 from django.core import checks
-from django.core.exceptions import ValidationError
-from django.db import models
+from django.core.exceptions import NON_FIELD_ERRORS, FieldDoesNotExist, ValidationError
+from django.db import connection, connections, models, router
 from django.utils.translation import gettext_lazy as _
 
 from psqlextra.indexes import ConditionalUniqueIndex
 from safedelete.models import SOFT_DELETE_CASCADE, SafeDeleteModel
 
+from ..managers import BaseManager
+from ..utils.deletion_utils import soft_delete_cascade
+from ..utils.uuid_utils import uuid7
+
 
 CHECKED_APPS = {"core"}
 
@@ -70,6 +72,40 @@ class NonDeletedUniqueIndex(ConditionalUniqueIndex):
         return path, args, kwargs
 
 
+class NonDeletedIndex(models.Index):
+    """An index on non deleted objects, the only ones looked up on the hot paths.
+
+    Its condition is the one of ``NonDeletedUniqueIndex``: deleted objects, which pile up with
+    time, are left out of the index and the planner uses it for queries filtering them out.
+
+    """
+
+    condition = NonDeletedUniqueIndex.condition
+    sql_create_index = (
+        "CREATE INDEX %(name)s ON %(table)s%(using)s (%(columns)s)%(extra)s "
+        "WHERE %(condition)s"
+    )
+
+    def __init__(self, fields, name=None):
+        """Accept the fields as positional argument, as ``NonDeletedUniqueIndex`` does.
+
+        For the parameters, see ``django.db.models.indexes.Index.__init__``.
+
+        """
+        super().__init__(fields=fields, name=name)
+
+    def create_sql(self, model, schema_editor, using=""):
+        """Add the condition to the statement creating the index.
+
+        For the parameters, see ``django.db.models.indexes.Index.create_sql``.
+
+        """
+        statement = super().create_sql(model, schema_editor, using)
+        statement.template = self.sql_create_index
+        statement.parts["condition"] = self.condition
+        return statement
+
+
 class BaseModel(SafeDeleteModel):
     """Base model for all our models.
 
@@ -78,12 +114,14 @@ class BaseModel(SafeDeleteModel):
     The default ``safedelete`` policy is ``SOFT_DELETE_CASCADE``, ie the object to
     delete and its relations will be soft deleted:  their ``deleted`` field will be
     filled with the current date-time (the opposite, ``None``, is the same as
-    "not deleted")
+    "not deleted"). The relations are soft deleted with one statement each instead of
+    one object at a time, see ``utils.deletion_utils``.
 
     Also it adds some checks run with ``django check``:
         - check that every ``ManyToManyField`` use a defined ``through`` table.
         - check that every model have a ``db_table`` defined, not prefixed with the name
         of the app or the project.
+        - check that every lookup declared in ``hot_lookups`` is supported by an index.
 
     """
 
@@ -91,7 +129,8 @@ class BaseModel(SafeDeleteModel):
         verbose_name=_("id"),
         help_text=_("primary key for the record as UUID"),
         primary_key=True,
-        default=uuid.uuid4,
+        # time-ordered so that new rows are inserted next to each other in indexes
+        default=uuid7,
         editable=False,
     )
     created_on = models.DateTimeField(
@@ -107,8 +146,14 @@ class BaseModel(SafeDeleteModel):
         editable=False,
     )
 
+    objects = BaseManager()
+
     _safedelete_policy = SOFT_DELETE_CASCADE
 
+    # The lookups run on the hot paths, e.g. on each LTI launch, each one being a tuple of
+    # fields filtered with an equality on non deleted objects
+    hot_lookups = ()
+
     class Meta:
         """Options for the ``BaseModel`` model."""
 
@@ -214,6 +259,82 @@ class BaseModel(SafeDeleteModel):
 
         return errors
 
+    @classmethod
+    def _get_lookup_index(cls, lookup):
+        """Find an index supporting a lookup on non deleted objects.
+
+        An index supports the lookup if its leading columns are the fields of the lookup, in
+        any order, and if it is restricted to non deleted objects. A unique or indexed field
+        also supports a lookup on this field alone.
+
+        Parameters
+        ----------
+        lookup : Tuple[str]
+            The names of the fields of the lookup
+
+        Returns
+        -------
+        django.db.models.Index or django.db.models.Field or `None`
+            The index or the field supporting the lookup, `None` if there is none
+
+        """
+        for index in cls._meta.indexes:
+            if not isinstance(index, (NonDeletedIndex, NonDeletedUniqueIndex)):
+                continue
+            columns = [name for name, _order in index.fields_orders]
+            if set(columns[: len(lookup)]) == set(lookup):
+                return index
+
+        if len(lookup) == 1:
+            field = cls._meta.get_field(lookup[0])
+            if field.unique or field.db_index:
+                return field
+
+        return None
+
+    @classmethod
+    def _check_hot_lookups(cls):
+        """Check that each lookup of ``hot_lookups`` is supported by an index.
+
+        Returns
+        -------
+        List[checks.CheckMessage]
+            A list of the check messages representing problems found on the model.
+
+        """
+        errors = []
+        model_full_name = "{}.{}".format(cls._meta.app_label, cls._meta.object_name)
+
+        for lookup in cls.hot_lookups:
+            try:
+                index = cls._get_lookup_index(lookup)
+            except FieldDoesNotExist as error:
+                errors.append(
+                    checks.Error(
+                        "The hot lookup {!r} of the model '{}' refers to a field that "
+                        "does not exist: {!s}".format(lookup, model_full_name, error),
+                        obj=cls,
+                        id="marsha.models.E010",
+                    )
+                )
+                continue
+
+            if index is None:
+                errors.append(
+                    checks.Error(
+                        "The hot lookup {!r} of the model '{}' is not supported by any "
+                        "index on non deleted objects.".format(lookup, model_full_name),
+                        hint="Add 'NonDeletedIndex({!r})' to the 'indexes' of the 'Meta' "
+                        "class of the model '{}' and create its migration.".format(
+                            list(lookup), model_full_name
+                        ),
+                        obj=cls,
+                        id="marsha.models.E011",
+                    )
+                )
+
+        return errors
+
     @classmethod
     def check(cls, **kwargs):
         """Add checks for related names.
@@ -233,12 +354,37 @@ class BaseModel(SafeDeleteModel):
 
         errors.extend(cls._check_table_name())
         errors.extend(cls._check_through_models())
+        errors.extend(cls._check_hot_lookups())
 
         return errors
 
+    def delete(self, force_policy=None, **kwargs):
+        """Soft delete the object and its relations in cascade with a few statements.
+
+        Other policies are applied by ``SafeDeleteModel.delete``.
+
+        For the parameters, see ``safedelete.models.SafeDeleteModel.delete``.
+
+        """
+        policy = self._safedelete_policy if force_policy is None else force_policy
+        if policy != SOFT_DELETE_CASCADE:
+            super().delete(force_policy=force_policy, **kwargs)
+            return
+
+        using = kwargs.get("using") or router.db_for_write(
+            self.__class__, instance=self
+        )
+        self.deleted, _counts = soft_delete_cascade(
+            self.__class__._base_manager.using(using).filter(pk=self.pk)
+        )
+        self.updated_on = self.deleted
+
     def validate_unique(self, exclude=None):
         """Add validation for our ``NonDeletedUniqueIndex`` replacing ``unique_together``.
 
+        All the indexes of the instance are checked with one query, see
+        ``_perform_non_deleted_unique_checks``.
+
         For the parameters, see ``django.db.models.base.Model.validate_unique``.
 
         """
@@ -251,19 +397,242 @@ class BaseModel(SafeDeleteModel):
             unique_checks = self._get_conditional_non_deleted_unique_checks(exclude)
 
             if unique_checks:
-                all_objects = self.__class__.all_objects
-                try:
-                    # we need to force ``_perform_unique_checks`` from ``SafeDeleteModel``
-                    # to use the default manager to ignore deleted instances
-                    self.__class__.all_objects = self.__class__.objects
+                errors = self._perform_non_deleted_unique_checks(unique_checks)
+                if errors:
+                    raise ValidationError(errors)
 
-                    errors = self._perform_unique_checks(unique_checks)
+    def _get_unique_lookup(self, unique_check):
+        """Get the values of the instance for the fields of a unique check.
 
-                finally:
-                    self.__class__.all_objects = all_objects
+        Parameters
+        ----------
+        unique_check : Tuple[str]
+            The names of the fields that are unique together
 
-                if errors:
-                    raise ValidationError(errors)
+        Returns
+        -------
+        Dict[str, Any] or `None`
+            The value of each field by name or `None` if one of them has no value, in which
+            case the check is skipped as Django does
+
+        """
+        lookup = {}
+        for field_name in unique_check:
+            field = self._meta.get_field(field_name)
+            value = getattr(self, field.attname)
+            if value is None or (
+                value == "" and connection.features.interprets_empty_strings_as_nulls
+            ):
+                return None
+            lookup[field_name] = value
+        return lookup
+
+    def _add_unique_error(self, errors, model_class, unique_check):
+        """Add the error of a failed unique check to errors keyed as Django does."""
+        key = unique_check[0] if len(unique_check) == 1 else NON_FIELD_ERRORS
+        errors.setdefault(key, []).append(
+            self.unique_error_message(model_class, unique_check)
+        )
+
+    def _get_non_deleted_unique_subquery(self, model_class, lookup, db_connection):
+        """Get the SQL selecting the other non deleted objects matching a unique lookup.
+
+        Parameters
+        ----------
+        model_class : Type["BaseModel"]
+            The model class on which the unique check is declared
+        lookup : Dict[str, Any]
+            The values of the instance for the fields of the unique check
+        db_connection : django.db.backends.base.base.BaseDatabaseWrapper
+            The connection for which the SQL is compiled
+
+        Returns
+        -------
+        Tuple[str, Tuple[Any]]
+            The SQL of the subquery and its parameters
+
+        """
+        queryset = model_class._base_manager.filter(deleted__isnull=True, **lookup)
+        model_class_pk = self._get_pk_val(model_class._meta)
+        if not self._state.adding and model_class_pk is not None:
+            queryset = queryset.exclude(pk=model_class_pk)
+
+        return (
+            queryset.values("pk").query.get_compiler(connection=db_connection).as_sql()
+        )
+
+    def _perform_non_deleted_unique_checks(self, unique_checks):
+        """Look up the non deleted objects conflicting with the instance in one query.
+
+        Unlike ``_perform_unique_checks``, that runs one query per check, the query selects
+        one ``EXISTS`` subquery per check so that the failed ones can be reported.
+
+        Parameters
+        ----------
+        unique_checks : List[Tuple[Type["BaseModel"], Tuple[str]]]
+            The checks as returned by ``_get_conditional_non_deleted_unique_checks``
+
+        Returns
+        -------
+        Dict[str, List[ValidationError]]
+            The errors of the failed checks, by field name or ``NON_FIELD_ERRORS``
+
+        """
+        db_connection = connections[router.db_for_read(self.__class__, instance=self)]
+
+        checks_to_run = []
+        sql, params = [], []
+        for model_class, unique_check in unique_checks:
+            lookup = self._get_unique_lookup(unique_check)
+            if lookup is None:
+                continue
+
+            subquery_sql, subquery_params = self._get_non_deleted_unique_subquery(
+                model_class, lookup, db_connection
+            )
+            checks_to_run.append((model_class, unique_check))
+            sql.append("EXISTS ({:s})".format(subquery_sql))
+            params.extend(subquery_params)
+
+        errors = {}
+        if not checks_to_run:
+            return errors
+
+        with db_connection.cursor() as cursor:
+            cursor.execute("SELECT {:s}".format(", ".join(sql)), params)
+            row = cursor.fetchone()
+
+        for (model_class, unique_check), exists in zip(checks_to_run, row):
+            if exists:
+                self._add_unique_error(errors, model_class, unique_check)
+        return errors
+
+    @classmethod
+    def get_non_deleted_unique_errors(cls, instances, exclude=None):
+        """Validate the ``NonDeletedUniqueIndex`` of many instances with a query per index.
+
+        It is the batched counterpart of ``validate_unique`` for admin inlines and bulk
+        imports: instances conflict with the non deleted objects of the database but also
+        with each other, e.g. when they are all to be created.
+
+        Parameters
+        ----------
+        instances : List[BaseModel]
+            The instances of the model to validate, deleted ones being ignored
+        exclude : List[str]
+            The names of the fields that are not validated
+
+        Returns
+        -------
+        List[Dict[str, List[ValidationError]]]
+            The errors of each instance, in the order of the instances, as raised by
+            ``validate_unique``, an empty dictionary if its checks pass
+
+        """
+        errors = [{} for _ in instances]
+        candidates = [
+            (position, instance)
+            for position, instance in enumerate(instances)
+            if not instance.deleted
+        ]
+        if not candidates:
+            return errors
+
+        # pylint: disable=protected-access
+        unique_checks = candidates[0][1]._get_conditional_non_deleted_unique_checks(
+            exclude
+        )
+        for model_class, unique_check in unique_checks:
+            # Instances sharing the values of the fields conflict with each other
+            groups = cls._group_by_unique_values(candidates, unique_check)
+            if not groups:
+                continue
+
+            existing = cls._get_non_deleted_primary_keys(
+                model_class,
+                unique_check,
+                groups.keys(),
+                router.db_for_read(model_class, instance=candidates[0][1]),
+            )
+            for values, group in groups.items():
+                for position, instance in group:
+                    conflicts = set(existing.get(values, ()))
+                    if not instance._state.adding:
+                        conflicts.discard(instance._get_pk_val(model_class._meta))
+                    if conflicts or len(group) > 1:
+                        instance._add_unique_error(
+                            errors[position], model_class, unique_check
+                        )
+
+        return errors
+
+    @staticmethod
+    def _group_by_unique_values(candidates, unique_check):
+        """Group instances by their values for the fields of a unique check.
+
+        Parameters
+        ----------
+        candidates : List[Tuple[int, BaseModel]]
+            The instances to group, with their position
+        unique_check : Tuple[str]
+            The names of the fields that are unique together
+
+        Returns
+        -------
+        Dict[Tuple[Any], List[Tuple[int, BaseModel]]]
+            The instances with their position by values of the fields, skipping those for
+            which the check is skipped
+
+        """
+        groups = {}
+        for position, instance in candidates:
+            # pylint: disable=protected-access
+            lookup = instance._get_unique_lookup(unique_check)
+            if lookup is not None:
+                groups.setdefault(tuple(lookup.values()), []).append(
+                    (position, instance)
+                )
+        return groups
+
+    @staticmethod
+    def _get_non_deleted_primary_keys(model_class, unique_check, values_list, using):
+        """Get the primary keys of the non deleted objects having values for unique fields.
+
+        One lookup is made for all the values, filtered down to the exact ones.
+
+        Parameters
+        ----------
+        model_class : Type["BaseModel"]
+            The model class on which the unique check is declared
+        unique_check : Tuple[str]
+            The names of the fields that are unique together
+        values_list : Iterable[Tuple[Any]]
+            The values looked up, in the order of the fields of the unique check
+        using : str
+            The alias of the database queried
+
+        Returns
+        -------
+        Dict[Tuple[Any], Set[Any]]
+            The primary keys of the objects by values of the fields of the unique check
+
+        """
+        attnames = [model_class._meta.get_field(name).attname for name in unique_check]
+        values_list = list(values_list)
+        existing = {}
+        for primary_key, *values in (
+            model_class._base_manager.using(using)
+            .filter(
+                deleted__isnull=True,
+                **{
+                    "{:s}__in".format(name): {values[index] for values in values_list}
+                    for index, name in enumerate(unique_check)
+                },
+            )
+            .values_list("pk", *attnames)
+        ):
+            existing.setdefault(tuple(values), set()).add(primary_key)
+        return existing
 
     @classmethod
     def _get_conditional_non_deleted_indexes_fields(cls):
@@ -0,0 +1,64 @@
+"""Declare the models related to the deletion of large objects in Marsha."""
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from .job import BackgroundJob
+
+
+class DeletionJob(BackgroundJob):
+    """Model representing the soft deletion of an object and its relations in the background.
+
+    A worker (see the ``run_deletion_jobs`` command) marks the objects of each relation of the
+    cascade as deleted in batches, each one in a short transaction that also records the
+    progress of the job. An interrupted job resumes from the last batch committed.
+
+    """
+
+    content_type = models.ForeignKey(
+        to=ContentType,
+        related_name="+",
+        verbose_name=_("content type"),
+        help_text=_("model of the object to delete"),
+        on_delete=models.PROTECT,
+    )
+    object_id = models.UUIDField(
+        verbose_name=_("object id"), help_text=_("primary key of the object to delete")
+    )
+    object_repr = models.CharField(
+        max_length=255,
+        verbose_name=_("object"),
+        help_text=_("representation of the object to delete"),
+    )
+    step = models.PositiveIntegerField(
+        verbose_name=_("step"),
+        help_text=_("index of the relation of the cascade being deleted"),
+        default=0,
+    )
+    steps = models.PositiveIntegerField(
+        verbose_name=_("steps"),
+        help_text=_("number of relations in the cascade"),
+        default=0,
+    )
+    deleted_on = models.DateTimeField(
+        verbose_name=_("deleted on"),
+        help_text=_("date and time set as deletion date on all the objects"),
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        """Options for the ``DeletionJob`` model."""
+
+        db_table = "deletion_job"
+        ordering = ["-created_on"]
+        verbose_name = _("deletion job")
+        verbose_name_plural = _("deletion jobs")
+
+    def __str__(self):
+        """Get the string representation of an instance."""
+        return "{:s} ({:s})".format(self.object_repr, self.get_state_display())
+
+    def get_work(self):
+        """Return the number of relations of the cascade already deleted and their total."""
+        return self.step, self.steps
@@ -0,0 +1,73 @@
+"""Declare the base model of the jobs run in the background in Marsha."""
+from django.contrib.postgres.fields import JSONField
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from .base import BaseModel
+
+
+class BackgroundJob(BaseModel):
+    """Base model for the jobs run in the background by a worker, see ``JobCommand``.
+
+    A job is claimed by a worker when it is pending or when it was interrupted, i.e. when it
+    is running but did not record any progress for a while, and runs until it is done or it
+    fails. Failed jobs are only resumed once set back to pending, e.g. from the admin.
+
+    """
+
+    PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+    STATE_CHOICES = (
+        (PENDING, _("pending")),
+        (RUNNING, _("running")),
+        (DONE, _("done")),
+        (FAILED, _("failed")),
+    )
+
+    state = models.CharField(
+        max_length=20,
+        verbose_name=_("state"),
+        help_text=_("state of the job"),
+        choices=STATE_CHOICES,
+        default=PENDING,
+    )
+    counts = JSONField(
+        verbose_name=_("counts"),
+        help_text=_("number of objects processed by the job, by kind"),
+        default=dict,
+        blank=True,
+    )
+    finished_on = models.DateTimeField(
+        verbose_name=_("finished on"),
+        help_text=_("date and time at which the job finished"),
+        null=True,
+        blank=True,
+    )
+    error = models.TextField(
+        verbose_name=_("error"),
+        help_text=_("error that stopped the job, if any"),
+        blank=True,
+    )
+
+    class Meta:
+        """Options for the ``BackgroundJob`` model."""
+
+        abstract = True
+
+    @property
+    def progress(self):
+        """Return the percentage of the work of the job already done."""
+        if self.state == self.DONE:
+            return 100
+        done, total = self.get_work()
+        return 100 * done // total if total else 0
+
+    def get_work(self):
+        """Return the amount of work done by the job and its total amount, none by default.
+
+        Returns
+        -------
+        Tuple[integer, integer]
+            The amount of work done and the total amount of work, in any unit
+
+        """
+        return 0, 0
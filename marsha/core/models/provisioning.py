@@ -0,0 +1,55 @@
+"""Declare the models related to the provisioning of LTI resources in Marsha."""
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from .account import ConsumerSite
+from .job import BackgroundJob
+
+
+class ProvisioningJob(BackgroundJob):
+    """Model representing the provisioning of a manifest of LTI resources in the background.
+
+    Manifests uploaded in the admin that are too large to be provisioned within a request are
+    stored with a job. A worker (see the ``run_provisioning_jobs`` command) provisions their
+    rows in batches and records the progress of the job after each one. An interrupted job
+    resumes after the last batch recorded.
+
+    """
+
+    FORMAT_CHOICES = (("csv", "CSV"), ("jsonl", "JSONL"))
+
+    consumer_site = models.ForeignKey(
+        to=ConsumerSite,
+        related_name="provisioning_jobs",
+        verbose_name=_("consumer site"),
+        help_text=_("consumer site of all the rows of the manifest"),
+        on_delete=models.CASCADE,
+    )
+    manifest = models.TextField(
+        verbose_name=_("manifest"), help_text=_("content of the manifest uploaded")
+    )
+    manifest_format = models.CharField(
+        max_length=10,
+        verbose_name=_("format"),
+        help_text=_("format of the manifest"),
+        choices=FORMAT_CHOICES,
+    )
+    rows = models.PositiveIntegerField(
+        verbose_name=_("rows"), help_text=_("number of rows in the manifest")
+    )
+
+    class Meta:
+        """Options for the ``ProvisioningJob`` model."""
+
+        db_table = "provisioning_job"
+        ordering = ["-created_on"]
+        verbose_name = _("provisioning job")
+        verbose_name_plural = _("provisioning jobs")
+
+    def __str__(self):
+        """Get the string representation of an instance."""
+        return "{!s} ({:s})".format(self.consumer_site, self.get_state_display())
+
+    def get_work(self):
+        """Return the number of rows of the manifest already provisioned and their total."""
+        return self.counts.get("rows", 0), self.rows
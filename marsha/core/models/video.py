@@ -1,6 +1,7 @@
 """This module holds the models for the marsha project."""
 
 from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
@@ -8,7 +9,7 @@ from safedelete import HARD_DELETE
 
 from ..utils.time_utils import to_timestamp
 from .account import INSTRUCTOR, ROLE_CHOICES
-from .base import BaseModel, NonDeletedUniqueIndex
+from .base import BaseModel, NonDeletedIndex, NonDeletedUniqueIndex
 
 
 class Playlist(BaseModel):
@@ -65,12 +66,16 @@ class Playlist(BaseModel):
         help_text=_("users who have been granted access to this playlist"),
     )
 
+    # LTI launch requests look up their playlist by context id in their consumer site
+    hot_lookups = (("consumer_site", "lti_id"),)
+
     class Meta:
         """Options for the ``Playlist`` model."""
 
         db_table = "playlist"
         verbose_name = _("playlist")
         verbose_name_plural = _("playlists")
+        indexes = [NonDeletedUniqueIndex(["consumer_site", "lti_id"])]
 
 
 class PlaylistAccess(BaseModel):
@@ -122,6 +127,8 @@ class Video(BaseModel):
 
     PENDING, ERROR, READY = "pending", "error", "ready"
     STATE_CHOICES = ((PENDING, _("pending")), (ERROR, _("error")), (READY, _("ready")))
+    HLS = "hls"
+    STREAMING_FORMAT_CHOICES = ((HLS, _("HLS")),)
 
     title = models.CharField(
         max_length=255, verbose_name=_("title"), help_text=_("title of the video")
@@ -188,6 +195,30 @@ class Video(BaseModel):
         choices=STATE_CHOICES,
         default=PENDING,
     )
+    resolutions = ArrayField(
+        models.PositiveSmallIntegerField(),
+        verbose_name=_("resolutions"),
+        help_text=_(
+            "resolutions in which the active version of the video and its thumbnails were "
+            "produced by the transcoding pipeline, unknown for the videos transcoded before "
+            "they were recorded."
+        ),
+        null=True,
+        blank=True,
+    )
+    streaming_formats = ArrayField(
+        models.CharField(max_length=10, choices=STREAMING_FORMAT_CHOICES),
+        verbose_name=_("streaming formats"),
+        help_text=_(
+            "adaptive streaming formats in which the active version of the video was "
+            "produced by the transcoding pipeline."
+        ),
+        default=list,
+        blank=True,
+    )
+
+    # LTI launch requests look up their video by resource link id in their playlist
+    hot_lookups = (("playlist", "lti_id"),)
 
     class Meta:
         """Options for the ``Video`` model."""
@@ -196,6 +227,11 @@ class Video(BaseModel):
         ordering = ["position", "id"]
         verbose_name = _("video")
         verbose_name_plural = _("videos")
+        indexes = [
+            NonDeletedUniqueIndex(["playlist", "lti_id"]),
+            # Pages of the videos of a playlist seek to their cursor in this order
+            NonDeletedIndex(["playlist", "position", "id"]),
+        ]
 
     def __str__(self):
         """Get the string representation of an instance."""
@@ -225,7 +261,7 @@ class Video(BaseModel):
         """
         stamp = stamp or self.active_stamp
         return "{playlist!s}/{video!s}/videos/{stamp:s}".format(
-            playlist=self.playlist.id, video=self.id, stamp=stamp
+            playlist=self.playlist_id, video=self.id, stamp=stamp
         )
 
     @property
@@ -0,0 +1,147 @@
+"""Paginate API responses with Django Rest Framework pagination classes."""
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+import binascii
+from collections import OrderedDict
+import uuid
+
+from django.db.models import Q
+
+from rest_framework import exceptions, pagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .defaults import PLAYLIST_VIDEOS_MAX_PAGE_SIZE, PLAYLIST_VIDEOS_PAGE_SIZE
+
+
+class PositionCursorPagination(pagination.BasePagination):
+    """Paginate objects ordered by position and id with a cursor on the last object of a page.
+
+    Unlike an offset, the cursor lets the database seek directly to the first object of the
+    next page in an index on the position and id, e.g. the one of the videos of a playlist, so
+    that all the pages are as fast to fetch. Positions are not unique so the id
+    breaks the ties. Objects inserted or moved while paginating are neither duplicated nor
+    skipped if they are before or after the cursor.
+
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size = PLAYLIST_VIDEOS_PAGE_SIZE
+    max_page_size = PLAYLIST_VIDEOS_MAX_PAGE_SIZE
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self):
+        """Initialize the state of the pagination of a request."""
+        self.request = None
+        self.page = []
+        self.has_next = False
+
+    def get_page_size(self, request):
+        """Get the page size requested, bounded by the maximum page size.
+
+        Parameters
+        ----------
+        request : Type[rest_framework.request.Request]
+            The request with an optional page size in its query string
+
+        Returns
+        -------
+        integer
+            The number of objects in each page
+
+        """
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def encode_cursor(self, obj):
+        """Encode the position and the id of an object in a cursor."""
+        return urlsafe_b64encode(
+            "{:d}:{!s}".format(obj.position, obj.id).encode("ascii")
+        ).decode("ascii")
+
+    def decode_cursor(self, request):
+        """Decode the position and the id of the cursor of a request.
+
+        Parameters
+        ----------
+        request : Type[rest_framework.request.Request]
+            The request with an optional cursor in its query string
+
+        Returns
+        -------
+        Tuple[integer, uuid.UUID] or `None`
+            The position and the id of the last object of the previous page or `None` for the
+            first page
+
+        Raises
+        ------
+        NotFound
+            If the cursor is not valid
+
+        """
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+
+        try:
+            position, pk = (
+                urlsafe_b64decode(cursor.encode("ascii")).decode("ascii").split(":")
+            )
+            return int(position), uuid.UUID(pk)
+        except (binascii.Error, UnicodeError, ValueError):
+            raise exceptions.NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Get the objects of the page following the cursor of the request.
+
+        Parameters
+        ----------
+        queryset : Type[django.db.models.QuerySet]
+            The objects to paginate
+        request : Type[rest_framework.request.Request]
+            The request with an optional cursor and page size in its query string
+        view : Type[restframework.viewsets or restframework.views]
+            The API view paginating the objects
+
+        Returns
+        -------
+        List[Type[models.Model]]
+            The objects of the page
+
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by("position", "id")
+        cursor = self.decode_cursor(request)
+        if cursor:
+            position, pk = cursor
+            # The first condition lets the database seek to the position in an index
+            queryset = queryset.filter(position__gte=position).filter(
+                Q(position__gt=position) | Q(id__gt=pk)
+            )
+
+        # Fetch one more object to know if there is a next page
+        objects = list(queryset[: page_size + 1])
+        self.has_next = len(objects) > page_size
+        self.page = objects[:page_size]
+        return self.page
+
+    def get_next_link(self):
+        """Get the url of the next page or `None` if this page is the last one."""
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.page[-1]),
+        )
+
+    def get_paginated_response(self, data):
+        """Return the serialized objects of the page along with the url of the next page."""
+        return Response(
+            OrderedDict([("next", self.get_next_link()), ("results", data)])
+        )
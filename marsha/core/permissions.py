@@ -2,13 +2,16 @@
 from rest_framework import exceptions, permissions
 from rest_framework_simplejwt.models import TokenUser
 
+from .models import Video
 
-class IsVideoTokenOrAdminUser(permissions.IsAdminUser):
-    """A custom permission class for LTI.
 
-    These permissions build on the `IsAdminUser` class but grants additional specific accesses
+class TokenOrAdminUserPermission(permissions.IsAdminUser):
+    """A base permission class for LTI.
+
+    These permissions build on the `IsAdminUser` class but grant additional specific accesses
     to users authenticated with a JWT token built from an LTI resource link id ie related to a
-    TokenUser as defined in `rest_framework_simplejwt`.
+    TokenUser as defined in `rest_framework_simplejwt`. Subclasses define the objects a token
+    grants access to in `has_token_access`, tokens grant access to none by default.
 
     """
 
@@ -54,14 +57,89 @@ class IsVideoTokenOrAdminUser(permissions.IsAdminUser):
 
         Returns
         -------
-        None
-            The response of this method is ignored by its caller in restframework (we delegate
-            checking if the user is Admin to the parent class `IsAdminUser`)
+        boolean
+            True if the request is authorized (we delegate checking if the user is Admin to
+            the parent class `IsAdminUser`)
 
         """
-        # Users authentified via LTI are identified by a TokenUser with the
-        # resource_link_id as user ID.
-        if isinstance(request.user, TokenUser) and str(obj.id) != request.user.id:
+        if isinstance(request.user, TokenUser) and not self.has_token_access(
+            request.user, obj
+        ):
             raise exceptions.PermissionDenied()
 
         return super().has_object_permission(request, view, obj)
+
+    # pylint: disable=unused-argument
+    def has_token_access(self, user, obj):
+        """Check if the JWT token of a user grants access to an object, denied by default.
+
+        Parameters
+        ----------
+        user : Type[rest_framework_simplejwt.models.TokenUser]
+            The user identified by the resource link id of the video of its token
+        obj: Type[models.Model]
+            The object for which object permissions are being checked
+
+        Returns
+        -------
+        boolean
+            True if the token grants access to the object
+
+        """
+        return False
+
+
+class IsVideoTokenOrAdminUser(TokenOrAdminUserPermission):
+    """A custom permission class for LTI on videos.
+
+    Users authenticated with a JWT token built from an LTI resource link id are granted access
+    to the video of their token.
+
+    """
+
+    def has_token_access(self, user, obj):
+        """Check that the video is the one of the JWT token of the user.
+
+        Parameters
+        ----------
+        user : Type[rest_framework_simplejwt.models.TokenUser]
+            The user identified by the resource link id of the video of its token
+        obj: Type[models.Model]
+            The video for which object permissions are being checked
+
+        Returns
+        -------
+        boolean
+            True if the video is the one of the token
+
+        """
+        # Users authentified via LTI are identified by a TokenUser with the
+        # resource_link_id as user ID.
+        return str(obj.id) == user.id
+
+
+class IsPlaylistTokenOrAdminUser(TokenOrAdminUserPermission):
+    """A custom permission class for LTI on playlists.
+
+    Users authenticated with a JWT token built from an LTI resource link id are granted access
+    to the playlist of the video of their token.
+
+    """
+
+    def has_token_access(self, user, obj):
+        """Check that the video of the JWT token of the user belongs to the playlist.
+
+        Parameters
+        ----------
+        user : Type[rest_framework_simplejwt.models.TokenUser]
+            The user identified by the resource link id of the video of its token
+        obj: Type[models.Model]
+            The playlist for which object permissions are being checked
+
+        Returns
+        -------
+        boolean
+            True if the video of the token belongs to the playlist
+
+        """
+        return Video.objects.filter(id=user.id, playlist=obj).exists()
@@ -1,15 +1,21 @@
 """Define the structure of our API responses with Django Rest Framework serializers."""
-from datetime import timedelta
+from collections import OrderedDict
 import json
+import operator
 
 from django.conf import settings
-from django.utils import timezone
 
-from botocore.signers import CloudFrontSigner
 from rest_framework import serializers
 
-from .models import Video
+from .defaults import (
+    VIDEO_SOURCE_MULTIPART_MAX_SIZE,
+    VIDEO_SOURCE_PART_URLS_MAX,
+    VIDEO_UPLOAD_POLICIES_MAX,
+)
+from .models import AudioTrack, SignTrack, SubtitleTrack, Video
 from .utils import cloudfront_utils, time_utils
+from .utils.s3_utils import S3_MAX_PARTS
+from .utils.timing_utils import timer
 
 
 class TimestampField(serializers.DateTimeField):
@@ -56,7 +62,25 @@ class TimestampField(serializers.DateTimeField):
 
 
 class VideoSerializer(serializers.ModelSerializer):
-    """Serializer to display a video model with all its resolution options."""
+    """Serializer to display a video model with all its resolution options.
+
+    In version 1.0 of the API, the urls are serialized as a JSON string. From version 2.0, they
+    are a nested object. In both versions, the `resolutions` and `kinds` query parameters of the
+    request, e.g. `?resolutions=480,720&kinds=mp4,manifests`, limit the urls that are built
+    and signed.
+
+    """
+
+    # Template of the url of each kind of file produced by the transcoding pipeline
+    URL_TEMPLATES = OrderedDict(
+        [
+            ("mp4", "{base:s}/videos/{stamp:s}_{resolution:d}.mp4"),
+            ("thumbnails", "{base:s}/thumbnails/{stamp:s}_{resolution:d}.0000000.jpg"),
+        ]
+    )
+    # Template of the url of the master manifest of each adaptive streaming format
+    MANIFEST_TEMPLATES = {Video.HLS: "{base:s}/hls/{stamp:s}.m3u8"}
+    URL_KINDS = tuple(URL_TEMPLATES) + ("manifests",)
 
     class Meta:  # noqa
         model = Video
@@ -66,6 +90,66 @@ class VideoSerializer(serializers.ModelSerializer):
     active_stamp = TimestampField(source="uploaded_on", required=False)
     urls = serializers.SerializerMethodField()
 
+    def get_url_filters(self):
+        """Get the resolutions and kinds of urls requested in the query string of the request.
+
+        Returns
+        -------
+        Tuple[Set[integer] or `None`, Tuple[string]]
+            The resolutions requested or `None` for all of them and the kinds of urls requested
+
+        """
+        return self.parse_url_filters(self.context.get("request"))
+
+    @classmethod
+    def parse_url_filters(cls, request):
+        """Get the resolutions and kinds of urls requested in the query string.
+
+        Parameters
+        ----------
+        request : Type[rest_framework.request.Request] or `None`
+            The request for which videos are serialized, if any
+
+        Returns
+        -------
+        Tuple[Set[integer] or `None`, Tuple[string]]
+            The resolutions requested or `None` for all of them and the kinds of urls requested
+
+        Raises
+        ------
+        ValidationError
+            If a resolution is not an integer or a kind of url does not exist
+
+        """
+        if request is None:
+            return None, cls.URL_KINDS
+
+        resolutions = request.query_params.get("resolutions")
+        if resolutions is not None:
+            try:
+                resolutions = {int(value) for value in resolutions.split(",") if value}
+            except ValueError:
+                raise serializers.ValidationError(
+                    {"resolutions": "Resolutions should be a list of integers."}
+                )
+
+        kinds = cls.URL_KINDS
+        if "kinds" in request.query_params:
+            requested_kinds = {
+                value for value in request.query_params["kinds"].split(",") if value
+            }
+            if not requested_kinds <= set(cls.URL_KINDS):
+                raise serializers.ValidationError(
+                    {
+                        "kinds": "Kinds should be among: {:s}.".format(
+                            ", ".join(cls.URL_KINDS)
+                        )
+                    }
+                )
+            kinds = tuple(kind for kind in cls.URL_KINDS if kind in requested_kinds)
+
+        return resolutions, kinds
+
     def get_urls(self, obj):
         """Urls of the video for each type of encoding and in each resolution.
 
@@ -76,48 +160,327 @@ class VideoSerializer(serializers.ModelSerializer):
 
         Returns
         -------
-        Dictionary or None
-            A dictionary of all urls for:
+        Dictionary, string or None
+            A dictionary, serialized as a JSON string before version 2.0 of the API, of all
+            urls for:
                 - mp4 encodings of the video in each resolution
                 - jpeg thumbnails of the video in each resolution
+                - master manifests of the video in each adaptive streaming format, if any
+            Only the resolutions produced by the transcoding pipeline are included or, for
+            the videos transcoded before they were recorded, all the resolutions of
+            `VIDEO_RESOLUTIONS`. They can be further filtered, along with the kinds of urls,
+            by the query string.
             None if the video is still not uploaded to S3 with success
 
         """
         if obj.uploaded_on is None or obj.state != Video.READY:
             return None
 
-        urls = {"mp4": {}, "thumbnails": {}}
-        base = "{cloudfront:s}/{playlist!s}/{video!s}".format(
-            cloudfront=settings.CLOUDFRONT_URL, playlist=obj.playlist.id, video=obj.id
+        urls = self.build_urls(
+            obj.id,
+            obj.playlist_id,
+            obj.active_stamp,
+            obj.resolutions,
+            obj.streaming_formats,
+            self.get_url_filters(),
         )
+        request = self.context.get("request")
+        if getattr(request, "version", None) == "2.0":
+            return urls
+        return json.dumps(urls)
 
-        date_less_than = timezone.now() + timedelta(
-            seconds=settings.CLOUDFRONT_SIGNED_URLS_VALIDITY
-        )
-        for resolution in settings.VIDEO_RESOLUTIONS:
-            # MP4
-            mp4_url = "{base:s}/videos/{stamp:s}_{resolution:d}.mp4".format(
-                base=base, stamp=obj.active_stamp, resolution=resolution
-            )
+    @classmethod
+    def build_urls(
+        cls, video_id, playlist_id, stamp, resolutions, streaming_formats, url_filters
+    ):
+        """Build and sign the urls of a video that is ready.
 
-            # Thumbnails
-            thumbnail_url = "{base:s}/thumbnails/{stamp:s}_{resolution:d}.0000000.jpg".format(
-                base=base, stamp=obj.active_stamp, resolution=resolution
-            )
+        Parameters
+        ----------
+        video_id : uuid.UUID
+            The id of the video
+        playlist_id : uuid.UUID
+            The id of the playlist of the video
+        stamp : string
+            The active stamp of the video
+        resolutions : List[integer] or `None`
+            The resolutions produced by the transcoding pipeline, if they were recorded
+        streaming_formats : List[string]
+            The adaptive streaming formats produced by the transcoding pipeline
+        url_filters : Tuple[Set[integer] or `None`, Tuple[string]]
+            The resolutions and kinds of urls requested, see `parse_url_filters`
+
+        Returns
+        -------
+        Dictionary
+            The urls of the video by kind and by resolution, see `get_urls`
+
+        """
+        requested_resolutions, kinds = url_filters
+        urls = {kind: {} for kind in kinds if kind in cls.URL_TEMPLATES}
+        base = "{cloudfront:s}/{playlist!s}/{video!s}".format(
+            cloudfront=settings.CLOUDFRONT_URL, playlist=playlist_id, video=video_id
+        )
 
-            # Sign urls if the functionality is activated
-            if settings.CLOUDFRONT_SIGNED_URLS_ACTIVE:
-                cloudfront_signer = CloudFrontSigner(
-                    settings.CLOUDFRONT_ACCESS_KEY_ID, cloudfront_utils.rsa_signer
+        date_less_than = cloudfront_utils.get_expiration()
+        query_string = None
+        if (
+            settings.CLOUDFRONT_SIGNED_URLS_ACTIVE
+            and settings.CLOUDFRONT_SIGNED_URLS_POLICY != cloudfront_utils.CANNED_POLICY
+        ):
+            # Sign all the files of the video at once with a wildcard
+            with timer("sign"):
+                query_string = cloudfront_utils.get_signed_query_string(
+                    "{base:s}/*".format(base=base), date_less_than
                 )
-                mp4_url = cloudfront_signer.generate_presigned_url(
-                    mp4_url, date_less_than=date_less_than
+
+        resolutions = set(
+            settings.VIDEO_RESOLUTIONS if resolutions is None else resolutions
+        )
+        if requested_resolutions is not None:
+            resolutions &= requested_resolutions
+
+        for resolution in sorted(resolutions):
+            for kind in urls:
+                url = cls.URL_TEMPLATES[kind].format(
+                    base=base, stamp=stamp, resolution=resolution
                 )
-                thumbnail_url = cloudfront_signer.generate_presigned_url(
-                    thumbnail_url, date_less_than=date_less_than
+
+                # Sign urls if the functionality is activated
+                if query_string:
+                    url = "{:s}?{:s}".format(url, query_string)
+                elif settings.CLOUDFRONT_SIGNED_URLS_ACTIVE:
+                    with timer("sign"):
+                        url = cloudfront_utils.get_signed_url(url, date_less_than)
+
+                urls[kind][resolution] = url
+
+        # Players request the files listed in a manifest without signing them, so manifests
+        # are only served if these files are not signed or if a wildcard policy covers them
+        if "manifests" in kinds and (
+            query_string or not settings.CLOUDFRONT_SIGNED_URLS_ACTIVE
+        ):
+            manifests = {}
+            for streaming_format in streaming_formats:
+                url = cls.MANIFEST_TEMPLATES[streaming_format].format(
+                    base=base, stamp=stamp
                 )
+                if query_string:
+                    url = "{:s}?{:s}".format(url, query_string)
+                manifests[streaming_format] = url
+            if manifests:
+                urls["manifests"] = manifests
 
-            urls["mp4"][resolution] = mp4_url
-            urls["thumbnails"][resolution] = thumbnail_url
+        return urls
 
-        return json.dumps(urls)
+
+class VideoReadSerializer:
+    """Read-only serializer producing the same representation of a video as `VideoSerializer`.
+
+    Instantiating a `ModelSerializer` builds its fields from the model and serializing goes
+    through each field, which costs more than the serialization itself. This serializer reads
+    all the attributes it needs with one accessor resolved when the class is created and
+    converts them as the fields of `VideoSerializer` do. The url filters of the request are
+    parsed once for all the videos.
+
+    It accepts model instances as well as rows of a `values` queryset selecting
+    `SOURCE_FIELDS`, that spare building the instances.
+
+    Parameters
+    ----------
+    instance : Type[models.Video], dictionary or Iterable
+        The video to serialize or the videos if `many` is set
+    many : boolean
+        Whether a list of videos is serialized
+    context : dictionary
+        The context of the serialization, with the request if any
+
+    """
+
+    # Fields read on a video, in the order of the accessors
+    SOURCE_FIELDS = (
+        "id",
+        "title",
+        "description",
+        "uploaded_on",
+        "state",
+        "playlist_id",
+        "resolutions",
+        "streaming_formats",
+    )
+    # Fields of the representation, checked against `VideoSerializer` by the tests
+    FIELDS = ("id", "title", "description", "active_stamp", "state", "urls")
+
+    get_attributes = operator.attrgetter(*SOURCE_FIELDS)
+    get_items = operator.itemgetter(*SOURCE_FIELDS)
+
+    def __init__(self, instance=None, many=False, context=None):
+        """Remember the videos and the context of the serialization."""
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+    @property
+    def data(self):
+        """Return the representation of the video or the list of videos."""
+        request = self.context.get("request")
+        url_filters = VideoSerializer.parse_url_filters(request)
+        as_json = getattr(request, "version", None) != "2.0"
+        if self.many:
+            return [
+                self.to_representation(video, url_filters, as_json)
+                for video in self.instance
+            ]
+        return self.to_representation(self.instance, url_filters, as_json)
+
+    def to_representation(self, video, url_filters, as_json):
+        """Represent a video as `VideoSerializer` does.
+
+        Parameters
+        ----------
+        video : Type[models.Video] or dictionary
+            The video as a model instance or as a row with the `SOURCE_FIELDS`
+        url_filters : Tuple[Set[integer] or `None`, Tuple[string]]
+            The resolutions and kinds of urls requested, see `VideoSerializer.parse_url_filters`
+        as_json : boolean
+            Whether the urls are serialized as a JSON string, as in version 1.0 of the API
+
+        Returns
+        -------
+        dictionary
+            The representation of the video
+
+        """
+        (
+            video_id,
+            title,
+            description,
+            uploaded_on,
+            state,
+            playlist_id,
+            resolutions,
+            streaming_formats,
+        ) = (self.get_items if isinstance(video, dict) else self.get_attributes)(video)
+
+        stamp = time_utils.to_timestamp(uploaded_on) if uploaded_on else None
+        urls = None
+        if uploaded_on is not None and state == Video.READY:
+            urls = VideoSerializer.build_urls(
+                video_id,
+                playlist_id,
+                str(stamp),
+                resolutions,
+                streaming_formats,
+                url_filters,
+            )
+            if as_json:
+                urls = json.dumps(urls)
+
+        return {
+            "id": str(video_id),
+            "title": str(title),
+            "description": None if description is None else str(description),
+            "active_stamp": stamp,
+            "state": state,
+            "urls": urls,
+        }
+
+
+class AudioTrackSerializer(serializers.ModelSerializer):
+    """Serializer to display an audio track of a video."""
+
+    class Meta:  # noqa
+        model = AudioTrack
+        fields = ("id", "language")
+
+
+class SubtitleTrackSerializer(serializers.ModelSerializer):
+    """Serializer to display a subtitle track of a video."""
+
+    class Meta:  # noqa
+        model = SubtitleTrack
+        fields = ("id", "language", "has_closed_captioning")
+
+
+class SignTrackSerializer(serializers.ModelSerializer):
+    """Serializer to display a sign language track of a video."""
+
+    class Meta:  # noqa
+        model = SignTrack
+        fields = ("id", "language")
+
+
+class PlaylistVideoSerializer(VideoSerializer):
+    """Serializer to display a video in the list of the videos of its playlist.
+
+    Its tracks are serialized along with the video so they should be prefetched.
+
+    """
+
+    class Meta(VideoSerializer.Meta):  # noqa
+        fields = VideoSerializer.Meta.fields + (
+            "position",
+            "audio_tracks",
+            "subtitle_tracks",
+            "sign_tracks",
+        )
+
+    audio_tracks = AudioTrackSerializer(source="audiotracks", many=True, read_only=True)
+    subtitle_tracks = SubtitleTrackSerializer(
+        source="subtitletracks", many=True, read_only=True
+    )
+    sign_tracks = SignTrackSerializer(source="signtracks", many=True, read_only=True)
+
+
+class BulkVideoSerializer(VideoSerializer):
+    """Serializer to validate the partial update of a video, position included, in a batch."""
+
+    class Meta(VideoSerializer.Meta):  # noqa
+        fields = VideoSerializer.Meta.fields + ("position",)
+
+
+# pylint: disable=abstract-method
+class BulkVideoItemSerializer(serializers.Serializer):
+    """Validate the id of the video targeted by each item of a bulk update."""
+
+    id = serializers.UUIDField()
+
+
+# pylint: disable=abstract-method
+class InitiateMultipartUploadSerializer(serializers.Serializer):
+    """Validate the file announced when initiating a multipart upload of a video."""
+
+    size = serializers.IntegerField(
+        min_value=1, max_value=VIDEO_SOURCE_MULTIPART_MAX_SIZE
+    )
+    content_type = serializers.RegexField(r"^video/", max_length=255)
+
+
+# pylint: disable=abstract-method
+class MultipartUploadSerializer(serializers.Serializer):
+    """Validate the stamp and the id identifying a multipart upload of a video."""
+
+    stamp = serializers.RegexField(r"^[0-9]+$", max_length=20)
+    upload_id = serializers.CharField(max_length=1024)
+
+
+class UploadPartUrlsSerializer(MultipartUploadSerializer):
+    """Validate the numbers of the parts of a multipart upload for which urls are presigned."""
+
+    part_numbers = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=S3_MAX_PARTS),
+        min_length=1,
+        max_length=VIDEO_SOURCE_PART_URLS_MAX,
+    )
+
+
+# pylint: disable=abstract-method
+class UploadPoliciesSerializer(serializers.Serializer):
+    """Validate the videos of a playlist for which upload policies are requested."""
+
+    playlist = serializers.UUIDField()
+    videos = serializers.ListField(
+        child=serializers.UUIDField(),
+        min_length=1,
+        max_length=VIDEO_UPLOAD_POLICIES_MAX,
+    )
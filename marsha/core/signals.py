@@ -0,0 +1,60 @@
+"""Signal receivers for the ``core`` app of the Marsha project."""
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from safedelete.signals import post_softdelete
+
+from .models import ConsumerSite, LTIPassport, Playlist
+from .utils.lti_utils import invalidate_lti_passport_cache
+
+
+# We don't use the arguments sent by the signals
+# pylint: disable=unused-argument
+
+
+@receiver(post_save, sender=LTIPassport)
+@receiver(post_softdelete, sender=LTIPassport)
+@receiver(post_delete, sender=LTIPassport)
+def invalidate_lti_passports(sender, **kwargs):
+    """Invalidate cached passports when a passport changes."""
+    invalidate_lti_passport_cache()
+
+
+@receiver(post_softdelete, sender=ConsumerSite)
+@receiver(post_softdelete, sender=Playlist)
+@receiver(post_delete, sender=ConsumerSite)
+@receiver(post_delete, sender=Playlist)
+def invalidate_deleted_lti_passports(sender, **kwargs):
+    """Invalidate cached passports when an object scoping passports is deleted.
+
+    Passports are resolved through their consumer site or through the consumer site of their
+    playlist. Deletions are rare so the cache is invalidated without checking whether the
+    object deleted scoped any passport, in as many queries whatever the size of the cascade.
+
+    """
+    invalidate_lti_passport_cache()
+
+
+@receiver(post_save, sender=ConsumerSite)
+@receiver(post_save, sender=Playlist)
+def invalidate_scoped_lti_passports(sender, instance, created, **kwargs):
+    """Invalidate cached passports when an object scoping some passports is updated.
+
+    Objects scoping no passport take no part in resolutions, and a new object can't scope a
+    passport yet: the cache is kept for them, as for the playlists created or updated by
+    instructor launches.
+
+    """
+    if created:
+        return
+
+    passports = LTIPassport.objects.all_with_deleted()
+    if sender is Playlist:
+        passports = passports.filter(playlist=instance)
+    else:
+        passports = passports.filter(
+            Q(consumer_site=instance) | Q(playlist__consumer_site=instance)
+        )
+    if passports.exists():
+        invalidate_lti_passport_cache()
@@ -0,0 +1,136 @@
+"""Test the admin of consumer sites."""
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+
+from .. import admin
+from ..factories import ConsumerSiteFactory, UserFactory
+from ..models import Playlist, ProvisioningJob, Video
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+class ConsumerSiteAdminTestCase(TestCase):
+    """Test the actions of the consumer site admin."""
+
+    def setUp(self):
+        """Log in as an administrator."""
+        super().setUp()
+        user = UserFactory(is_staff=True, is_superuser=True)
+        self.client.login(username=user.username, password="password")
+
+    def test_admin_consumer_site_provision_lti_resources(self):
+        """The action should display a form then provision the uploaded manifest."""
+        consumer_site = ConsumerSiteFactory(name="example.com")
+
+        response = self.client.post(
+            "/admin/core/consumersite/",
+            {
+                "action": "provision_lti_resources",
+                "_selected_action": [str(consumer_site.id)],
+                "index": 0,
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'name="manifest"')
+        self.assertContains(response, 'enctype="multipart/form-data"')
+
+        manifest = SimpleUploadedFile(
+            "manifest.csv",
+            b"context_id,resource_link_id\ncourse-1,video-1\ncourse-1,video-2\n",
+        )
+        response = self.client.post(
+            "/admin/core/consumersite/",
+            {
+                "action": "provision_lti_resources",
+                "_selected_action": [str(consumer_site.id)],
+                "provision": "Provision",
+                "manifest": manifest,
+                "manifest_format": "csv",
+            },
+            follow=True,
+        )
+        self.assertContains(response, "2 videos created")
+        self.assertEqual(Playlist.objects.get().consumer_site, consumer_site)
+        self.assertEqual(Video.objects.count(), 2)
+
+    def test_admin_consumer_site_provision_lti_resources_several_sites(self):
+        """The action should refuse to provision several consumer sites at once."""
+        consumer_sites = ConsumerSiteFactory.create_batch(2)
+
+        response = self.client.post(
+            "/admin/core/consumersite/",
+            {
+                "action": "provision_lti_resources",
+                "_selected_action": [str(site.id) for site in consumer_sites],
+                "index": 0,
+            },
+            follow=True,
+        )
+        self.assertContains(response, "Please select exactly one consumer site")
+
+    @mock.patch.object(admin, "PROVISIONING_ADMIN_MAX_ROWS", 2)
+    def test_admin_consumer_site_provision_lti_resources_large_manifest(self):
+        """A manifest too large to be provisioned in the request should be stored in a job."""
+        consumer_site = ConsumerSiteFactory(name="example.com")
+
+        manifest = SimpleUploadedFile(
+            "manifest.jsonl",
+            b'{"context_id": "course-1", "resource_link_id": "video-1"}\n'
+            b'{"context_id": "course-1", "resource_link_id": "video-2"}\n'
+            b'{"context_id": "course-2", "resource_link_id": "video-3"}\n',
+        )
+        response = self.client.post(
+            "/admin/core/consumersite/",
+            {
+                "action": "provision_lti_resources",
+                "_selected_action": [str(consumer_site.id)],
+                "provision": "Provision",
+                "manifest": manifest,
+                "manifest_format": "jsonl",
+            },
+        )
+
+        job = ProvisioningJob.objects.get()
+        self.assertRedirects(
+            response,
+            "/admin/core/provisioningjob/{!s}/change/".format(job.pk),
+            fetch_redirect_response=False,
+        )
+        self.assertEqual(job.consumer_site, consumer_site)
+        self.assertEqual(job.state, ProvisioningJob.PENDING)
+        self.assertEqual(job.manifest_format, "jsonl")
+        self.assertEqual(job.rows, 3)
+        self.assertFalse(Video.objects.exists())
+
+        response = self.client.get(response.url)
+        self.assertContains(
+            response,
+            "The 3 rows of the manifest will be provisioned in the background.",
+        )
+
+    def test_admin_consumer_site_provision_lti_resources_invalid_manifest(self):
+        """A manifest with a line that is not a JSON object should be reported."""
+        consumer_site = ConsumerSiteFactory(name="example.com")
+
+        manifest = SimpleUploadedFile(
+            "manifest.jsonl",
+            b'{"context_id": "course-1", "resource_link_id": "video-1"}\n["course-1"]\n',
+        )
+        response = self.client.post(
+            "/admin/core/consumersite/",
+            {
+                "action": "provision_lti_resources",
+                "_selected_action": [str(consumer_site.id)],
+                "provision": "Provision",
+                "manifest": manifest,
+                "manifest_format": "jsonl",
+            },
+            follow=True,
+        )
+        self.assertContains(response, "Line 2 of the manifest is not a JSON object.")
+        self.assertFalse(ProvisioningJob.objects.exists())
+        self.assertFalse(Video.objects.exists())
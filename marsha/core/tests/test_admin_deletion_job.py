@@ -0,0 +1,93 @@
+"""Test the deletion of consumer sites and organizations from the admin."""
+from django.test import TestCase
+
+from ..factories import ConsumerSiteFactory, OrganizationFactory, UserFactory
+from ..models import ConsumerSite, DeletionJob, Organization
+from ..utils.deletion_job_utils import schedule_deletion
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+class DeletionJobAdminTestCase(TestCase):
+    """Test that deletions from the admin are scheduled as deletion jobs."""
+
+    def setUp(self):
+        """Log in as an administrator."""
+        super().setUp()
+        user = UserFactory(is_staff=True, is_superuser=True)
+        self.client.login(username=user.username, password="password")
+
+    def test_admin_deletion_job_delete_view(self):
+        """The deletion page should schedule a job instead of deleting the consumer site."""
+        consumer_site = ConsumerSiteFactory(name="example.com")
+        url = "/admin/core/consumersite/{!s}/delete/".format(consumer_site.id)
+
+        response = self.client.get(url)
+        self.assertContains(response, "example.com")
+        self.assertFalse(DeletionJob.objects.exists())
+
+        response = self.client.post(url, {"post": "yes"})
+        job = DeletionJob.objects.get()
+        self.assertRedirects(
+            response, "/admin/core/deletionjob/{!s}/change/".format(job.id)
+        )
+        self.assertEqual(job.object_id, consumer_site.id)
+        self.assertEqual(job.state, DeletionJob.PENDING)
+        self.assertTrue(ConsumerSite.objects.filter(id=consumer_site.id).exists())
+
+        # Deleting it again leads to the job already scheduled
+        response = self.client.post(url, {"post": "yes"}, follow=True)
+        self.assertContains(response, "was already scheduled")
+        self.assertEqual(DeletionJob.objects.count(), 1)
+
+    def test_admin_deletion_job_action(self):
+        """The selected organizations should be deleted by jobs after confirmation."""
+        organizations = OrganizationFactory.create_batch(2)
+        data = {
+            "action": "schedule_deletion",
+            "_selected_action": [
+                str(organization.id) for organization in organizations
+            ],
+        }
+
+        response = self.client.post("/admin/core/organization/", data)
+        self.assertContains(response, organizations[0].name)
+        self.assertFalse(DeletionJob.objects.exists())
+
+        response = self.client.post(
+            "/admin/core/organization/", dict(data, post="yes"), follow=True
+        )
+        self.assertContains(response, "2 deletion job(s) scheduled.")
+        self.assertEqual(
+            set(DeletionJob.objects.values_list("object_id", flat=True)),
+            {organization.id for organization in organizations},
+        )
+        self.assertEqual(Organization.objects.count(), 2)
+
+        response = self.client.get("/admin/core/organization/")
+        self.assertNotContains(response, 'value="delete_selected"')
+
+    def test_admin_deletion_job_changelist(self):
+        """The jobs should be listed with their progress and the failed ones resumed."""
+        job, _ = schedule_deletion(ConsumerSiteFactory(name="example.com"))
+        job.state = DeletionJob.FAILED
+        job.step, job.steps = 2, 5
+        job.error = "RuntimeError('Connection lost')"
+        job.save()
+
+        response = self.client.get("/admin/core/deletionjob/")
+        self.assertContains(response, "example.com")
+        self.assertContains(response, "40%")
+        self.assertNotContains(response, "/admin/core/deletionjob/add/")
+
+        response = self.client.post(
+            "/admin/core/deletionjob/",
+            {"action": "resume", "_selected_action": [str(job.id)]},
+            follow=True,
+        )
+        self.assertContains(response, "1 deletion job(s) resumed.")
+        job.refresh_from_db()
+        self.assertEqual(job.state, DeletionJob.PENDING)
+        self.assertEqual(job.error, "")
@@ -0,0 +1,157 @@
+"""Tests for the Playlist API of the Marsha project."""
+import json
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..factories import (
+    AudioTrackFactory,
+    PlaylistFactory,
+    SignTrackFactory,
+    SubtitleTrackFactory,
+    UserFactory,
+    VideoFactory,
+)
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+class PlaylistAPITest(TestCase):
+    """Test the API listing the videos of a playlist."""
+
+    def setUp(self):
+        """Create a playlist and a token for one of its videos."""
+        super().setUp()
+        self.playlist = PlaylistFactory()
+        self.video = VideoFactory(playlist=self.playlist, position=0)
+        jwt_token = AccessToken()
+        jwt_token.payload["video_id"] = str(self.video.id)
+        self.authorization = "Bearer {!s}".format(jwt_token)
+
+    def get_videos(self, query="", playlist=None):
+        """Get a page of the videos of the playlist."""
+        return self.client.get(
+            "/api/playlists/{!s}/videos/{:s}".format(
+                (playlist or self.playlist).id, query
+            ),
+            HTTP_AUTHORIZATION=self.authorization,
+        )
+
+    def test_api_playlist_videos_anonymous(self):
+        """Anonymous users are not allowed to list the videos of a playlist."""
+        response = self.client.get(
+            "/api/playlists/{!s}/videos/".format(self.playlist.id)
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_api_playlist_videos_staff_or_user(self):
+        """Users authenticated via a session should not be able to list videos."""
+        for user in [UserFactory(), UserFactory(is_staff=True)]:
+            self.client.login(username=user.username, password="test")
+            response = self.client.get(
+                "/api/playlists/{!s}/videos/".format(self.playlist.id)
+            )
+            self.assertEqual(response.status_code, 401)
+
+    def test_api_playlist_videos_other_playlist(self):
+        """A token user should only list the videos of the playlist of its video."""
+        response = self.get_videos(playlist=PlaylistFactory())
+        self.assertEqual(response.status_code, 403)
+
+    def test_api_playlist_list_and_detail(self):
+        """Playlists and videos should not be listed or retrieved outside of this endpoint."""
+        for url in [
+            "/api/playlists/",
+            "/api/playlists/{!s}/".format(self.playlist.id),
+            "/api/videos/",
+        ]:
+            response = self.client.get(url, HTTP_AUTHORIZATION=self.authorization)
+            self.assertEqual(response.status_code, 404)
+
+    def test_api_playlist_videos_tracks(self):
+        """Videos should be listed with their position and their tracks."""
+        audio_track = AudioTrackFactory(video=self.video, language="fr")
+        subtitle_track = SubtitleTrackFactory(
+            video=self.video, language="en", has_closed_captioning=True
+        )
+        sign_track = SignTrackFactory(video=self.video, language="fr")
+        VideoFactory(playlist=PlaylistFactory())
+
+        response = self.get_videos()
+
+        self.assertEqual(response.status_code, 200)
+        content = json.loads(response.content)
+        self.assertIsNone(content["next"])
+        self.assertEqual(len(content["results"]), 1)
+        video = content["results"][0]
+        self.assertEqual(video["id"], str(self.video.id))
+        self.assertEqual(video["position"], 0)
+        self.assertEqual(
+            video["audio_tracks"], [{"id": str(audio_track.id), "language": "fr"}]
+        )
+        self.assertEqual(
+            video["subtitle_tracks"],
+            [
+                {
+                    "id": str(subtitle_track.id),
+                    "language": "en",
+                    "has_closed_captioning": True,
+                }
+            ],
+        )
+        self.assertEqual(
+            video["sign_tracks"], [{"id": str(sign_track.id), "language": "fr"}]
+        )
+
+    def test_api_playlist_videos_cursor(self):
+        """Pages should follow each other by position and id without gaps or duplicates."""
+        videos = [self.video] + [
+            VideoFactory(playlist=self.playlist, position=position)
+            for position in [0, 0, 1, 1, 1, 2]
+        ]
+        expected = [
+            str(video.id)
+            for video in sorted(videos, key=lambda video: (video.position, video.id))
+        ]
+
+        ids = []
+        url = "/api/playlists/{!s}/videos/?page_size=2".format(self.playlist.id)
+        while url:
+            response = self.client.get(url, HTTP_AUTHORIZATION=self.authorization)
+            self.assertEqual(response.status_code, 200)
+            content = json.loads(response.content)
+            self.assertLessEqual(len(content["results"]), 2)
+            ids.extend(video["id"] for video in content["results"])
+            url = content["next"]
+
+        self.assertEqual(ids, expected)
+
+    def test_api_playlist_videos_invalid_cursor(self):
+        """An invalid cursor should return a 404."""
+        for cursor in ["abc", "MTpub3RhdXVpZA=="]:
+            response = self.get_videos("?cursor={:s}".format(cursor))
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(json.loads(response.content), {"detail": "Invalid cursor"})
+
+    def test_api_playlist_videos_query_count(self):
+        """The number of queries should not depend on the size of the page."""
+        for _ in range(9):
+            video = VideoFactory(playlist=self.playlist)
+            AudioTrackFactory(video=video)
+            SubtitleTrackFactory(video=video)
+            SignTrackFactory(video=video)
+
+        counts = []
+        for page_size in [1, 10]:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.get_videos("?page_size={:d}".format(page_size))
+            self.assertEqual(len(json.loads(response.content)["results"]), page_size)
+            counts.append(len(queries))
+
+        # Playlist, permission, videos and one query for each kind of track
+        self.assertEqual(counts, [6, 6])
@@ -1,15 +1,23 @@
 """Tests for the Video API of the Marsha project."""
+import base64
 from datetime import datetime
 import json
+import os
+import tempfile
 from unittest import mock
+from urllib.parse import parse_qs
 
 from django.test import TestCase, override_settings
 
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
 import pytz
 from rest_framework_simplejwt.tokens import AccessToken
 
 from ..factories import UserFactory, VideoFactory
 from ..models import Video
+from ..utils import cloudfront_utils
 from ..utils.s3_utils import timezone
 
 
@@ -50,6 +58,16 @@ ASOu/Da3/eg8PI5Rsh6ubNVlEAMQdDFhL/TpfaHqSwim6mxbrQ==
 class VideoAPITest(TestCase):
     """Test the API of the video object."""
 
+    def setUp(self):
+        """Write the RSA key used to sign urls in a temporary file and forget signatures."""
+        super().setUp()
+        cloudfront_utils._signatures.clear()
+        key_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(key_directory.cleanup)
+        self.rsa_key_path = os.path.join(key_directory.name, "cloudfront_private_key")
+        with open(self.rsa_key_path, "wb") as key_file:
+            key_file.write(RSA_KEY_MOCK)
+
     def test_api_video_read_detail_anonymous(self):
         """Anonymous users should not be allowed to read a video detail."""
         video = VideoFactory()
@@ -119,6 +137,223 @@ class VideoAPITest(TestCase):
             content, {"detail": "You do not have permission to perform this action."}
         )
 
+    @override_settings(
+        CLOUDFRONT_SIGNED_URLS_ACTIVE=True,
+        CLOUDFRONT_SIGNED_URLS_POLICY="canned",
+        CLOUDFRONT_ACCESS_KEY_ID="cloudfront-access-key-id",
+    )
+    def test_api_video_read_detail_token_user_resolutions(self):
+        """Only the resolutions produced by the transcoding pipeline should be signed."""
+        video = VideoFactory(
+            uploaded_on=datetime(2018, 8, 8, tzinfo=pytz.utc),
+            state="ready",
+            resolutions=[480, 144],
+        )
+        jwt_token = AccessToken()
+        jwt_token.payload["video_id"] = str(video.id)
+
+        with self.settings(
+            CLOUDFRONT_PRIVATE_KEY_PATH=self.rsa_key_path
+        ), mock.patch.object(
+            cloudfront_utils, "rsa_signer", wraps=cloudfront_utils.rsa_signer
+        ) as rsa_signer:
+            response = self.client.get(
+                "/api/videos/{!s}/".format(video.id),
+                HTTP_AUTHORIZATION="Bearer {!s}".format(jwt_token),
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(rsa_signer.call_count, 4)
+
+        urls = json.loads(json.loads(response.content)["urls"])
+        self.assertEqual(list(urls["mp4"]), ["144", "480"])
+        self.assertEqual(list(urls["thumbnails"]), ["144", "480"])
+        self.assertTrue(
+            urls["mp4"]["480"].startswith(
+                "https://abc.cloudfront.net/{!s}/{!s}/videos/1533686400_480.mp4?".format(
+                    video.playlist.id, video.id
+                )
+            )
+        )
+
+    @override_settings(CLOUDFRONT_SIGNED_URLS_ACTIVE=False)
+    def test_api_video_read_detail_token_user_version_2(self):
+        """Urls should be a nested object from version 2.0 of the API."""
+        video = VideoFactory(
+            uploaded_on=datetime(2018, 8, 8, tzinfo=pytz.utc), state="ready"
+        )
+        jwt_token = AccessToken()
+        jwt_token.payload["video_id"] = str(video.id)
+
+        response = self.client.get(
+            "/api/videos/{!s}/".format(video.id),
+            HTTP_ACCEPT="application/json; version=2.0",
+            HTTP_AUTHORIZATION="Bearer {!s}".format(jwt_token),
+        )
+        self.assertEqual(response.status_code, 200)
+        urls = json.loads(response.content)["urls"]
+        self.assertEqual(list(urls), ["mp4", "thumbnails"])
+        self.assertEqual(
+            urls["mp4"]["720"],
+            "https://abc.cloudfront.net/{!s}/{!s}/videos/1533686400_720.mp4".format(
+                video.playlist.id, video.id
+            ),
+        )
+
+        # Unknown versions are not acceptable
+        response = self.client.get(
+            "/api/videos/{!s}/".format(video.id),
+            HTTP_ACCEPT="application/json; version=3.0",
+            HTTP_AUTHORIZATION="Bearer {!s}".format(jwt_token),
+        )
+        self.assertEqual(response.status_code, 406)
+
+    @override_settings(
+        CLOUDFRONT_SIGNED_URLS_ACTIVE=True,
+        CLOUDFRONT_SIGNED_URLS_POLICY="canned",
+        CLOUDFRONT_ACCESS_KEY_ID="cloudfront-access-key-id",
+    )
+    def test_api_video_read_detail_token_user_url_filters(self):
+        """Only the resolutions and kinds of urls requested should be built and signed."""
+        video = VideoFactory(
+            uploaded_on=datetime(2018, 8, 8, tzinfo=pytz.utc), state="ready"
+        )
+        jwt_token = AccessToken()
+        jwt_token.payload["video_id"] = str(video.id)
+
+        with self.settings(
+            CLOUDFRONT_PRIVATE_KEY_PATH=self.rsa_key_path
+        ), mock.patch.object(
+            cloudfront_utils, "rsa_signer", wraps=cloudfront_utils.rsa_signer
+        ) as rsa_signer:
+            response = self.client.get(
+                "/api/videos/{!s}/?resolutions=480,720,2160&kinds=mp4".format(video.id),
+                HTTP_ACCEPT="application/json; version=2.0",
+                HTTP_AUTHORIZATION="Bearer {!s}".format(jwt_token),
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(rsa_signer.call_count, 2)
+        urls = json.loads(response.content)["urls"]
+        self.assertEqual(list(urls), ["mp4"])
+        self.assertEqual(list(urls["mp4"]), ["480", "720"])
+
+        # Filters also apply to version 1.0
+        with self.settings(CLOUDFRONT_PRIVATE_KEY_PATH=self.rsa_key_path):
+            response = self.client.get(
+                "/api/videos/{!s}/?kinds=thumbnails,".format(video.id),
+                HTTP_AUTHORIZATION="Bearer {!s}".format(jwt_token),
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(json.loads(json.loads(response.content)["urls"])), ["thumbnails"]
+        )
+
+    @override_settings(
+        CLOUDFRONT_SIGNED_URLS_ACTIVE=True,
+        CLOUDFRONT_ACCESS_KEY_ID="cloudfront-access-key-id",
+    )
+    def test_api_video_read_detail_token_user_manifests(self):
+        """The manifest of a video should only be served if its segments can be read."""
+        video = VideoFactory(
+            uploaded_on=datetime(2018, 8, 8, tzinfo=pytz.utc),
+            state="ready",
+            streaming_formats=["hls"],
+        )
+        jwt_token = AccessToken()
+        jwt_token.payload["video_id"] = str(video.id)
+        manifest_url = "https://abc.cloudfront.net/{!s}/{!s}/hls/1533686400.m3u8".format(
+            video.playlist.id, video.id
+        )
+
+        def get_urls(**settings):
+            """Get the urls of the video, in version 2.0 of the API, with some settings."""
+            with self.settings(
+                CLOUDFRONT_PRIVATE_KEY_PATH=self.rsa_key_path, **settings
+            ):
+                response = self.client.get(
+                    "/api/videos/{!s}/".format(video.id),
+                    HTTP_ACCEPT="application/json; version=2.0",
+                    HTTP_AUTHORIZATION="Bearer {!s}".format(jwt_token),
+                )
+            self.assertEqual(response.status_code, 200)
+            return json.loads(response.content)["urls"]
+
+        # Unsigned manifest
+        urls = get_urls(CLOUDFRONT_SIGNED_URLS_ACTIVE=False)
+        self.assertEqual(urls["manifests"], {"hls": manifest_url})
+
+        # The custom policy of the manifest also covers its playlists and segments
+        urls = get_urls(CLOUDFRONT_SIGNED_URLS_POLICY="custom")
+        manifest, query_string = urls["manifests"]["hls"].split("?")
+        self.assertEqual(manifest, manifest_url)
+        self.assertTrue(urls["mp4"]["720"].endswith("?{:s}".format(query_string)))
+
+        # A canned policy would only grant access to the manifest itself
+        urls = get_urls(CLOUDFRONT_SIGNED_URLS_POLICY="canned")
+        self.assertNotIn("manifests", urls)
+        self.assertEqual(len(urls["mp4"]), 5)
+
+    @override_settings(CLOUDFRONT_SIGNED_URLS_ACTIVE=False)
+    def test_api_video_read_detail_token_user_manifests_filters(self):
+        """Manifests should only be listed if requested and if the video has some."""
+        video = VideoFactory(
+            uploaded_on=datetime(2018, 8, 8, tzinfo=pytz.utc),
+            state="ready",
+            streaming_formats=["hls"],
+        )
+        jwt_token = AccessToken()
+        jwt_token.payload["video_id"] = str(video.id)
+
+        response = self.client.get(
+            "/api/videos/{!s}/?kinds=manifests".format(video.id),
+            HTTP_ACCEPT="application/json; version=2.0",
+            HTTP_AUTHORIZATION="Bearer {!s}".format(jwt_token),
+        )
+        self.assertEqual(list(json.loads(response.content)["urls"]), ["manifests"])
+
+        response = self.client.get(
+            "/api/videos/{!s}/?kinds=mp4".format(video.id),
+            HTTP_ACCEPT="application/json; version=2.0",
+            HTTP_AUTHORIZATION="Bearer {!s}".format(jwt_token),
+        )
+        self.assertEqual(list(json.loads(response.content)["urls"]), ["mp4"])
+
+        # Videos transcoded before adaptive streaming have no manifest
+        video.streaming_formats = []
+        video.save()
+        response = self.client.get(
+            "/api/videos/{!s}/".format(video.id),
+            HTTP_ACCEPT="application/json; version=2.0",
+            HTTP_AUTHORIZATION="Bearer {!s}".format(jwt_token),
+        )
+        self.assertEqual(
+            list(json.loads(response.content)["urls"]), ["mp4", "thumbnails"]
+        )
+
+    def test_api_video_read_detail_token_user_url_filters_invalid(self):
+        """Invalid resolutions or kinds of urls should be rejected."""
+        video = VideoFactory(
+            uploaded_on=datetime(2018, 8, 8, tzinfo=pytz.utc), state="ready"
+        )
+        jwt_token = AccessToken()
+        jwt_token.payload["video_id"] = str(video.id)
+
+        for query_string, error in [
+            (
+                "resolutions=480p",
+                {"resolutions": "Resolutions should be a list of integers."},
+            ),
+            (
+                "kinds=mp4,webm",
+                {"kinds": "Kinds should be among: mp4, thumbnails, manifests."},
+            ),
+        ]:
+            response = self.client.get(
+                "/api/videos/{!s}/?{:s}".format(video.id, query_string),
+                HTTP_AUTHORIZATION="Bearer {!s}".format(jwt_token),
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(json.loads(response.content), error)
+
     @override_settings(CLOUDFRONT_SIGNED_URLS_ACTIVE=False)
     def test_api_video_read_detail_token_user_no_active_stamp(self):
         """A video with no active stamp should not fail and its "urls" should be set to `None`."""
@@ -180,10 +415,10 @@ class VideoAPITest(TestCase):
 
     @override_settings(
         CLOUDFRONT_SIGNED_URLS_ACTIVE=True,
+        CLOUDFRONT_SIGNED_URLS_POLICY="canned",
         CLOUDFRONT_ACCESS_KEY_ID="cloudfront-access-key-id",
     )
-    @mock.patch("builtins.open", new_callable=mock.mock_open, read_data=RSA_KEY_MOCK)
-    def test_api_video_read_detail_token_user_signed_urls(self, mock_open):
+    def test_api_video_read_detail_token_user_signed_urls(self):
         """Activating signed urls should add Cloudfront query string authentication parameters."""
         video = VideoFactory(
             id="a2f27fde-973a-4e89-8dca-cc59e01d255c",
@@ -197,7 +432,9 @@ class VideoAPITest(TestCase):
         # Get the video linked to the JWT token
         # fix the time so that the url signature is deterministic and can be checked
         now = datetime(2018, 8, 8, tzinfo=pytz.utc)
-        with mock.patch.object(timezone, "now", return_value=now):
+        with self.settings(
+            CLOUDFRONT_PRIVATE_KEY_PATH=self.rsa_key_path
+        ), mock.patch.object(timezone, "now", return_value=now):
             response = self.client.get(
                 "/api/videos/{!s}/".format(video.id),
                 HTTP_AUTHORIZATION="Bearer {!s}".format(jwt_token),
@@ -232,6 +469,83 @@ class VideoAPITest(TestCase):
             ),
         )
 
+    @override_settings(
+        CLOUDFRONT_SIGNED_URLS_ACTIVE=True,
+        CLOUDFRONT_SIGNED_URLS_POLICY="custom",
+        CLOUDFRONT_ACCESS_KEY_ID="cloudfront-access-key-id",
+    )
+    def test_api_video_read_detail_token_user_signed_urls_custom_policy(self):
+        """A custom policy should sign all the urls of a video at once with a wildcard."""
+        video = VideoFactory(
+            id="a2f27fde-973a-4e89-8dca-cc59e01d255c",
+            playlist__id="f76f6afd-7135-488e-9d70-6ec599a67806",
+            uploaded_on=datetime(2018, 8, 8, tzinfo=pytz.utc),
+            state="ready",
+        )
+        jwt_token = AccessToken()
+        jwt_token.payload["video_id"] = str(video.id)
+
+        now = datetime(2018, 8, 8, tzinfo=pytz.utc)
+        with self.settings(
+            CLOUDFRONT_PRIVATE_KEY_PATH=self.rsa_key_path
+        ), mock.patch.object(timezone, "now", return_value=now), mock.patch.object(
+            cloudfront_utils, "rsa_signer", wraps=cloudfront_utils.rsa_signer
+        ) as rsa_signer:
+            response = self.client.get(
+                "/api/videos/{!s}/".format(video.id),
+                HTTP_AUTHORIZATION="Bearer {!s}".format(jwt_token),
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(rsa_signer.call_count, 1)
+        urls = json.loads(json.loads(response.content)["urls"])
+
+        base = (
+            "https://abc.cloudfront.net/f76f6afd-7135-488e-9d70-6ec599a67806/"
+            "a2f27fde-973a-4e89-8dca-cc59e01d255c"
+        )
+        mp4_url, query_string = urls["mp4"]["144"].split("?")
+        self.assertEqual(mp4_url, "{:s}/videos/1533686400_144.mp4".format(base))
+        thumbnail_url, thumbnail_query_string = urls["thumbnails"]["144"].split("?")
+        self.assertEqual(
+            thumbnail_url, "{:s}/thumbnails/1533686400_144.0000000.jpg".format(base)
+        )
+        self.assertEqual(thumbnail_query_string, query_string)
+
+        # All the urls share the same signature
+        for kind in ["mp4", "thumbnails"]:
+            for resolution in ["144", "240", "480", "720", "1080"]:
+                self.assertTrue(urls[kind][resolution].endswith(query_string))
+
+        parameters = parse_qs(query_string)
+        self.assertEqual(parameters["Key-Pair-Id"], ["cloudfront-access-key-id"])
+        policy = base64.b64decode(
+            parameters["Policy"][0].translate(str.maketrans("-_~", "+=/"))
+        )
+        self.assertEqual(
+            json.loads(policy),
+            {
+                "Statement": [
+                    {
+                        "Resource": "{:s}/*".format(base),
+                        "Condition": {"DateLessThan": {"AWS:EpochTime": 1533693600}},
+                    }
+                ]
+            },
+        )
+
+        # The signature of the policy can be verified with the public key
+        public_key = serialization.load_pem_private_key(
+            RSA_KEY_MOCK, password=None, backend=default_backend()
+        ).public_key()
+        public_key.verify(
+            base64.b64decode(
+                parameters["Signature"][0].translate(str.maketrans("-_~", "+=/"))
+            ),
+            policy,
+            padding.PKCS1v15(),
+            hashes.SHA1(),
+        )
+
     def test_api_video_read_detail_staff_or_user(self):
         """Users authenticated via a session should not be allowed to read a video detail."""
         for user in [UserFactory(), UserFactory(is_staff=True)]:
@@ -365,6 +679,35 @@ class VideoAPITest(TestCase):
         video.refresh_from_db()
         self.assertEqual(video.uploaded_on, datetime(2018, 8, 8, tzinfo=pytz.utc))
 
+    @override_settings(CLOUDFRONT_SIGNED_URLS_ACTIVE=False)
+    def test_api_video_update_detail_token_user_uploaded_on_resolutions(self):
+        """Confirming a new upload should keep serving the urls of all the resolutions."""
+        video = VideoFactory(
+            uploaded_on=datetime(2018, 8, 7, tzinfo=pytz.utc), state="ready"
+        )
+        jwt_token = AccessToken()
+        jwt_token.payload["video_id"] = str(video.id)
+
+        response = self.client.patch(
+            "/api/videos/{!s}/".format(video.id),
+            json.dumps({"active_stamp": "1533686400"}),
+            HTTP_ACCEPT="application/json; version=2.0",
+            HTTP_AUTHORIZATION="Bearer {!s}".format(jwt_token),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        urls = json.loads(response.content)["urls"]
+        self.assertEqual(list(urls["mp4"]), ["144", "240", "480", "720", "1080"])
+        self.assertEqual(
+            urls["mp4"]["720"],
+            "https://abc.cloudfront.net/{!s}/{!s}/videos/1533686400_720.mp4".format(
+                video.playlist.id, video.id
+            ),
+        )
+
+        video.refresh_from_db()
+        self.assertIsNone(video.resolutions)
+
     def test_api_video_update_detail_token_user_id(self):
         """Token users trying to update the ID of a video they own should be ignored."""
         video = VideoFactory()
@@ -0,0 +1,196 @@
+"""Tests for the bulk update API of the Marsha project."""
+from datetime import datetime
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+import pytz
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..factories import PlaylistFactory, VideoFactory
+from ..lti import LTI
+from ..models import Video
+from ..permissions import IsVideoTokenOrAdminUser
+from ..views import VideoLTIView
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+class VideoBulkUpdateAPITest(TestCase):
+    """Test the API updating several videos at once."""
+
+    def setUp(self):
+        """Create videos in a playlist and a token for the first one."""
+        super().setUp()
+        self.playlist = PlaylistFactory()
+        self.video = VideoFactory(playlist=self.playlist, title="title", position=0)
+        jwt_token = AccessToken()
+        jwt_token.payload["video_id"] = str(self.video.id)
+        self.authorization = "Bearer {!s}".format(jwt_token)
+
+    def patch(self, data):
+        """Send a bulk update with the token of the video."""
+        return self.client.patch(
+            "/api/videos/bulk/",
+            json.dumps(data),
+            content_type="application/json",
+            HTTP_AUTHORIZATION=self.authorization,
+        )
+
+    def test_api_video_bulk_update_anonymous(self):
+        """Anonymous users are not allowed to update videos."""
+        response = self.client.patch(
+            "/api/videos/bulk/",
+            json.dumps([{"id": str(self.video.id), "title": "new title"}]),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 401)
+        self.video.refresh_from_db()
+        self.assertEqual(self.video.title, "title")
+
+    def test_api_video_bulk_update_token_user(self):
+        """Valid items should be applied in one statement, the others reported."""
+        # The token does not grant access to the other videos, even in its playlist
+        other_video = VideoFactory(playlist=self.playlist, title="other title")
+        missing_id = "a2f27fde-973a-4e89-8dca-cc59e01d255c"
+        updated_on = self.video.updated_on
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.patch(
+                [
+                    {
+                        "id": str(self.video.id),
+                        "title": "new title",
+                        "position": 3,
+                        "active_stamp": "1533686400",
+                    },
+                    {"id": str(other_video.id), "title": "forbidden"},
+                    {"id": missing_id, "title": "missing"},
+                ]
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            json.loads(response.content),
+            {
+                "updated": [str(self.video.id)],
+                "errors": {
+                    str(other_video.id): (
+                        "You do not have permission to perform this action."
+                    ),
+                    missing_id: "Not found.",
+                },
+            },
+        )
+        self.assertEqual(
+            len([query for query in queries if query["sql"].startswith("UPDATE")]), 1
+        )
+
+        self.video.refresh_from_db()
+        self.assertEqual(self.video.title, "new title")
+        self.assertEqual(self.video.position, 3)
+        self.assertEqual(self.video.uploaded_on, datetime(2018, 8, 8, tzinfo=pytz.utc))
+        self.assertGreater(self.video.updated_on, updated_on)
+        other_video.refresh_from_db()
+        self.assertEqual(other_video.title, "other title")
+
+    def test_api_video_bulk_update_invalid_item(self):
+        """An invalid item should be reported with the errors of the serializer."""
+        response = self.patch([{"id": str(self.video.id), "position": -1}])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            json.loads(response.content),
+            {
+                "updated": [],
+                "errors": {
+                    str(self.video.id): {
+                        "position": ["Ensure this value is greater than or equal to 0."]
+                    }
+                },
+            },
+        )
+        self.video.refresh_from_db()
+        self.assertEqual(self.video.position, 0)
+
+    def test_api_video_bulk_update_several_videos(self):
+        """All the videos should be updated at once, absent fields keeping their value."""
+        videos = VideoFactory.create_batch(
+            3, playlist=self.playlist, title="title", position=5
+        )
+
+        # Grant access to all the videos to the user of the token, as to an admin user
+        with mock.patch.object(
+            IsVideoTokenOrAdminUser, "has_object_permission", return_value=True
+        ), CaptureQueriesContext(connection) as queries:
+            response = self.patch(
+                [
+                    {"id": str(videos[0].id), "position": 2},
+                    {"id": str(videos[1].id), "title": "second", "position": 1},
+                    {"id": str(videos[2].id), "description": "third"},
+                ]
+            )
+
+        self.assertEqual(
+            json.loads(response.content)["updated"], [str(video.id) for video in videos]
+        )
+        self.assertEqual(
+            len([query for query in queries if query["sql"].startswith("UPDATE")]), 1
+        )
+        for video in videos:
+            video.refresh_from_db()
+        self.assertEqual(
+            [(video.title, video.position) for video in videos],
+            [("title", 2), ("second", 1), ("title", 5)],
+        )
+        self.assertEqual(videos[2].description, "third")
+
+    @override_settings(LTI_STUDENT_CACHE_ACTIVE=True)
+    @mock.patch.object(LTI, "verify", return_value=True)
+    def test_api_video_bulk_update_student_cache(self, mock_verify):
+        """The contexts of student launches cached for a video should not be served after."""
+        cache.clear()
+        self.video.lti_id = "123"
+        self.video.save()
+        view = VideoLTIView()
+        view.request = RequestFactory().post(
+            "/",
+            {
+                "resource_link_id": "123",
+                "roles": "student",
+                "context_id": self.playlist.lti_id,
+                "tool_consumer_instance_guid": self.playlist.consumer_site.name,
+            },
+        )
+        self.assertEqual(view.get_context_data()["video"]["title"], "title")
+
+        response = self.patch([{"id": str(self.video.id), "title": "new title"}])
+        self.assertEqual(json.loads(response.content)["updated"], [str(self.video.id)])
+
+        self.assertEqual(view.get_context_data()["video"]["title"], "new title")
+
+    def test_api_video_bulk_update_invalid_payload(self):
+        """The payload should be a list of items with distinct video ids."""
+        for data in [
+            {"id": str(self.video.id)},
+            [],
+            [{"title": "no id"}],
+            [{"id": str(self.video.id)}, {"id": str(self.video.id)}],
+            [{"id": str(self.video.id)}] * 501,
+        ]:
+            response = self.patch(data)
+            self.assertEqual(response.status_code, 400)
+
+    def test_api_video_bulk_update_not_detail(self):
+        """The bulk route should not be taken for the detail of a video."""
+        response = self.client.get(
+            "/api/videos/bulk/", HTTP_AUTHORIZATION=self.authorization
+        )
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(Video.objects.count(), 1)
@@ -0,0 +1,165 @@
+"""Tests for the conditional requests on the Video API of the Marsha project."""
+from datetime import datetime
+import json
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+
+import pytz
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..factories import VideoFactory
+from ..models import Video
+from ..serializers import VideoSerializer
+from ..utils import cloudfront_utils
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+class VideoConditionalAPITest(TestCase):
+    """Test the validators and the 304 responses of the video detail endpoint."""
+
+    def setUp(self):
+        """Create an uploaded video and a token to read it."""
+        super().setUp()
+        self.video = VideoFactory(
+            state=Video.READY,
+            uploaded_on=datetime(2018, 8, 8, tzinfo=pytz.utc),
+            resolutions=[144, 720],
+        )
+        jwt_token = AccessToken()
+        jwt_token.payload["video_id"] = str(self.video.id)
+        self.authorization = "Bearer {!s}".format(jwt_token)
+
+    def get(self, query="", **headers):
+        """Get the video with the token of the video."""
+        return self.client.get(
+            "/api/videos/{!s}/{:s}".format(self.video.id, query),
+            HTTP_AUTHORIZATION=self.authorization,
+            **headers
+        )
+
+    def test_api_video_conditional_headers(self):
+        """Responses should carry a strong ETag, a Last-Modified date and no-cache."""
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response["ETag"], r'^"[0-9a-f]{40}"$')
+        self.assertEqual(
+            response["Last-Modified"], http_date(self.video.updated_on.timestamp())
+        )
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        self.assertEqual(response["Vary"], "Accept, Authorization")
+
+    def test_api_video_conditional_if_none_match(self):
+        """A 304 should be computed with one query, without serializing the video."""
+        etag = self.get()["ETag"]
+
+        with CaptureQueriesContext(connection) as queries, mock.patch.object(
+            VideoSerializer, "get_urls"
+        ) as get_urls:
+            response = self.get(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(len(queries), 1)
+        get_urls.assert_not_called()
+
+        response = self.get(HTTP_IF_NONE_MATCH='"other", {:s}'.format(etag))
+        self.assertEqual(response.status_code, 304)
+
+    def test_api_video_conditional_if_modified_since(self):
+        """A 304 should be returned if the video did not change since the date."""
+        last_modified = self.get()["Last-Modified"]
+
+        response = self.get(HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+        response = self.get(
+            HTTP_IF_MODIFIED_SINCE=http_date(self.video.updated_on.timestamp() - 1)
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_api_video_conditional_changed(self):
+        """The ETag should change with the video and with the representation requested."""
+        etag = self.get()["ETag"]
+
+        for query, headers in [
+            ("?resolutions=144", {}),
+            ("?kinds=mp4", {}),
+            ("", {"HTTP_ACCEPT": "application/json; version=2.0"}),
+        ]:
+            response = self.get(query, HTTP_IF_NONE_MATCH=etag, **headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response["ETag"], etag)
+
+        self.video.title = "new title"
+        self.video.save()
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["title"], "new title")
+        self.assertNotEqual(response["ETag"], etag)
+
+        # Fields updated without saving the video are also taken into account
+        etag = response["ETag"]
+        Video.objects.filter(id=self.video.id).update(resolutions=[144])
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_api_video_conditional_other_video(self):
+        """Conditional requests should not bypass permissions."""
+        etag = self.get()["ETag"]
+        other_video = VideoFactory()
+
+        response = self.client.get(
+            "/api/videos/{!s}/".format(other_video.id),
+            HTTP_AUTHORIZATION=self.authorization,
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.get(
+            "/api/videos/abc/",
+            HTTP_AUTHORIZATION=self.authorization,
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(
+        CLOUDFRONT_SIGNED_URLS_ACTIVE=True,
+        CLOUDFRONT_SIGNED_URLS_VALIDITY=2 * 60 * 60,
+        CLOUDFRONT_SIGNED_URLS_BUCKET=10 * 60,
+    )
+    def test_api_video_conditional_signed_urls(self):
+        """With signed urls, responses should be cached until the next time bucket."""
+        Video.objects.filter(id=self.video.id).update(
+            updated_on=datetime(2018, 8, 8, 9, tzinfo=pytz.utc)
+        )
+
+        # 4 minutes after the beginning of a time bucket
+        now = datetime(2018, 8, 8, 10, 4, tzinfo=pytz.utc)
+        with mock.patch.object(
+            cloudfront_utils, "get_signed_query_string", return_value="Policy=abc"
+        ), mock.patch("django.utils.timezone.now", return_value=now):
+            response = self.get()
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Cache-Control"], "private, max-age=360")
+            self.assertEqual(response["Last-Modified"], "Wed, 08 Aug 2018 10:00:00 GMT")
+            etag = response["ETag"]
+
+            self.assertEqual(self.get(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Urls signed in the next time bucket expire later
+        now = datetime(2018, 8, 8, 10, 10, tzinfo=pytz.utc)
+        with mock.patch.object(
+            cloudfront_utils, "get_signed_query_string", return_value="Policy=abc"
+        ), mock.patch("django.utils.timezone.now", return_value=now):
+            response = self.get(HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Cache-Control"], "private, max-age=600")
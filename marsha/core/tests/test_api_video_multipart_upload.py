@@ -0,0 +1,332 @@
+"""Tests for the multipart upload API of the Marsha project."""
+from datetime import datetime
+import json
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+from django.test import TestCase
+
+from botocore.stub import Stubber
+import pytz
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..factories import UserFactory, VideoFactory
+from ..utils import s3_utils
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+class MultipartUploadAPITest(TestCase):
+    """Test the multipart upload API against a stubbed S3 client.
+
+    The stubber stands in for S3: it checks the parameters of each request sent by the client
+    and returns the response S3 would return, without any network access.
+
+    """
+
+    def setUp(self):
+        """Create a video with a token and activate the S3 stubber."""
+        super().setUp()
+        self.video = VideoFactory(
+            id="a2f27fde-973a-4e89-8dca-cc59e01d255c",
+            playlist__id="f76f6afd-7135-488e-9d70-6ec599a67806",
+        )
+        jwt_token = AccessToken()
+        jwt_token.payload["video_id"] = str(self.video.id)
+        self.authorization = "Bearer {!s}".format(jwt_token)
+        self.key = (
+            "f76f6afd-7135-488e-9d70-6ec599a67806/"
+            "a2f27fde-973a-4e89-8dca-cc59e01d255c/videos/1533686400"
+        )
+
+        self.stubber = Stubber(s3_utils.get_s3_client())
+        self.stubber.activate()
+        self.addCleanup(self.stubber.deactivate)
+
+    def post(self, path, data):
+        """Post JSON data to a multipart upload endpoint of the video."""
+        return self.client.post(
+            "/api/videos/{!s}/multipart-upload/{:s}".format(self.video.id, path),
+            json.dumps(data),
+            content_type="application/json",
+            HTTP_AUTHORIZATION=self.authorization,
+        )
+
+    def add_list_parts_response(self, sizes):
+        """Stub the listing of parts of the given sizes."""
+        self.stubber.add_response(
+            "list_parts",
+            {
+                "IsTruncated": False,
+                "Parts": [
+                    {
+                        "PartNumber": number,
+                        "ETag": '"etag{:d}"'.format(number),
+                        "Size": size,
+                    }
+                    for number, size in enumerate(sizes, start=1)
+                ],
+            },
+            {"Bucket": "test-marsha-source", "Key": self.key, "UploadId": "upload-1"},
+        )
+
+    def test_api_video_multipart_upload_anonymous_user(self):
+        """Anonymous users are not allowed to initiate a multipart upload."""
+        response = self.client.post(
+            "/api/videos/{!s}/multipart-upload/".format(self.video.id),
+            {"size": 10, "content_type": "video/mp4"},
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_api_video_multipart_upload_staff_or_user(self):
+        """Users authenticated via a session should not be able to upload a video."""
+        for user in [UserFactory(), UserFactory(is_staff=True)]:
+            self.client.login(username=user.username, password="test")
+            response = self.client.post(
+                "/api/videos/{!s}/multipart-upload/".format(self.video.id),
+                {"size": 10, "content_type": "video/mp4"},
+            )
+            self.assertEqual(response.status_code, 401)
+
+    def test_api_video_multipart_upload_other_video(self):
+        """A token user should not be able to upload another video."""
+        other_video = VideoFactory()
+        for path in ["", "parts/", "complete/", "abort/"]:
+            response = self.client.post(
+                "/api/videos/{!s}/multipart-upload/{:s}".format(other_video.id, path),
+                {"size": 10, "content_type": "video/mp4"},
+                HTTP_AUTHORIZATION=self.authorization,
+            )
+            self.assertEqual(response.status_code, 403)
+
+    def test_api_video_multipart_upload_initiate(self):
+        """Initiating an upload should return its id and split the file in parts."""
+        self.stubber.add_response(
+            "create_multipart_upload",
+            {"UploadId": "upload-1"},
+            {
+                "ACL": "private",
+                "Bucket": "test-marsha-source",
+                "ContentType": "video/mp4",
+                "Key": self.key,
+            },
+        )
+
+        now = datetime(2018, 8, 8, tzinfo=pytz.utc)
+        with mock.patch.object(s3_utils.timezone, "now", return_value=now):
+            response = self.post("", {"size": 3 * 2 ** 30, "content_type": "video/mp4"})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            json.loads(response.content),
+            {
+                "bucket": "test-marsha-source",
+                "stamp": "1533686400",
+                "key": self.key,
+                "upload_id": "upload-1",
+                "max_file_size": 53687091200,
+                "part_size": 67108864,
+                "part_count": 48,
+                "s3_endpoint": "s3.eu-west-1.amazonaws.com",
+            },
+        )
+        self.stubber.assert_no_pending_responses()
+
+    def test_api_video_multipart_upload_initiate_invalid(self):
+        """The size and the content type of the file should be validated before S3 is called."""
+        response = self.post("", {"size": 60 * 2 ** 30, "content_type": "text/plain"})
+
+        self.assertEqual(response.status_code, 400)
+        content = json.loads(response.content)
+        self.assertEqual(set(content), {"size", "content_type"})
+
+    def test_api_video_multipart_upload_part_size(self):
+        """Parts should grow for files that would need more parts than S3 accepts."""
+        self.assertEqual(s3_utils.get_part_size(1), 64 * 2 ** 20)
+        self.assertEqual(s3_utils.get_part_size(10000 * 64 * 2 ** 20), 64 * 2 ** 20)
+        self.assertEqual(s3_utils.get_part_size(10000 * 64 * 2 ** 20 + 1), 65 * 2 ** 20)
+        self.assertLessEqual(
+            50 * 2 ** 30 / s3_utils.get_part_size(50 * 2 ** 30), s3_utils.S3_MAX_PARTS
+        )
+
+    def test_api_video_multipart_upload_part_urls(self):
+        """The urls of many parts should be presigned in one request, without calling S3."""
+        response = self.post(
+            "parts/",
+            {
+                "stamp": "1533686400",
+                "upload_id": "upload-1",
+                "part_numbers": [3, 1, 2, 1],
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        urls = json.loads(response.content)["urls"]
+        self.assertEqual(list(urls), ["1", "2", "3"])
+        for part_number, url in urls.items():
+            url = urlparse(url)
+            # Depending on the version of botocore, the bucket is in the host or in the path
+            self.assertIn("test-marsha-source", url.netloc + url.path)
+            self.assertTrue(url.path.endswith("/{:s}".format(self.key)))
+            query = parse_qs(url.query)
+            self.assertEqual(query["partNumber"], [part_number])
+            self.assertEqual(query["uploadId"], ["upload-1"])
+            self.assertEqual(query["X-Amz-Algorithm"], ["AWS4-HMAC-SHA256"])
+            self.assertEqual(query["X-Amz-Expires"], ["86400"])
+            self.assertIn("X-Amz-Signature", query)
+
+    def test_api_video_multipart_upload_part_urls_invalid(self):
+        """Part numbers should be between 1 and 10000 and limited in number."""
+        for part_numbers in [[], [0], [10001], list(range(1, 102))]:
+            response = self.post(
+                "parts/",
+                {
+                    "stamp": "1533686400",
+                    "upload_id": "upload-1",
+                    "part_numbers": part_numbers,
+                },
+            )
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(list(json.loads(response.content)), ["part_numbers"])
+
+        response = self.post(
+            "parts/", {"stamp": "../1", "upload_id": "upload-1", "part_numbers": [1]}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(json.loads(response.content)), ["stamp"])
+
+    def test_api_video_multipart_upload_list_parts(self):
+        """The parts already uploaded should be listed to resume an upload."""
+        self.add_list_parts_response([2 ** 20, 512])
+
+        response = self.client.get(
+            "/api/videos/{!s}/multipart-upload/parts/".format(self.video.id),
+            {"stamp": "1533686400", "upload_id": "upload-1"},
+            HTTP_AUTHORIZATION=self.authorization,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            json.loads(response.content),
+            {
+                "parts": [
+                    {"part_number": 1, "etag": '"etag1"', "size": 1048576},
+                    {"part_number": 2, "etag": '"etag2"', "size": 512},
+                ]
+            },
+        )
+        self.stubber.assert_no_pending_responses()
+
+    def test_api_video_multipart_upload_list_parts_unknown(self):
+        """Listing the parts of an upload that does not exist should return a 404."""
+        self.stubber.add_client_error("list_parts", service_error_code="NoSuchUpload")
+
+        response = self.client.get(
+            "/api/videos/{!s}/multipart-upload/parts/".format(self.video.id),
+            {"stamp": "1533686400", "upload_id": "upload-1"},
+            HTTP_AUTHORIZATION=self.authorization,
+        )
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(
+            json.loads(response.content), {"detail": "The upload does not exist."}
+        )
+
+    def test_api_video_multipart_upload_complete(self):
+        """Completing an upload should assemble all the parts listed by S3."""
+        self.add_list_parts_response([64 * 2 ** 20, 64 * 2 ** 20, 10])
+        self.stubber.add_response(
+            "complete_multipart_upload",
+            {},
+            {
+                "Bucket": "test-marsha-source",
+                "Key": self.key,
+                "MultipartUpload": {
+                    "Parts": [
+                        {"ETag": '"etag1"', "PartNumber": 1},
+                        {"ETag": '"etag2"', "PartNumber": 2},
+                        {"ETag": '"etag3"', "PartNumber": 3},
+                    ]
+                },
+                "UploadId": "upload-1",
+            },
+        )
+
+        response = self.post(
+            "complete/", {"stamp": "1533686400", "upload_id": "upload-1"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            json.loads(response.content),
+            {"stamp": "1533686400", "key": self.key, "size": 134217738},
+        )
+        self.stubber.assert_no_pending_responses()
+
+    def test_api_video_multipart_upload_complete_empty(self):
+        """An upload without any part should not be completed."""
+        self.add_list_parts_response([])
+
+        response = self.post(
+            "complete/", {"stamp": "1533686400", "upload_id": "upload-1"}
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            json.loads(response.content), {"parts": "No part was uploaded."}
+        )
+        self.stubber.assert_no_pending_responses()
+
+    def test_api_video_multipart_upload_complete_too_large(self):
+        """An upload larger than the maximum size should be aborted."""
+        self.add_list_parts_response([25 * 2 ** 30, 25 * 2 ** 30, 1])
+        self.stubber.add_response(
+            "abort_multipart_upload",
+            {},
+            {"Bucket": "test-marsha-source", "Key": self.key, "UploadId": "upload-1"},
+        )
+
+        response = self.post(
+            "complete/", {"stamp": "1533686400", "upload_id": "upload-1"}
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            json.loads(response.content),
+            {"size": "The file should not exceed 53687091200 bytes."},
+        )
+        self.stubber.assert_no_pending_responses()
+
+    def test_api_video_multipart_upload_complete_parts_too_small(self):
+        """Errors of S3 on the parts of an upload should be returned as validation errors."""
+        self.add_list_parts_response([10, 10])
+        self.stubber.add_client_error(
+            "complete_multipart_upload",
+            service_error_code="EntityTooSmall",
+            service_message="Your proposed upload is smaller than the minimum allowed size",
+        )
+
+        response = self.post(
+            "complete/", {"stamp": "1533686400", "upload_id": "upload-1"}
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            json.loads(response.content),
+            {"parts": "Your proposed upload is smaller than the minimum allowed size"},
+        )
+
+    def test_api_video_multipart_upload_abort(self):
+        """Aborting an upload should delete its parts."""
+        self.stubber.add_response(
+            "abort_multipart_upload",
+            {},
+            {"Bucket": "test-marsha-source", "Key": self.key, "UploadId": "upload-1"},
+        )
+
+        response = self.post("abort/", {"stamp": "1533686400", "upload_id": "upload-1"})
+
+        self.assertEqual(response.status_code, 204)
+        self.stubber.assert_no_pending_responses()
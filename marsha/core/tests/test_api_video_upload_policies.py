@@ -0,0 +1,134 @@
+"""Tests for the bulk upload policies API of the Marsha project."""
+from datetime import datetime
+import json
+from unittest import mock
+import uuid
+
+from django.test import TestCase
+
+import pytz
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..factories import PlaylistFactory, VideoFactory
+from ..utils import s3_utils
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+class UploadPoliciesAPITest(TestCase):
+    """Test the API building the upload policies of several videos of a playlist."""
+
+    def setUp(self):
+        """Start each test without signing keys cached."""
+        super().setUp()
+        s3_utils.get_signature_key.cache_clear()
+
+    def post(self, data, jwt_token=None):
+        """Post JSON data to the upload policies endpoint."""
+        headers = {}
+        if jwt_token:
+            headers["HTTP_AUTHORIZATION"] = "Bearer {!s}".format(jwt_token)
+        return self.client.post(
+            "/api/videos/upload-policies/",
+            json.dumps(data),
+            content_type="application/json",
+            **headers
+        )
+
+    def test_api_video_upload_policies_anonymous_user(self):
+        """Anonymous users are not allowed to retrieve upload policies."""
+        video = VideoFactory()
+        response = self.post(
+            {"playlist": str(video.playlist_id), "videos": [str(video.id)]}
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_api_video_upload_policies_token_user(self):
+        """Policies should only be built for the videos of the playlist the user can upload."""
+        video = VideoFactory(
+            id="a2f27fde-973a-4e89-8dca-cc59e01d255c",
+            playlist__id="f76f6afd-7135-488e-9d70-6ec599a67806",
+        )
+        other_video = VideoFactory(playlist=video.playlist)
+        video_elsewhere = VideoFactory()
+        unknown_id = str(uuid.uuid4())
+        jwt_token = AccessToken()
+        jwt_token.payload["video_id"] = str(video.id)
+
+        now = datetime(2018, 8, 8, tzinfo=pytz.utc)
+        with mock.patch.object(s3_utils.timezone, "now", return_value=now):
+            response = self.post(
+                {
+                    "playlist": str(video.playlist_id),
+                    "videos": [
+                        str(video.id),
+                        str(other_video.id),
+                        str(video_elsewhere.id),
+                        unknown_id,
+                    ],
+                },
+                jwt_token,
+            )
+
+        self.assertEqual(response.status_code, 200)
+        content = json.loads(response.content)
+        self.assertEqual(list(content["policies"]), [str(video.id)])
+        policy = content["policies"][str(video.id)]
+        self.assertEqual(
+            policy["key"],
+            "f76f6afd-7135-488e-9d70-6ec599a67806/"
+            "a2f27fde-973a-4e89-8dca-cc59e01d255c/videos/1533686400",
+        )
+        # Same signature as the policy of the single video endpoint
+        self.assertEqual(
+            policy["x_amz_signature"],
+            "f359246c2c2c7d8eedeca623b4f28d3f4baf5f71294a3de60a742bbff0be9c7e",
+        )
+        self.assertEqual(
+            content["errors"],
+            {
+                str(other_video.id): (
+                    "You do not have permission to perform this action."
+                ),
+                str(video_elsewhere.id): "Not found.",
+                unknown_id: "Not found.",
+            },
+        )
+
+    def test_api_video_upload_policies_signing_key_derived_once(self):
+        """All the policies of a batch should be signed with the same signing key."""
+        playlist = PlaylistFactory()
+        videos = VideoFactory.create_batch(3, playlist=playlist)
+
+        with mock.patch.object(s3_utils, "sign", wraps=s3_utils.sign) as sign:
+            policies = s3_utils.get_s3_policies("test-marsha-source", videos)
+
+        self.assertEqual(set(policies), {str(video.id) for video in videos})
+        self.assertEqual(
+            {policy["stamp"] for policy in policies.values()},
+            {policies[str(videos[0].id)]["stamp"]},
+        )
+        # The four HMAC of the key derivation
+        self.assertEqual(sign.call_count, 4)
+
+    def test_api_video_upload_policies_invalid(self):
+        """The playlist and the list of videos should be validated."""
+        jwt_token = AccessToken()
+        jwt_token.payload["video_id"] = str(uuid.uuid4())
+
+        for data, fields in [
+            ({"videos": [str(uuid.uuid4())]}, ["playlist"]),
+            ({"playlist": "abc", "videos": []}, ["playlist", "videos"]),
+            (
+                {
+                    "playlist": str(uuid.uuid4()),
+                    "videos": [str(uuid.uuid4()) for _ in range(501)],
+                },
+                ["videos"],
+            ),
+        ]:
+            response = self.post(data, jwt_token)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(sorted(json.loads(response.content)), fields)
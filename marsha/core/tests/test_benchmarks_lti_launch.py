@@ -0,0 +1,47 @@
+"""Test the query budgets of the LTI launch benchmark scenarios."""
+from django.test import TestCase, override_settings
+
+from ..benchmarks.lti_launch import (
+    QUERY_BUDGETS,
+    SCENARIOS,
+    replay_scenario,
+    signed_urls,
+)
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+class LTILaunchBenchmarkTestCase(TestCase):
+    """Replay each scenario of the benchmark and enforce its budgets."""
+
+    def test_benchmarks_lti_launch_query_budgets(self):
+        """Each launch request should stay within the query budget of its scenario."""
+        self.assertEqual(set(QUERY_BUDGETS), set(SCENARIOS))
+        for name in SCENARIOS:
+            with self.subTest(scenario=name):
+                result = replay_scenario(name, 2)
+                self.assertEqual(result.iterations, 2)
+                self.assertLessEqual(result.counts["queries"], QUERY_BUDGETS[name])
+
+    def test_benchmarks_lti_launch_rsa_signatures(self):
+        """Urls should only be signed when launching uploaded videos, once per video."""
+        with signed_urls():
+            for name, expected in [
+                ("instructor_new_video", 0),
+                ("instructor_existing_video", 1),
+                ("student_existing_video", 1),
+                ("playlist_passport", 1),
+                ("consumer_site_passport", 0),
+            ]:
+                with self.subTest(scenario=name):
+                    self.assertEqual(replay_scenario(name, 1).counts["rsa"], expected)
+
+    @override_settings(CLOUDFRONT_SIGNED_URLS_POLICY="canned")
+    def test_benchmarks_lti_launch_rsa_signatures_canned_policy(self):
+        """With canned policies, each url of an uploaded video should be signed separately."""
+        with signed_urls():
+            self.assertEqual(
+                replay_scenario("student_existing_video", 1).counts["rsa"], 10
+            )
@@ -0,0 +1,118 @@
+"""Test the ``benchmark`` management command."""
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..benchmarks.base import measure, percentile
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+class BenchmarkCommandTestCase(TestCase):
+    """Test the command running benchmarks and its helpers."""
+
+    def test_commands_benchmark_lti_verification(self):
+        """The benchmark should report the results of both verifiers."""
+        out = StringIO()
+        call_command("benchmark", "lti_verification", iterations=5, stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], "lti_verification")
+        self.assertTrue(lines[1].startswith("name"))
+        self.assertEqual(
+            [line.split()[:2] for line in lines[2:4]], [["pylti", "5"], ["native", "5"]]
+        )
+
+    def test_commands_benchmark_server_timing(self):
+        """The benchmark should report phases and requests with and without timing."""
+        out = StringIO()
+        call_command("benchmark", "server_timing", iterations=2, stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], "server_timing")
+        self.assertEqual(
+            [line.split()[:2] for line in lines[2:7]],
+            [
+                ["phase_without_timer", "2"],
+                ["phase_timer_inactive", "2"],
+                ["phase_timer_active", "2"],
+                ["request_inactive", "2"],
+                ["request_active", "2"],
+            ],
+        )
+
+    def test_commands_benchmark_upload_policies(self):
+        """The benchmark should report each way of signing for each batch size."""
+        out = StringIO()
+        call_command("benchmark", "upload_policies", iterations=1, stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], "upload_policies")
+        self.assertEqual(
+            [line.split()[0] for line in lines[2:10]],
+            [
+                "separately_1",
+                "batch_1",
+                "separately_10",
+                "batch_10",
+                "separately_100",
+                "batch_100",
+                "separately_500",
+                "batch_500",
+            ],
+        )
+
+    def test_commands_benchmark_uuid_inserts(self):
+        """The benchmark should report the generation and inserts of each kind of UUID."""
+        out = StringIO()
+        call_command("benchmark", "uuid_inserts", iterations=2, stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], "uuid_inserts")
+        self.assertTrue(lines[1].endswith("index_kb"))
+        self.assertEqual(
+            [line.split()[:2] for line in lines[2:6]],
+            [
+                ["generate_uuid4", "2"],
+                ["generate_uuid7", "2"],
+                ["insert_uuid4", "2"],
+                ["insert_uuid7", "2"],
+            ],
+        )
+
+    def test_commands_benchmark_video_serializer(self):
+        """The benchmark should report each way of serializing videos."""
+        out = StringIO()
+        call_command("benchmark", "video_serializer", iterations=1, stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], "video_serializer")
+        self.assertEqual(
+            [line.split()[0] for line in lines[2:5]],
+            ["model_serializer", "read_serializer", "read_serializer_rows"],
+        )
+
+    def test_commands_benchmark_unknown(self):
+        """Unknown benchmarks should be rejected."""
+        with self.assertRaises(CommandError):
+            call_command("benchmark", "unknown")
+
+    def test_commands_benchmark_percentile(self):
+        """Percentiles should be computed with the nearest-rank method."""
+        timings = list(range(1, 101))
+        self.assertEqual(percentile(timings, 50), 50)
+        self.assertEqual(percentile(timings, 99), 99)
+        self.assertEqual(percentile(timings, 100), 100)
+        self.assertEqual(percentile([3], 99), 3)
+
+    def test_commands_benchmark_measure(self):
+        """Each argument should be passed to the measured function once."""
+        calls = []
+        result = measure("append", calls.append, [1, 2, 3])
+        self.assertEqual(calls, [1, 2, 3])
+        self.assertEqual(result.name, "append")
+        self.assertEqual(result.iterations, 3)
+        self.assertLessEqual(result.p50, result.p99)
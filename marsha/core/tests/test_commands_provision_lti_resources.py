@@ -0,0 +1,85 @@
+"""Test the ``provision_lti_resources`` management command."""
+from io import StringIO
+import os
+import tempfile
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..factories import ConsumerSiteFactory
+from ..models import Playlist, Video
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+class ProvisionLTIResourcesCommandTestCase(TestCase):
+    """Test the command provisioning playlists and videos from a manifest file."""
+
+    def setUp(self):
+        """Create the consumer site and a directory for the manifests."""
+        super().setUp()
+        ConsumerSiteFactory(name="example.com")
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write_manifest(self, name, content):
+        """Write a manifest in the temporary directory and return its path."""
+        path = os.path.join(self.directory, name)
+        with open(path, "w", encoding="utf-8") as manifest:
+            manifest.write(content)
+        return path
+
+    def test_commands_provision_lti_resources_csv(self):
+        """The manifest format should be guessed from its extension and a BOM ignored."""
+        path = self.write_manifest(
+            "manifest.csv",
+            "﻿consumer_site,context_id,context_title,resource_link_id\n"
+            "example.com,course-1,Course 1,video-1\n"
+            "example.com,course-1,Course 1,video-2\n",
+        )
+        out = StringIO()
+        call_command("provision_lti_resources", path, stdout=out)
+
+        self.assertIn("2 rows provisioned", out.getvalue())
+        self.assertIn("1 playlists created, 2 videos created", out.getvalue())
+        self.assertEqual(Playlist.objects.get().title, "Course 1")
+        self.assertEqual(Video.objects.count(), 2)
+
+    def test_commands_provision_lti_resources_jsonl(self):
+        """JSONL manifests can be provisioned for a consumer site given as option."""
+        path = self.write_manifest(
+            "manifest.txt",
+            '{"context_id": "course-1", "resource_link_id": "video-1"}\n',
+        )
+        out = StringIO()
+        call_command(
+            "provision_lti_resources",
+            path,
+            format="jsonl",
+            consumer_site="example.com",
+            batch_size=10,
+            stdout=out,
+        )
+
+        self.assertIn("1 videos created", out.getvalue())
+        self.assertEqual(Video.objects.get().lti_id, "video-1")
+
+    def test_commands_provision_lti_resources_errors(self):
+        """Unknown formats, missing files and invalid manifests should be reported."""
+        with self.assertRaises(CommandError):
+            call_command(
+                "provision_lti_resources", self.write_manifest("manifest.txt", "")
+            )
+
+        with self.assertRaises(CommandError):
+            call_command(
+                "provision_lti_resources", os.path.join(self.directory, "missing.csv")
+            )
+
+        with self.assertRaises(CommandError):
+            call_command(
+                "provision_lti_resources", self.write_manifest("manifest.jsonl", "{")
+            )
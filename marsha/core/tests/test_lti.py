@@ -3,16 +3,17 @@ from unittest import mock
 
 from django.test import RequestFactory, TestCase
 
-import oauth2
-from pylti.common import LTIException, LTIOAuthServer
+from pylti.common import LTIException
 
 from ..factories import (
+    ConsumerSiteFactory,
     ConsumerSiteLTIPassportFactory,
     PlaylistLTIPassportFactory,
     VideoFactory,
 )
 from ..lti import LTI
 from ..models import Playlist, Video
+from ..utils import oauth_utils
 
 
 # We don't enforce arguments documentation in tests
@@ -83,7 +84,7 @@ class VideoLTITestCase(TestCase):
             lti = LTI(request)
             self.assertFalse(lti.is_instructor)
 
-    @mock.patch.object(LTIOAuthServer, "verify_request", return_value=True)
+    @mock.patch.object(oauth_utils, "verify_request", return_value=True)
     def test_lti_passport_unknown(self, mock_verify):
         """Launch request for an unknown passport.
 
@@ -95,7 +96,7 @@ class VideoLTITestCase(TestCase):
             lti.verify()
         self.assertFalse(mock_verify.called)
 
-    @mock.patch.object(LTIOAuthServer, "verify_request", return_value=True)
+    @mock.patch.object(oauth_utils, "verify_request", return_value=True)
     def test_lti_passport_consumer_site(self, mock_verify):
         """Authenticating an LTI launch request with a passport related to a consumer site."""
         ConsumerSiteLTIPassportFactory(
@@ -108,7 +109,7 @@ class VideoLTITestCase(TestCase):
         self.assertTrue(lti.verify())
         self.assertEqual(mock_verify.call_count, 1)
 
-    @mock.patch.object(LTIOAuthServer, "verify_request", return_value=True)
+    @mock.patch.object(oauth_utils, "verify_request", return_value=True)
     def test_lti_passport_playlist(self, mock_verify):
         """Authenticating an LTI launch request with a passport related to a playlist."""
         PlaylistLTIPassportFactory(
@@ -121,10 +122,10 @@ class VideoLTITestCase(TestCase):
         self.assertTrue(lti.verify())
         self.assertEqual(mock_verify.call_count, 1)
 
-    @mock.patch.object(LTIOAuthServer, "verify_request", side_effect=oauth2.Error)
+    @mock.patch.object(oauth_utils, "verify_request", side_effect=LTIException)
     def test_lti_verify_request_flush_on_error(self, mock_verify):
         """When an LTI launch request fails to verify."""
-        # mock_verify is forced to raise an oauth2 Error upon verification
+        # mock_verify is forced to raise an LTIException upon verification
         PlaylistLTIPassportFactory(
             oauth_consumer_key="ABC123",
             shared_secret="#Y5$",
@@ -206,6 +207,30 @@ class VideoLTITestCase(TestCase):
         lti = LTI(request)
         self.assertIsNone(lti.get_or_create_video())
 
+    @mock.patch.object(LTI, "verify", return_value=True)
+    def test_lti_get_video_deleted_playlist_student(self, mock_verify):
+        """Videos of deleted playlists or consumer sites should not be retrieved by students."""
+        video = VideoFactory(
+            lti_id="example.com-df7",
+            playlist__lti_id="course-v1:ufr+mathematics+0001",
+            playlist__consumer_site__name="example.com",
+        )
+        data = {
+            "resource_link_id": "example.com-df7",
+            "context_id": "course-v1:ufr+mathematics+0001",
+            "roles": "Student",
+            "oauth_consumer_key": "ABC123",
+        }
+        request = self.factory.post("/", data)
+
+        # Videos protect their playlist so they are left when their consumer site is deleted
+        video.playlist.consumer_site.delete()
+        self.assertTrue(Video.objects.filter(id=video.id).exists())
+        self.assertIsNone(LTI(request).get_or_create_video())
+
+        video.playlist.consumer_site.undelete()
+        self.assertEqual(LTI(request).get_or_create_video(), video)
+
     @mock.patch.object(LTI, "verify", return_value=True)
     def test_lti_get_video_wrong_lti_id_intructor(self, mock_verify):
         """An instructor retrieving an unknown video.
@@ -225,3 +250,67 @@ class VideoLTITestCase(TestCase):
         self.assertEqual(new_video.playlist, video.playlist)
         # No new playlist is created
         self.assertEqual(Playlist.objects.count(), 1)
+
+    @mock.patch.object(oauth_utils, "verify_request", return_value=True)
+    def test_lti_get_video_instructor_queries(self, mock_verify):
+        """An instructor launch should take one statement for the playlist and one for the video.
+
+        The consumer site is taken from the passport and the existing video is returned
+        untouched.
+        """
+        video = VideoFactory(
+            lti_id="example.com-df7",
+            title="my title",
+            playlist__lti_id="course-v1:ufr+mathematics+0001",
+            playlist__consumer_site__name="example.com",
+        )
+        ConsumerSiteLTIPassportFactory(
+            oauth_consumer_key="ABC123", consumer_site=video.playlist.consumer_site
+        )
+        request = self.factory.post("/", OPENEDX_LAUNCH_REQUEST_DATA)
+        lti = LTI(request)
+        lti.verify()
+
+        with self.assertNumQueries(2):
+            self.assertEqual(lti.get_or_create_video(), video)
+
+        video.refresh_from_db()
+        self.assertEqual(video.title, "my title")
+
+    @mock.patch.object(oauth_utils, "verify_request", return_value=True)
+    def test_lti_get_video_instructor_playlist_passport(self, mock_verify):
+        """The consumer site of the playlist should be used for a playlist passport."""
+        passport = PlaylistLTIPassportFactory(
+            oauth_consumer_key="ABC123",
+            playlist__lti_id="course-v1:ufr+mathematics+0001",
+            playlist__consumer_site__name="example.com",
+        )
+        request = self.factory.post("/", OPENEDX_LAUNCH_REQUEST_DATA)
+        lti = LTI(request)
+        lti.verify()
+
+        with self.assertNumQueries(2):
+            video = lti.get_or_create_video()
+
+        self.assertEqual(video.playlist, passport.playlist)
+        self.assertEqual(video.lti_id, "example.com-df7")
+        self.assertEqual(video.title, "example.com-df7")
+
+    @mock.patch.object(LTI, "verify", return_value=True)
+    def test_lti_get_video_instructor_no_duplicate(self, mock_verify):
+        """Repeated instructor launches should create the playlist and the video only once."""
+        ConsumerSiteFactory(name="example.com")
+        data = dict(
+            OPENEDX_LAUNCH_REQUEST_DATA,
+            context_title="Mathematics",
+            resource_link_title="Lesson 1",
+        )
+
+        videos = {
+            LTI(self.factory.post("/", data)).get_or_create_video() for _ in range(3)
+        }
+
+        video = Video.objects.get()
+        self.assertEqual(videos, {video})
+        self.assertEqual(video.title, "Lesson 1")
+        self.assertEqual(Playlist.objects.get().title, "Mathematics")
@@ -0,0 +1,113 @@
+"""Tests for the managers of the ``core`` app of the Marsha project."""
+from unittest import mock
+
+from django.db import connection
+from django.db.models import signals
+from django.test import TestCase
+
+from ..factories import ConsumerSiteFactory, PlaylistFactory, VideoFactory
+from ..models import ConsumerSite, Playlist, Video
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+class BaseManagerTestCase(TestCase):
+    """Test the manager shared by our models."""
+
+    def test_managers_get_or_create_non_deleted_create(self):
+        """The object should be created with its defaults when it does not exist."""
+        playlist = PlaylistFactory()
+
+        with self.assertNumQueries(1):
+            video, created = Video.objects.get_or_create_non_deleted(
+                playlist=playlist, lti_id="123", defaults={"title": "my title"}
+            )
+
+        self.assertTrue(created)
+        self.assertEqual(Video.objects.get(), video)
+        self.assertEqual(video.playlist_id, playlist.id)
+        self.assertEqual(video.lti_id, "123")
+        self.assertEqual(video.title, "my title")
+        self.assertEqual(video.state, Video.PENDING)
+        self.assertIsNotNone(video.created_on)
+        self.assertIsNone(video.deleted)
+        self.assertFalse(video._state.adding)
+
+    def test_managers_get_or_create_non_deleted_existing(self):
+        """The existing object should be returned untouched and nothing created."""
+        video = VideoFactory(lti_id="123", title="my title")
+
+        with self.assertNumQueries(1):
+            existing_video, created = Video.objects.get_or_create_non_deleted(
+                playlist=video.playlist, lti_id="123", defaults={"title": "new title"}
+            )
+
+        self.assertFalse(created)
+        self.assertEqual(existing_video, video)
+        self.assertEqual(Video.objects.count(), 1)
+
+        existing_video.refresh_from_db()
+        self.assertEqual(existing_video.title, "my title")
+        self.assertEqual(existing_video.updated_on, video.updated_on)
+
+    def test_managers_get_or_create_non_deleted_existing_not_written(self):
+        """Getting an existing object should not write a new version of its row."""
+        video = VideoFactory(lti_id="123")
+
+        def get_row_version():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT ctid FROM video WHERE id = %s", [video.id])
+                return cursor.fetchone()[0]
+
+        version = get_row_version()
+        Video.objects.get_or_create_non_deleted(playlist=video.playlist, lti_id="123")
+        self.assertEqual(get_row_version(), version)
+
+    def test_managers_get_or_create_non_deleted_ignores_deleted(self):
+        """A soft deleted object should not be returned and a new one should be created."""
+        consumer_site = ConsumerSiteFactory()
+        playlist = PlaylistFactory(consumer_site=consumer_site, lti_id="abc")
+        playlist.delete()
+
+        new_playlist, created = Playlist.objects.get_or_create_non_deleted(
+            consumer_site=consumer_site, lti_id="abc", defaults={"title": "my title"}
+        )
+
+        self.assertTrue(created)
+        self.assertNotEqual(new_playlist, playlist)
+        self.assertEqual(Playlist.all_objects.count(), 2)
+
+    def test_managers_get_or_create_non_deleted_post_save(self):
+        """The post_save signal should only be sent when the object is created."""
+        consumer_site = ConsumerSiteFactory()
+        receiver = mock.Mock()
+        signals.post_save.connect(receiver, sender=Playlist)
+        try:
+            playlist, _ = Playlist.objects.get_or_create_non_deleted(
+                consumer_site=consumer_site, lti_id="abc"
+            )
+            Playlist.objects.get_or_create_non_deleted(
+                consumer_site=consumer_site, lti_id="abc"
+            )
+        finally:
+            signals.post_save.disconnect(receiver, sender=Playlist)
+
+        receiver.assert_called_once_with(
+            signal=signals.post_save,
+            sender=Playlist,
+            instance=playlist,
+            created=True,
+            update_fields=None,
+            raw=False,
+            using="default",
+        )
+
+    def test_managers_get_or_create_non_deleted_no_index(self):
+        """The lookup should be refused if it does not match a conditional unique index."""
+        with self.assertRaises(ValueError):
+            ConsumerSite.objects.get_or_create_non_deleted(name="example.com")
+
+        with self.assertRaises(ValueError):
+            Video.objects.get_or_create_non_deleted(lti_id="123")
@@ -0,0 +1,92 @@
+"""Test the server timing middleware of the Marsha project."""
+import json
+import re
+
+from django.test import TestCase, override_settings
+
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..benchmarks.base import sign_lti_parameters
+from ..factories import ConsumerSiteLTIPassportFactory, VideoFactory
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+def get_metrics(header):
+    """Parse the metrics of a Server-Timing header into a dictionary by name."""
+    return {
+        match.group(1): match.group(2)
+        for match in re.finditer(r"(\w+);dur=[0-9.]+(?:;desc=\"([^\"]*)\")?", header)
+    }
+
+
+class ServerTimingMiddlewareTestCase(TestCase):
+    """Test the middleware adding timings to the responses."""
+
+    def get_video(self, video):
+        """Retrieve a video on the API with a token."""
+        jwt_token = AccessToken()
+        jwt_token.payload["video_id"] = str(video.id)
+        return self.client.get(
+            "/api/videos/{!s}/".format(video.id),
+            HTTP_AUTHORIZATION="Bearer {!s}".format(jwt_token),
+        )
+
+    def test_middleware_server_timing_inactive(self):
+        """No timing should be added to the responses by default."""
+        response = self.get_video(VideoFactory())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(SERVER_TIMING_ACTIVE=True)
+    def test_middleware_server_timing_api(self):
+        """The queries and the phases of an API request should be timed and logged."""
+        video = VideoFactory()
+
+        with self.assertLogs("marsha.core.middleware", "INFO") as logs:
+            response = self.get_video(video)
+
+        self.assertEqual(response.status_code, 200)
+        metrics = get_metrics(response["Server-Timing"])
+        self.assertEqual(list(metrics), ["sql", "video", "serialize", "total"], metrics)
+        self.assertEqual(metrics["sql"], "1 queries")
+
+        self.assertEqual(len(logs.records), 1)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["method"], "GET")
+        self.assertEqual(record["path"], "/api/videos/{!s}/".format(video.id))
+        self.assertEqual(record["status"], 200)
+        self.assertEqual(record["queries"], 1)
+        self.assertEqual(set(record["phases_ms"]), {"video", "serialize"})
+        self.assertGreaterEqual(record["total_ms"], record["sql_ms"])
+
+    @override_settings(SERVER_TIMING_ACTIVE=True)
+    def test_middleware_server_timing_lti_launch(self):
+        """All the phases of an LTI launch request should be timed."""
+        passport = ConsumerSiteLTIPassportFactory(consumer_site__name="example.com")
+        video = VideoFactory(playlist__consumer_site=passport.consumer_site)
+        data = sign_lti_parameters(
+            {
+                "context_id": video.playlist.lti_id,
+                "resource_link_id": video.lti_id,
+                "roles": "Instructor",
+                "tool_consumer_instance_guid": "example.com",
+            },
+            passport.oauth_consumer_key,
+            passport.shared_secret,
+            url="http://testserver/lti-video/",
+        )
+
+        with self.assertLogs("marsha.core.middleware", "INFO"):
+            response = self.client.post("/lti-video/", data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'data-state="instructor"')
+        metrics = get_metrics(response["Server-Timing"])
+        self.assertEqual(
+            list(metrics),
+            ["sql", "passport", "video", "jwt", "serialize", "render", "total"],
+        )
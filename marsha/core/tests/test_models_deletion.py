@@ -385,6 +385,12 @@ class DeletionTestCase(TestCase):
         self.assertIsVisible(organization)
         self.assertIsVisible(playlist)
 
+    def test_video_uniqueness(self):
+        """Ensure a video cannot exist twice as non-deleted with the same lti id in a playlist."""
+        self._test_uniqueness_ignores_deleted(
+            VideoFactory, playlist=PlaylistFactory(), lti_id="example.com-df7"
+        )
+
     def test_video_tracks_soft_deletion(self):
         """Ensure soft deletion work as expected for video tracks."""
         video = VideoFactory(created_by=UserFactory())
@@ -442,6 +448,12 @@ class DeletionTestCase(TestCase):
         self.assertIsVisible(copied_playlist)
         self.assertIsSoftDeleted(playlist_access)
 
+    def test_playlist_uniqueness(self):
+        """Ensure a playlist cannot exist twice as non-deleted with the same lti id on a site."""
+        self._test_uniqueness_ignores_deleted(
+            PlaylistFactory, consumer_site=ConsumerSiteFactory(), lti_id="course-v1"
+        )
+
     def test_playlist_hard_deletion_cascade(self):
         """It should not be possible to hard delete a playlist that still contains videos."""
         organization = OrganizationFactory()
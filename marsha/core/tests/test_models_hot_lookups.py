@@ -0,0 +1,156 @@
+"""Test the indexes supporting the hot lookups of the Marsha core app."""
+import uuid
+
+from django.db import connection, models
+from django.db.models import Q
+from django.test import TestCase
+from django.test.utils import isolate_apps
+
+from ..models import ConsumerSite, Playlist, Video
+from ..models.base import BaseModel, NonDeletedIndex, NonDeletedUniqueIndex
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+class HotLookupsCheckTestCase(TestCase):
+    """Test the check of the indexes supporting the hot lookups of a model."""
+
+    def test_models_hot_lookups_check_indexes(self):
+        """Lookups should be supported by the leading columns of a non deleted index."""
+        with isolate_apps("marsha.core"):
+
+            class Book(BaseModel):
+                """A model with lookups supported by indexes."""
+
+                title = models.CharField(max_length=255)
+                author = models.CharField(max_length=255)
+                isbn = models.CharField(max_length=13, unique=True)
+                hot_lookups = (("author", "title"), ("title",), ("isbn",))
+
+                class Meta:
+                    """Options for the ``Book`` model."""
+
+                    db_table = "book"
+                    indexes = [
+                        NonDeletedUniqueIndex(["title", "author"]),
+                        NonDeletedIndex(["-title"]),
+                    ]
+
+            self.assertEqual(Book.check(), [])
+
+    def test_models_hot_lookups_check_errors(self):
+        """Lookups without index or on unknown fields should be reported."""
+        with isolate_apps("marsha.core"):
+
+            class Book(BaseModel):
+                """A model with lookups that are not supported by any index."""
+
+                title = models.CharField(max_length=255)
+                author = models.CharField(max_length=255)
+                hot_lookups = (("author",), ("title", "author"), ("summary",))
+
+                class Meta:
+                    """Options for the ``Book`` model."""
+
+                    db_table = "book"
+                    # An index that is not restricted to non deleted objects or that starts
+                    # with other columns does not support the lookups
+                    indexes = [
+                        models.Index(fields=["author"]),
+                        NonDeletedIndex(["title", "created_on", "author"]),
+                    ]
+
+            errors = Book.check()
+            self.assertEqual(
+                [error.id for error in errors],
+                ["marsha.models.E011", "marsha.models.E011", "marsha.models.E010"],
+            )
+            self.assertEqual(
+                errors[0].hint,
+                "Add 'NonDeletedIndex(['author'])' to the 'indexes' of the 'Meta' class of "
+                "the model 'core.Book' and create its migration.",
+            )
+
+
+class HotLookupsExplainTestCase(TestCase):
+    """Test that the planner uses the indexes of the hot lookups on a seeded dataset."""
+
+    def setUp(self):
+        """Create consumer sites, half of them deleted, each with a playlist and videos."""
+        super().setUp()
+        ConsumerSite.objects.bulk_create(
+            ConsumerSite(
+                name="site-{:d}.example.com".format(i),
+                deleted="2018-08-08T00:00:00Z" if i % 2 else None,
+            )
+            for i in range(2000)
+        )
+        Playlist.objects.bulk_create(
+            Playlist(consumer_site=consumer_site, lti_id="course-1", title="Course")
+            for consumer_site in ConsumerSite.objects.all_with_deleted()
+        )
+        Video.objects.bulk_create(
+            Video(playlist=playlist, lti_id="video-{:d}".format(i), title="Video")
+            for playlist in Playlist.objects.all()
+            for i in range(5)
+        )
+        with connection.cursor() as cursor:
+            for model in [ConsumerSite, Playlist, Video]:
+                cursor.execute("ANALYZE {:s}".format(model._meta.db_table))
+
+    def explain(self, queryset):
+        """Return the plan of the query of a queryset."""
+        # safedelete only filters out deleted objects when the queryset is evaluated
+        queryset._filter_visibility()  # pylint: disable=protected-access
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN " + sql, params)
+            return "\n".join(row[0] for row in cursor.fetchall())
+
+    def test_models_hot_lookups_explain_consumer_site(self):
+        """The consumer site of an LTI launch should be found with the index on its name."""
+        plan = self.explain(ConsumerSite.objects.filter(name="site-42.example.com"))
+        self.assertIn("Index Scan using consumer_si_name_e88584_idx", plan)
+
+    def test_models_hot_lookups_explain_lti_video(self):
+        """The video of an LTI launch should be found without scanning any table."""
+        # The query of ``LTI.get_video_queryset``
+        plan = self.explain(
+            Video.objects.filter(
+                lti_id="video-3",
+                playlist__lti_id="course-1",
+                playlist__deleted__isnull=True,
+                playlist__consumer_site__name="site-42.example.com",
+                playlist__consumer_site__deleted__isnull=True,
+            )
+        )
+        self.assertIn("consumer_si_name_e88584_idx", plan)
+        self.assertIn("playlist_consume_c7ec0f_idx", plan)
+        self.assertNotIn("Seq Scan", plan)
+
+    def test_models_hot_lookups_explain_playlist_videos_page(self):
+        """A page of the videos of a large playlist should be read in order from the index."""
+        playlist = Playlist.objects.first()
+        Video.objects.bulk_create(
+            Video(
+                playlist=playlist,
+                lti_id="large-{:d}".format(i),
+                title="Video",
+                position=i % 100,
+            )
+            for i in range(5000)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE video")
+
+        # The query of ``PositionCursorPagination.paginate_queryset`` after a cursor
+        plan = self.explain(
+            Video.objects.filter(playlist=playlist)
+            .order_by("position", "id")
+            .filter(position__gte=0)
+            .filter(Q(position__gt=0) | Q(id__gt=uuid.UUID(int=0)))[:21]
+        )
+        self.assertIn("video_playlis_6a7fcb_idx", plan)
+        self.assertNotIn("Sort", plan)
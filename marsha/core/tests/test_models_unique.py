@@ -0,0 +1,173 @@
+"""Test the validation of the conditional unique indexes of the Marsha core app."""
+from unittest import mock
+
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.db import connection
+from django.forms.models import inlineformset_factory
+from django.test import TestCase
+from django.utils.timezone import now
+
+from ..admin import NonDeletedUniqueInlineFormSet
+from ..factories import PlaylistAccessFactory, PlaylistFactory, UserFactory
+from ..models import Playlist, PlaylistAccess
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+class ValidateUniqueTestCase(TestCase):
+    """Test the validation of the ``NonDeletedUniqueIndex`` of instances."""
+
+    def setUp(self):
+        """Create a playlist with an access."""
+        super().setUp()
+        self.playlist = PlaylistFactory()
+        self.access = PlaylistAccessFactory(playlist=self.playlist, user=UserFactory())
+
+    def test_models_unique_validate_unique_one_query(self):
+        """All the conditional unique indexes should be checked with one query."""
+        access = PlaylistAccess(playlist=self.playlist, user=self.access.user)
+        unique_checks = [
+            (PlaylistAccess, ("user", "playlist")),
+            (PlaylistAccess, ("playlist",)),
+        ]
+
+        # The primary key of the new instance is checked by Django as a unique field
+        with mock.patch.object(
+            PlaylistAccess,
+            "_get_conditional_non_deleted_unique_checks",
+            return_value=unique_checks,
+        ), self.assertNumQueries(2), self.assertRaises(ValidationError) as context:
+            access.validate_unique()
+
+        self.assertEqual(
+            context.exception.message_dict,
+            {
+                NON_FIELD_ERRORS: [
+                    "Playlist access with this User and Playlist already exists."
+                ],
+                "playlist": ["Playlist access with this Playlist already exists."],
+            },
+        )
+
+    def test_models_unique_validate_unique_class_untouched(self):
+        """The managers of the model should not be swapped while the indexes are checked."""
+        access = PlaylistAccess(playlist=self.playlist, user=UserFactory())
+        all_objects = PlaylistAccess.all_objects
+        managers = []
+
+        def record_managers(execute, sql, params, many, context):
+            """Record the manager of the model when each query is executed."""
+            managers.append(PlaylistAccess.all_objects)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record_managers):
+            access.validate_unique()
+
+        self.assertEqual(len(managers), 2)
+        for manager in managers:
+            self.assertIs(manager, all_objects)
+
+    def test_models_unique_validate_unique_existing(self):
+        """An existing instance should not conflict with itself nor with deleted objects."""
+        self.access.validate_unique()
+
+        other_access = PlaylistAccessFactory(playlist=self.playlist, user=UserFactory())
+        other_access.user = self.access.user
+        with self.assertRaises(ValidationError):
+            other_access.validate_unique()
+
+        self.access.delete()
+        other_access.validate_unique()
+
+    def test_models_unique_get_non_deleted_unique_errors(self):
+        """Instances should conflict with the database and with each other in one query."""
+        user = UserFactory()
+        instances = [
+            # Conflicts with the existing access
+            PlaylistAccess(playlist=self.playlist, user=self.access.user),
+            # Conflict with each other
+            PlaylistAccess(playlist=self.playlist, user=user),
+            PlaylistAccess(playlist=self.playlist, user=user),
+            # Deleted instances are ignored
+            PlaylistAccess(playlist=self.playlist, user=user, deleted=now()),
+            # Valid, existing instances not conflicting with themselves
+            PlaylistAccess(playlist=self.playlist, user=UserFactory()),
+            PlaylistAccessFactory(playlist=self.playlist, user=UserFactory()),
+        ]
+
+        with self.assertNumQueries(1):
+            errors = PlaylistAccess.get_non_deleted_unique_errors(instances)
+
+        self.assertEqual(
+            [
+                [
+                    error.message % error.params
+                    for error in instance_errors.get(NON_FIELD_ERRORS, [])
+                ]
+                for instance_errors in errors
+            ],
+            [
+                ["Playlist access with this User and Playlist already exists."],
+                ["Playlist access with this User and Playlist already exists."],
+                ["Playlist access with this User and Playlist already exists."],
+                [],
+                [],
+                [],
+            ],
+        )
+
+    def test_models_unique_get_non_deleted_unique_errors_empty(self):
+        """No query should be run without instance to validate."""
+        with self.assertNumQueries(0):
+            self.assertEqual(PlaylistAccess.get_non_deleted_unique_errors([]), [])
+            self.assertEqual(
+                PlaylistAccess.get_non_deleted_unique_errors(
+                    [PlaylistAccess(playlist=self.playlist, user=self.access.user)],
+                    exclude=["user"],
+                ),
+                [{}],
+            )
+
+    def test_models_unique_inline_formset(self):
+        """Rows of an inline with the same values should be reported before saving."""
+        formset_class = inlineformset_factory(
+            Playlist,
+            PlaylistAccess,
+            formset=NonDeletedUniqueInlineFormSet,
+            fields=["user"],
+            extra=2,
+        )
+        user = UserFactory()
+        data = {
+            "user_accesses-TOTAL_FORMS": "3",
+            "user_accesses-INITIAL_FORMS": "1",
+            "user_accesses-0-id": str(self.access.id),
+            "user_accesses-0-user": str(self.access.user.id),
+            "user_accesses-1-user": str(user.id),
+            "user_accesses-2-user": str(user.id),
+        }
+
+        formset = formset_class(data, instance=self.playlist)
+        self.assertFalse(formset.is_valid())
+        self.assertEqual(
+            formset.errors,
+            [
+                {},
+                {
+                    NON_FIELD_ERRORS: [
+                        "Playlist access with this User and Playlist already exists."
+                    ]
+                },
+                {
+                    NON_FIELD_ERRORS: [
+                        "Playlist access with this User and Playlist already exists."
+                    ]
+                },
+            ],
+        )
+
+        data["user_accesses-2-user"] = str(UserFactory().id)
+        formset = formset_class(data, instance=self.playlist)
+        self.assertTrue(formset.is_valid())
@@ -0,0 +1,120 @@
+"""Test the read-only serializer of videos of the Marsha project."""
+from datetime import datetime
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+import pytz
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from ..factories import VideoFactory
+from ..models import Video
+from ..serializers import VideoReadSerializer, VideoSerializer
+from ..utils import cloudfront_utils
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+class VideoReadSerializerTestCase(TestCase):
+    """The read-only serializer should represent videos exactly as `VideoSerializer` does."""
+
+    def setUp(self):
+        """Create videos in every state that affects their representation."""
+        super().setUp()
+        uploaded_on = datetime(2018, 8, 8, tzinfo=pytz.utc)
+        self.videos = [
+            VideoFactory(title="pending", description=None),
+            VideoFactory(title="error", state=Video.ERROR, uploaded_on=uploaded_on),
+            VideoFactory(title="ready", state=Video.READY, uploaded_on=uploaded_on),
+            VideoFactory(
+                title="ready with resolutions",
+                state=Video.READY,
+                uploaded_on=uploaded_on,
+                resolutions=[144, 1080],
+                streaming_formats=[Video.HLS],
+            ),
+        ]
+
+    def get_request(self, query_string="", version="1.0"):
+        """Build a request for the API in a given version."""
+        request = Request(
+            APIRequestFactory().get("/api/videos/{:s}".format(query_string))
+        )
+        request.version = version
+        return request
+
+    def assert_parity(self, context):
+        """Instances and rows should be represented as by the model serializer."""
+        expected = [
+            VideoSerializer(video, context=context).data for video in self.videos
+        ]
+
+        self.assertEqual(
+            [VideoReadSerializer(video, context=context).data for video in self.videos],
+            expected,
+        )
+        self.assertEqual(
+            VideoReadSerializer(self.videos, many=True, context=context).data, expected
+        )
+
+        rows = Video.objects.order_by("title").values(
+            *VideoReadSerializer.SOURCE_FIELDS
+        )
+        self.assertEqual(
+            VideoReadSerializer(rows, many=True, context=context).data,
+            sorted(expected, key=lambda video: video["title"]),
+        )
+        for representation in expected:
+            self.assertEqual(list(representation), list(VideoReadSerializer.FIELDS))
+
+    def test_serializers_video_read_fields(self):
+        """The representation should have the fields of `VideoSerializer`, in the same order."""
+        self.assertEqual(VideoReadSerializer.FIELDS, VideoSerializer.Meta.fields)
+
+    @override_settings(CLOUDFRONT_SIGNED_URLS_ACTIVE=False)
+    def test_serializers_video_read_parity(self):
+        """Videos should be represented the same without request and in both API versions."""
+        self.assert_parity({})
+        self.assert_parity({"request": self.get_request()})
+        self.assert_parity({"request": self.get_request(version="2.0")})
+        self.assert_parity(
+            {"request": self.get_request("?resolutions=144,480&kinds=mp4,manifests")}
+        )
+
+    def test_serializers_video_read_parity_signed(self):
+        """Urls should be signed the same with both signing policies."""
+        with mock.patch.object(
+            cloudfront_utils,
+            "get_signed_url",
+            side_effect=lambda url, date_less_than: url + "?Signature=canned",
+        ), mock.patch.object(
+            cloudfront_utils, "get_signed_query_string", return_value="Policy=custom"
+        ):
+            for policy in ["custom", "canned"]:
+                with self.settings(
+                    CLOUDFRONT_SIGNED_URLS_ACTIVE=True,
+                    CLOUDFRONT_SIGNED_URLS_POLICY=policy,
+                ):
+                    self.assert_parity({"request": self.get_request(version="2.0")})
+
+    def test_serializers_video_read_invalid_filters(self):
+        """Invalid url filters should be rejected as by `VideoSerializer`."""
+        for query_string in ["?resolutions=abc", "?kinds=unknown"]:
+            context = {"request": self.get_request(query_string)}
+            with self.assertRaises(ValidationError) as expected:
+                getattr(VideoSerializer(self.videos[2], context=context), "data")
+            with self.assertRaises(ValidationError) as raised:
+                getattr(VideoReadSerializer(self.videos[2], context=context), "data")
+            self.assertEqual(raised.exception.detail, expected.exception.detail)
+
+    def test_serializers_video_read_queries(self):
+        """Serializing instances or rows should not query the database."""
+        rows = list(Video.objects.values(*VideoReadSerializer.SOURCE_FIELDS))
+        videos = list(Video.objects.all())
+        with self.assertNumQueries(0):
+            self.assertEqual(len(VideoReadSerializer(rows, many=True).data), 4)
+            self.assertEqual(len(VideoReadSerializer(videos, many=True).data), 4)
@@ -0,0 +1,200 @@
+"""Test the archive of the objects soft deleted long ago."""
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from ..factories import (
+    AudioTrackFactory,
+    PlaylistAccessFactory,
+    PlaylistFactory,
+    SubtitleTrackFactory,
+    UserFactory,
+    VideoFactory,
+)
+from ..models import AudioTrack, Playlist, PlaylistAccess, SubtitleTrack, Video
+from ..utils import deletion_utils
+from ..utils.archive_utils import (
+    archive_deleted_objects,
+    ensure_archive_table,
+    get_archived_models,
+)
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+class ArchiveUtilsTestCase(TestCase):
+    """Test moving deleted objects to archive tables and restoring them."""
+
+    def delete(self, obj, days):
+        """Soft delete an object and its cascade as if it was done days ago."""
+        deleted_on = timezone.now() - timedelta(days=days)
+        with mock.patch.object(deletion_utils.timezone, "now", return_value=deleted_on):
+            obj.delete()
+
+    def count_archived(self, model):
+        """Count the objects in the archive table of a model."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM {:s}_archive".format(model._meta.db_table)
+            )
+            return cursor.fetchone()[0]
+
+    def setUp(self):
+        """Create videos deleted long ago, recently or not deleted, with their tracks."""
+        super().setUp()
+        self.playlist = PlaylistFactory()
+        self.old_video = VideoFactory(playlist=self.playlist)
+        AudioTrackFactory(video=self.old_video)
+        SubtitleTrackFactory(video=self.old_video)
+        self.delete(self.old_video, 100)
+
+        self.recent_video = VideoFactory(playlist=self.playlist)
+        self.delete(self.recent_video, 10)
+        self.video = VideoFactory(playlist=self.playlist)
+
+        # The videos of a playlist protect it, but not its accesses
+        self.old_playlist = PlaylistFactory()
+        VideoFactory(playlist=self.old_playlist)
+        PlaylistAccessFactory(playlist=self.old_playlist, user=UserFactory())
+        self.delete(self.old_playlist, 100)
+
+    def test_utils_archive_utils_models(self):
+        """Models should be archived after the models referencing them."""
+        models = get_archived_models()
+        self.assertLess(models.index(AudioTrack), models.index(Video))
+        self.assertLess(models.index(Video), models.index(Playlist))
+        self.assertLess(models.index(PlaylistAccess), models.index(Playlist))
+
+    def test_utils_archive_utils_archive(self):
+        """Objects deleted before the retention period and not referenced should be moved."""
+        counts = archive_deleted_objects(timedelta(days=90), batch_size=1)
+
+        self.assertEqual(
+            counts,
+            {
+                "core.AudioTrack": 1,
+                "core.SubtitleTrack": 1,
+                "core.Video": 1,
+                "core.PlaylistAccess": 1,
+            },
+        )
+        self.assertEqual(
+            set(Video.objects.all_with_deleted()),
+            {self.recent_video, self.video, self.old_playlist.videos.get()},
+        )
+        self.assertFalse(AudioTrack.objects.all_with_deleted().exists())
+        self.assertEqual(self.count_archived(Video), 1)
+        self.assertEqual(self.count_archived(AudioTrack), 1)
+        # The playlist is kept as long as a video references it
+        self.assertTrue(
+            Playlist.objects.all_with_deleted().filter(id=self.old_playlist.id).exists()
+        )
+
+        # Archiving again does not find any object to move
+        self.assertEqual(archive_deleted_objects(timedelta(days=90), batch_size=1), {})
+
+    def test_utils_archive_utils_restore(self):
+        """Restored objects should come back, still deleted, with their cascade."""
+        call_command("archive_deleted_objects", retention_days=90, stdout=StringIO())
+
+        stdout = StringIO()
+        call_command(
+            "restore_archived_objects",
+            "core.Video",
+            str(self.old_video.id),
+            stdout=stdout,
+        )
+        self.assertEqual(
+            stdout.getvalue().splitlines(),
+            [
+                "core.Video: 1 objects restored.",
+                "core.AudioTrack: 1 objects restored.",
+                "core.SubtitleTrack: 1 objects restored.",
+            ],
+        )
+        self.assertEqual(self.count_archived(Video), 0)
+
+        video = Video.objects.all_with_deleted().get(id=self.old_video.id)
+        self.assertEqual(video.deleted, self.old_video.deleted)
+        self.assertEqual(video.title, self.old_video.title)
+        self.assertEqual(
+            AudioTrack.objects.all_with_deleted().get().deleted, video.deleted
+        )
+
+        # Restored objects can be undeleted
+        video.undelete()
+        self.assertTrue(Video.objects.filter(id=video.id).exists())
+
+    def test_utils_archive_utils_restore_referenced(self):
+        """Archived objects referenced by a restored object should come back with their cascade."""
+        call_command("archive_deleted_objects", retention_days=90, stdout=StringIO())
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT id FROM audio_track_archive")
+            [audio_track_id] = cursor.fetchone()
+
+        stdout = StringIO()
+        call_command(
+            "restore_archived_objects",
+            "core.AudioTrack",
+            str(audio_track_id),
+            stdout=stdout,
+        )
+        self.assertEqual(
+            stdout.getvalue().splitlines(),
+            [
+                "core.AudioTrack: 1 objects restored.",
+                "core.Video: 1 objects restored.",
+                "core.SubtitleTrack: 1 objects restored.",
+            ],
+        )
+        self.assertEqual(self.count_archived(SubtitleTrack), 0)
+        self.assertTrue(
+            Video.objects.all_with_deleted().filter(id=self.old_video.id).exists()
+        )
+
+    def test_utils_archive_utils_restore_errors(self):
+        """The model and the primary keys of the objects to restore should be valid."""
+        for arguments, message in [
+            (["core.Unknown", "1"], "App 'core' doesn't have a 'Unknown' model."),
+            (["auth.Group", "1"], "The objects of auth.Group are not archived."),
+            (["core.Video", "1"], "'1' is not a valid UUID."),
+            (
+                ["core.Video", str(self.video.id)],
+                "No archived object matches these primary keys.",
+            ),
+        ]:
+            with self.assertRaises(CommandError) as context:
+                call_command("restore_archived_objects", *arguments)
+            self.assertEqual(str(context.exception), message)
+
+
+class ArchiveTableTestCase(TestCase):
+    """Test keeping the archive tables in sync with the tables of their models."""
+
+    def test_utils_archive_utils_ensure_archive_table(self):
+        """Archive tables should follow the columns added to and removed from tables."""
+        ensure_archive_table(Video)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "ALTER TABLE video ADD COLUMN views integer NOT NULL DEFAULT 0"
+            )
+            cursor.execute("ALTER TABLE video_archive ADD COLUMN legacy text NOT NULL")
+
+        ensure_archive_table(Video)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT attname, attnotnull FROM pg_attribute "
+                "WHERE attrelid = 'video_archive'::regclass AND attname IN %s",
+                [("id", "views", "legacy")],
+            )
+            self.assertEqual(
+                dict(cursor.fetchall()), {"id": True, "views": False, "legacy": False}
+            )
@@ -0,0 +1,170 @@
+"""Test the cache utils of the Marsha core app."""
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..utils.cache_utils import LRUCache, get_or_set_single_flight
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+class LRUCacheTestCase(TestCase):
+    """Test our in-process LRU cache."""
+
+    def test_utils_cache_utils_lru_cache_get_set(self):
+        """Values should be retrieved under their key and missing keys return the default."""
+        lru_cache = LRUCache(2)
+        lru_cache.set("a", 1)
+        self.assertEqual(lru_cache.get("a"), 1)
+        self.assertIsNone(lru_cache.get("b"))
+        self.assertEqual(lru_cache.get("b", 0), 0)
+
+    def test_utils_cache_utils_lru_cache_eviction(self):
+        """The least recently used entry should be evicted when the cache is full."""
+        lru_cache = LRUCache(2)
+        lru_cache.set("a", 1)
+        lru_cache.set("b", 2)
+        # Reading "a" makes "b" the least recently used entry
+        lru_cache.get("a")
+        lru_cache.set("c", 3)
+
+        self.assertEqual(len(lru_cache), 2)
+        self.assertEqual(lru_cache.get("a"), 1)
+        self.assertIsNone(lru_cache.get("b"))
+        self.assertEqual(lru_cache.get("c"), 3)
+
+    def test_utils_cache_utils_lru_cache_timeout(self):
+        """Entries should be considered missing once their timeout has elapsed."""
+        lru_cache = LRUCache(2)
+        with mock.patch("time.monotonic", return_value=100):
+            lru_cache.set("a", 1, timeout=10)
+            lru_cache.set("b", 2)
+
+        with mock.patch("time.monotonic", return_value=109):
+            self.assertEqual(lru_cache.get("a"), 1)
+
+        with mock.patch("time.monotonic", return_value=110):
+            self.assertIsNone(lru_cache.get("a"))
+            self.assertEqual(lru_cache.get("b"), 2)
+        self.assertEqual(len(lru_cache), 1)
+
+    def test_utils_cache_utils_lru_cache_delete_clear(self):
+        """Entries can be removed one by one or all at once."""
+        lru_cache = LRUCache(3)
+        lru_cache.set("a", 1)
+        lru_cache.set("b", 2)
+        lru_cache.delete("a")
+        lru_cache.delete("unknown")
+        self.assertIsNone(lru_cache.get("a"))
+        self.assertEqual(lru_cache.get("b"), 2)
+
+        lru_cache.clear()
+        self.assertEqual(len(lru_cache), 0)
+
+
+class SingleFlightTestCase(TestCase):
+    """Test the cache protected against concurrent rebuilds."""
+
+    def setUp(self):
+        """Start each test with an empty cache."""
+        super().setUp()
+        cache.clear()
+
+    def test_utils_cache_utils_single_flight_build_once(self):
+        """The value should be built on the first call and then served from the cache."""
+        build = mock.Mock(return_value="value")
+        for _ in range(2):
+            self.assertEqual(
+                get_or_set_single_flight("key", build, timeout=60), "value"
+            )
+
+        build.assert_called_once_with()
+        self.assertIsNone(cache.get("key:lock"))
+
+    def test_utils_cache_utils_single_flight_expired(self):
+        """An expired value should be rebuilt by the caller that acquires the lock."""
+        with mock.patch("time.time", return_value=1000):
+            get_or_set_single_flight("key", lambda: "old", timeout=60, stale_timeout=30)
+
+        with mock.patch("time.time", return_value=1060):
+            self.assertEqual(
+                get_or_set_single_flight("key", lambda: "new", timeout=60), "new"
+            )
+
+    def test_utils_cache_utils_single_flight_serve_stale(self):
+        """An expired value should be served while another caller rebuilds it."""
+        with mock.patch("time.time", return_value=1000):
+            get_or_set_single_flight("key", lambda: "old", timeout=60, stale_timeout=30)
+
+        cache.add("key:lock", True)
+        build = mock.Mock(return_value="new")
+        with mock.patch("time.time", return_value=1060):
+            self.assertEqual(get_or_set_single_flight("key", build, timeout=60), "old")
+        build.assert_not_called()
+
+    def test_utils_cache_utils_single_flight_wait(self):
+        """Without any value to serve, the other callers should wait for the rebuild."""
+        cache.add("key:lock", True)
+
+        def rebuild(seconds):
+            """Rebuild the value as another caller would while this one sleeps."""
+            cache.set("key", (float("inf"), "value"))
+
+        build = mock.Mock(return_value="other")
+        with mock.patch("time.sleep", side_effect=rebuild) as mock_sleep:
+            self.assertEqual(
+                get_or_set_single_flight("key", build, timeout=60), "value"
+            )
+
+        mock_sleep.assert_called_once_with(0.05)
+        build.assert_not_called()
+
+    def test_utils_cache_utils_single_flight_wait_released(self):
+        """A value rebuilt while waiting should be served even if the lock is released."""
+        cache.add("key:lock", True)
+
+        def rebuild(seconds):
+            """Rebuild the value and release the lock as another caller would."""
+            cache.set("key", (float("inf"), "value"))
+            cache.delete("key:lock")
+
+        build = mock.Mock(return_value="other")
+        with mock.patch("time.sleep", side_effect=rebuild) as mock_sleep:
+            self.assertEqual(
+                get_or_set_single_flight("key", build, timeout=60), "value"
+            )
+
+        mock_sleep.assert_called_once_with(0.05)
+        build.assert_not_called()
+        self.assertIsNone(cache.get("key:lock"))
+
+    def test_utils_cache_utils_single_flight_wait_timeout(self):
+        """The value should be built without the lock if the rebuild takes too long."""
+        cache.add("key:lock", True)
+        build = mock.Mock(return_value="value")
+
+        with mock.patch("time.sleep"), mock.patch(
+            "time.monotonic", side_effect=[0, 5, 10]
+        ):
+            self.assertEqual(
+                get_or_set_single_flight("key", build, timeout=60, lock_timeout=10),
+                "value",
+            )
+
+        build.assert_called_once_with()
+        self.assertIsNone(cache.get("key"))
+
+    def test_utils_cache_utils_single_flight_build_error(self):
+        """The lock should be released if building the value fails."""
+        with self.assertRaises(ValueError):
+            get_or_set_single_flight(
+                "key", mock.Mock(side_effect=ValueError), timeout=60
+            )
+
+        self.assertIsNone(cache.get("key:lock"))
+        self.assertEqual(
+            get_or_set_single_flight("key", lambda: "value", timeout=60), "value"
+        )
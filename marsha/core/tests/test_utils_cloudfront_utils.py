@@ -0,0 +1,287 @@
+"""Test the CloudFront utils of the Marsha core app."""
+from datetime import datetime, timedelta
+import os
+import tempfile
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+import pytz
+
+from ..utils import cloudfront_utils
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+def write_private_key(path):
+    """Generate an RSA private key, write it to a PEM file and return it."""
+    private_key = rsa.generate_private_key(
+        public_exponent=65537, key_size=1024, backend=default_backend()
+    )
+    with open(path, "wb") as key_file:
+        key_file.write(
+            private_key.private_bytes(
+                encoding=serialization.Encoding.PEM,
+                format=serialization.PrivateFormat.TraditionalOpenSSL,
+                encryption_algorithm=serialization.NoEncryption(),
+            )
+        )
+    return private_key
+
+
+def verify(private_key, signature, message):
+    """Verify a signature with the public key of a private key, raising if it is invalid."""
+    private_key.public_key().verify(
+        signature, message, padding.PKCS1v15(), hashes.SHA1()
+    )
+
+
+class KeyManagerTestCase(TestCase):
+    """Test the loading of the private keys of CloudFront key pairs."""
+
+    def setUp(self):
+        """Start each test with a fresh key manager and a key pair in a temporary directory."""
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.key_path = os.path.join(self.directory, "cloudfront_private_key")
+        self.private_key = write_private_key(self.key_path)
+        self.key_manager = cloudfront_utils.KeyManager()
+
+    def test_utils_cloudfront_utils_key_manager_load_once(self):
+        """The key should only be loaded once for all the signatures."""
+        with override_settings(
+            CLOUDFRONT_ACCESS_KEY_ID="ABC", CLOUDFRONT_PRIVATE_KEY_PATH=self.key_path
+        ):
+            for message in [b"a", b"b", b"c"]:
+                verify(self.private_key, self.key_manager.sign(message, "ABC"), message)
+
+        stats = self.key_manager.get_stats()
+        self.assertEqual(stats["loads"], 1)
+        self.assertEqual(stats["signatures"], 3)
+        self.assertGreater(stats["load_time"], 0)
+        self.assertGreater(stats["signing_time"], 0)
+
+        self.key_manager.reset_stats()
+        self.assertEqual(
+            self.key_manager.get_stats(),
+            {"loads": 0, "load_time": 0.0, "signatures": 0, "signing_time": 0.0},
+        )
+
+    def test_utils_cloudfront_utils_key_manager_rotation(self):
+        """The key and the id of its key pair should be loaded again when a file changes."""
+        self.assertEqual(
+            self.key_manager.get_key_pair(self.key_path, "ABC"),
+            ("ABC", self.key_manager.get_key_pair(self.key_path)[1]),
+        )
+        with open(self.key_path + ".id", "w") as id_file:
+            id_file.write("OLD\n")
+        self.assertEqual(self.key_manager.get_key_pair(self.key_path, "ABC")[0], "OLD")
+
+        # Rotating the key pair replaces both its key and its id
+        new_path = os.path.join(self.directory, "new_private_key")
+        new_private_key = write_private_key(new_path)
+        with open(new_path + ".id", "w") as id_file:
+            id_file.write("NEW")
+        os.replace(new_path + ".id", self.key_path + ".id")
+        os.replace(new_path, self.key_path)
+
+        key_pair_id, private_key = self.key_manager.get_key_pair(self.key_path, "ABC")
+        self.assertEqual(key_pair_id, "NEW")
+        verify(
+            new_private_key,
+            private_key.sign(b"a", padding.PKCS1v15(), hashes.SHA1()),
+            b"a",
+        )
+        self.assertEqual(self.key_manager.get_stats()["loads"], 3)
+
+        # Messages are still signed with the key of the previous key pair for its id
+        verify(new_private_key, self.key_manager.sign(b"a", "NEW"), b"a")
+        verify(self.private_key, self.key_manager.sign(b"a", "OLD"), b"a")
+
+    def test_utils_cloudfront_utils_key_manager_key_pairs(self):
+        """Other key pairs active during a rotation should sign with their own key."""
+        other_path = os.path.join(self.directory, "other_private_key")
+        other_private_key = write_private_key(other_path)
+
+        with override_settings(
+            CLOUDFRONT_ACCESS_KEY_ID="NEW",
+            CLOUDFRONT_PRIVATE_KEY_PATH=self.key_path,
+            CLOUDFRONT_PRIVATE_KEY_PATHS={"OLD": other_path},
+        ):
+            self.assertEqual(
+                cloudfront_utils.get_key_pairs(),
+                [(self.key_path, "NEW"), (other_path, "OLD")],
+            )
+            verify(self.private_key, self.key_manager.sign(b"a", "NEW"), b"a")
+            verify(other_private_key, self.key_manager.sign(b"a", "OLD"), b"a")
+
+            with self.assertRaises(cloudfront_utils.MissingRSAKey):
+                self.key_manager.sign(b"a", "UNKNOWN")
+
+    def test_utils_cloudfront_utils_key_manager_missing(self):
+        """A missing key file should raise a MissingRSAKey exception."""
+        with self.assertRaises(cloudfront_utils.MissingRSAKey):
+            self.key_manager.get_key_pair(os.path.join(self.directory, "missing"))
+
+        # The key is not kept in memory once its file is deleted
+        self.key_manager.get_key_pair(self.key_path)
+        os.remove(self.key_path)
+        with self.assertRaises(cloudfront_utils.MissingRSAKey):
+            self.key_manager.get_key_pair(self.key_path)
+
+
+class CheckPrivateKeysTestCase(TestCase):
+    """Test the check of the private keys when gunicorn workers boot."""
+
+    def setUp(self):
+        """Write a valid and an invalid private key in a temporary directory."""
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.key_path = os.path.join(directory.name, "valid")
+        write_private_key(self.key_path)
+        self.invalid_path = os.path.join(directory.name, "invalid")
+        with open(self.invalid_path, "w") as key_file:
+            key_file.write("not a key")
+        self.missing_path = os.path.join(directory.name, "missing")
+
+    def test_utils_cloudfront_utils_check_private_keys_valid(self):
+        """Valid keys should be loaded by the key manager."""
+        with override_settings(
+            CLOUDFRONT_SIGNED_URLS_ACTIVE=True,
+            CLOUDFRONT_PRIVATE_KEY_PATH=self.key_path,
+            CLOUDFRONT_PRIVATE_KEY_PATHS={"OLD": self.key_path},
+        ), mock.patch.object(
+            cloudfront_utils, "key_manager", cloudfront_utils.KeyManager()
+        ) as key_manager:
+            cloudfront_utils.check_private_keys()
+        self.assertEqual(key_manager.get_stats()["loads"], 1)
+
+    def test_utils_cloudfront_utils_check_private_keys_errors(self):
+        """A missing or invalid key should be reported, for any active key pair."""
+        for path, message in [
+            (self.missing_path, "is missing: {!s}".format(self.missing_path)),
+            (self.invalid_path, "not a valid unencrypted PEM file"),
+        ]:
+            with override_settings(
+                CLOUDFRONT_SIGNED_URLS_ACTIVE=True, CLOUDFRONT_PRIVATE_KEY_PATH=path
+            ), self.assertRaisesRegex(ImproperlyConfigured, message):
+                cloudfront_utils.check_private_keys()
+
+            with override_settings(
+                CLOUDFRONT_SIGNED_URLS_ACTIVE=True,
+                CLOUDFRONT_PRIVATE_KEY_PATH=self.key_path,
+                CLOUDFRONT_PRIVATE_KEY_PATHS={"OLD": path},
+            ), self.assertRaisesRegex(ImproperlyConfigured, message):
+                cloudfront_utils.check_private_keys()
+
+    def test_utils_cloudfront_utils_check_private_keys_inactive(self):
+        """The keys should not be checked if signed urls are not activated."""
+        with override_settings(
+            CLOUDFRONT_SIGNED_URLS_ACTIVE=False,
+            CLOUDFRONT_PRIVATE_KEY_PATH=self.missing_path,
+        ):
+            cloudfront_utils.check_private_keys()
+
+
+class SignedUrlsTestCase(TestCase):
+    """Test the expiration and the cache of CloudFront signed urls."""
+
+    def setUp(self):
+        """Start each test with no signature cached and a key pair in a temporary directory."""
+        super().setUp()
+        cloudfront_utils._signatures.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.key_path = os.path.join(directory.name, "cloudfront_private_key")
+        write_private_key(self.key_path)
+
+    @override_settings(
+        CLOUDFRONT_SIGNED_URLS_VALIDITY=7200, CLOUDFRONT_SIGNED_URLS_BUCKET=600
+    )
+    def test_utils_cloudfront_utils_get_expiration(self):
+        """Expirations should be rounded down to the time bucket."""
+        for now, expected in [
+            (datetime(2018, 8, 8, 12, 0), datetime(2018, 8, 8, 14, 0)),
+            (datetime(2018, 8, 8, 12, 3, 20), datetime(2018, 8, 8, 14, 0)),
+            (datetime(2018, 8, 8, 12, 9, 59), datetime(2018, 8, 8, 14, 0)),
+            (datetime(2018, 8, 8, 12, 10), datetime(2018, 8, 8, 14, 10)),
+        ]:
+            self.assertEqual(
+                cloudfront_utils.get_expiration(now.replace(tzinfo=pytz.utc)),
+                expected.replace(tzinfo=pytz.utc),
+            )
+
+        with override_settings(CLOUDFRONT_SIGNED_URLS_BUCKET=0):
+            self.assertEqual(
+                cloudfront_utils.get_expiration(
+                    datetime(2018, 8, 8, 12, 3, 20, tzinfo=pytz.utc)
+                ),
+                datetime(2018, 8, 8, 14, 3, 20, tzinfo=pytz.utc),
+            )
+
+        now = datetime(2018, 8, 8, 12, 3, 20, tzinfo=pytz.utc)
+        with mock.patch.object(timezone, "now", return_value=now):
+            self.assertEqual(
+                cloudfront_utils.get_expiration(),
+                datetime(2018, 8, 8, 14, 0, tzinfo=pytz.utc),
+            )
+
+    def test_utils_cloudfront_utils_signatures_cached(self):
+        """Urls and resources should only be signed once for each expiration."""
+        date_less_than = cloudfront_utils.get_expiration()
+        with override_settings(
+            CLOUDFRONT_ACCESS_KEY_ID="ABC", CLOUDFRONT_PRIVATE_KEY_PATH=self.key_path
+        ), mock.patch.object(
+            cloudfront_utils, "rsa_signer", wraps=cloudfront_utils.rsa_signer
+        ) as rsa_signer:
+            url = cloudfront_utils.get_signed_url("https://abc/a.mp4", date_less_than)
+            self.assertIn("Key-Pair-Id=ABC", url)
+            self.assertEqual(
+                cloudfront_utils.get_signed_url("https://abc/a.mp4", date_less_than),
+                url,
+            )
+            query_string = cloudfront_utils.get_signed_query_string(
+                "https://abc/*", date_less_than
+            )
+            self.assertEqual(
+                cloudfront_utils.get_signed_query_string(
+                    "https://abc/*", date_less_than
+                ),
+                query_string,
+            )
+            self.assertEqual(rsa_signer.call_count, 2)
+
+            # Another url, expiration or key pair needs its own signature
+            cloudfront_utils.get_signed_url("https://abc/b.mp4", date_less_than)
+            cloudfront_utils.get_signed_url(
+                "https://abc/a.mp4", date_less_than + timedelta(minutes=10)
+            )
+            with open(self.key_path + ".id", "w") as id_file:
+                id_file.write("DEF")
+            self.assertIn(
+                "Key-Pair-Id=DEF",
+                cloudfront_utils.get_signed_url("https://abc/a.mp4", date_less_than),
+            )
+            self.assertEqual(rsa_signer.call_count, 5)
+
+    def test_utils_cloudfront_utils_signatures_expired(self):
+        """Signatures that already expired should not be cached."""
+        date_less_than = timezone.now() - timedelta(seconds=1)
+        with override_settings(
+            CLOUDFRONT_ACCESS_KEY_ID="ABC", CLOUDFRONT_PRIVATE_KEY_PATH=self.key_path
+        ), mock.patch.object(
+            cloudfront_utils, "rsa_signer", wraps=cloudfront_utils.rsa_signer
+        ) as rsa_signer:
+            for _ in range(2):
+                cloudfront_utils.get_signed_url("https://abc/a.mp4", date_less_than)
+        self.assertEqual(rsa_signer.call_count, 2)
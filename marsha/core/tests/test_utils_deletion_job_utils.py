@@ -0,0 +1,194 @@
+"""Test the deletion jobs of the Marsha core app."""
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..defaults import DELETION_JOB_STALE_TIMEOUT
+from ..factories import (
+    ConsumerSiteAccessFactory,
+    ConsumerSiteFactory,
+    ConsumerSiteOrganizationFactory,
+    OrganizationFactory,
+    UserFactory,
+)
+from ..models import ConsumerSite, DeletionJob, Playlist, PlaylistAccess, Video
+from ..utils import deletion_job_utils, job_utils
+from ..utils.deletion_job_utils import run_deletion_job, schedule_deletion
+from ..utils.job_utils import claim_job
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+class DeletionJobUtilsTestCase(TestCase):
+    """Test the deletion of a large tenant in batches."""
+
+    def create_tenant(self, playlists, videos_per_playlist):
+        """Create a consumer site with playlists, each with videos and a user access."""
+        consumer_site = ConsumerSiteFactory()
+        ConsumerSiteOrganizationFactory(
+            consumer_site=consumer_site, organization=OrganizationFactory()
+        )
+        user = UserFactory()
+        ConsumerSiteAccessFactory(consumer_site=consumer_site, user=user)
+
+        Playlist.objects.bulk_create(
+            Playlist(
+                title="Playlist {:d}".format(i),
+                lti_id="playlist#{:d}".format(i),
+                consumer_site=consumer_site,
+            )
+            for i in range(playlists)
+        )
+        playlists = list(Playlist.objects.filter(consumer_site=consumer_site))
+        PlaylistAccess.objects.bulk_create(
+            PlaylistAccess(playlist=playlist, user=user) for playlist in playlists
+        )
+        Video.objects.bulk_create(
+            (
+                Video(
+                    title="Video {:d}".format(i),
+                    lti_id="video#{:d}".format(i),
+                    playlist=playlist,
+                    position=i,
+                )
+                for playlist in playlists
+                for i in range(videos_per_playlist)
+            ),
+            batch_size=5000,
+        )
+        return consumer_site
+
+    def test_utils_deletion_job_utils_schedule(self):
+        """Scheduling the deletion of an object twice should return the same job."""
+        consumer_site = ConsumerSiteFactory(name="example.com")
+
+        job, created = schedule_deletion(consumer_site)
+        self.assertTrue(created)
+        self.assertEqual(job.state, DeletionJob.PENDING)
+        self.assertEqual(job.content_type.model_class(), ConsumerSite)
+        self.assertEqual(job.object_id, consumer_site.id)
+        self.assertEqual(str(job), "example.com (pending)")
+
+        self.assertEqual(schedule_deletion(consumer_site), (job, False))
+
+        # A new job can be scheduled once the previous one failed
+        job.state = DeletionJob.FAILED
+        job.save()
+        other_job, created = schedule_deletion(consumer_site)
+        self.assertTrue(created)
+        self.assertNotEqual(other_job, job)
+
+    def test_utils_deletion_job_utils_claim(self):
+        """Pending jobs and running jobs without recent progress should be claimed."""
+        job, _ = schedule_deletion(ConsumerSiteFactory())
+
+        self.assertEqual(claim_job(DeletionJob, DELETION_JOB_STALE_TIMEOUT), job)
+        job.refresh_from_db()
+        self.assertEqual(job.state, DeletionJob.RUNNING)
+
+        # The job is running and recorded its progress recently
+        self.assertIsNone(claim_job(DeletionJob, DELETION_JOB_STALE_TIMEOUT))
+
+        # It is resumed once it did not record any progress for longer than the timeout
+        later = timezone.now() + timedelta(seconds=DELETION_JOB_STALE_TIMEOUT + 1)
+        with mock.patch.object(job_utils.timezone, "now", return_value=later):
+            self.assertEqual(claim_job(DeletionJob, DELETION_JOB_STALE_TIMEOUT), job)
+
+    def test_utils_deletion_job_utils_large_tenant(self):
+        """A tenant with 50k videos should be deleted in batches and resumed after a pause."""
+        consumer_site = self.create_tenant(5000, 10)
+        job, _ = schedule_deletion(consumer_site)
+
+        job = claim_job(DeletionJob, DELETION_JOB_STALE_TIMEOUT)
+        self.assertFalse(run_deletion_job(job, batch_size=1000, max_batches=7))
+
+        # The provisioning jobs, none, then the accesses to the playlists took 7 batches
+        job.refresh_from_db()
+        self.assertEqual(job.state, DeletionJob.RUNNING)
+        self.assertEqual(job.step, 2)
+        self.assertEqual(job.steps, 6)
+        self.assertEqual(job.progress, 33)
+        self.assertEqual(job.counts, {"core.PlaylistAccess": 5000})
+        self.assertEqual(PlaylistAccess.objects.count(), 0)
+        self.assertEqual(Playlist.objects.count(), 5000)
+
+        # The worker resumes the job from its last batch
+        stdout = StringIO()
+        call_command(
+            "run_deletion_jobs",
+            once=True,
+            stale_timeout=0,
+            batch_size=1000,
+            stdout=stdout,
+        )
+        self.assertIn("objects deleted", stdout.getvalue())
+
+        job.refresh_from_db()
+        self.assertEqual(job.state, DeletionJob.DONE)
+        self.assertEqual(job.progress, 100)
+        self.assertIsNotNone(job.finished_on)
+        self.assertEqual(
+            job.counts,
+            {
+                "core.ConsumerSiteAccess": 1,
+                "core.ConsumerSiteOrganization": 1,
+                "core.PlaylistAccess": 5000,
+                "core.Playlist": 5000,
+                "core.ConsumerSite": 1,
+            },
+        )
+        # All the objects are deleted at the date of the job
+        self.assertEqual(
+            set(Playlist.objects.all_with_deleted().values_list("deleted", flat=True)),
+            {job.deleted_on},
+        )
+        self.assertFalse(ConsumerSite.objects.exists())
+        # Videos protect their playlist so they are not deleted in cascade
+        self.assertEqual(Video.objects.count(), 50000)
+
+    def test_utils_deletion_job_utils_failure(self):
+        """A job failing should keep the progress of its last batch and be resumable."""
+        consumer_site = self.create_tenant(25, 0)
+        schedule_deletion(consumer_site)
+
+        calls = []
+
+        def mark_deleted(queryset, now):
+            """Lose the connection when the playlists start being deleted."""
+            calls.append(queryset.model)
+            if queryset.model is Playlist:
+                raise RuntimeError("Connection lost")
+            return original_mark_deleted(queryset, now)
+
+        original_mark_deleted = deletion_job_utils.mark_deleted
+        stderr = StringIO()
+        with mock.patch.object(deletion_job_utils, "mark_deleted", mark_deleted):
+            call_command("run_deletion_jobs", once=True, batch_size=10, stderr=stderr)
+        self.assertEqual(calls, [PlaylistAccess] * 3 + [Playlist])
+        self.assertIn("(failed): ", stderr.getvalue())
+        self.assertIn("Connection lost", stderr.getvalue())
+
+        job = DeletionJob.objects.get()
+        self.assertEqual(job.state, DeletionJob.FAILED)
+        self.assertIn("Connection lost", job.error)
+        self.assertEqual(job.step, 2)
+        self.assertEqual(job.counts, {"core.PlaylistAccess": 25})
+        self.assertEqual(Playlist.objects.count(), 25)
+
+        # Failed jobs are only resumed once set back to pending, e.g. from the admin
+        self.assertIsNone(claim_job(DeletionJob, stale_timeout=0))
+        job.state = DeletionJob.PENDING
+        job.save()
+        call_command("run_deletion_jobs", once=True, batch_size=10, stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.state, DeletionJob.DONE)
+        self.assertEqual(job.counts["core.PlaylistAccess"], 25)
+        self.assertEqual(job.counts["core.Playlist"], 25)
+        self.assertFalse(Playlist.objects.exists())
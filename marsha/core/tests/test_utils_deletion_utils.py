@@ -0,0 +1,173 @@
+"""Test the deletion utils of the Marsha core app."""
+from datetime import datetime
+from unittest import mock
+
+from django.apps import apps
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+import factory
+import pytz
+from safedelete.models import is_safedelete_cls
+from safedelete.signals import post_softdelete
+from safedelete.utils import related_objects
+
+from ..factories import (
+    AudioTrackFactory,
+    ConsumerSiteAccessFactory,
+    ConsumerSiteFactory,
+    ConsumerSiteOrganizationFactory,
+    OrganizationAccessFactory,
+    OrganizationFactory,
+    PlaylistAccessFactory,
+    PlaylistFactory,
+    SignTrackFactory,
+    SubtitleTrackFactory,
+    UserFactory,
+    VideoFactory,
+)
+from ..models import ConsumerSite, Organization, Playlist, User, Video
+from ..utils.deletion_utils import soft_delete_cascade
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+class UniqueUserFactory(UserFactory):
+    """Create users with unique usernames, random ones may collide in large tenants."""
+
+    username = factory.Sequence("user{:d}".format)
+
+
+class DeletionUtilsTestCase(TestCase):
+    """Test the set-based soft deletion cascade."""
+
+    def create_tenant(self, size):
+        """Create a consumer site with an organization, users, playlists, videos and tracks."""
+        user = UniqueUserFactory()
+        consumer_site = ConsumerSiteFactory()
+        organization = OrganizationFactory()
+        ConsumerSiteOrganizationFactory(
+            consumer_site=consumer_site, organization=organization
+        )
+        ConsumerSiteAccessFactory(consumer_site=consumer_site, user=user)
+        OrganizationAccessFactory(organization=organization, user=user)
+
+        for _ in range(size):
+            playlist = PlaylistFactory(
+                consumer_site=consumer_site, organization=organization, created_by=user
+            )
+            PlaylistAccessFactory(playlist=playlist, user=UniqueUserFactory())
+            # Videos protect their playlist, except those created by the user
+            for created_by in [user, UniqueUserFactory()]:
+                video = VideoFactory(playlist=playlist, created_by=created_by)
+                AudioTrackFactory(video=video)
+                SubtitleTrackFactory(video=video)
+                SignTrackFactory(video=video)
+
+        return consumer_site, organization, user
+
+    @staticmethod
+    def get_deleted_objects():
+        """Get all the soft deleted objects of the core app."""
+        return {
+            obj
+            for model in apps.get_app_config("core").get_models()
+            if is_safedelete_cls(model)
+            for obj in model.all_objects.filter(deleted__isnull=False)
+        }
+
+    def test_utils_deletion_utils_parity(self):
+        """The objects deleted should be those the deletion collector of safedelete finds."""
+        consumer_site, organization, user = self.create_tenant(2)
+        video = Video.objects.filter(created_by=user).first()
+
+        for obj in [video, user, organization, consumer_site]:
+            obj = obj.__class__.objects.get(pk=obj.pk)
+            with self.subTest(model=obj.__class__):
+                expected = self.get_deleted_objects() | {obj}
+                expected.update(
+                    related
+                    for related in related_objects(obj)
+                    if is_safedelete_cls(related.__class__)
+                )
+
+                obj.delete()
+
+                self.assertIsNotNone(obj.deleted)
+                self.assertEqual(self.get_deleted_objects(), expected)
+
+    def test_utils_deletion_utils_queries(self):
+        """The number of queries should not depend on the number of related objects."""
+        for model in [ConsumerSite, Organization, User]:
+            counts = []
+            for size in [1, 5]:
+                objects = dict(
+                    zip([ConsumerSite, Organization, User], self.create_tenant(size))
+                )
+                obj = model.objects.get(pk=objects[model].pk)
+                with CaptureQueriesContext(connection) as queries:
+                    obj.delete()
+                counts.append(len(queries))
+
+            with self.subTest(model=model):
+                self.assertEqual(counts[0], counts[1])
+
+    def test_utils_deletion_utils_counts(self):
+        """Deleting an organization should update each relation with one statement."""
+        _consumer_site, organization, _user = self.create_tenant(3)
+
+        with self.assertNumQueries(8):
+            # A savepoint, a statement for each relation, playlists being selected to
+            # send the signals of their receivers, and the release of the savepoint
+            deleted, counts = soft_delete_cascade(
+                Organization.objects.filter(pk=organization.pk)
+            )
+
+        self.assertEqual(
+            counts,
+            {
+                "core.Organization": 1,
+                "core.OrganizationAccess": 1,
+                "core.ConsumerSiteOrganization": 1,
+                "core.Playlist": 3,
+                "core.PlaylistAccess": 3,
+            },
+        )
+        self.assertEqual(Organization.all_objects.get().deleted, deleted)
+        self.assertEqual(Organization.all_objects.get().updated_on, deleted)
+        # Videos protect their playlist so they are not deleted with it
+        self.assertFalse(Video.all_objects.filter(deleted__isnull=False).exists())
+
+    def test_utils_deletion_utils_already_deleted(self):
+        """Related objects already deleted should keep the date of their deletion."""
+        user = UserFactory()
+        video = VideoFactory(created_by=user)
+        old_video = VideoFactory(created_by=user)
+        old_track = AudioTrackFactory(video=video)
+        past = datetime(2018, 8, 8, tzinfo=pytz.utc)
+        Video.all_objects.filter(pk=old_video.pk).update(deleted=past)
+        old_track.__class__.all_objects.filter(pk=old_track.pk).update(deleted=past)
+
+        user.delete()
+
+        self.assertEqual(Video.all_objects.get(pk=old_video.pk).deleted, past)
+        self.assertEqual(
+            old_track.__class__.all_objects.get(pk=old_track.pk).deleted, past
+        )
+        self.assertEqual(Video.all_objects.get(pk=video.pk).deleted, user.deleted)
+
+    def test_utils_deletion_utils_signals(self):
+        """Soft deletion signals should be sent for each object of models with receivers."""
+        _consumer_site, organization, _user = self.create_tenant(2)
+        receiver = mock.Mock()
+        post_softdelete.connect(receiver, sender=Playlist)
+        self.addCleanup(post_softdelete.disconnect, receiver, sender=Playlist)
+
+        organization.delete()
+
+        self.assertEqual(receiver.call_count, 2)
+        for call in receiver.call_args_list:
+            self.assertEqual(call[1]["instance"].deleted, organization.deleted)
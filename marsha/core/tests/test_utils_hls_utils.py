@@ -0,0 +1,84 @@
+"""Test the HLS utils of the Marsha core app."""
+import os
+
+from django.test import TestCase
+
+from ..utils import hls_utils
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "hls")
+
+
+def read_fixture(name):
+    """Read a playlist from the fixtures."""
+    with open(os.path.join(FIXTURES_DIR, name)) as playlist_file:
+        return playlist_file.read()
+
+
+class HLSUtilsTestCase(TestCase):
+    """Test reading and rewriting HLS playlists."""
+
+    def test_utils_hls_utils_parse_attributes(self):
+        """Quoted values may contain commas and unquoted ones should be kept as is."""
+        self.assertEqual(
+            list(
+                hls_utils.parse_attributes(
+                    'BANDWIDTH=556000,CODECS="avc1.4d401e,mp4a.40.2",RESOLUTION=256x144'
+                ).items()
+            ),
+            [
+                ("BANDWIDTH", "556000"),
+                ("CODECS", "avc1.4d401e,mp4a.40.2"),
+                ("RESOLUTION", "256x144"),
+            ],
+        )
+
+    def test_utils_hls_utils_parse_master_playlist(self):
+        """All the variant streams of the master playlist should be found in order."""
+        variants = hls_utils.parse_master_playlist(read_fixture("1533686400.m3u8"))
+
+        self.assertEqual(len(variants), 5)
+        self.assertEqual(
+            variants[0],
+            hls_utils.Variant(
+                uri="1533686400_144.m3u8",
+                bandwidth=556000,
+                width=256,
+                height=144,
+                codecs="avc1.4d401e,mp4a.40.2",
+            ),
+        )
+        self.assertEqual(
+            [variant.uri for variant in variants],
+            [
+                "1533686400_{:d}.m3u8".format(resolution)
+                for resolution in [144, 240, 480, 720, 1080]
+            ],
+        )
+        self.assertEqual(
+            hls_utils.get_resolutions(read_fixture("1533686400.m3u8")),
+            [144, 240, 480, 720, 1080],
+        )
+
+    def test_utils_hls_utils_parse_master_playlist_invalid(self):
+        """Texts that are not playlists or with a variant stream and no uri are invalid."""
+        with self.assertRaises(ValueError):
+            hls_utils.parse_master_playlist("1533686400_144.m3u8\n")
+
+        with self.assertRaises(ValueError):
+            hls_utils.parse_master_playlist(
+                "#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=556000\n"
+            )
+
+    def test_utils_hls_utils_is_master_playlist(self):
+        """Master playlists should be told apart from media playlists."""
+        self.assertTrue(hls_utils.is_master_playlist(read_fixture("1533686400.m3u8")))
+        self.assertTrue(
+            hls_utils.is_master_playlist(read_fixture("master_with_media.m3u8"))
+        )
+        self.assertFalse(
+            hls_utils.is_master_playlist(read_fixture("1533686400_144.m3u8"))
+        )
@@ -0,0 +1,207 @@
+"""Test the LTI utils of the Marsha core app."""
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+
+from pylti.common import LTIException
+
+from ..factories import (
+    ConsumerSiteFactory,
+    ConsumerSiteLTIPassportFactory,
+    PlaylistFactory,
+    PlaylistLTIPassportFactory,
+)
+from ..lti import LTI
+from ..utils import lti_utils, oauth_utils
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+@override_settings(LTI_PASSPORT_CACHE_ACTIVE=True)
+class LTIUtilsTestCase(TestCase):
+    """Test the resolution of LTI passports through the cache."""
+
+    def setUp(self):
+        """Start each test with empty caches."""
+        super().setUp()
+        cache.clear()
+        lti_utils._local_passports.clear()
+
+    def test_utils_lti_utils_get_lti_passport_cached(self):
+        """A passport should only be queried once and then served from the caches."""
+        passport = ConsumerSiteLTIPassportFactory(consumer_site__name="example.com")
+
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                lti_utils.get_lti_passport(passport.oauth_consumer_key, "example.com"),
+                passport,
+            )
+
+        # The passport is now in the local cache
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                lti_utils.get_lti_passport(passport.oauth_consumer_key, "example.com"),
+                passport,
+            )
+
+        # Another process would find it in the shared cache
+        lti_utils._local_passports.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                lti_utils.get_lti_passport(passport.oauth_consumer_key, "example.com"),
+                passport,
+            )
+
+    def test_utils_lti_utils_get_lti_passport_playlist(self):
+        """A passport related to a playlist should be resolved with the playlist's site."""
+        passport = PlaylistLTIPassportFactory(
+            playlist__consumer_site__name="example.com"
+        )
+        self.assertEqual(
+            lti_utils.get_lti_passport(passport.oauth_consumer_key, "example.com"),
+            passport,
+        )
+        self.assertIsNone(
+            lti_utils.get_lti_passport(passport.oauth_consumer_key, "other.com")
+        )
+
+    def test_utils_lti_utils_get_lti_passport_negative_cached(self):
+        """Lookups matching no passport should be cached until a passport is created."""
+        with self.assertNumQueries(1):
+            self.assertIsNone(lti_utils.get_lti_passport("ABC123", "example.com"))
+        with self.assertNumQueries(0):
+            self.assertIsNone(lti_utils.get_lti_passport("ABC123", "example.com"))
+
+        passport = ConsumerSiteLTIPassportFactory(
+            oauth_consumer_key="ABC123", consumer_site__name="example.com"
+        )
+        self.assertEqual(lti_utils.get_lti_passport("ABC123", "example.com"), passport)
+
+    @mock.patch.object(lti_utils, "LTI_PASSPORT_CACHE_NEGATIVE_TIMEOUT", 0)
+    def test_utils_lti_utils_get_lti_passport_negative_timeout(self):
+        """Negative lookups should expire after their own timeout."""
+        self.assertIsNone(lti_utils.get_lti_passport("ABC123", "example.com"))
+        with self.assertNumQueries(1):
+            self.assertIsNone(lti_utils.get_lti_passport("ABC123", "example.com"))
+
+    def test_utils_lti_utils_get_lti_passport_consumer_site_renamed(self):
+        """Renaming a consumer site should invalidate the passports cached for its old name."""
+        passport = ConsumerSiteLTIPassportFactory(consumer_site__name="example.com")
+        self.assertEqual(
+            lti_utils.get_lti_passport(passport.oauth_consumer_key, "example.com"),
+            passport,
+        )
+
+        consumer_site = passport.consumer_site
+        consumer_site.name = "renamed.com"
+        consumer_site.save()
+
+        self.assertIsNone(
+            lti_utils.get_lti_passport(passport.oauth_consumer_key, "example.com")
+        )
+        self.assertEqual(
+            lti_utils.get_lti_passport(passport.oauth_consumer_key, "renamed.com"),
+            passport,
+        )
+
+    def test_utils_lti_utils_get_lti_passport_soft_deleted(self):
+        """Soft deleting a passport should invalidate the cached passports."""
+        passport = ConsumerSiteLTIPassportFactory(consumer_site__name="example.com")
+        self.assertEqual(
+            lti_utils.get_lti_passport(passport.oauth_consumer_key, "example.com"),
+            passport,
+        )
+
+        passport.delete()
+
+        self.assertIsNone(
+            lti_utils.get_lti_passport(passport.oauth_consumer_key, "example.com")
+        )
+
+    def test_utils_lti_utils_get_lti_passport_playlist_without_passport(self):
+        """Playlists scoping no passport should be created and updated without invalidation."""
+        passport = ConsumerSiteLTIPassportFactory(consumer_site__name="example.com")
+        lti_utils.get_lti_passport(passport.oauth_consumer_key, "example.com")
+
+        playlist = PlaylistFactory(consumer_site=passport.consumer_site)
+        playlist.title = "new title"
+        playlist.save()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                lti_utils.get_lti_passport(passport.oauth_consumer_key, "example.com"),
+                passport,
+            )
+
+    def test_utils_lti_utils_get_lti_passport_playlist_moved(self):
+        """Moving a playlist scoping a passport to another site should invalidate it."""
+        passport = PlaylistLTIPassportFactory(
+            playlist__consumer_site__name="example.com"
+        )
+        self.assertEqual(
+            lti_utils.get_lti_passport(passport.oauth_consumer_key, "example.com"),
+            passport,
+        )
+
+        playlist = passport.playlist
+        playlist.consumer_site = ConsumerSiteFactory(name="other.com")
+        playlist.save()
+
+        self.assertIsNone(
+            lti_utils.get_lti_passport(passport.oauth_consumer_key, "example.com")
+        )
+        self.assertEqual(
+            lti_utils.get_lti_passport(passport.oauth_consumer_key, "other.com"),
+            passport,
+        )
+
+    def test_utils_lti_utils_get_lti_passport_generation_evicted(self):
+        """Entries should not be trusted anymore if the shared generation was evicted."""
+        passport = ConsumerSiteLTIPassportFactory(consumer_site__name="example.com")
+        lti_utils.get_lti_passport(passport.oauth_consumer_key, "example.com")
+
+        cache.delete(lti_utils.PASSPORT_CACHE_GENERATION_KEY)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                lti_utils.get_lti_passport(passport.oauth_consumer_key, "example.com"),
+                passport,
+            )
+
+    @override_settings(LTI_PASSPORT_CACHE_ACTIVE=False)
+    def test_utils_lti_utils_get_lti_passport_inactive(self):
+        """The database should be queried on each lookup when the cache is not active."""
+        passport = ConsumerSiteLTIPassportFactory(consumer_site__name="example.com")
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.assertEqual(
+                    lti_utils.get_lti_passport(
+                        passport.oauth_consumer_key, "example.com"
+                    ),
+                    passport,
+                )
+
+    @mock.patch.object(oauth_utils, "verify_request", return_value=True)
+    def test_utils_lti_utils_disabled_passport_immediately_rejected(self, mock_verify):
+        """Disabling a passport should take effect on the very next LTI launch request."""
+        passport = ConsumerSiteLTIPassportFactory(
+            oauth_consumer_key="ABC123", consumer_site__name="example.com"
+        )
+        request = RequestFactory().post(
+            "/",
+            {
+                "oauth_consumer_key": "ABC123",
+                "context_id": "course-v1:ufr+mathematics+0001",
+                "tool_consumer_instance_guid": "example.com",
+            },
+        )
+        self.assertTrue(LTI(request).verify())
+
+        passport.is_enabled = False
+        passport.save()
+
+        with self.assertRaises(LTIException):
+            LTI(request).verify()
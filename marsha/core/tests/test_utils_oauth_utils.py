@@ -0,0 +1,192 @@
+"""Test the OAuth utils of the Marsha core app."""
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import QueryDict
+from django.test import RequestFactory, TestCase
+
+import oauth2
+from pylti.common import LTIException, verify_request_common
+
+from ..utils import oauth_utils
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+def sign_parameters(parameters, secret, url="http://testserver/"):
+    """Sign the parameters of a POST request with the reference oauth2 library."""
+    parameters = dict(
+        parameters,
+        oauth_consumer_key="ABC123",
+        oauth_nonce=oauth2.generate_nonce(),
+        oauth_signature_method="HMAC-SHA1",
+        oauth_timestamp=str(int(time.time())),
+        oauth_version="1.0",
+    )
+    oauth_request = oauth2.Request("POST", url, parameters)
+    parameters["oauth_signature"] = (
+        oauth2.SignatureMethod_HMAC_SHA1()
+        .sign(oauth_request, oauth2.Consumer("ABC123", secret), None)
+        .decode("ascii")
+    )
+    return parameters
+
+
+class OAuthUtilsTestCase(TestCase):
+    """Test the verification of OAuth 1.0 signatures."""
+
+    def setUp(self):
+        """Start each test with empty caches and a request factory."""
+        super().setUp()
+        cache.clear()
+        oauth_utils._local_nonces.clear()
+        self.factory = RequestFactory()
+
+    def test_utils_oauth_utils_base_string(self):
+        """The base string should match the example of RFC 5849 section 3.4.1.1."""
+        base_string = oauth_utils.get_signature_base_string(
+            "post",
+            "HTTP://Example.com:80/request?b5=%3D%253D&a3=a&c%40=&a2=r%20b",
+            QueryDict("b5=%3D%253D&a3=a&c%40=&a2=r%20b"),
+            QueryDict(
+                "c2&a3=2+q&oauth_consumer_key=9djdj82h48djs9d2&oauth_token=kkk9d7dh3k39sjv7"
+                "&oauth_signature_method=HMAC-SHA1&oauth_timestamp=137131201"
+                "&oauth_nonce=7d8f3e4a&oauth_signature=djosJKDKJSD8743243%2Fjdk33klY%3D"
+            ),
+        )
+        self.assertEqual(
+            base_string,
+            "POST&http%3A%2F%2Fexample.com%2Frequest&a2%3Dr%2520b%26a3%3D2%2520q"
+            "%26a3%3Da%26b5%3D%253D%25253D%26c%2540%3D%26c2%3D%26oauth_consumer_"
+            "key%3D9djdj82h48djs9d2%26oauth_nonce%3D7d8f3e4a%26oauth_signature_m"
+            "ethod%3DHMAC-SHA1%26oauth_timestamp%3D137131201%26oauth_token%3Dkkk"
+            "9d7dh3k39sjv7",
+        )
+
+    def test_utils_oauth_utils_normalize_url(self):
+        """Only default ports should be removed from urls along with the query string."""
+        for url, expected in [
+            ("http://example.com", "http://example.com/"),
+            ("HTTPS://Example.COM:443/lti/?a=b#c", "https://example.com/lti/"),
+            ("http://example.com:8080/lti/", "http://example.com:8080/lti/"),
+            ("https://example.com:80/lti/", "https://example.com:80/lti/"),
+        ]:
+            self.assertEqual(oauth_utils.normalize_url(url), expected)
+
+    def test_utils_oauth_utils_verify_request(self):
+        """A request signed by the reference implementation should be verified."""
+        parameters = sign_parameters(
+            {"context_id": "course-v1:ufr+mathematics+0001", "title": "é ~*"}, "#Y5$"
+        )
+        request = self.factory.post("/", parameters)
+
+        self.assertTrue(oauth_utils.verify_request(request, "ABC123", "#Y5$"))
+        # Both implementations agree
+        self.assertTrue(
+            verify_request_common(
+                {"ABC123": {"secret": "#Y5$"}},
+                request.build_absolute_uri(),
+                request.method,
+                request.META,
+                dict(request.POST.items()),
+            )
+        )
+
+    def test_utils_oauth_utils_verify_request_query_string(self):
+        """Parameters sent in the query string should be signed."""
+        parameters = sign_parameters(
+            {"context_id": "abc", "a": "1"},
+            "#Y5$",
+            url="https://testserver:443/lti/videos/?a=2",
+        )
+        request = self.factory.post("/lti/videos/?a=2", parameters, secure=True)
+        self.assertTrue(oauth_utils.verify_request(request, "ABC123", "#Y5$"))
+
+        request = self.factory.post("/lti/videos/?a=3", parameters, secure=True)
+        with self.assertRaises(LTIException):
+            oauth_utils.verify_request(request, "ABC123", "#Y5$")
+
+    def test_utils_oauth_utils_verify_request_invalid_signature(self):
+        """Requests signed with another secret or tampered should be rejected."""
+        parameters = sign_parameters({"context_id": "abc"}, "#Y5$")
+
+        with self.assertRaises(LTIException):
+            oauth_utils.verify_request(
+                self.factory.post("/", parameters), "ABC123", "other"
+            )
+
+        with self.assertRaises(LTIException):
+            oauth_utils.verify_request(
+                self.factory.post("/", dict(parameters, context_id="def")),
+                "ABC123",
+                "#Y5$",
+            )
+
+        with self.assertRaises(LTIException):
+            oauth_utils.verify_request(
+                self.factory.post("/", dict(parameters, other="1")), "ABC123", "#Y5$"
+            )
+
+    def test_utils_oauth_utils_verify_request_unsupported(self):
+        """Requests with missing or unsupported OAuth parameters should be rejected."""
+        parameters = sign_parameters({"context_id": "abc"}, "#Y5$")
+        for changes in [
+            {"oauth_signature_method": "PLAINTEXT"},
+            {"oauth_version": "2.0"},
+            {"oauth_consumer_key": "DEF456"},
+            {"oauth_nonce": ""},
+            {"oauth_timestamp": "yesterday"},
+        ]:
+            with self.assertRaises(LTIException):
+                oauth_utils.verify_request(
+                    self.factory.post("/", dict(parameters, **changes)),
+                    "ABC123",
+                    "#Y5$",
+                )
+
+    def test_utils_oauth_utils_verify_request_timestamp(self):
+        """Requests should be rejected outside of the timestamp window."""
+        parameters = sign_parameters({"context_id": "abc"}, "#Y5$")
+        timestamp = int(parameters["oauth_timestamp"])
+
+        for now in [timestamp - 301, timestamp + 301]:
+            with mock.patch("time.time", return_value=now), self.assertRaises(
+                LTIException
+            ):
+                oauth_utils.verify_request(
+                    self.factory.post("/", parameters), "ABC123", "#Y5$"
+                )
+
+        with mock.patch("time.time", return_value=timestamp + 300):
+            self.assertTrue(
+                oauth_utils.verify_request(
+                    self.factory.post("/", parameters), "ABC123", "#Y5$"
+                )
+            )
+
+    def test_utils_oauth_utils_verify_request_replay(self):
+        """A request should be rejected if its nonce was already used, in any process."""
+        parameters = sign_parameters({"context_id": "abc"}, "#Y5$")
+        oauth_utils.verify_request(self.factory.post("/", parameters), "ABC123", "#Y5$")
+
+        with self.assertRaises(LTIException):
+            oauth_utils.verify_request(
+                self.factory.post("/", parameters), "ABC123", "#Y5$"
+            )
+
+        # Another process only knows the nonce from the shared cache
+        oauth_utils._local_nonces.clear()
+        with self.assertRaises(LTIException):
+            oauth_utils.verify_request(
+                self.factory.post("/", parameters), "ABC123", "#Y5$"
+            )
+
+    def test_utils_oauth_utils_consumer_reused(self):
+        """Consumers should be reused for the same key and secret."""
+        consumer = oauth_utils.OAuthConsumer.get("ABC123", "#Y5$")
+        self.assertIs(oauth_utils.OAuthConsumer.get("ABC123", "#Y5$"), consumer)
+        self.assertIsNot(oauth_utils.OAuthConsumer.get("ABC123", "other"), consumer)
+        self.assertEqual(consumer.sign("base"), consumer.sign("base"))
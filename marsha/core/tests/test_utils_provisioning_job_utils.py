@@ -0,0 +1,122 @@
+"""Test the provisioning jobs of the Marsha core app."""
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..defaults import PROVISIONING_JOB_STALE_TIMEOUT
+from ..factories import ConsumerSiteFactory
+from ..models import Playlist, ProvisioningJob, Video
+from ..utils import provisioning_utils
+from ..utils.job_utils import claim_job
+from ..utils.provisioning_job_utils import run_provisioning_job
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+class ProvisioningJobUtilsTestCase(TestCase):
+    """Test the provisioning of a large manifest in batches."""
+
+    def create_job(self, rows, **kwargs):
+        """Create a job provisioning a CSV manifest of videos spread in 10 playlists."""
+        manifest = "context_id,resource_link_id\n" + "".join(
+            "course-{:d},video-{:d}\n".format(i % 10, i) for i in range(rows)
+        )
+        return ProvisioningJob.objects.create(
+            consumer_site=ConsumerSiteFactory(name="example.com"),
+            manifest=manifest,
+            manifest_format="csv",
+            rows=rows,
+            **kwargs
+        )
+
+    def test_utils_provisioning_job_utils_claim(self):
+        """Pending jobs and running jobs without progress should be claimed in order."""
+        job = self.create_job(1)
+        self.assertEqual(str(job), "example.com (pending)")
+
+        self.assertEqual(
+            claim_job(ProvisioningJob, PROVISIONING_JOB_STALE_TIMEOUT), job
+        )
+        job.refresh_from_db()
+        self.assertEqual(job.state, ProvisioningJob.RUNNING)
+
+        # A running job is only claimed again once it is stale
+        self.assertIsNone(claim_job(ProvisioningJob, PROVISIONING_JOB_STALE_TIMEOUT))
+        ProvisioningJob.objects.filter(pk=job.pk).update(
+            updated_on=timezone.now() - timedelta(minutes=10)
+        )
+        self.assertEqual(
+            claim_job(ProvisioningJob, PROVISIONING_JOB_STALE_TIMEOUT), job
+        )
+
+    def test_utils_provisioning_job_utils_resume(self):
+        """A job should record its progress after each batch and resume after the last one."""
+        job = self.create_job(25, state=ProvisioningJob.RUNNING)
+
+        self.assertFalse(run_provisioning_job(job, batch_size=10, max_batches=2))
+        job.refresh_from_db()
+        self.assertEqual(job.counts["rows"], 20)
+        self.assertEqual(job.progress, 80)
+        self.assertEqual(Video.objects.count(), 20)
+
+        self.assertTrue(run_provisioning_job(job, batch_size=10))
+        job.refresh_from_db()
+        self.assertEqual(job.state, ProvisioningJob.DONE)
+        self.assertEqual(job.progress, 100)
+        self.assertIsNotNone(job.finished_on)
+        self.assertEqual(
+            job.counts,
+            {
+                "rows": 25,
+                "rows_skipped": 0,
+                "playlists_created": 10,
+                "videos_created": 25,
+                "videos_existing": 0,
+            },
+        )
+        self.assertEqual(
+            set(Playlist.objects.values_list("consumer_site", flat=True)),
+            {job.consumer_site_id},
+        )
+        self.assertEqual(Video.objects.count(), 25)
+
+    def test_utils_provisioning_job_utils_failure(self):
+        """A job failing should keep its progress and be resumed once set back to pending."""
+        job = self.create_job(25)
+        provision_batch = provisioning_utils._provision_batch
+
+        def failing_provision_batch(rows, consumer_sites, playlists, report):
+            """Provision the first batches, then fail as if the connection was lost."""
+            if Video.objects.count() >= 20:
+                raise RuntimeError("Connection lost")
+            return provision_batch(rows, consumer_sites, playlists, report)
+
+        stderr = StringIO()
+        with mock.patch.object(
+            provisioning_utils, "_provision_batch", failing_provision_batch
+        ):
+            call_command(
+                "run_provisioning_jobs", once=True, batch_size=10, stderr=stderr
+            )
+
+        job.refresh_from_db()
+        self.assertEqual(job.state, ProvisioningJob.FAILED)
+        self.assertIn("Connection lost", job.error)
+        self.assertEqual(job.counts["rows"], 20)
+        self.assertIn("example.com (failed): ", stderr.getvalue())
+
+        job.state = ProvisioningJob.PENDING
+        job.save()
+        stdout = StringIO()
+        call_command("run_provisioning_jobs", once=True, batch_size=10, stdout=stdout)
+
+        job.refresh_from_db()
+        self.assertEqual(job.state, ProvisioningJob.DONE)
+        self.assertEqual(job.counts["videos_created"], 25)
+        self.assertIn("example.com (done): 25 rows provisioned", stdout.getvalue())
@@ -0,0 +1,212 @@
+"""Test the provisioning utils of the Marsha core app."""
+import io
+from unittest import mock
+
+from django.db import IntegrityError
+from django.test import TestCase
+
+from ..factories import ConsumerSiteFactory, PlaylistFactory, VideoFactory
+from ..models import Playlist, Video
+from ..utils import provisioning_utils
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+def get_row(context_id, resource_link_id, consumer_site="example.com", **kwargs):
+    """Build a row of a manifest."""
+    return dict(
+        consumer_site=consumer_site,
+        context_id=context_id,
+        resource_link_id=resource_link_id,
+        **kwargs
+    )
+
+
+class ProvisioningUtilsTestCase(TestCase):
+    """Test the provisioning of playlists and videos from a manifest."""
+
+    def setUp(self):
+        """Create the consumer site of the manifests."""
+        super().setUp()
+        self.consumer_site = ConsumerSiteFactory(name="example.com")
+
+    def test_utils_provisioning_utils_create(self):
+        """Missing playlists and videos should be created with their titles."""
+        rows = [
+            get_row(
+                "course-1", "video-1", context_title="Course", resource_link_title="1"
+            ),
+            get_row("course-1", "video-2"),
+            get_row("course-2", "video-1"),
+        ]
+
+        # Lookup of the consumer site, lookup and insertion of the playlists then of the
+        # videos, in a transaction
+        with self.assertNumQueries(7):
+            report = provisioning_utils.provision_lti_resources(rows)
+
+        self.assertEqual(report.rows, 3)
+        self.assertEqual(report.playlists_created, 2)
+        self.assertEqual(report.videos_created, 3)
+        self.assertEqual(report.videos_existing, 0)
+        self.assertEqual(report.rows_skipped, 0)
+
+        playlist = Playlist.objects.get(lti_id="course-1")
+        self.assertEqual(playlist.consumer_site, self.consumer_site)
+        self.assertEqual(playlist.title, "Course")
+        self.assertEqual(
+            list(playlist.videos.order_by("lti_id").values_list("lti_id", "title")),
+            [("video-1", "1"), ("video-2", "video-2")],
+        )
+        self.assertEqual(Playlist.objects.get(lti_id="course-2").title, "course-2")
+        self.assertEqual(Video.objects.get(lti_id="video-2").state, Video.PENDING)
+
+    def test_utils_provisioning_utils_existing(self):
+        """Existing playlists and videos should be left untouched."""
+        video = VideoFactory(
+            lti_id="video-1",
+            title="my title",
+            playlist__lti_id="course-1",
+            playlist__consumer_site=self.consumer_site,
+        )
+        # Deleted objects are ignored
+        PlaylistFactory(lti_id="course-2", consumer_site=self.consumer_site).delete()
+        # Objects of other consumer sites are ignored
+        VideoFactory(lti_id="video-2", playlist__lti_id="course-1")
+
+        report = provisioning_utils.provision_lti_resources(
+            [
+                get_row("course-1", "video-1", resource_link_title="new title"),
+                get_row("course-1", "video-2"),
+                get_row("course-2", "video-1"),
+            ]
+        )
+
+        self.assertEqual(report.playlists_created, 1)
+        self.assertEqual(report.videos_created, 2)
+        self.assertEqual(report.videos_existing, 1)
+
+        video.refresh_from_db()
+        self.assertEqual(video.title, "my title")
+        self.assertEqual(
+            set(video.playlist.videos.values_list("lti_id", flat=True)),
+            {"video-1", "video-2"},
+        )
+        self.assertEqual(
+            Playlist.objects.filter(
+                consumer_site=self.consumer_site, lti_id="course-2"
+            ).count(),
+            1,
+        )
+
+    def test_utils_provisioning_utils_batches(self):
+        """Playlists should be created once across batches and duplicate rows ignored."""
+        rows = [get_row("course-1", "video-{:d}".format(i % 3)) for i in range(5)]
+
+        progress = []
+        report = provisioning_utils.provision_lti_resources(
+            rows,
+            batch_size=2,
+            on_batch=lambda report: progress.append(report.as_dict()),
+        )
+
+        # The report is passed after each batch committed
+        self.assertEqual([counts["rows"] for counts in progress], [2, 4, 5])
+        self.assertEqual(progress[-1], report.as_dict())
+        self.assertEqual(report.rows, 5)
+        self.assertEqual(report.playlists_created, 1)
+        self.assertEqual(report.videos_created, 3)
+        self.assertEqual(report.videos_existing, 2)
+        self.assertEqual(Video.objects.count(), 3)
+
+    def test_utils_provisioning_utils_skipped(self):
+        """Invalid rows and rows of unknown consumer sites should be skipped."""
+        report = provisioning_utils.provision_lti_resources(
+            [
+                get_row("course-1", "video-1", consumer_site="unknown.com"),
+                get_row("", "video-1"),
+                get_row("course-1", " "),
+                get_row("course-1", "v" * 256),
+                get_row("course-1", "video-1", context_title="t" * 300),
+            ]
+        )
+
+        self.assertEqual(report.rows, 5)
+        self.assertEqual(report.rows_skipped, 4)
+        self.assertEqual(report.videos_created, 1)
+        self.assertEqual(Playlist.objects.get().title, "t" * 255)
+
+    def test_utils_provisioning_utils_consumer_site_name(self):
+        """The consumer site passed in argument should replace the one of the rows."""
+        report = provisioning_utils.provision_lti_resources(
+            [get_row("course-1", "video-1", consumer_site="other.com")],
+            consumer_site_name="example.com",
+        )
+
+        self.assertEqual(report.videos_created, 1)
+        self.assertEqual(Playlist.objects.get().consumer_site, self.consumer_site)
+
+    def test_utils_provisioning_utils_concurrent_creation(self):
+        """A batch should be processed again if a concurrent launch created an object."""
+        provision_batch = provisioning_utils._provision_batch
+        calls = []
+
+        def conflicting_provision_batch(rows, consumer_sites, playlists, report):
+            """Provision the batch, then fail the first time as if a launch conflicted."""
+            calls.append(rows)
+            new_playlists = provision_batch(rows, consumer_sites, playlists, report)
+            if len(calls) == 1:
+                # The objects created are rolled back with the transaction
+                raise IntegrityError()
+            return new_playlists
+
+        with mock.patch.object(
+            provisioning_utils, "_provision_batch", conflicting_provision_batch
+        ):
+            report = provisioning_utils.provision_lti_resources(
+                [get_row("course-1", "video-1")]
+            )
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(report.playlists_created, 1)
+        self.assertEqual(report.videos_created, 1)
+        self.assertEqual(Video.objects.count(), 1)
+
+    def test_utils_provisioning_utils_read_manifest(self):
+        """Manifests can be read from CSV or JSONL lines."""
+        expected = [get_row("course-1", "video-1"), get_row("course-1", "video-2")]
+
+        csv_lines = io.StringIO(
+            "consumer_site,context_id,resource_link_id\n"
+            "example.com,course-1,video-1\n"
+            "example.com,course-1,video-2\n"
+        )
+        self.assertEqual(
+            list(provisioning_utils.read_manifest(csv_lines, "csv")), expected
+        )
+
+        jsonl_lines = io.StringIO(
+            '{"consumer_site": "example.com", "context_id": "course-1", '
+            '"resource_link_id": "video-1"}\n\n'
+            '{"consumer_site": "example.com", "context_id": "course-1", '
+            '"resource_link_id": "video-2"}\n'
+        )
+        self.assertEqual(
+            list(provisioning_utils.read_manifest(jsonl_lines, "jsonl")), expected
+        )
+
+        for line in ["{", '["example.com", "course-1", "video-1"]', "null"]:
+            with self.assertRaises(ValueError) as context:
+                list(
+                    provisioning_utils.read_manifest(
+                        io.StringIO("{}\n" + line), "jsonl"
+                    )
+                )
+            self.assertEqual(
+                str(context.exception), "Line 2 of the manifest is not a JSON object."
+            )
+
+        with self.assertRaises(ValueError):
+            list(provisioning_utils.read_manifest(csv_lines, "xml"))
@@ -0,0 +1,54 @@
+"""Test the S3 utils of the Marsha core app."""
+from datetime import datetime
+from unittest import mock
+
+from django.test import TestCase
+
+import pytz
+
+from ..factories import VideoFactory
+from ..utils import s3_utils
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+class S3UtilsTestCase(TestCase):
+    """Test the signature of S3 upload policies."""
+
+    def setUp(self):
+        """Start each test without signing keys cached."""
+        super().setUp()
+        s3_utils.get_signature_key.cache_clear()
+
+    def test_utils_s3_utils_signature_key(self):
+        """The signing key should match the example of the AWS documentation."""
+        self.assertEqual(
+            s3_utils.get_signature_key(
+                "wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY",
+                "20120215",
+                "us-east-1",
+                "iam",
+            ).hex(),
+            "f4780e2d9f65fa895f9c67b32ce1baf0b0d8a43505a000a1a9e090d414db404d",
+        )
+
+    def test_utils_s3_utils_signature_key_cached_for_the_day(self):
+        """The signing key should be derived again at UTC midnight only."""
+        video = VideoFactory()
+
+        with mock.patch.object(s3_utils, "sign", wraps=s3_utils.sign) as sign:
+            for now in [
+                datetime(2018, 8, 8, 0, 0, tzinfo=pytz.utc),
+                datetime(2018, 8, 8, 23, 59, tzinfo=pytz.utc),
+            ]:
+                s3_utils.get_s3_policy("test-marsha-source", video, now=now)
+            self.assertEqual(sign.call_count, 4)
+
+            s3_utils.get_s3_policy(
+                "test-marsha-source",
+                video,
+                now=datetime(2018, 8, 9, 0, 0, tzinfo=pytz.utc),
+            )
+            self.assertEqual(sign.call_count, 8)
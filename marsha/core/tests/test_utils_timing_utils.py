@@ -0,0 +1,88 @@
+"""Test the timing utils of the Marsha core app."""
+from django.test import TestCase
+
+from ..utils import timing_utils
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+class TimingUtilsTestCase(TestCase):
+    """Test our timing utils."""
+
+    def tearDown(self):
+        """Stop measuring the request started by a test, if any."""
+        super().tearDown()
+        timing_utils.stop_request()
+
+    def test_utils_timing_utils_timer_inactive(self):
+        """Timers should do nothing when no request is measured."""
+        with timing_utils.timer("phase"):
+            pass
+        self.assertIsNone(timing_utils.stop_request())
+
+    def test_utils_timing_utils_timer(self):
+        """Timers should sum the durations of each phase in the order they first run."""
+        timings = timing_utils.start_request()
+        for name in ["video", "sign", "video"]:
+            with timing_utils.timer(name):
+                pass
+
+        self.assertIs(timing_utils.stop_request(), timings)
+        self.assertEqual(list(timings.phases), ["video", "sign"])
+        self.assertIsNotNone(timings.duration)
+
+        # Timers don't add anything once the request is stopped
+        with timing_utils.timer("render"):
+            pass
+        self.assertEqual(list(timings.phases), ["video", "sign"])
+
+    def test_utils_timing_utils_timer_exception(self):
+        """Phases should be timed even if they raise an exception."""
+        timings = timing_utils.start_request()
+        with self.assertRaises(ValueError):
+            with timing_utils.timer("phase"):
+                raise ValueError()
+        self.assertIn("phase", timings.phases)
+
+    def test_utils_timing_utils_server_timing(self):
+        """Timings should be formatted as a Server-Timing header in milliseconds."""
+        timings = timing_utils.RequestTimings()
+        timings.queries = 3
+        timings.sql_duration = 0.0012
+        timings.add("passport", 0.0004)
+        timings.add("passport", 0.0001)
+        self.assertEqual(
+            timings.get_server_timing(),
+            'sql;dur=1.2;desc="3 queries", passport;dur=0.5',
+        )
+
+        timings.duration = 0.0081
+        self.assertEqual(
+            timings.get_server_timing(),
+            'sql;dur=1.2;desc="3 queries", passport;dur=0.5, total;dur=8.1',
+        )
+        self.assertEqual(
+            timings.as_dict(),
+            {
+                "queries": 3,
+                "sql_ms": 1.2,
+                "phases_ms": {"passport": 0.5},
+                "total_ms": 8.1,
+            },
+        )
+
+    def test_utils_timing_utils_execute_wrapper(self):
+        """Timings should count the queries they wrap, even failing ones."""
+        timings = timing_utils.RequestTimings()
+        self.assertEqual(
+            timings(lambda *args: "result", "SELECT 1", None, False, {}), "result"
+        )
+
+        def fail(*args):
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            timings(fail, "SELECT 1", None, False, {})
+        self.assertEqual(timings.queries, 2)
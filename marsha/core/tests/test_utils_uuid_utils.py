@@ -0,0 +1,58 @@
+"""Test the UUID utils of the Marsha core app."""
+from unittest import mock
+import uuid
+
+from django.test import TestCase
+
+from ..factories import VideoFactory
+from ..models import Video
+from ..utils import uuid_utils
+
+
+# We don't enforce arguments documentation in tests
+# pylint: disable=missing-param-doc,missing-type-doc,unused-argument
+
+
+class UUIDUtilsTestCase(TestCase):
+    """Test the generation of time-ordered UUIDs."""
+
+    def test_utils_uuid_utils_uuid7_layout(self):
+        """The UUID should start with the time in milliseconds then its version."""
+        with mock.patch.object(
+            uuid_utils.time, "time", return_value=1533686400.0005
+        ), mock.patch.object(uuid_utils.os, "urandom", return_value=b"\xff" * 8):
+            value = uuid_utils.uuid7()
+
+        self.assertEqual(value.version, 7)
+        self.assertEqual(value.variant, uuid.RFC_4122)
+        self.assertEqual(value.int >> 80, 1533686400000)
+        # Half of the millisecond elapsed
+        self.assertEqual(value.int >> 64 & 0xFFF, 2048)
+        self.assertEqual(str(value), "016516d5-4400-7800-bfff-ffffffffffff")
+
+    def test_utils_uuid_utils_uuid7_ordered(self):
+        """Successive UUIDs should be ordered, unlike random UUIDs."""
+        timestamps = [1533686400.0, 1533686400.0004, 1533686400.0009, 1533686400.002]
+        with mock.patch.object(uuid_utils.time, "time", side_effect=timestamps):
+            values = [uuid_utils.uuid7() for _ in timestamps]
+
+        self.assertEqual(sorted(values), values)
+        self.assertEqual(sorted(str(value) for value in values), list(map(str, values)))
+
+    def test_utils_uuid_utils_uuid7_unique(self):
+        """Simultaneous UUIDs should differ by their random bits."""
+        with mock.patch.object(uuid_utils.time, "time", return_value=1533686400.0):
+            values = {uuid_utils.uuid7() for _ in range(1000)}
+        self.assertEqual(len(values), 1000)
+
+    def test_utils_uuid_utils_model_default(self):
+        """New objects should get a time-ordered UUID next to existing random UUIDs."""
+        random_video = VideoFactory(id=uuid.uuid4())
+        videos = [VideoFactory() for _ in range(3)]
+
+        for video in videos:
+            self.assertEqual(video.id.version, 7)
+        self.assertEqual(
+            sorted(video.id for video in videos), [video.id for video in videos]
+        )
+        self.assertEqual(Video.objects.get(id=random_video.id).id.version, 4)
@@ -1,13 +1,14 @@
 """Test the LTI interconnection with Open edX."""
 from unittest import mock
 
-from django.test import RequestFactory, TestCase
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
 
 from rest_framework_simplejwt.state import token_backend
 
 from ..factories import VideoFactory
 from ..lti import LTI
-from ..views import VideoLTIView
+from ..views import VideoLTIView, _get_student_cache_timeout
 
 
 # We don't enforce arguments documentation in tests
@@ -79,3 +80,89 @@ class ViewsTestCase(TestCase):
         self.assertEqual(context["video"]["title"], str(video.title))
         self.assertEqual(context["video"]["description"], str(video.description))
         self.assertIsNone(context["video"]["urls"])
+
+    @override_settings(LTI_STUDENT_CACHE_ACTIVE=True)
+    @mock.patch.object(LTI, "verify", return_value=True)
+    def test_views_video_lti_student_cached(self, mock_initialize):
+        """The context of a student should be served from the cache until the video changes."""
+        cache.clear()
+        video = VideoFactory(
+            lti_id="123",
+            title="my title",
+            playlist__lti_id="abc",
+            playlist__consumer_site__name="example.com",
+        )
+        view = VideoLTIView()
+        view.request = self.factory.post(
+            "/",
+            {
+                "resource_link_id": "123",
+                "roles": "student",
+                "context_id": "abc",
+                "tool_consumer_instance_guid": "example.com",
+            },
+        )
+
+        context = view.get_context_data()
+        self.assertEqual(context["state"], "student")
+        self.assertEqual(context["video"]["id"], str(video.id))
+        self.assertEqual(context["video"]["title"], "my title")
+
+        # Only the date of the last update of the video is queried
+        with self.assertNumQueries(1):
+            self.assertEqual(view.get_context_data(), context)
+
+        video.title = "new title"
+        video.save()
+
+        context = view.get_context_data()
+        self.assertEqual(context["video"]["title"], "new title")
+
+    @override_settings(LTI_STUDENT_CACHE_ACTIVE=True)
+    @mock.patch.object(LTI, "verify", return_value=True)
+    def test_views_video_lti_student_cached_no_video(self, mock_initialize):
+        """No context should be cached for a student if the video does not exist."""
+        cache.clear()
+        view = VideoLTIView()
+        view.request = self.factory.post(
+            "/",
+            {
+                "resource_link_id": "123",
+                "roles": "student",
+                "context_id": "abc",
+                "tool_consumer_instance_guid": "example.com",
+            },
+        )
+
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                view.get_context_data(), {"state": "student", "video": None}
+            )
+
+        video = VideoFactory(
+            lti_id="123",
+            playlist__lti_id="abc",
+            playlist__consumer_site__name="example.com",
+        )
+        self.assertEqual(view.get_context_data()["video"]["id"], str(video.id))
+
+    @override_settings(
+        CLOUDFRONT_SIGNED_URLS_ACTIVE=True,
+        CLOUDFRONT_SIGNED_URLS_VALIDITY=1200,
+        CLOUDFRONT_SIGNED_URLS_BUCKET=0,
+    )
+    @mock.patch("marsha.core.views.LTI_STUDENT_CONTEXT_CACHE_STALE_TIMEOUT", 60)
+    @mock.patch("marsha.core.views.LTI_STUDENT_CONTEXT_CACHE_TIMEOUT", 900)
+    def test_views_video_lti_student_cache_timeout(self):
+        """Cached student contexts should expire before their signed urls."""
+        self.assertEqual(_get_student_cache_timeout(), 540)
+
+        with override_settings(CLOUDFRONT_SIGNED_URLS_ACTIVE=False):
+            self.assertEqual(_get_student_cache_timeout(), 900)
+
+        with override_settings(CLOUDFRONT_SIGNED_URLS_VALIDITY=60):
+            self.assertEqual(_get_student_cache_timeout(), 0)
+
+        # Urls signed at the end of a bucket are valid for one bucket less
+        with override_settings(CLOUDFRONT_SIGNED_URLS_BUCKET=600):
+            self.assertEqual(_get_student_cache_timeout(), 240)
@@ -0,0 +1,350 @@
+"""Utils to move the objects soft deleted long ago to archive tables, and back.
+
+Soft deleted objects stay in their table, where every query filters them out while they keep
+growing the table and its indexes. Once they are deleted for longer than a retention period,
+they are moved in batches to an archive table with the same columns, e.g. ``video_archive``
+for ``video``. Until then, they can still be listed with ``all_with_deleted`` and undeleted
+from the admin.
+
+An object referenced by an object still in a table is kept until the latter is archived, so
+that foreign keys never point to archived objects. Archived objects can be restored along
+with the archived objects they reference and those deleted in cascade with them.
+
+"""
+from functools import lru_cache
+
+from django.apps import apps
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Exists, OuterRef
+from django.db.models.deletion import get_candidate_relations_to_delete
+from django.utils import timezone
+
+from safedelete.models import is_safedelete_cls
+
+from .deletion_utils import get_cascade_relations
+
+
+ARCHIVE_TABLE_SUFFIX = "_archive"
+
+
+def get_archive_table(model):
+    """Return the name of the archive table of a model."""
+    return "{:s}{:s}".format(model._meta.db_table, ARCHIVE_TABLE_SUFFIX)
+
+
+@lru_cache(maxsize=None)
+def get_archived_models():
+    """List the models of the core app whose soft deleted objects are archived.
+
+    Returns
+    -------
+    Tuple[Type[models.Model]]
+        The safedelete models, each one listed after the models referencing it so that the
+        objects referencing an object are archived before it
+
+    """
+    archived_models = [
+        model
+        for model in apps.get_app_config("core").get_models()
+        if is_safedelete_cls(model)
+    ]
+    ordered_models = []
+
+    def visit(model, path):
+        if model in ordered_models or model in path:
+            return
+        for related in get_candidate_relations_to_delete(model._meta):
+            if related.related_model in archived_models:
+                visit(related.related_model, path + (model,))
+        ordered_models.append(model)
+
+    for model in archived_models:
+        visit(model, ())
+    return tuple(ordered_models)
+
+
+def _get_columns(cursor, table):
+    """Get the columns of a table with their type and whether they are required."""
+    cursor.execute(
+        "SELECT attname, format_type(atttypid, atttypmod), attnotnull "
+        "FROM pg_attribute "
+        "WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped",
+        [table],
+    )
+    return {name: (column_type, not_null) for name, column_type, not_null in cursor}
+
+
+def ensure_archive_table(model, using=DEFAULT_DB_ALIAS):
+    """Create the archive table of a model or add the columns it lacks.
+
+    The archive table has the columns of the table of the model, without its indexes and
+    constraints except its primary key. Columns added to the table after the archive table
+    was created are added to it, nullable, and columns removed from the table become
+    nullable in it, so that the columns of the model can always be moved between them.
+
+    Parameters
+    ----------
+    model : Type[models.Model]
+        The model whose objects are archived
+    using : string
+        The alias of the database
+
+    """
+    connection = connections[using]
+    quote_name = connection.ops.quote_name
+    table = model._meta.db_table
+    archive_table = get_archive_table(model)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS {:s} (LIKE {:s}, PRIMARY KEY ({:s}))".format(
+                quote_name(archive_table),
+                quote_name(table),
+                quote_name(model._meta.pk.column),
+            )
+        )
+        columns = _get_columns(cursor, quote_name(table))
+        archive_columns = _get_columns(cursor, quote_name(archive_table))
+
+        for name, (column_type, _not_null) in columns.items():
+            if name not in archive_columns:
+                cursor.execute(
+                    "ALTER TABLE {:s} ADD COLUMN {:s} {:s}".format(
+                        quote_name(archive_table), quote_name(name), column_type
+                    )
+                )
+        for name, (_column_type, not_null) in archive_columns.items():
+            if name not in columns and not_null:
+                cursor.execute(
+                    "ALTER TABLE {:s} ALTER COLUMN {:s} DROP NOT NULL".format(
+                        quote_name(archive_table), quote_name(name)
+                    )
+                )
+
+
+def _move_rows(model, source, destination, pk_sql, params, using):
+    """Move rows between the table of a model and its archive table with one statement.
+
+    Parameters
+    ----------
+    model : Type[models.Model]
+        The model of the rows
+    source : string
+        The table from which the rows are deleted
+    destination : string
+        The table in which the rows are inserted
+    pk_sql : string
+        The SQL query selecting the primary keys of the rows to move
+    params : List[any]
+        The parameters of the query
+    using : string
+        The alias of the database
+
+    Returns
+    -------
+    List[Tuple[any]]
+        The primary key and the values of the concrete fields of each row moved
+
+    """
+    connection = connections[using]
+    quote_name = connection.ops.quote_name
+    columns = ", ".join(
+        quote_name(field.column) for field in model._meta.concrete_fields
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "WITH moved AS ("
+            "DELETE FROM {source} WHERE {pk} IN ({pk_sql}) RETURNING {columns}"
+            "), inserted AS ("
+            "INSERT INTO {destination} ({columns}) SELECT {columns} FROM moved"
+            ") SELECT {columns} FROM moved".format(
+                source=quote_name(source),
+                destination=quote_name(destination),
+                pk=quote_name(model._meta.pk.column),
+                pk_sql=pk_sql,
+                columns=columns,
+            ),
+            params,
+        )
+        return cursor.fetchall()
+
+
+def get_archivable_queryset(model, cutoff):
+    """Select the objects of a model deleted before a date and referenced by no object.
+
+    Parameters
+    ----------
+    model : Type[models.Model]
+        The model whose objects are archived
+    cutoff : datetime.datetime
+        The date before which objects were deleted to be archived
+
+    Returns
+    -------
+    Type[models.QuerySet]
+        The objects to archive, ordered by primary key
+
+    """
+    queryset = model._base_manager.filter(deleted__lt=cutoff)
+    for index, related in enumerate(get_candidate_relations_to_delete(model._meta)):
+        field = related.field
+        name = "_referenced_{:d}".format(index)
+        queryset = queryset.annotate(
+            **{
+                name: Exists(
+                    related.related_model._base_manager.filter(
+                        **{field.attname: OuterRef(field.target_field.attname)}
+                    )
+                )
+            }
+        ).filter(**{name: False})
+    return queryset.order_by("pk")
+
+
+def archive_deleted_objects(retention, batch_size, using=DEFAULT_DB_ALIAS):
+    """Move the objects deleted for longer than a retention period to archive tables.
+
+    Each model is processed in the order of `get_archived_models`, by batches of objects in
+    the order of their primary key, each batch being moved with one statement in its own
+    transaction.
+
+    Parameters
+    ----------
+    retention : datetime.timedelta
+        The time during which deleted objects are kept in their table
+    batch_size : integer
+        The maximum number of objects moved in each transaction
+    using : string
+        The alias of the database
+
+    Returns
+    -------
+    Dict[string, integer]
+        The number of objects archived by model label
+
+    """
+    cutoff = timezone.now() - retention
+    compiler_connection = connections[using]
+    counts = {}
+
+    for model in get_archived_models():
+        ensure_archive_table(model, using)
+        pk_name = model._meta.pk.attname
+        last_pk = None
+        while True:
+            queryset = get_archivable_queryset(model, cutoff).using(using)
+            if last_pk is not None:
+                queryset = queryset.filter(pk__gt=last_pk)
+            pk_sql, params = (
+                queryset.values("pk")[:batch_size]
+                .query.get_compiler(connection=compiler_connection)
+                .as_sql()
+            )
+            with transaction.atomic(using=using):
+                rows = _move_rows(
+                    model,
+                    model._meta.db_table,
+                    get_archive_table(model),
+                    pk_sql,
+                    params,
+                    using,
+                )
+            if rows:
+                label = model._meta.label
+                counts[label] = counts.get(label, 0) + len(rows)
+                pk_index = [
+                    field.attname for field in model._meta.concrete_fields
+                ].index(pk_name)
+                last_pk = max(row[pk_index] for row in rows)
+            if len(rows) < batch_size:
+                break
+
+    return counts
+
+
+def _restore(model, pks, counts, using):
+    """Restore archived objects, those they reference and those deleted in cascade."""
+    if not pks:
+        return
+
+    connection = connections[using]
+    quote_name = connection.ops.quote_name
+    archive_table = get_archive_table(model)
+    rows = _move_rows(
+        model,
+        archive_table,
+        model._meta.db_table,
+        "SELECT {pk} FROM {table} WHERE {pk} = ANY(%s)".format(
+            pk=quote_name(model._meta.pk.column), table=quote_name(archive_table)
+        ),
+        [list(pks)],
+        using,
+    )
+    if not rows:
+        return
+    counts[model._meta.label] = counts.get(model._meta.label, 0) + len(rows)
+
+    archived_models = get_archived_models()
+    attnames = [field.attname for field in model._meta.concrete_fields]
+    values = [dict(zip(attnames, row)) for row in rows]
+
+    # The objects referenced by the objects restored, if they were archived
+    for field in model._meta.concrete_fields:
+        if field.is_relation and field.related_model in archived_models:
+            _restore(
+                field.related_model,
+                {value[field.attname] for value in values} - {None},
+                counts,
+                using,
+            )
+
+    # The objects deleted in cascade with the objects restored, i.e. at the same date
+    deletions = {(value[model._meta.pk.attname], value["deleted"]) for value in values}
+    for related in get_cascade_relations(model):
+        related_model = related.related_model
+        if related_model not in archived_models:
+            continue
+        field = related.field
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT {pk}, {fk}, deleted FROM {table} WHERE {fk} = ANY(%s)".format(
+                    pk=quote_name(related_model._meta.pk.column),
+                    fk=quote_name(field.column),
+                    table=quote_name(get_archive_table(related_model)),
+                ),
+                [[pk for pk, _deleted in deletions]],
+            )
+            related_pks = {
+                pk for pk, fk, deleted in cursor if (fk, deleted) in deletions
+            }
+        _restore(related_model, related_pks, counts, using)
+
+
+def restore_archived_objects(model, pks, using=DEFAULT_DB_ALIAS):
+    """Move archived objects back to the table of their model, still soft deleted.
+
+    The archived objects they reference are restored too, as well as the archived objects
+    deleted in cascade with them, all in one transaction. Restored objects can then be
+    undeleted from the admin.
+
+    Parameters
+    ----------
+    model : Type[models.Model]
+        The model of the objects to restore
+    pks : Iterable[any]
+        The primary keys of the objects to restore
+    using : string
+        The alias of the database
+
+    Returns
+    -------
+    Dict[string, integer]
+        The number of objects restored by model label
+
+    """
+    counts = {}
+    with transaction.atomic(using=using):
+        for archived_model in get_archived_models():
+            ensure_archive_table(archived_model, using)
+        _restore(model, set(pks), counts, using)
+    return counts
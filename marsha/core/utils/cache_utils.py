@@ -0,0 +1,157 @@
+"""Utils to cache values in the memory of the current process or in the default cache."""
+from collections import OrderedDict
+import threading
+import time
+
+from django.core.cache import cache
+
+
+class LRUCache:
+    """A thread-safe mapping bounded in size that evicts its least recently used entries.
+
+    Each entry can be given a timeout after which it is considered as missing.
+
+    """
+
+    def __init__(self, maxsize):
+        """Initialize an empty cache.
+
+        Parameters
+        ----------
+        maxsize : integer
+            The maximum number of entries kept in the cache
+
+        """
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Return the number of entries currently held by the cache."""
+        return len(self._data)
+
+    def get(self, key, default=None):
+        """Get the value cached for a key and mark it as recently used.
+
+        Parameters
+        ----------
+        key : any hashable
+            The key for which we want to retrieve the cached value
+        default : any
+            The value to return if the key is missing or expired
+
+        Returns
+        -------
+        any
+            The cached value or the default value passed in argument
+
+        """
+        with self._lock:
+            try:
+                value, expires_at = self._data[key]
+            except KeyError:
+                return default
+
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        """Cache a value for a key, evicting the least recently used entries if needed.
+
+        Parameters
+        ----------
+        key : any hashable
+            The key under which the value should be cached
+        value : any
+            The value to cache
+        timeout : integer or `None`
+            Number of seconds after which the entry expires or `None` to keep it until
+            it is evicted
+
+        """
+        expires_at = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Remove the entry cached for a key if any."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove all the entries from the cache."""
+        with self._lock:
+            self._data.clear()
+
+
+def get_or_set_single_flight(
+    key, build, timeout, stale_timeout=0, lock_timeout=10, wait_interval=0.05
+):
+    """Get a value from the default cache and make sure only one caller rebuilds it at a time.
+
+    When the value is missing or expired, the first caller acquires a lock in the cache and
+    rebuilds the value. Meanwhile, the other callers serve the expired value if it is not older
+    than `stale_timeout`, or wait for the value to be rebuilt. If the value is still missing
+    after `lock_timeout`, they end up building it on their own.
+
+    The value and the lock are shared by the callers sharing the cache backend: the threads of
+    a process with the default cache, local to each process, or all the processes with a shared
+    backend (see the `CACHE_BACKEND` setting).
+
+    Parameters
+    ----------
+    key : string
+        The key under which the value is cached
+    build : callable
+        A function taking no argument and returning the value to cache
+    timeout : integer
+        Number of seconds during which the cached value is fresh
+    stale_timeout : integer
+        Number of seconds during which the value can still be served once expired, while
+        another caller rebuilds it
+    lock_timeout : integer
+        Number of seconds after which the lock is released, if the caller holding it did not
+        release it, and for which the other callers wait for the value
+    wait_interval : float
+        Number of seconds to wait between two lookups while the value is rebuilt
+
+    Returns
+    -------
+    any
+        The value found in the cache or built
+
+    """
+    # Entries are stored with the time until which they are fresh, the cache keeps them
+    # longer so they can be served while they are rebuilt
+    entry = cache.get(key)
+    if entry is not None and entry[0] > time.time():
+        return entry[1]
+
+    lock_key = "{:s}:lock".format(key)
+    deadline = time.monotonic() + lock_timeout
+    while not cache.add(lock_key, True, timeout=lock_timeout):
+        # Another caller is rebuilding the value
+        if entry is not None:
+            return entry[1]
+        if time.monotonic() >= deadline:
+            return build()
+        time.sleep(wait_interval)
+        entry = cache.get(key)
+        # The value may have been rebuilt and the lock released in the meantime
+        if entry is not None and entry[0] > time.time():
+            return entry[1]
+
+    try:
+        value = build()
+        cache.set(key, (time.time() + timeout, value), timeout=timeout + stale_timeout)
+    finally:
+        cache.delete(lock_key)
+
+    return value
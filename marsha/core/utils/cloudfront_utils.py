@@ -4,12 +4,37 @@ Utils to sign CloudFront urls and cookies.
 Following boto3's documentation to sign CloudFront urls
 https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/cloudfront.html
 """
+import base64
+import functools
+import os
+import threading
+import time
+from urllib.parse import urlencode
+
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
 
+from botocore.signers import CloudFrontSigner
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import padding
 
+from . import time_utils
+from ..defaults import CLOUDFRONT_SIGNED_URLS_CACHE_SIZE
+from .cache_utils import LRUCache
+
+
+# Policies with which CloudFront urls can be signed
+CANNED_POLICY = "canned"
+CUSTOM_POLICY = "custom"
+
+# Suffix of the file, next to the private key of a key pair, holding the id of the key pair
+KEY_PAIR_ID_SUFFIX = ".id"
+
+# Signed urls and query strings, by policy, key pair id, url or resource and expiration
+_signatures = LRUCache(CLOUDFRONT_SIGNED_URLS_CACHE_SIZE)
+
 
 class MissingRSAKey(Exception):
     """Exception raised when an RSA key is missing."""
@@ -17,13 +42,251 @@ class MissingRSAKey(Exception):
     pass
 
 
-def rsa_signer(message):
+class KeyManager:
+    """Load the key pairs of CloudFront once per process.
+
+    A key pair is made of the private key of a PEM file and of its id, read from the file
+    next to it suffixed with `KEY_PAIR_ID_SUFFIX` or, without such a file, taken from the
+    settings. Both are loaded the first time they are used and loaded again together when one
+    of the files is replaced or modified, so that a rotation, which always comes with a new
+    key pair id, needs no restart. Private keys are kept by key pair id: a message signed for
+    a key pair always gets the signature of its key, even if a rotation occurred meanwhile.
+    The manager counts the keys loaded and the signatures computed along with their duration.
+
+    """
+
+    def __init__(self):
+        """Start with no key loaded and all counters to zero."""
+        # The stats of the files of each key pair along with its id, by path of its key
+        self._files = {}
+        # The private key of each key pair loaded, by key pair id
+        self._keys = {}
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset the counters and timings of the manager to zero."""
+        with self._lock:
+            self._stats = {
+                "loads": 0,
+                "load_time": 0.0,
+                "signatures": 0,
+                "signing_time": 0.0,
+            }
+
+    def get_stats(self):
+        """Return a copy of the counters and of the timings, in seconds, of the manager."""
+        with self._lock:
+            return dict(self._stats)
+
+    @staticmethod
+    def _get_version(path):
+        """Get the version of the files of a key pair from their inode, mtime and size.
+
+        Parameters
+        ----------
+        path : string
+            The path of the PEM file of the private key
+
+        Returns
+        -------
+        Tuple
+            The version of the key file and the one of the id file, `None` if there is none
+
+        Raises
+        ------
+        MissingRSAKey
+            If the key file does not exist
+
+        """
+        versions = []
+        for file_path in (path, path + KEY_PAIR_ID_SUFFIX):
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
+                if file_path == path:
+                    raise MissingRSAKey()
+                stat = None
+            versions.append(stat and (stat.st_ino, stat.st_mtime_ns, stat.st_size))
+        return tuple(versions)
+
+    def get_key_pair(self, path, key_pair_id=None):
+        """Get the id and the private key of a key pair, loading them again if a file changed.
+
+        Parameters
+        ----------
+        path : string
+            The path of the PEM file of the private key
+        key_pair_id : string
+            The id of the key pair if there is no id file next to its key
+
+        Returns
+        -------
+        Tuple[string, cryptography.hazmat.primitives.asymmetric.rsa.RSAPrivateKey]
+            The id of the key pair and its private key
+
+        Raises
+        ------
+        MissingRSAKey
+            If the key file does not exist
+        ValueError
+            If the key file is not a valid unencrypted PEM private key
+
+        """
+        version = self._get_version(path)
+        loaded = self._files.get(path)
+        if loaded is not None and loaded[0] == version:
+            return loaded[1], self._keys[loaded[1]]
+
+        start = time.perf_counter()
+        loaded_id = key_pair_id
+        try:
+            if version[1] is not None:
+                with open(path + KEY_PAIR_ID_SUFFIX) as id_file:
+                    loaded_id = id_file.read().strip()
+            with open(path, "rb") as key_file:
+                private_key = serialization.load_pem_private_key(
+                    key_file.read(), password=None, backend=default_backend()
+                )
+        except FileNotFoundError:
+            raise MissingRSAKey()
+        duration = time.perf_counter() - start
+
+        # Files replaced while they were read may not belong to the same key pair
+        if self._get_version(path) != version:
+            return self.get_key_pair(path, key_pair_id)
+
+        with self._lock:
+            self._files[path] = (version, loaded_id)
+            self._keys[loaded_id] = private_key
+            self._stats["loads"] += 1
+            self._stats["load_time"] += duration
+        return loaded_id, private_key
+
+    def sign(self, message, key_pair_id):
+        """Sign a message with the private key of a key pair.
+
+        Parameters
+        ----------
+        message : bytes
+            The message for which we want to compute a signature
+        key_pair_id : string
+            The id of the key pair
+
+        Returns
+        -------
+        bytes
+            The rsa signature
+
+        Raises
+        ------
+        MissingRSAKey
+            If the key pair is not active or its private key file does not exist
+
+        """
+        if key_pair_id not in self._keys:
+            for path, default_id in get_key_pairs():
+                self.get_key_pair(path, default_id)
+        try:
+            private_key = self._keys[key_pair_id]
+        except KeyError:
+            raise MissingRSAKey()
+
+        start = time.perf_counter()
+        signature = private_key.sign(message, padding.PKCS1v15(), hashes.SHA1())
+        duration = time.perf_counter() - start
+
+        with self._lock:
+            self._stats["signatures"] += 1
+            self._stats["signing_time"] += duration
+        return signature
+
+
+key_manager = KeyManager()
+
+
+def get_key_pairs():
+    """Get the paths of the private keys of all the active CloudFront key pairs.
+
+    Returns
+    -------
+    List[Tuple[string, string]]
+        The path of the private key file of each key pair with the id of the key pair if
+        there is no id file next to it. The key pair of `CLOUDFRONT_PRIVATE_KEY_PATH`, that
+        signs urls, comes first, followed by the key pairs of `CLOUDFRONT_PRIVATE_KEY_PATHS`
+        that stay active during a rotation.
+
+    """
+    return [
+        (settings.CLOUDFRONT_PRIVATE_KEY_PATH, settings.CLOUDFRONT_ACCESS_KEY_ID)
+    ] + [
+        (path, key_pair_id)
+        for key_pair_id, path in settings.CLOUDFRONT_PRIVATE_KEY_PATHS.items()
+    ]
+
+
+def get_signing_key_pair_id():
+    """Get the id of the key pair signing urls, loading the key pair again if it changed.
+
+    Returns
+    -------
+    string
+        The id of the key pair of `CLOUDFRONT_PRIVATE_KEY_PATH`
+
+    Raises
+    ------
+    MissingRSAKey
+        If the private key file does not exist
+
+    """
+    return key_manager.get_key_pair(*get_key_pairs()[0])[0]
+
+
+def check_private_keys():
+    """Load the active key pairs, failing if one of them can't be when signing is active.
+
+    It is called when gunicorn workers boot so that a server missing a key fails to start
+    instead of failing each request serving a video. Management commands and the development
+    server don't need the keys until they sign a url. Loading the keys beforehand also
+    spares the first signature of each process from it.
+
+    Raises
+    ------
+    django.core.exceptions.ImproperlyConfigured
+        If signed urls are active and a private key is missing or invalid
+
+    """
+    if not settings.CLOUDFRONT_SIGNED_URLS_ACTIVE:
+        return
+
+    for path, key_pair_id in get_key_pairs():
+        try:
+            key_manager.get_key_pair(path, key_pair_id)
+        except MissingRSAKey:
+            raise ImproperlyConfigured(
+                "The private key of a CloudFront key pair is missing: {!s}. Install it or "
+                "deactivate signed urls with CLOUDFRONT_SIGNED_URLS_ACTIVE=False.".format(
+                    path
+                )
+            )
+        except (TypeError, ValueError):
+            raise ImproperlyConfigured(
+                "The private key of a CloudFront key pair is not a valid unencrypted PEM "
+                "file: {!s}".format(path)
+            )
+
+
+def rsa_signer(message, key_pair_id=None):
     """Sign a message with an rsa key pair found on the file system for CloudFront signed urls.
 
+    The key is loaded once by the key manager and reloaded when its file changes.
+
     Parameters
     ----------
     message : Type[string]
         the message for which we want to compute a signature
+    key_pair_id : string
+        The id of the key pair, the one signing urls by default
 
     Returns
     -------
@@ -31,12 +294,128 @@ def rsa_signer(message):
         The rsa signature
 
     """
-    try:
-        with open(settings.CLOUDFRONT_PRIVATE_KEY_PATH, "rb") as key_file:
-            private_key = serialization.load_pem_private_key(
-                key_file.read(), password=None, backend=default_backend()
-            )
-    except FileNotFoundError:
-        raise MissingRSAKey()
+    return key_manager.sign(message, key_pair_id or get_signing_key_pair_id())
+
+
+def _url_b64encode(data):
+    """Encode data in base64 with the characters CloudFront expects in a query string."""
+    return (
+        base64.b64encode(data)
+        .replace(b"+", b"-")
+        .replace(b"=", b"_")
+        .replace(b"/", b"~")
+        .decode("ascii")
+    )
+
+
+def get_expiration(now=None):
+    """Compute the expiration of urls signed at a given time.
+
+    The expiration is rounded down to a multiple of `CLOUDFRONT_SIGNED_URLS_BUCKET` so that
+    all the urls signed during the same time bucket expire at the same time and get the same
+    signature. Urls are thus valid for at least `CLOUDFRONT_SIGNED_URLS_VALIDITY` minus one
+    bucket and never for more than `CLOUDFRONT_SIGNED_URLS_VALIDITY`.
+
+    Parameters
+    ----------
+    now : datetime.datetime
+        The time at which urls are signed, the current time by default
+
+    Returns
+    -------
+    datetime.datetime
+        The date after which the signed urls expire
+
+    """
+    expires_at = (
+        time_utils.to_timestamp(now or timezone.now())
+        + settings.CLOUDFRONT_SIGNED_URLS_VALIDITY
+    )
+    bucket = settings.CLOUDFRONT_SIGNED_URLS_BUCKET
+    if bucket > 1:
+        expires_at = expires_at // bucket * bucket
+    return time_utils.to_datetime(expires_at)
+
+
+def _get_or_sign(key, date_less_than, sign):
+    """Get a signature from the cache or compute it and cache it until it expires."""
+    value = _signatures.get(key)
+    if value is None:
+        value = sign()
+        timeout = time_utils.to_timestamp(date_less_than) - time.time()
+        if timeout > 0:
+            _signatures.set(key, value, timeout=timeout)
+    return value
+
+
+def get_signed_url(url, date_less_than):
+    """Sign a url with a canned policy granting access to it until a date.
+
+    Signed urls are cached by url and expiration so, with an expiration aligned on a time
+    bucket by `get_expiration`, each url is only signed once per bucket.
+
+    Parameters
+    ----------
+    url : string
+        The url to sign
+    date_less_than : datetime.datetime
+        The date after which the signed url expires
+
+    Returns
+    -------
+    string
+        The url with the expiration, its signature and the id of the key pair in the query
+        string
+
+    """
+    key_pair_id = get_signing_key_pair_id()
+    signer = functools.partial(rsa_signer, key_pair_id=key_pair_id)
+    return _get_or_sign(
+        (CANNED_POLICY, key_pair_id, url, date_less_than),
+        date_less_than,
+        lambda: CloudFrontSigner(key_pair_id, signer).generate_presigned_url(
+            url, date_less_than=date_less_than
+        ),
+    )
+
+
+def get_signed_query_string(resource, date_less_than):
+    """Sign a custom policy granting access to a resource until a date.
+
+    The resource may end with a "*" wildcard so that the same query string can be appended to
+    all the urls it matches, with only one RSA signature. Query strings are cached like the
+    urls signed by `get_signed_url`.
+
+    Parameters
+    ----------
+    resource : string
+        The url, possibly with wildcards, to which the policy grants access
+    date_less_than : datetime.datetime
+        The date after which the policy expires
+
+    Returns
+    -------
+    string
+        The query string with the policy, its signature and the id of the key pair
+
+    """
+    key_pair_id = get_signing_key_pair_id()
+
+    def sign():
+        policy = (
+            CloudFrontSigner(key_pair_id, rsa_signer)
+            .build_policy(resource, date_less_than)
+            .encode("utf8")
+        )
+        return urlencode(
+            [
+                ("Policy", _url_b64encode(policy)),
+                ("Signature", _url_b64encode(rsa_signer(policy, key_pair_id))),
+                ("Key-Pair-Id", key_pair_id),
+            ],
+            safe="~",
+        )
 
-    return private_key.sign(message, padding.PKCS1v15(), hashes.SHA1())
+    return _get_or_sign(
+        (CUSTOM_POLICY, key_pair_id, resource, date_less_than), date_less_than, sign
+    )
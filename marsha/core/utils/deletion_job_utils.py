@@ -0,0 +1,102 @@
+"""Utils to soft delete large objects in the background with deletion jobs.
+
+Deleting a consumer site or an organization with its whole cascade can take longer than a
+request is allowed to. A deletion job records the object to delete, then a worker marks the
+objects of each relation of its cascade as deleted in batches of bounded size, each one in a
+short transaction that also records the progress of the job.
+
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils import timezone
+
+from ..defaults import DELETION_JOB_BATCH_SIZE
+from ..models import DeletionJob
+from .deletion_utils import get_cascade, mark_deleted
+
+
+def schedule_deletion(obj):
+    """Create a job deleting an object, unless a job deleting it is already scheduled.
+
+    Parameters
+    ----------
+    obj : Type[models.BaseModel]
+        The object to delete with its relations
+
+    Returns
+    -------
+    Tuple[DeletionJob, boolean]
+        The job deleting the object and a boolean set to True if it was created
+
+    """
+    content_type = ContentType.objects.get_for_model(obj)
+    job = DeletionJob.objects.filter(
+        content_type=content_type,
+        object_id=obj.pk,
+        state__in=[DeletionJob.PENDING, DeletionJob.RUNNING],
+    ).first()
+    if job is not None:
+        return job, False
+
+    job = DeletionJob.objects.create(
+        content_type=content_type, object_id=obj.pk, object_repr=str(obj)[:255]
+    )
+    return job, True
+
+
+def run_deletion_job(job, batch_size=DELETION_JOB_BATCH_SIZE, max_batches=None):
+    """Mark the objects of the cascade of a job as deleted, batch by batch.
+
+    The relations of the cascade are processed in the order of `get_cascade`, the index of
+    the current one being recorded as the step of the job. Each batch selects up to
+    `batch_size` objects of this relation not marked as deleted yet, marks them with the
+    deletion date of the job and records the progress in the same transaction. A job can thus
+    be resumed from its last batch committed.
+
+    Parameters
+    ----------
+    job : DeletionJob
+        The job to run, claimed by the caller (see `claim_job`)
+    batch_size : integer
+        The maximum number of objects marked as deleted in each transaction
+    max_batches : integer
+        If set, the number of batches after which the job is paused
+
+    Returns
+    -------
+    boolean
+        True if the job is done, False if it was paused before the end
+
+    """
+    model = job.content_type.model_class()
+    cascade = get_cascade(model._base_manager.filter(pk=job.object_id))
+
+    if job.deleted_on is None:
+        job.deleted_on = timezone.now()
+        job.steps = len(cascade)
+        job.save()
+
+    batches = 0
+    while job.step < len(cascade):
+        if max_batches is not None and batches >= max_batches:
+            return False
+
+        model, queryset = cascade[job.step]
+        remaining = queryset.filter(deleted__isnull=True).values_list("pk", flat=True)
+        with transaction.atomic():
+            ids = list(remaining[:batch_size])
+            if ids:
+                label = model._meta.label
+                job.counts[label] = job.counts.get(label, 0) + mark_deleted(
+                    model._base_manager.filter(pk__in=ids, deleted__isnull=True),
+                    job.deleted_on,
+                )
+            if len(ids) < batch_size:
+                job.step += 1
+            job.save()
+        batches += 1
+
+    job.state = DeletionJob.DONE
+    job.finished_on = timezone.now()
+    job.save()
+    return True
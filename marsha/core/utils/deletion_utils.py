@@ -0,0 +1,185 @@
+"""Utils to soft delete objects along with their relations in a few SQL statements.
+
+The `SOFT_DELETE_CASCADE` policy of safedelete collects the related objects with the deletion
+collector of Django, then saves them one at a time. For a consumer site or an organization
+with thousands of playlists, videos and tracks, this takes minutes while holding locks.
+
+The cascade implemented here follows the same relation graph, the relations deleting their
+objects in cascade, but marks the objects of each relation as deleted with one statement:
+`UPDATE ... SET deleted = now() WHERE fk IN (subquery)`.
+
+"""
+from functools import lru_cache
+
+from django.db import models, transaction
+from django.db.models.deletion import get_candidate_relations_to_delete
+from django.utils import timezone
+
+from safedelete.models import is_safedelete_cls
+from safedelete.signals import post_softdelete, pre_softdelete
+
+
+@lru_cache(maxsize=None)
+def get_cascade_relations(model):
+    """Get the relations whose objects are deleted in cascade with the objects of a model.
+
+    Parameters
+    ----------
+    model : Type[models.Model]
+        The model of the objects being deleted
+
+    Returns
+    -------
+    Tuple[django.db.models.fields.reverse_related.ForeignObjectRel]
+        The reverse relations of the model with an `on_delete` set to `CASCADE`, in the
+        order the deletion collector follows them. Relations with `PROTECT`, `SET_NULL` or
+        any other behavior leave their objects untouched by a soft deletion.
+
+    """
+    return tuple(
+        related
+        for related in get_candidate_relations_to_delete(model._meta)
+        if related.on_delete is models.CASCADE
+    )
+
+
+def walk_cascade(queryset, path=None):
+    """Walk the relation graph from a queryset, yielding the objects deleted in cascade.
+
+    Parameters
+    ----------
+    queryset : Type[models.QuerySet]
+        The objects from which the cascade starts
+    path : Tuple[Type[models.Model]]
+        The models already walked to reach the queryset
+
+    Yields
+    ------
+    Tuple[Type[models.Model], Type[models.QuerySet]]
+        Each model reached by the cascade with a queryset selecting its objects through
+        subqueries on the primary keys of their parents, deleted or not. A model already on
+        the path is not walked again so that cycles of relations end.
+
+    """
+    model = queryset.model
+    path = (path or ()) + (model,)
+    yield model, queryset
+
+    for related in get_cascade_relations(model):
+        related_model = related.related_model
+        if related_model in path:
+            continue
+
+        field = related.field
+        # The base manager includes deleted objects, as the deletion collector does
+        related_queryset = related_model._base_manager.using(queryset.db).filter(
+            **{
+                "{:s}__in".format(field.name): queryset.values(
+                    field.target_field.attname
+                )
+            }
+        )
+        yield from walk_cascade(related_queryset, path)
+
+
+def get_cascade(queryset):
+    """List the objects to mark as deleted along with a queryset, related objects first.
+
+    Related objects are listed before the objects they are related to so that marking them
+    in this order does not affect the subqueries selecting the objects not marked yet.
+
+    Parameters
+    ----------
+    queryset : Type[models.QuerySet]
+        The objects from which the cascade starts
+
+    Returns
+    -------
+    List[Tuple[Type[models.Model], Type[models.QuerySet]]]
+        Each safedelete model reached by the cascade with a queryset selecting its objects,
+        see `walk_cascade`, the queryset passed in argument being the last one
+
+    """
+    return [
+        (model, model_queryset)
+        for model, model_queryset in reversed(list(walk_cascade(queryset)))
+        if is_safedelete_cls(model)
+    ]
+
+
+def mark_deleted(queryset, now):
+    """Mark the objects of a queryset as deleted, sending the signals of safedelete.
+
+    Instances are only built for models with receivers of the soft deletion signals.
+
+    Parameters
+    ----------
+    queryset : Type[models.QuerySet]
+        The objects to mark as deleted
+    now : datetime.datetime
+        The date at which the objects are deleted
+
+    Returns
+    -------
+    integer
+        The number of objects marked as deleted
+
+    """
+    model = queryset.model
+    values = {"deleted": now}
+    values.update(
+        {
+            field.attname: now
+            for field in model._meta.concrete_fields
+            if getattr(field, "auto_now", False)
+        }
+    )
+
+    if not (
+        pre_softdelete.has_listeners(model) or post_softdelete.has_listeners(model)
+    ):
+        return queryset.update(**values)
+
+    instances = list(queryset)
+    for instance in instances:
+        pre_softdelete.send(sender=model, instance=instance, using=queryset.db)
+    count = queryset.update(**values)
+    for instance in instances:
+        for attname, value in values.items():
+            setattr(instance, attname, value)
+        post_softdelete.send(sender=model, instance=instance, using=queryset.db)
+    return count
+
+
+def soft_delete_cascade(queryset):
+    """Soft delete the objects of a queryset and the objects related to them in cascade.
+
+    All the statements are run in one transaction, see `get_cascade` for their order. The
+    objects of the queryset are marked as deleted even if they already were, as safedelete
+    does, but related objects already deleted keep the date at which they were deleted.
+
+    Parameters
+    ----------
+    queryset : Type[models.QuerySet]
+        The objects to delete, of a safedelete model
+
+    Returns
+    -------
+    Tuple[datetime.datetime, Dict[string, integer]]
+        The date at which the objects were deleted and the number of objects marked as
+        deleted by model label
+
+    """
+    now = timezone.now()
+    counts = {}
+
+    with transaction.atomic(using=queryset.db):
+        for model, model_queryset in get_cascade(queryset):
+            if model_queryset is not queryset:
+                model_queryset = model_queryset.filter(deleted__isnull=True)
+            count = mark_deleted(model_queryset, now)
+            if count:
+                label = model._meta.label
+                counts[label] = counts.get(label, 0) + count
+
+    return now, counts
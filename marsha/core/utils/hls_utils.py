@@ -0,0 +1,127 @@
+"""Utils to read the HLS playlists produced by the transcoding pipeline.
+
+A master playlist lists the variant streams of a video, one per resolution, each one pointing
+to a media playlist that lists the segments of the stream (RFC 8216).
+
+"""
+from collections import OrderedDict, namedtuple
+import re
+
+
+# Tags, with their separator, only found in master playlists
+MASTER_PLAYLIST_TAGS = (
+    "#EXT-X-STREAM-INF:",
+    "#EXT-X-I-FRAME-STREAM-INF:",
+    "#EXT-X-MEDIA:",
+)
+
+# An attribute is a name followed by a quoted string or by a value without comma
+ATTRIBUTE_PATTERN = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+
+
+class Variant(namedtuple("Variant", ["uri", "bandwidth", "width", "height", "codecs"])):
+    """A variant stream of a master playlist."""
+
+    __slots__ = ()
+
+
+def parse_attributes(value):
+    """Parse the attribute list of a tag (RFC 8216 4.2).
+
+    Parameters
+    ----------
+    value : string
+        The attribute list e.g. 'BANDWIDTH=556000,CODECS="avc1.4d401e,mp4a.40.2"'
+
+    Returns
+    -------
+    OrderedDict
+        The value of each attribute, without quotes, by name
+
+    """
+    return OrderedDict(
+        (name, attribute.strip('"'))
+        for name, attribute in ATTRIBUTE_PATTERN.findall(value)
+    )
+
+
+def _get_lines(text):
+    """Split a playlist in lines without blanks and check that it starts with its header.
+
+    Raises
+    ------
+    ValueError
+        If the text is not an HLS playlist
+
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines or lines[0] != "#EXTM3U":
+        raise ValueError("The text is not an HLS playlist.")
+    return lines
+
+
+def is_master_playlist(text):
+    """Check if a playlist is a master playlist rather than a media playlist."""
+    return any(line.startswith(MASTER_PLAYLIST_TAGS) for line in _get_lines(text))
+
+
+def parse_master_playlist(text):
+    """Get the variant streams of a master playlist.
+
+    Parameters
+    ----------
+    text : string
+        The content of the master playlist
+
+    Returns
+    -------
+    List[Variant]
+        The variant streams in the order of the playlist. The width, height and codecs are
+        `None` if the playlist does not specify them.
+
+    Raises
+    ------
+    ValueError
+        If the text is not an HLS playlist or if a variant stream is not followed by its uri
+
+    """
+    variants = []
+    attributes = None
+    for line in _get_lines(text):
+        if line.startswith("#EXT-X-STREAM-INF:"):
+            attributes = parse_attributes(line.partition(":")[2])
+        elif attributes is not None and not line.startswith("#"):
+            width, _separator, height = attributes.get("RESOLUTION", "").partition("x")
+            variants.append(
+                Variant(
+                    uri=line,
+                    bandwidth=int(attributes["BANDWIDTH"]),
+                    width=int(width) if width else None,
+                    height=int(height) if height else None,
+                    codecs=attributes.get("CODECS"),
+                )
+            )
+            attributes = None
+
+    if attributes is not None:
+        raise ValueError("The last variant stream of the playlist has no uri.")
+    return variants
+
+
+def get_resolutions(text):
+    """Get the resolutions, as heights, of the variant streams of a master playlist.
+
+    Parameters
+    ----------
+    text : string
+        The content of the master playlist
+
+    Returns
+    -------
+    List[integer]
+        The distinct heights of the variant streams in ascending order
+
+    """
+    return sorted(
+        {variant.height for variant in parse_master_playlist(text) if variant.height}
+    )
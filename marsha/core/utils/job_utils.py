@@ -0,0 +1,41 @@
+"""Utils to run the jobs of the models based on ``BackgroundJob`` in the background."""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+
+def claim_job(model, stale_timeout):
+    """Claim the oldest job of a model that is pending or that was interrupted.
+
+    A running job is considered interrupted when it did not record any progress for longer
+    than the stale timeout. Concurrent workers skip the jobs being claimed by another one.
+
+    Parameters
+    ----------
+    model : Type[BackgroundJob]
+        The model of the jobs to claim
+    stale_timeout : integer
+        Number of seconds after which a running job without progress is resumed
+
+    Returns
+    -------
+    BackgroundJob or `None`
+        The job claimed, now running, or `None` if there is no job to run
+
+    """
+    stale = timezone.now() - timedelta(seconds=stale_timeout)
+    with transaction.atomic():
+        job = (
+            model.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(state=model.PENDING) | Q(state=model.RUNNING, updated_on__lt=stale)
+            )
+            .order_by("created_on")
+            .first()
+        )
+        if job is not None:
+            job.state = model.RUNNING
+            job.save()
+    return job
@@ -0,0 +1,154 @@
+"""Utils to resolve the LTI passports used to verify LTI launch requests."""
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from ..defaults import (
+    LTI_PASSPORT_CACHE_NEGATIVE_TIMEOUT,
+    LTI_PASSPORT_CACHE_SIZE,
+    LTI_PASSPORT_CACHE_TIMEOUT,
+)
+from ..models.account import LTIPassport
+from .cache_utils import LRUCache
+
+
+PASSPORT_CACHE_GENERATION_KEY = "lti_passport:generation"
+
+# Entries cached in the memory of the current process. Each one is tagged with the generation
+# that was current in the shared cache when it was computed.
+_local_passports = LRUCache(LTI_PASSPORT_CACHE_SIZE)
+
+
+def _get_passport_cache_key(consumer_key, consumer_site_name):
+    """Build the shared cache key for a consumer key and a consumer site name.
+
+    The key is hashed because the values come from the LTI launch request and may contain
+    characters that some cache backends don't accept.
+
+    """
+    digest = hashlib.sha1(
+        "{:s}\n{:s}".format(consumer_key, consumer_site_name).encode("utf-8")
+    ).hexdigest()
+    return "lti_passport:{:s}".format(digest)
+
+
+def _query_lti_passport(consumer_key, consumer_site_name):
+    """Find the enabled passport related to either the consumer site or one of its playlists.
+
+    Returns
+    -------
+    core.models.account.LTIPassport or `None`
+        The passport matching the consumer key and the consumer site name or `None`
+
+    """
+    try:
+        return LTIPassport.objects.select_related(
+            "consumer_site", "playlist__consumer_site"
+        ).get(
+            Q(
+                oauth_consumer_key=consumer_key,
+                is_enabled=True,
+                consumer_site__name=consumer_site_name,
+            )
+            | Q(
+                oauth_consumer_key=consumer_key,
+                is_enabled=True,
+                playlist__consumer_site__name=consumer_site_name,
+            )
+        )
+    except LTIPassport.DoesNotExist:
+        return None
+
+
+def get_lti_passport(consumer_key, consumer_site_name):
+    """Resolve the LTI passport for a consumer key and a consumer site name.
+
+    When the cache is active, the passport is looked up in a per-process LRU cache, then in the
+    shared cache, and the database is only queried when both miss. Lookups that match no
+    passport are also cached, but for a shorter time.
+
+    Every cached entry is tagged with a generation stored in the shared cache. Changing this
+    generation (see ``invalidate_lti_passport_cache``) makes all the entries stale at once, in
+    all the processes sharing the cache. With a cache local to each process, other processes
+    keep their entries until they expire: the cache should only be activated with a shared
+    cache backend.
+
+    Parameters
+    ----------
+    consumer_key : string
+        The oauth consumer key sent with the LTI launch request
+    consumer_site_name : string
+        The name of the consumer site that sent the LTI launch request
+
+    Returns
+    -------
+    core.models.account.LTIPassport or `None`
+        The enabled passport matching the consumer key and the consumer site name or `None`
+
+    """
+    if not settings.LTI_PASSPORT_CACHE_ACTIVE:
+        return _query_lti_passport(consumer_key, consumer_site_name)
+
+    local_key = (consumer_key, consumer_site_name)
+    shared_key = _get_passport_cache_key(consumer_key, consumer_site_name)
+
+    # Get the current generation and the shared entry in one round trip
+    shared_values = cache.get_many([PASSPORT_CACHE_GENERATION_KEY, shared_key])
+    generation = shared_values.get(PASSPORT_CACHE_GENERATION_KEY)
+
+    if generation is None:
+        # The generation was never set or was evicted: start a new one so that entries
+        # tagged with a previous generation can't be trusted anymore
+        cache.add(PASSPORT_CACHE_GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+        generation = cache.get(PASSPORT_CACHE_GENERATION_KEY)
+        if generation is None:
+            # The shared cache does not keep anything (e.g. a dummy cache) so we can't
+            # invalidate entries across processes: don't cache anything
+            return _query_lti_passport(consumer_key, consumer_site_name)
+
+    local_entry = _local_passports.get(local_key)
+    if local_entry is not None and local_entry[0] == generation:
+        return local_entry[1]
+
+    shared_entry = shared_values.get(shared_key)
+    is_shared_hit = shared_entry is not None and shared_entry[0] == generation
+    if not is_shared_hit:
+        # The generation was read before querying the database so that an invalidation
+        # happening in the meantime makes this entry stale
+        shared_entry = (
+            generation,
+            _query_lti_passport(consumer_key, consumer_site_name),
+        )
+
+    timeout = (
+        LTI_PASSPORT_CACHE_TIMEOUT
+        if shared_entry[1] is not None
+        else LTI_PASSPORT_CACHE_NEGATIVE_TIMEOUT
+    )
+    if not is_shared_hit:
+        cache.set(shared_key, shared_entry, timeout=timeout)
+    _local_passports.set(local_key, shared_entry, timeout=timeout)
+
+    return shared_entry[1]
+
+
+def _reset_passport_cache_generation():
+    """Start a new generation for the passport cache and forget local entries."""
+    cache.set(PASSPORT_CACHE_GENERATION_KEY, uuid.uuid4().hex, timeout=None)
+    _local_passports.clear()
+
+
+def invalidate_lti_passport_cache():
+    """Make all the cached LTI passport lookups stale in all the processes sharing the cache.
+
+    The invalidation is done right away and done again when the current transaction is
+    committed, so that a lookup made by another process before the commit can't leave a stale
+    entry in the cache.
+
+    """
+    _reset_passport_cache_generation()
+    transaction.on_commit(_reset_passport_cache_generation)
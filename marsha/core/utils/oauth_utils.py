@@ -0,0 +1,223 @@
+"""Utils to verify the OAuth 1.0 signature of LTI launch requests.
+
+Only the HMAC-SHA1 signature method with parameters sent in the query string and in the form
+encoded body is supported, as it is the one used by LTI 1.0 consumers.
+
+"""
+import base64
+import hashlib
+import hmac
+import time
+from urllib.parse import quote, urlsplit, urlunsplit
+
+from django.core.cache import cache
+
+from pylti.common import LTIException
+
+from ..defaults import LTI_OAUTH_NONCE_CACHE_SIZE, LTI_OAUTH_TIMESTAMP_WINDOW
+from .cache_utils import LRUCache
+
+
+SIGNATURE_METHOD = "HMAC-SHA1"
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+# Consumers are reused between requests as long as their secret does not change
+_consumers = LRUCache(1024)
+
+# Nonces already seen by the current process, the shared cache covers the other processes
+_local_nonces = LRUCache(LTI_OAUTH_NONCE_CACHE_SIZE)
+
+
+class OAuthConsumer:
+    """An OAuth consumer able to sign base strings with the HMAC-SHA1 method."""
+
+    def __init__(self, key, secret):
+        """Prepare the HMAC keyed with the secret of the consumer once and for all.
+
+        Parameters
+        ----------
+        key : string
+            The oauth consumer key
+        secret : string
+            The secret shared with the consumer
+
+        """
+        self.key = key
+        # There is no token in an LTI launch request so the token secret is empty
+        self._hmac = hmac.new(
+            "{:s}&".format(escape(secret)).encode("ascii"), digestmod=hashlib.sha1
+        )
+
+    @classmethod
+    def get(cls, key, secret):
+        """Get the consumer for a key and a secret, reusing it if it was already built."""
+        consumer = _consumers.get((key, secret))
+        if consumer is None:
+            consumer = cls(key, secret)
+            _consumers.set((key, secret), consumer)
+        return consumer
+
+    def sign(self, base_string):
+        """Compute the base64 encoded HMAC-SHA1 signature of a base string.
+
+        Parameters
+        ----------
+        base_string : string
+            The signature base string of the request
+
+        Returns
+        -------
+        bytes
+            The signature of the base string
+
+        """
+        signer = self._hmac.copy()
+        signer.update(base_string.encode("ascii"))
+        return base64.b64encode(signer.digest())
+
+
+def escape(value):
+    """Percent encode a value as required by the OAuth 1.0 specification (RFC 5849 3.6)."""
+    return quote(value, safe="~")
+
+
+def normalize_url(url):
+    """Build the base string URI of a request (RFC 5849 3.4.1.2).
+
+    Parameters
+    ----------
+    url : string
+        The absolute url of the request
+
+    Returns
+    -------
+    string
+        The url in lower case, without its default port, query string or fragment
+
+    """
+    scheme, netloc, path, _query, _fragment = urlsplit(url)
+    scheme, netloc = scheme.lower(), netloc.lower()
+    host, _sep, port = netloc.rpartition(":")
+    if host and port == DEFAULT_PORTS.get(scheme):
+        netloc = host
+    return urlunsplit((scheme, netloc, path or "/", "", ""))
+
+
+def get_signature_base_string(method, url, *parameters):
+    """Build the signature base string of a request (RFC 5849 3.4.1).
+
+    Parameters
+    ----------
+    method : string
+        The HTTP method of the request
+    url : string
+        The absolute url of the request
+    parameters : django.http.QueryDict
+        The parameters of the request e.g. the query string and the form encoded body. The
+        `oauth_signature` parameter is excluded.
+
+    Returns
+    -------
+    string
+        The signature base string
+
+    """
+    # Encode, filter and collect all the parameters in one pass
+    pairs = sorted(
+        (escape(key), escape(value))
+        for query_dict in parameters
+        for key, values in query_dict.lists()
+        if key != "oauth_signature"
+        for value in values
+    )
+    normalized_parameters = "&".join("{:s}={:s}".format(*pair) for pair in pairs)
+
+    return "&".join(
+        [
+            escape(method.upper()),
+            escape(normalize_url(url)),
+            escape(normalized_parameters),
+        ]
+    )
+
+
+def _check_timestamp(timestamp):
+    """Check that the timestamp of a request is close enough to the current time."""
+    try:
+        timestamp = int(timestamp)
+    except (TypeError, ValueError):
+        raise LTIException("OAuth error: Invalid timestamp.")
+
+    if abs(time.time() - timestamp) > LTI_OAUTH_TIMESTAMP_WINDOW:
+        raise LTIException("OAuth error: Expired timestamp.")
+
+
+def _check_nonce(consumer_key, timestamp, nonce):
+    """Check that a nonce was never used by a consumer and record it.
+
+    The nonce is recorded in the memory of the current process and in the shared cache, for
+    a bit longer than the timestamp window outside of which the request is rejected anyway.
+
+    """
+    digest = hashlib.sha1(
+        "{:s}\n{:s}\n{:s}".format(consumer_key, timestamp, nonce).encode("utf-8")
+    ).hexdigest()
+    key = "lti_nonce:{:s}".format(digest)
+    timeout = 2 * LTI_OAUTH_TIMESTAMP_WINDOW
+
+    if _local_nonces.get(key) or not cache.add(key, True, timeout=timeout):
+        raise LTIException("OAuth error: The nonce was already used.")
+    _local_nonces.set(key, True, timeout=timeout)
+
+
+def verify_request(request, consumer_key, secret):
+    """Verify the OAuth 1.0 HMAC-SHA1 signature of a request.
+
+    Parameters
+    ----------
+    request : django.http.request.HttpRequest
+        The request to verify
+    consumer_key : string
+        The oauth consumer key expected in the request
+    secret : string
+        The secret shared with the consumer
+
+    Returns
+    -------
+    boolean
+        True if the request is signed with the secret of the consumer
+
+    Raises
+    ------
+    LTIException
+        Exception raised if the request is not correctly signed, expired or replayed
+
+    """
+    params = request.POST
+    if params.get("oauth_version", "1.0") != "1.0":
+        raise LTIException("OAuth error: Unsupported version.")
+    if params.get("oauth_signature_method") != SIGNATURE_METHOD:
+        raise LTIException("OAuth error: Unsupported signature method.")
+    if params.get("oauth_consumer_key") != consumer_key:
+        raise LTIException("OAuth error: Invalid consumer.")
+
+    signature = params.get("oauth_signature")
+    timestamp = params.get("oauth_timestamp")
+    nonce = params.get("oauth_nonce")
+    if not (signature and timestamp and nonce):
+        raise LTIException("OAuth error: Missing parameters.")
+
+    _check_timestamp(timestamp)
+
+    base_string = get_signature_base_string(
+        request.method, request.build_absolute_uri(), request.GET, params
+    )
+    expected_signature = OAuthConsumer.get(consumer_key, secret).sign(base_string)
+    if not hmac.compare_digest(expected_signature, signature.encode("utf-8")):
+        # Don't give any detail as it could help forging a signature
+        raise LTIException("OAuth error: Please check your key and secret")
+
+    # Only record nonces of correctly signed requests so they can't be used to fill the store
+    _check_nonce(consumer_key, timestamp, nonce)
+
+    return True
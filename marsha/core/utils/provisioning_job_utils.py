@@ -0,0 +1,73 @@
+"""Utils to provision large manifests of LTI resources in the background with jobs.
+
+Provisioning a manifest of more than a few thousand rows can take longer than a request is
+allowed to. A provisioning job stores the manifest uploaded in the admin, then a worker
+provisions its rows in batches, each one in a short transaction, and records the progress of
+the job after each batch.
+
+"""
+import io
+from itertools import islice
+
+from django.utils import timezone
+
+from ..defaults import PROVISIONING_JOB_BATCH_SIZE
+from ..models import ProvisioningJob
+from .provisioning_utils import provision_lti_resources, read_manifest
+
+
+def run_provisioning_job(job, batch_size=PROVISIONING_JOB_BATCH_SIZE, max_batches=None):
+    """Provision the rows of the manifest of a job, batch by batch.
+
+    The rows already counted in the progress of the job are skipped, then the others are
+    provisioned for the consumer site of the job (see `provision_lti_resources`). The counts
+    of the job are updated after each batch. A batch committed but not recorded before an
+    interruption is provisioned again when the job is resumed, its objects being counted as
+    existing then.
+
+    Parameters
+    ----------
+    job : ProvisioningJob
+        The job to run, claimed by the caller (see `claim_job`)
+    batch_size : integer
+        The maximum number of rows provisioned in each transaction
+    max_batches : integer
+        If set, the number of batches after which the job is paused
+
+    Returns
+    -------
+    boolean
+        True if the job is done, False if it was paused before the end
+
+    """
+    counts = dict(job.counts)
+    rows = islice(
+        read_manifest(io.StringIO(job.manifest, newline=""), job.manifest_format),
+        counts.get("rows", 0),
+        None,
+    )
+    if max_batches is not None:
+        rows = islice(rows, max_batches * batch_size)
+
+    def record_progress(report):
+        """Add the counts of the rows provisioned so far to the ones of the job."""
+        job.counts = {
+            name: counts.get(name, 0) + value
+            for name, value in report.as_dict().items()
+        }
+        job.save()
+
+    provision_lti_resources(
+        rows,
+        batch_size=batch_size,
+        consumer_site_name=job.consumer_site.name,
+        on_batch=record_progress,
+    )
+
+    if max_batches is not None and job.counts.get("rows", 0) < job.rows:
+        return False
+
+    job.state = ProvisioningJob.DONE
+    job.finished_on = timezone.now()
+    job.save()
+    return True
@@ -0,0 +1,312 @@
+"""Utils to provision the playlists and videos targetted by future LTI launch requests.
+
+A manifest lists, for each resource link, the consumer site, the context id and title and the
+resource link id and title that LTI launch requests will send. Provisioning it beforehand
+spares the first launch of each resource link from creating its playlist and its video.
+
+"""
+import csv
+from itertools import islice
+import json
+import time
+
+from django.db import IntegrityError, transaction
+
+from ..models import ConsumerSite, Playlist, Video
+
+
+MANIFEST_FORMATS = ("csv", "jsonl")
+MANIFEST_FIELDS = (
+    "consumer_site",
+    "context_id",
+    "context_title",
+    "resource_link_id",
+    "resource_link_title",
+)
+# Length of the title and lti id fields of playlists and videos
+MAX_LENGTH = 255
+
+
+class ProvisioningReport:
+    """Counts of the rows of a manifest and of the objects created while provisioning it."""
+
+    COUNTS = (
+        "rows",
+        "rows_skipped",
+        "playlists_created",
+        "videos_created",
+        "videos_existing",
+    )
+
+    def __init__(self):
+        """Initialize all counts to zero."""
+        self.rows = 0
+        self.rows_skipped = 0
+        self.playlists_created = 0
+        self.videos_created = 0
+        self.videos_existing = 0
+        self.duration = 0.0
+
+    @property
+    def rows_per_second(self):
+        """Return the number of manifest rows processed per second."""
+        return self.rows / self.duration if self.duration else float("inf")
+
+    def as_dict(self):
+        """Return the counts of the report as a dictionary that can be stored as JSON."""
+        return {name: getattr(self, name) for name in self.COUNTS}
+
+    def __str__(self):
+        """Summarize the report in one sentence."""
+        return (
+            "{rows:d} rows provisioned in {duration:.1f}s ({rate:.0f} rows/s): "
+            "{playlists:d} playlists created, {videos:d} videos created, "
+            "{existing:d} videos already existed, {skipped:d} rows skipped."
+        ).format(
+            rows=self.rows,
+            duration=self.duration,
+            rate=self.rows_per_second,
+            playlists=self.playlists_created,
+            videos=self.videos_created,
+            existing=self.videos_existing,
+            skipped=self.rows_skipped,
+        )
+
+
+def read_manifest(lines, manifest_format):
+    """Read the rows of a manifest.
+
+    Parameters
+    ----------
+    lines : Iterable[string]
+        The lines of the manifest
+    manifest_format : string
+        Either "csv", for a manifest with a header line naming the columns, or "jsonl", for a
+        manifest with a JSON object on each line
+
+    Yields
+    ------
+    dictionary
+        Each row of the manifest
+
+    Raises
+    ------
+    ValueError
+        If the format is not supported or a line of a JSONL manifest is not a JSON object
+
+    """
+    if manifest_format == "csv":
+        yield from csv.DictReader(lines)
+    elif manifest_format == "jsonl":
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            if not isinstance(row, dict):
+                raise ValueError(
+                    "Line {:d} of the manifest is not a JSON object.".format(number)
+                )
+            yield row
+    else:
+        raise ValueError("Unsupported manifest format: {!s}.".format(manifest_format))
+
+
+def _clean_row(row, consumer_site_name=None):
+    """Normalize a row of a manifest, defaulting titles to ids as LTI launch requests do.
+
+    Returns
+    -------
+    dictionary or `None`
+        The row with all the manifest fields stripped or `None` if the row is not valid
+
+    """
+    row = {field: str(row.get(field) or "").strip() for field in MANIFEST_FIELDS}
+    if consumer_site_name is not None:
+        row["consumer_site"] = consumer_site_name
+    if not (row["consumer_site"] and row["context_id"] and row["resource_link_id"]):
+        return None
+    if max(len(row["context_id"]), len(row["resource_link_id"])) > MAX_LENGTH:
+        return None
+
+    row["context_title"] = (row["context_title"] or row["context_id"])[:MAX_LENGTH]
+    row["resource_link_title"] = (
+        row["resource_link_title"] or row["resource_link_id"]
+    )[:MAX_LENGTH]
+    return row
+
+
+def _provision_batch(rows, consumer_sites, playlists, report):
+    """Create the playlists and videos of a batch of rows that don't exist yet.
+
+    Parameters
+    ----------
+    rows : List[dictionary]
+        Cleaned rows of the manifest
+    consumer_sites : Dict[string, string or `None`]
+        Ids of the consumer sites already looked up, by name, updated in place
+    playlists : Dict[Tuple[string, string], string]
+        Ids of the playlists already looked up or created, by consumer site id and lti id
+    report : ProvisioningReport
+        The report in which to count the rows and objects of the batch
+
+    Returns
+    -------
+    Dict[Tuple[string, string], string]
+        Ids of the playlists looked up or created for this batch, by consumer site id and
+        lti id, that should be added to `playlists` once the batch is committed
+
+    """
+    # Consumer sites are few and never created here: look up the ones we don't know yet
+    unknown_names = {row["consumer_site"] for row in rows} - consumer_sites.keys()
+    if unknown_names:
+        consumer_sites.update(dict.fromkeys(unknown_names))
+        consumer_sites.update(
+            ConsumerSite.objects.filter(name__in=unknown_names).values_list(
+                "name", "id"
+            )
+        )
+
+    # Titles of the playlists missing from the cache, by key, the first one wins
+    missing_playlists = {}
+    for row in rows:
+        consumer_site_id = consumer_sites[row["consumer_site"]]
+        if consumer_site_id is None:
+            continue
+        key = (consumer_site_id, row["context_id"])
+        if key not in playlists:
+            missing_playlists.setdefault(key, row["context_title"])
+
+    new_playlists = {}
+    if missing_playlists:
+        # One lookup for all the missing playlists, filtered down to the exact keys
+        for consumer_site_id, lti_id, playlist_id in Playlist.objects.filter(
+            consumer_site_id__in={key[0] for key in missing_playlists},
+            lti_id__in={key[1] for key in missing_playlists},
+        ).values_list("consumer_site_id", "lti_id", "id"):
+            if (consumer_site_id, lti_id) in missing_playlists:
+                new_playlists[(consumer_site_id, lti_id)] = playlist_id
+
+        created_playlists = Playlist.objects.bulk_create(
+            [
+                Playlist(consumer_site_id=key[0], lti_id=key[1], title=title)
+                for key, title in missing_playlists.items()
+                if key not in new_playlists
+            ]
+        )
+        for playlist in created_playlists:
+            new_playlists[(playlist.consumer_site_id, playlist.lti_id)] = playlist.id
+        report.playlists_created += len(created_playlists)
+
+    # Titles of the videos of the batch, by key, the first one wins
+    videos = {}
+    for row in rows:
+        consumer_site_id = consumer_sites[row["consumer_site"]]
+        if consumer_site_id is None:
+            report.rows_skipped += 1
+            continue
+        playlist_key = (consumer_site_id, row["context_id"])
+        playlist_id = new_playlists.get(playlist_key) or playlists[playlist_key]
+        videos.setdefault(
+            (playlist_id, row["resource_link_id"]), row["resource_link_title"]
+        )
+
+    # One lookup for all the videos of the batch, filtered down to the exact keys
+    existing_videos = {
+        key
+        for key in Video.objects.filter(
+            playlist_id__in={key[0] for key in videos},
+            lti_id__in={key[1] for key in videos},
+        ).values_list("playlist_id", "lti_id")
+        if key in videos
+    }
+    created_videos = Video.objects.bulk_create(
+        [
+            Video(playlist_id=key[0], lti_id=key[1], title=title)
+            for key, title in videos.items()
+            if key not in existing_videos
+        ]
+    )
+    report.videos_created += len(created_videos)
+    report.videos_existing += len(existing_videos)
+
+    return new_playlists
+
+
+def provision_lti_resources(
+    rows, batch_size=1000, consumer_site_name=None, on_batch=None
+):
+    """Create the playlists and videos of a manifest that don't exist yet.
+
+    Rows are processed in batches, each one in its own transaction. Existing playlists and
+    videos are found with one query per batch and the missing ones are created with one bulk
+    insert per batch. If a concurrent LTI launch request creates one of them in the meantime,
+    the batch is rolled back and processed again.
+
+    Rows with a consumer site that does not exist or without a context id or a resource link
+    id are skipped.
+
+    Parameters
+    ----------
+    rows : Iterable[dictionary]
+        The rows of the manifest, see `read_manifest`
+    batch_size : integer
+        The number of rows processed in each transaction
+    consumer_site_name : string
+        If set, the name of the consumer site for all the rows, ignoring their own
+    on_batch : callable
+        If set, a function called with the report after each batch is committed
+
+    Returns
+    -------
+    ProvisioningReport
+        The counts of rows processed and of objects created
+
+    """
+    start = time.perf_counter()
+    report = ProvisioningReport()
+    consumer_sites = {}
+    playlists = {}
+
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+
+        report.rows += len(batch)
+        cleaned_rows = []
+        for row in batch:
+            cleaned_row = _clean_row(row, consumer_site_name)
+            if cleaned_row is None:
+                report.rows_skipped += 1
+            else:
+                cleaned_rows.append(cleaned_row)
+
+        # Count the batch in a copy of the report until it is committed
+        for attempt in range(2):
+            batch_report = ProvisioningReport()
+            try:
+                with transaction.atomic():
+                    new_playlists = _provision_batch(
+                        cleaned_rows, consumer_sites, playlists, batch_report
+                    )
+            except IntegrityError:
+                # A concurrent LTI launch request created one of the objects
+                if attempt:
+                    raise
+            else:
+                break
+
+        playlists.update(new_playlists)
+        report.rows_skipped += batch_report.rows_skipped
+        report.playlists_created += batch_report.playlists_created
+        report.videos_created += batch_report.videos_created
+        report.videos_existing += batch_report.videos_existing
+        if on_batch is not None:
+            on_batch(report)
+
+    report.duration = time.perf_counter() - start
+    return report
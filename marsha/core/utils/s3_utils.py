@@ -1,6 +1,7 @@
 """Utils for direct upload to AWS S3."""
 from base64 import b64encode
 from datetime import timedelta
+from functools import lru_cache
 import hashlib
 import hmac
 import json
@@ -8,10 +9,23 @@ import json
 from django.conf import settings
 from django.utils import timezone
 
-from ..defaults import AWS_UPLOAD_EXPIRATION_DELAY, VIDEO_SOURCE_MAX_SIZE
+import boto3
+from botocore.config import Config
+
+from ..defaults import (
+    AWS_UPLOAD_EXPIRATION_DELAY,
+    VIDEO_SOURCE_MAX_SIZE,
+    VIDEO_SOURCE_MULTIPART_MAX_SIZE,
+    VIDEO_SOURCE_PART_SIZE,
+)
 from ..utils.time_utils import to_timestamp
 
 
+# Limits of S3 multipart uploads
+S3_MIN_PART_SIZE = 5 * 2 ** 20  # 5MB, except for the last part
+S3_MAX_PARTS = 10000
+
+
 def sign(key, message):
     """Return a SHA256 hmac updated with the message.
 
@@ -31,6 +45,9 @@ def sign(key, message):
     return hmac.new(key, message.encode("utf-8"), hashlib.sha256).digest()
 
 
+# The signing key changes every day at UTC midnight, keep the keys of a few days in case
+# several regions, services or secret keys are used
+@lru_cache(maxsize=8)
 def get_signature_key(secret_key, date_stamp, region_name, service_name):
     """AWS Signature v4 Key derivation function.
 
@@ -38,6 +55,9 @@ def get_signature_key(secret_key, date_stamp, region_name, service_name):
     version 4, the signing key is derived from the secret access key, which improves the security
     of the secret access key.
 
+    The key only depends on the date so it is derived once a day for each region and service
+    and cached by the process.
+
     Parameters
     ----------
     secret_key : string
@@ -64,7 +84,7 @@ def get_signature_key(secret_key, date_stamp, region_name, service_name):
     return k_signing
 
 
-def get_s3_policy(bucket, video):
+def get_s3_policy(bucket, video, now=None):
     """Build a S3 policy to allow uploading a video to our video source bucket.
 
     Parameters
@@ -73,6 +93,8 @@ def get_s3_policy(bucket, video):
         The name of the S3 bucket to which we want to upload a video.
     video : Type[models.Model]
         The video object for which we want to upload a video file.
+    now : datetime.datetime
+        The time at which the policy is signed, the present time by default.
 
     Returns
     -------
@@ -80,7 +102,7 @@ def get_s3_policy(bucket, video):
         A tuple of the policy and its signature both encoded in b64.
 
     """
-    now = timezone.now()
+    now = now or timezone.now()
     stamp = str(to_timestamp(now))
     key = video.get_source_s3_key(stamp=stamp)
 
@@ -136,6 +158,28 @@ def get_s3_policy(bucket, video):
     }
 
 
+def get_s3_policies(bucket, videos):
+    """Build the S3 policies to allow uploading several videos to our video source bucket.
+
+    All the policies are signed at the same time, with the same signing key.
+
+    Parameters
+    ----------
+    bucket : string
+        The name of the S3 bucket to which we want to upload the videos.
+    videos : Iterable[Type[models.Model]]
+        The video objects for which we want to upload video files.
+
+    Returns
+    -------
+    Dict[string, dictionary]
+        The policy of each video by video id, see `get_s3_policy`
+
+    """
+    now = timezone.now()
+    return {str(video.id): get_s3_policy(bucket, video, now=now) for video in videos}
+
+
 def get_s3_endpoint(region):
     """Return the S3 endpoint domain for the region.
 
@@ -153,3 +197,216 @@ def get_s3_endpoint(region):
     if region == "us-east-1":
         return "s3.amazonaws.com"
     return "s3.{:s}.amazonaws.com".format(region)
+
+
+@lru_cache(maxsize=None)
+def _get_s3_client(region, access_key_id, secret_access_key):
+    """Create a S3 client for a region and credentials."""
+    return boto3.client(
+        "s3",
+        region_name=region,
+        aws_access_key_id=access_key_id,
+        aws_secret_access_key=secret_access_key,
+        config=Config(signature_version="s3v4"),
+    )
+
+
+def get_s3_client():
+    """Get the S3 client of the process for the current AWS settings.
+
+    Creating a client loads the description of the whole S3 API so clients are created once
+    and reused. They are thread safe.
+
+    Returns
+    -------
+    botocore.client.S3
+        A client signing its requests with AWS signature version 4
+
+    """
+    return _get_s3_client(
+        settings.AWS_DEFAULT_REGION,
+        settings.AWS_ACCESS_KEY_ID,
+        settings.AWS_SECRET_ACCESS_KEY,
+    )
+
+
+def get_part_size(size):
+    """Get the size of the parts of a multipart upload.
+
+    Parts have the default size unless the file would need more parts than S3 accepts.
+
+    Parameters
+    ----------
+    size : integer
+        The size of the file to upload in bytes
+
+    Returns
+    -------
+    integer
+        The size of all the parts but the last one, in bytes, rounded up to a whole megabyte
+
+    """
+    part_size = max(VIDEO_SOURCE_PART_SIZE, S3_MIN_PART_SIZE, -(-size // S3_MAX_PARTS))
+    return -(-part_size // 2 ** 20) * 2 ** 20
+
+
+def create_multipart_upload(bucket, video, size, content_type):
+    """Initiate a multipart upload of a video to our video source bucket.
+
+    Parameters
+    ----------
+    bucket : string
+        The name of the S3 bucket to which we want to upload a video.
+    video : Type[models.Model]
+        The video object for which we want to upload a video file.
+    size : integer
+        The size of the video file in bytes
+    content_type : string
+        The content type of the video file e.g. "video/mp4"
+
+    Returns
+    -------
+    dictionary
+        The key and the id of the upload along with the size and the number of its parts
+
+    """
+    stamp = str(to_timestamp(timezone.now()))
+    key = video.get_source_s3_key(stamp=stamp)
+    response = get_s3_client().create_multipart_upload(
+        ACL="private", Bucket=bucket, ContentType=content_type, Key=key
+    )
+    part_size = get_part_size(size)
+
+    return {
+        "bucket": bucket,
+        "stamp": stamp,
+        "key": key,
+        "upload_id": response["UploadId"],
+        "max_file_size": VIDEO_SOURCE_MULTIPART_MAX_SIZE,
+        "part_size": part_size,
+        "part_count": max(1, -(-size // part_size)),
+        "s3_endpoint": get_s3_endpoint(settings.AWS_DEFAULT_REGION),
+    }
+
+
+def get_upload_part_urls(bucket, key, upload_id, part_numbers):
+    """Presign the urls to which the parts of a multipart upload are sent with PUT requests.
+
+    Presigning urls is done locally, without requests to S3.
+
+    Parameters
+    ----------
+    bucket : string
+        The name of the S3 bucket of the upload
+    key : string
+        The S3 key of the upload
+    upload_id : string
+        The id of the multipart upload
+    part_numbers : Iterable[integer]
+        The numbers of the parts, from 1 to 10000
+
+    Returns
+    -------
+    Dict[integer, string]
+        The presigned url of each part by part number
+
+    """
+    client = get_s3_client()
+    return {
+        part_number: client.generate_presigned_url(
+            "upload_part",
+            Params={
+                "Bucket": bucket,
+                "Key": key,
+                "PartNumber": part_number,
+                "UploadId": upload_id,
+            },
+            ExpiresIn=AWS_UPLOAD_EXPIRATION_DELAY,
+        )
+        for part_number in part_numbers
+    }
+
+
+def list_parts(bucket, key, upload_id):
+    """List the parts already uploaded for a multipart upload, e.g. to resume it.
+
+    Parameters
+    ----------
+    bucket : string
+        The name of the S3 bucket of the upload
+    key : string
+        The S3 key of the upload
+    upload_id : string
+        The id of the multipart upload
+
+    Returns
+    -------
+    List[dictionary]
+        The number, the etag and the size of each part in ascending order of part numbers
+
+    Raises
+    ------
+    botocore.exceptions.ClientError
+        If the upload does not exist, with a "NoSuchUpload" error code
+
+    """
+    paginator = get_s3_client().get_paginator("list_parts")
+    return [
+        {"part_number": part["PartNumber"], "etag": part["ETag"], "size": part["Size"]}
+        for page in paginator.paginate(Bucket=bucket, Key=key, UploadId=upload_id)
+        for part in page.get("Parts", [])
+    ]
+
+
+def complete_multipart_upload(bucket, key, upload_id, parts):
+    """Assemble the parts of a multipart upload into the video file.
+
+    Parameters
+    ----------
+    bucket : string
+        The name of the S3 bucket of the upload
+    key : string
+        The S3 key of the upload
+    upload_id : string
+        The id of the multipart upload
+    parts : List[dictionary]
+        The number and the etag of each part in ascending order, see `list_parts`
+
+    Raises
+    ------
+    botocore.exceptions.ClientError
+        If the upload does not exist or if S3 refuses the parts
+
+    """
+    get_s3_client().complete_multipart_upload(
+        Bucket=bucket,
+        Key=key,
+        MultipartUpload={
+            "Parts": [
+                {"ETag": part["etag"], "PartNumber": part["part_number"]}
+                for part in parts
+            ]
+        },
+        UploadId=upload_id,
+    )
+
+
+def abort_multipart_upload(bucket, key, upload_id):
+    """Abort a multipart upload and delete the parts already uploaded.
+
+    Parameters
+    ----------
+    bucket : string
+        The name of the S3 bucket of the upload
+    key : string
+        The S3 key of the upload
+    upload_id : string
+        The id of the multipart upload
+
+    Raises
+    ------
+    botocore.exceptions.ClientError
+        If the upload does not exist, with a "NoSuchUpload" error code
+
+    """
+    get_s3_client().abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
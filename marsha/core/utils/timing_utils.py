@@ -0,0 +1,152 @@
+"""Utils to measure the SQL queries and the phases of the request being processed.
+
+The `ServerTimingMiddleware` starts measuring each request in the thread processing it. Code
+on the hot paths wraps its phases in a `timer`, which does nothing but look up a thread local
+when no request is being measured, e.g. when the middleware is not activated.
+
+"""
+from collections import OrderedDict
+import threading
+import time
+
+
+_local = threading.local()
+
+
+def _to_milliseconds(duration):
+    """Convert a duration in seconds, if any, to milliseconds rounded to the microsecond."""
+    return None if duration is None else round(duration * 1000, 3)
+
+
+class RequestTimings:
+    """Number and duration of the SQL queries and duration of each phase of a request.
+
+    An instance is also an execution wrapper (see `connection.execute_wrapper`) that counts
+    and times the SQL queries it wraps.
+
+    """
+
+    def __init__(self):
+        """Start measuring the request now."""
+        self.start = time.perf_counter()
+        self.duration = None
+        self.queries = 0
+        self.sql_duration = 0.0
+        self.phases = OrderedDict()
+
+    def __call__(self, execute, sql, params, many, context):
+        """Execute a SQL query and add it to the timings."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_duration += time.perf_counter() - start
+
+    def add(self, name, duration):
+        """Add a duration to a phase, the phases repeated during a request being summed."""
+        self.phases[name] = self.phases.get(name, 0.0) + duration
+
+    def stop(self):
+        """Stop measuring the request."""
+        self.duration = time.perf_counter() - self.start
+
+    def get_server_timing(self):
+        """Format the timings as the value of a `Server-Timing` header.
+
+        Returns
+        -------
+        string
+            A metric for the SQL queries, one for each phase and one for the whole request,
+            with their duration in milliseconds e.g.
+            'sql;dur=1.2;desc="3 queries", passport;dur=0.4, total;dur=8.1'
+
+        """
+        metrics = [
+            'sql;dur={:.1f};desc="{:d} queries"'.format(
+                self.sql_duration * 1000, self.queries
+            )
+        ]
+        metrics.extend(
+            "{:s};dur={:.1f}".format(name, duration * 1000)
+            for name, duration in self.phases.items()
+        )
+        if self.duration is not None:
+            metrics.append("total;dur={:.1f}".format(self.duration * 1000))
+        return ", ".join(metrics)
+
+    def as_dict(self):
+        """Return the timings, in milliseconds, as a dictionary that can be logged as JSON."""
+        return {
+            "queries": self.queries,
+            "sql_ms": _to_milliseconds(self.sql_duration),
+            "phases_ms": {
+                name: _to_milliseconds(duration)
+                for name, duration in self.phases.items()
+            },
+            "total_ms": _to_milliseconds(self.duration),
+        }
+
+
+def start_request():
+    """Start measuring a request in the current thread.
+
+    Returns
+    -------
+    RequestTimings
+        The timings to which the phases of the request are added until `stop_request`
+
+    """
+    _local.timings = RequestTimings()
+    return _local.timings
+
+
+def stop_request():
+    """Stop measuring the request of the current thread.
+
+    Returns
+    -------
+    RequestTimings or `None`
+        The timings of the request or `None` if no request was being measured
+
+    """
+    timings = getattr(_local, "timings", None)
+    _local.timings = None
+    if timings is not None:
+        timings.stop()
+    return timings
+
+
+class timer:  # pylint: disable=invalid-name
+    """Context manager adding its duration to a phase of the request being measured.
+
+    It is a class rather than a generator so that it costs only a thread local lookup when no
+    request is being measured.
+
+    Parameters
+    ----------
+    name : string
+        The name of the phase, reported as a metric of the `Server-Timing` header
+
+    """
+
+    __slots__ = ("name", "timings", "start")
+
+    def __init__(self, name):
+        """Remember the name of the phase."""
+        self.name = name
+        self.timings = None
+        self.start = None
+
+    def __enter__(self):
+        """Start timing the phase if a request is being measured."""
+        self.timings = getattr(_local, "timings", None)
+        if self.timings is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        """Add the duration of the phase to the request being measured."""
+        if self.timings is not None:
+            self.timings.add(self.name, time.perf_counter() - self.start)
+        return False
@@ -0,0 +1,40 @@
+"""Utils to generate the UUIDs used as primary keys."""
+import os
+import time
+import uuid
+
+
+# Number of values of the 12 bits of a UUIDv7 storing the fraction of the current millisecond
+SUB_MILLISECOND_STEPS = 1 << 12
+
+
+def uuid7():
+    """Generate a time-ordered UUID with the layout of UUIDv7.
+
+    The 48 first bits are the current Unix time in milliseconds and the 12 bits following the
+    version hold the fraction of the current millisecond, as allowed by RFC 9562. The last 62
+    bits are random. UUIDs generated one after the other are thus close to each other in
+    indexes, where random UUIDs (version 4) scatter inserts across the whole B-tree.
+
+    They are regular UUIDs stored in the same columns as the random UUIDs already there. Their
+    order only helps the locality of indexes and should not be relied on: the clock of the
+    system may go backwards and each process has its own.
+
+    Returns
+    -------
+    uuid.UUID
+        A UUID of version 7 and of the RFC 4122 variant
+
+    """
+    timestamp = time.time() * 1000
+    milliseconds = int(timestamp)
+    fraction = int((timestamp - milliseconds) * SUB_MILLISECOND_STEPS)
+    random_bits = int.from_bytes(os.urandom(8), "big") >> 2
+
+    return uuid.UUID(
+        int=(milliseconds & 0xFFFFFFFFFFFF) << 80
+        | 0x7 << 76
+        | fraction << 64
+        | 0b10 << 62
+        | random_bits
+    )
@@ -1,4 +1,7 @@
 """Views of the ``core`` app of the Marsha project."""
+import hashlib
+
+from django.conf import settings
 from django.utils.decorators import method_decorator
 from django.views.decorators.clickjacking import xframe_options_exempt
 from django.views.decorators.csrf import csrf_exempt
@@ -8,9 +11,42 @@ from django.views.generic.base import TemplateResponseMixin
 from pylti.common import LTIException
 from rest_framework_simplejwt.tokens import AccessToken
 
+from .defaults import (
+    LTI_STUDENT_CONTEXT_CACHE_LOCK_TIMEOUT,
+    LTI_STUDENT_CONTEXT_CACHE_STALE_TIMEOUT,
+    LTI_STUDENT_CONTEXT_CACHE_TIMEOUT,
+)
 from .lti import LTI
 from .models.account import INSTRUCTOR, STUDENT
-from .serializers import VideoSerializer
+from .serializers import VideoReadSerializer
+from .utils.cache_utils import get_or_set_single_flight
+from .utils.timing_utils import timer
+
+
+def _get_student_cache_timeout():
+    """Compute the number of seconds during which a student context is fresh in the cache.
+
+    The context includes signed urls so, when signing is active, the context can't be served
+    from the cache, even stale, for more than half the minimum validity of the signed urls,
+    their expiration being rounded down to a time bucket. Students are thus left with urls
+    valid for at least as long.
+
+    Returns
+    -------
+    integer
+        Number of seconds during which a cached student context is fresh
+
+    """
+    timeout = LTI_STUDENT_CONTEXT_CACHE_TIMEOUT
+    if settings.CLOUDFRONT_SIGNED_URLS_ACTIVE:
+        min_validity = (
+            settings.CLOUDFRONT_SIGNED_URLS_VALIDITY
+            - settings.CLOUDFRONT_SIGNED_URLS_BUCKET
+        )
+        timeout = min(
+            timeout, min_validity // 2 - LTI_STUDENT_CONTEXT_CACHE_STALE_TIMEOUT
+        )
+    return max(timeout, 0)
 
 
 @method_decorator(csrf_exempt, name="dispatch")
@@ -50,23 +86,101 @@ class VideoLTIView(TemplateResponseMixin, View):
         """
         lti = LTI(self.request)
         try:
-            video = lti.get_or_create_video()
+            if not lti.is_instructor:
+                return self.get_student_context(lti)
+            with timer("video"):
+                video = lti.get_or_create_video()
         except LTIException:
             return {"state": "error"}
 
-        if lti.is_instructor:
-            # Create a short-lived JWT token for the video
+        # Create a short-lived JWT token for the video. Evaluating the token as a string
+        # computes it from its payload.
+        with timer("jwt"):
             jwt_token = AccessToken()
             jwt_token.payload["video_id"] = str(video.id)
+            jwt_token = str(jwt_token)
+
+        with timer("serialize"):
+            video = VideoReadSerializer(video).data
+
+        return {"state": INSTRUCTOR, "jwt_token": jwt_token, "video": video}
+
+    @staticmethod
+    def get_student_context(lti):
+        """Build the context for a student, served from the cache when it is active.
 
-            # Evaluating the token as a string computes it from its payload
-            context = {"state": INSTRUCTOR, "jwt_token": str(jwt_token)}
-        else:
-            context = {"state": STUDENT}
+        Students of a course all share the same context for a video. It is cached under the
+        consumer site, the context and the resource link of the LTI launch request, along with
+        the last update of the video so that any change to the video is visible right away.
+        Only this date is queried when the context is found in the cache.
 
-        context["video"] = VideoSerializer(video).data if video else None
+        When the cached context expires, only one process rebuilds it while the others keep
+        serving the expired one for a short time.
 
-        return context
+        Parameters
+        ----------
+        lti : core.lti.LTI
+            The LTI launch request of the student
+
+        Returns
+        -------
+        dictionary
+            The context for template rendering, see ``get_context_data``
+
+        Raises
+        ------
+        LTIException
+            Exception raised if the LTI launch request is not valid
+
+        """
+        if not settings.LTI_STUDENT_CACHE_ACTIVE:
+            with timer("video"):
+                video = lti.get_or_create_video()
+            with timer("serialize"):
+                return {
+                    "state": STUDENT,
+                    "video": VideoReadSerializer(video).data if video else None,
+                }
+
+        with timer("video"):
+            updated_on = (
+                lti.get_video_queryset().values_list("updated_on", flat=True).first()
+            )
+        if updated_on is None:
+            return {"state": STUDENT, "video": None}
+
+        def build_context():
+            """Build the context of the students from a row, sparing the video instance."""
+            with timer("video"):
+                video = (
+                    lti.get_video_queryset()
+                    .values(*VideoReadSerializer.SOURCE_FIELDS)
+                    .first()
+                )
+            with timer("serialize"):
+                return {
+                    "state": STUDENT,
+                    "video": VideoReadSerializer(video).data if video else None,
+                }
+
+        digest = hashlib.sha1(
+            "\n".join(
+                [
+                    lti.consumer_site_name,
+                    lti.context_id,
+                    lti.resource_link_id,
+                    updated_on.isoformat(),
+                ]
+            ).encode("utf-8")
+        ).hexdigest()
+
+        return get_or_set_single_flight(
+            "lti_student_context:{:s}".format(digest),
+            build_context,
+            timeout=_get_student_cache_timeout(),
+            stale_timeout=LTI_STUDENT_CONTEXT_CACHE_STALE_TIMEOUT,
+            lock_timeout=LTI_STUDENT_CONTEXT_CACHE_LOCK_TIMEOUT,
+        )
 
     # pylint: disable=unused-argument
     def post(self, request, *args, **kwargs):
@@ -89,4 +203,7 @@ class VideoLTIView(TemplateResponseMixin, View):
             generated from applying the data to the template
 
         """
-        return self.render_to_response(self.get_context_data())
+        response = self.render_to_response(self.get_context_data())
+        # Render the template now rather than in the handler so that it can be timed
+        with timer("render"):
+            return response.render()
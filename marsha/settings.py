@@ -65,6 +65,22 @@ class Base(Configuration):
         }
     }
 
+    # The default cache is local to each process. The LTI passport cache needs a cache shared
+    # by all the processes serving requests (e.g. memcached) to be invalidated everywhere, and
+    # the student context cache to be rebuilt by one process at a time.
+    CACHES = {
+        "default": {
+            "BACKEND": values.Value(
+                "django.core.cache.backends.locmem.LocMemCache",
+                environ_name="CACHE_BACKEND",
+                environ_prefix=None,
+            ),
+            "LOCATION": values.Value(
+                "", environ_name="CACHE_LOCATION", environ_prefix=None
+            ),
+        }
+    }
+
     ALLOWED_HOSTS = []
 
     # Application definition
@@ -82,6 +98,7 @@ class Base(Configuration):
     ]
 
     MIDDLEWARE = [
+        "marsha.core.middleware.ServerTimingMiddleware",
         "django.middleware.security.SecurityMiddleware",
         "django.contrib.sessions.middleware.SessionMiddleware",
         "django.middleware.common.CommonMiddleware",
@@ -116,7 +133,11 @@ class Base(Configuration):
     REST_FRAMEWORK = {
         "DEFAULT_AUTHENTICATION_CLASSES": (
             "rest_framework_simplejwt.authentication.JWTTokenUserAuthentication",
-        )
+        ),
+        # The version is requested in the "Accept" header e.g. "application/json; version=2.0"
+        "DEFAULT_VERSIONING_CLASS": "rest_framework.versioning.AcceptHeaderVersioning",
+        "DEFAULT_VERSION": "1.0",
+        "ALLOWED_VERSIONS": ("1.0", "2.0"),
     }
 
     # Password validation
@@ -155,11 +176,31 @@ class Base(Configuration):
     # Cloud Front key pair for signed urls
     CLOUDFRONT_URL = values.SecretValue()
     CLOUDFRONT_ACCESS_KEY_ID = values.Value(None)
+    # The id of a key pair is read from the file next to its private key suffixed with ".id"
+    # if it exists, so that both can be rotated together without restarting
     CLOUDFRONT_PRIVATE_KEY_PATH = values.Value(
         os.path.join(BASE_DIR, "..", ".ssh", "cloudfront_private_key")
     )
+    # Paths of the private keys of other key pairs still active during a rotation, by id
+    CLOUDFRONT_PRIVATE_KEY_PATHS = values.DictValue({})
     CLOUDFRONT_SIGNED_URLS_ACTIVE = True
     CLOUDFRONT_SIGNED_URLS_VALIDITY = 2 * 60 * 60  # 2 hours
+    # Expirations are rounded down to this duration so that signatures can be cached
+    CLOUDFRONT_SIGNED_URLS_BUCKET = 10 * 60  # 10 minutes
+    # "custom" signs all the files of a video at once with a wildcard policy,
+    # "canned" signs each url separately
+    CLOUDFRONT_SIGNED_URLS_POLICY = values.Value("custom")
+
+    # Cache LTI passports resolved when verifying LTI launch requests. Only activate it with
+    # a shared cache backend: with a cache local to each process, the other processes keep
+    # accepting a disabled or deleted passport until their cached entry expires.
+    LTI_PASSPORT_CACHE_ACTIVE = values.BooleanValue(False)
+    # Cache the context rendered for students by LTI launch requests. Its rebuilds are only
+    # serialized across processes with a shared cache backend, see CACHES.
+    LTI_STUDENT_CACHE_ACTIVE = True
+    # Send the timings of SQL queries and of the phases of each request in a Server-Timing
+    # header and log them. They reveal details of the backend so this is off by default.
+    SERVER_TIMING_ACTIVE = values.BooleanValue(False)
 
     # pylint: disable=invalid-name
     @property
@@ -196,3 +237,6 @@ class Test(Base):
     AWS_SOURCE_BUCKET_NAME = "test-marsha-source"
 
     CLOUDFRONT_SIGNED_URLS_ACTIVE = False
+    LTI_PASSPORT_CACHE_ACTIVE = False
+    LTI_STUDENT_CACHE_ACTIVE = False
+    SERVER_TIMING_ACTIVE = False
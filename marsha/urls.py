@@ -5,11 +5,12 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from marsha.core.admin import admin_site
-from marsha.core.api import VideoViewSet
+from marsha.core.api import PlaylistViewSet, VideoViewSet
 from marsha.core.views import VideoLTIView
 
 
 router = DefaultRouter()
+router.register(r"playlists", PlaylistViewSet, base_name="playlist")
 router.register(r"videos", VideoViewSet, base_name="video")
 
 urlpatterns = [
@@ -3,6 +3,14 @@ resource "aws_s3_bucket" "marsha_source" {
   bucket = "${terraform.workspace}-marsha-source"
   acl    = "private"
 
+  # Delete the parts of multipart uploads that were neither completed nor aborted
+  lifecycle_rule {
+    id      = "abort-incomplete-multipart-uploads"
+    enabled = true
+
+    abort_incomplete_multipart_upload_days = 7
+  }
+
   tags {
     Name        = "marsha-source"
     Environment = "${terraform.workspace}"
@@ -48,7 +48,7 @@ describe('Media Convert', () => {
     lambda
       .MediaConvertPresets(event)
       .then(data => {
-        expect(data).to.deep.equal({ Presets: Array.from(Array(11).keys()) });
+        expect(data).to.deep.equal({ Presets: Array.from(Array(16).keys()) });
         done();
       })
       .catch(err => done(err));
@@ -75,7 +75,7 @@ describe('Media Convert', () => {
     lambda
       .MediaConvertPresets(event)
       .then(data => {
-        expect(data).to.deep.equal({ Presets: Array.from(Array(11).keys()) });
+        expect(data).to.deep.equal({ Presets: Array.from(Array(16).keys()) });
         done();
       })
       .catch(err => done(err));
@@ -81,6 +81,57 @@ exports.handler = (event, context, callback) => {
             },
           ],
         },
+        {
+          CustomName: 'Video HLS outputs',
+          Name: 'Apple HLS',
+          OutputGroupSettings: {
+            Type: 'HLS_GROUP_SETTINGS',
+            HlsGroupSettings: {
+              // The master playlist is written to "{stamp}.m3u8" and each rendition
+              // to "{stamp}_{resolution}.m3u8" along with its segments
+              Destination:
+                's3://' +
+                process.env.S3_DESTINATION_BUCKET +
+                '/' +
+                objectKey.replace('/videos/', '/hls/'),
+              ManifestDurationFormat: 'INTEGER',
+              SegmentLength: 6,
+              MinSegmentLength: 0,
+              SegmentControl: 'SEGMENTED_FILES',
+              OutputSelection: 'MANIFESTS_AND_SEGMENTS',
+              DirectoryStructure: 'SINGLE_DIRECTORY',
+              ManifestCompression: 'NONE',
+              ClientCache: 'ENABLED',
+              CodecSpecification: 'RFC_4281',
+              StreamInfResolution: 'INCLUDE',
+              ProgramDateTime: 'EXCLUDE',
+              TimedMetadataId3Frame: 'NONE',
+              CaptionLanguageSetting: 'OMIT',
+            },
+          },
+          Outputs: [
+            {
+              Preset: process.env.ENV_TYPE + '_marsha_video_hls_144',
+              NameModifier: '_144',
+            },
+            {
+              Preset: process.env.ENV_TYPE + '_marsha_video_hls_240',
+              NameModifier: '_240',
+            },
+            {
+              Preset: process.env.ENV_TYPE + '_marsha_video_hls_480',
+              NameModifier: '_480',
+            },
+            {
+              Preset: process.env.ENV_TYPE + '_marsha_video_hls_720',
+              NameModifier: '_720',
+            },
+            {
+              Preset: process.env.ENV_TYPE + '_marsha_video_hls_1080',
+              NameModifier: '_1080',
+            },
+          ],
+        },
         {
           CustomName: 'Thumbnails outputs',
           Name: 'File Group',